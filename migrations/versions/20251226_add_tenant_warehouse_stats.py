@@ -0,0 +1,71 @@
+"""
+Migration: Add tenant_warehouse_stats rollup table
+
+Revision ID: 20251226_warehouse_stats
+Created: 2025-12-26
+Description:
+    - Add tenant_warehouse_stats (stock, orders, product count, turnover
+      per tenant and warehouse), refreshed at the end of each sync
+    - Merge the two 2025-12-25 heads
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Revision identifiers
+revision = '20251226_warehouse_stats'
+down_revision = ('20251225_critical_improvements', '20251225_unify_subscriptions')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create tenant_warehouse_stats and backfill it from products."""
+    op.create_table(
+        'tenant_warehouse_stats',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('warehouse_name', sa.String(255), nullable=False),
+        sa.Column('total_stock', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('product_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('turnover_days', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id', 'warehouse_name')
+    )
+    op.create_index(
+        'ix_tenant_warehouse_stats_tenant_stock',
+        'tenant_warehouse_stats',
+        ['tenant_id', 'total_stock']
+    )
+    
+    # Backfill from existing products
+    op.execute("""
+        INSERT INTO tenant_warehouse_stats
+            (tenant_id, warehouse_name, total_stock, total_orders, product_count, turnover_days, updated_at)
+        SELECT
+            p.tenant_id,
+            wh.value ->> 'name',
+            SUM(COALESCE((wh.value ->> 'stock')::int, 0)),
+            SUM(COALESCE((wh.value ->> 'orders')::int, 0)),
+            COUNT(DISTINCT p.id),
+            CASE WHEN SUM(COALESCE((wh.value ->> 'orders')::int, 0)) > 0
+                 THEN ROUND(SUM(COALESCE((wh.value ->> 'stock')::int, 0)) * 7.0
+                            / SUM(COALESCE((wh.value ->> 'orders')::int, 0)), 1)
+                 ELSE 0 END,
+            now()
+        FROM products p
+        JOIN jsonb_array_elements(p.warehouse_data -> 'warehouses') AS wh ON true
+        WHERE jsonb_typeof(p.warehouse_data -> 'warehouses') = 'array'
+          AND wh.value ->> 'name' IS NOT NULL
+        GROUP BY p.tenant_id, wh.value ->> 'name';
+    """)
+    
+    print("✓ Created tenant_warehouse_stats")
+
+
+def downgrade():
+    """Drop tenant_warehouse_stats."""
+    op.drop_index('ix_tenant_warehouse_stats_tenant_stock', table_name='tenant_warehouse_stats')
+    op.drop_table('tenant_warehouse_stats')
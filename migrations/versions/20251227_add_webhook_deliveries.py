@@ -0,0 +1,60 @@
+"""
+Migration: Add webhook_deliveries outbox table
+
+Revision ID: 20251227_webhook_deliveries
+Created: 2025-12-27
+Description:
+    - Add webhook_deliveries (pending/delivered/failed deliveries with
+      attempt counter and next attempt time), sent by the deliver_webhooks task
+    - Partial index on next_attempt_at for pending rows
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Revision identifiers
+revision = '20251227_webhook_deliveries'
+down_revision = '20251226_warehouse_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create webhook_deliveries."""
+    op.create_table(
+        'webhook_deliveries',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('webhook_config_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_type', sa.String(100), nullable=False),
+        sa.Column('data', postgresql.JSONB(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_status_code', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['webhook_config_id'], ['webhook_configs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_webhook_deliveries_tenant_id', 'webhook_deliveries', ['tenant_id'])
+    op.create_index('ix_webhook_deliveries_webhook_config_id', 'webhook_deliveries', ['webhook_config_id'])
+    op.create_index(
+        'ix_webhook_deliveries_due',
+        'webhook_deliveries',
+        ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    
+    print("✓ Created webhook_deliveries")
+
+
+def downgrade():
+    """Drop webhook_deliveries."""
+    op.drop_index('ix_webhook_deliveries_due', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_webhook_config_id', table_name='webhook_deliveries')
+    op.drop_index('ix_webhook_deliveries_tenant_id', table_name='webhook_deliveries')
+    op.drop_table('webhook_deliveries')
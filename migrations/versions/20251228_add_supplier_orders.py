@@ -0,0 +1,68 @@
+"""
+Migration: Add incremental supplier orders store
+
+Revision ID: 20251228_supplier_orders
+Created: 2025-12-28
+Description:
+    - Add supplier_orders (latest version of each supplier/orders record
+      per tenant, keyed on srid, raw record in JSONB)
+    - Add supplier_order_cursors (lastChangeDate cursor per tenant)
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Revision identifiers
+revision = '20251228_supplier_orders'
+down_revision = '20251227_webhook_deliveries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create supplier_orders and supplier_order_cursors."""
+    op.create_table(
+        'supplier_orders',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('srid', sa.String(255), nullable=False),
+        sa.Column('nm_id', sa.Integer(), nullable=True),
+        sa.Column('supplier_article', sa.String(255), nullable=True),
+        sa.Column('warehouse_name', sa.String(255), nullable=True),
+        sa.Column('warehouse_type', sa.String(100), nullable=True),
+        sa.Column('is_cancel', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('order_date', sa.DateTime(), nullable=True),
+        sa.Column('last_change_date', sa.DateTime(), nullable=False),
+        sa.Column('data', postgresql.JSONB(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id', 'srid')
+    )
+    op.create_index(
+        'ix_supplier_orders_tenant_last_change',
+        'supplier_orders',
+        ['tenant_id', 'last_change_date']
+    )
+    op.create_index(
+        'ix_supplier_orders_tenant_date',
+        'supplier_orders',
+        ['tenant_id', 'order_date']
+    )
+    
+    op.create_table(
+        'supplier_order_cursors',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('last_change_date', sa.DateTime(), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id')
+    )
+    
+    print("✓ Created supplier_orders and supplier_order_cursors")
+
+
+def downgrade():
+    """Drop supplier_orders and supplier_order_cursors."""
+    op.drop_table('supplier_order_cursors')
+    op.drop_index('ix_supplier_orders_tenant_date', table_name='supplier_orders')
+    op.drop_index('ix_supplier_orders_tenant_last_change', table_name='supplier_orders')
+    op.drop_table('supplier_orders')
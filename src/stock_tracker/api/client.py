@@ -13,29 +13,189 @@ CRITICAL: Uses Analytics API v2 endpoints with required parameters:
 """
 
 import asyncio
+import hashlib
+import json
 import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 from urllib.parse import urljoin
 
+import httpx
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from stock_tracker.cache import get_cache
 from stock_tracker.utils.logger import get_logger
 from stock_tracker.utils.config import get_config
+from stock_tracker.utils.distributed_rate_limit import api_key_id
 from stock_tracker.utils.exceptions import (
-    WildberriesAPIError, RateLimitError, TaskTimeoutError, 
+    APIError, WildberriesAPIError, RateLimitError, TaskTimeoutError, 
     AuthenticationError, handle_api_error
 )
 from stock_tracker.utils.retry import retry_with_backoff, RetryConfig
 from stock_tracker.utils.rate_limiting import (
     rate_limited, get_rate_limiter, configure_wildberries_rate_limits
 )
+from stock_tracker.utils.json_stream import aiter_json_array
 
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+
+# Hosts that get their own keep-alive connection pool in the async transport
+WB_API_HOSTS = (
+    "https://seller-analytics-api.wildberries.ru",
+    "https://statistics-api.wildberries.ru",
+)
+
+# Default async pool sizing per host (overridden by config.max_concurrent_requests)
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+# Analytics API v2 products page size (API maximum)
+PRODUCT_STOCK_PAGE_LIMIT = 1000
+
+# How long an interrupted full-catalog fetch can be resumed
+PRODUCT_STOCK_CHECKPOINT_TTL = 3600
+
+
+async def _close_when_cancelled(session: httpx.AsyncClient) -> None:
+    """Keep async session open until cancelled, then close it on its own loop."""
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await session.aclose()
+
+
+class RemainsTaskTimings:
+    """
+    Learns how long warehouse remains tasks take to become downloadable.
+    
+    Completion times (task creation -> successful download) of recent tasks
+    drive the polling schedule: the first download attempt is made just
+    before the typical completion time and later attempts are aimed at the
+    slow tail instead of a fixed 60s wait plus 30/60/90s backoff.
+    """
+    
+    DEFAULT_FIRST_POLL = 60.0  # Cold start: no history yet
+    MIN_POLL_INTERVAL = 10.0
+    MAX_POLL_INTERVAL = 90.0
+    
+    def __init__(self, history_size: int = 20):
+        self._durations: deque = deque(maxlen=history_size)
+    
+    def record(self, duration: float) -> None:
+        """Record completion time of a task in seconds."""
+        self._durations.append(duration)
+    
+    def _quantile(self, q: float) -> float:
+        ordered = sorted(self._durations)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    def first_poll_delay(self) -> float:
+        """Delay between task creation and the first download attempt."""
+        if not self._durations:
+            return self.DEFAULT_FIRST_POLL
+        return max(self.MIN_POLL_INTERVAL, 0.9 * self._quantile(0.5))
+    
+    def next_poll_interval(self, elapsed: float, attempt: int) -> float:
+        """
+        Delay before the next download attempt.
+        
+        Args:
+            elapsed: Seconds since task creation
+            attempt: Number of failed attempts so far (1-based)
+        """
+        backoff = min(30.0 * attempt, self.MAX_POLL_INTERVAL)  # 30 -> 60 -> 90
+        if not self._durations:
+            return backoff
+        
+        remaining = self._quantile(0.9) - elapsed
+        if remaining >= self.MIN_POLL_INTERVAL:
+            return min(remaining, self.MAX_POLL_INTERVAL)
+        return max(self.MIN_POLL_INTERVAL, backoff / 2)
+
+
+# Shared across clients: task latency is a property of WB, not of the tenant
+remains_task_timings = RemainsTaskTimings()
+
+
+class PaginationCheckpoint:
+    """
+    Resumable progress of an offset-paginated fetch, kept in the cache.
+    
+    Every completed page is stored under its offset together with the next
+    offset, so a fetch interrupted by a timeout, 429 or worker restart
+    continues where it stopped instead of starting over. Without Redis
+    (NoOpCache) nothing is stored and fetches always start at offset 0.
+    """
+    
+    def __init__(self, cache, scope: str, name: str, ttl: int = PRODUCT_STOCK_CHECKPOINT_TTL):
+        """
+        Initialize checkpoint.
+        
+        Args:
+            cache: Cache instance (RedisCache, TieredCache or NoOpCache)
+            scope: Cache namespace (hash of the API key)
+            name: Fetch identity (endpoint, filters and period)
+            ttl: Lifetime of stored progress in seconds
+        """
+        self.cache = cache
+        self.scope = scope
+        self.name = name
+        self.ttl = ttl
+    
+    def _page_key(self, offset: int) -> str:
+        return f"{self.name}:page:{offset}"
+    
+    def load(self, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Restore progress of a previous run with the same page size.
+        
+        Returns:
+            (next offset, items fetched so far); (0, []) if there is nothing
+            to resume or a stored page has expired
+        """
+        progress = self.cache.get(self.scope, f"{self.name}:progress")
+        if not progress or progress.get("limit") != limit:
+            return 0, []
+        
+        keys = [self._page_key(offset) for offset in range(0, progress["offset"], limit)]
+        pages = self.cache.get_many(self.scope, keys)
+        if len(pages) < len(keys):
+            return 0, []
+        
+        items = []
+        for key in keys:
+            items.extend(pages[key])
+        return progress["offset"], items
+    
+    def save(self, offset: int, limit: int, items: List[Dict[str, Any]]) -> None:
+        """Store a full page fetched at offset; the next run starts after it."""
+        self.cache.set(self.scope, self._page_key(offset), items, ttl=self.ttl)
+        self.cache.set(self.scope, f"{self.name}:progress",
+                       {"offset": offset + limit, "limit": limit}, ttl=self.ttl)
+    
+    def clear(self) -> None:
+        """
+        Drop stored progress after the fetch completed.
+        
+        Page keys are derived from the stored progress and deleted directly,
+        so the shared keyspace is never scanned.
+        """
+        progress_key = f"{self.name}:progress"
+        keys = [progress_key]
+        progress = self.cache.get(self.scope, progress_key)
+        if progress and progress.get("limit"):
+            keys.extend(
+                self._page_key(offset) for offset in range(0, progress["offset"], progress["limit"])
+            )
+        self.cache.delete_many(self.scope, keys)
+
 
 class WildberriesAPIClient:
     """
@@ -66,6 +226,7 @@ class WildberriesAPIClient:
             self.timeout = 30
             self.max_retries = 3
             self.retry_delay = 1
+            self.max_connections_per_host = DEFAULT_MAX_CONNECTIONS_PER_HOST
             self.config = None
         else:
             # Legacy mode: load from config
@@ -75,6 +236,7 @@ class WildberriesAPIClient:
             self.timeout = self.config.wildberries.timeout
             self.max_retries = self.config.wildberries.retry_count
             self.retry_delay = self.config.wildberries.retry_delay
+            self.max_connections_per_host = self.config.wildberries.max_concurrent_requests
         
         # Analytics API v2 has stricter rate limits: 3 requests/minute, 20 second intervals  
         rate_limit_config = configure_wildberries_rate_limits()
@@ -96,11 +258,17 @@ class WildberriesAPIClient:
         self.session.mount("https://", adapter)
         
         # Set headers for Analytics API v2
-        self.session.headers.update({
+        self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "User-Agent": "StockTracker/2.0"
-        })
+        }
+        self.session.headers.update(self.headers)
+        
+        # Async transport is created lazily: httpx pools are bound to the event loop
+        self._async_session: Optional[httpx.AsyncClient] = None
+        self._async_session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_session_guard: Optional[asyncio.Task] = None
         
         logger.info("Initialized Wildberries Analytics API v2 client")
         logger.debug(f"Analytics Base URL: {self.base_url}")
@@ -142,6 +310,168 @@ class WildberriesAPIClient:
         except requests.exceptions.RequestException as e:
             raise WildberriesAPIError(f"Request failed: {e}", endpoint=url)
     
+    def _create_async_session(self) -> httpx.AsyncClient:
+        """
+        Create pooled keep-alive async HTTP client.
+        
+        Each Wildberries host gets a separate transport so connection limits
+        apply per host (analytics polling cannot starve the statistics API).
+        
+        Returns:
+            Configured httpx.AsyncClient
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_connections_per_host,
+            max_keepalive_connections=self.max_connections_per_host,
+            keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY
+        )
+        
+        hosts = set(WB_API_HOSTS)
+        hosts.add(self.base_url.rstrip("/"))
+        mounts = {
+            host: httpx.AsyncHTTPTransport(limits=limits, retries=2)
+            for host in hosts
+        }
+        
+        return httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=limits,
+            mounts=mounts
+        )
+    
+    def _get_async_session(self) -> httpx.AsyncClient:
+        """
+        Get async HTTP client bound to the running event loop.
+        
+        Sync callers (Celery tasks, CLI) spin up a fresh loop per run, so the
+        client is recreated whenever the running loop changes. Each client is
+        paired with a guard task: asyncio.run() cancels leftover tasks before
+        closing its loop, so the pool is closed on its own loop even when the
+        caller never awaits aclose().
+        
+        Returns:
+            httpx.AsyncClient for the current event loop
+        """
+        loop = asyncio.get_running_loop()
+        
+        if self._async_session is None or self._async_session_loop is not loop:
+            if self._async_session is not None:
+                self._release_stale_session()
+            session = self._create_async_session()
+            self._async_session = session
+            self._async_session_loop = loop
+            self._async_session_guard = loop.create_task(_close_when_cancelled(session))
+            logger.debug(f"Created async HTTP session "
+                        f"({self.max_connections_per_host} connections per host)")
+        
+        return self._async_session
+    
+    def _release_stale_session(self) -> None:
+        """Close async HTTP session bound to a previous event loop."""
+        session, session_loop = self._async_session, self._async_session_loop
+        guard = self._async_session_guard
+        self._async_session = None
+        self._async_session_loop = None
+        self._async_session_guard = None
+        
+        if session_loop.is_closed():
+            if not session.is_closed:
+                logger.warning("Event loop closed without aclose(), dropping its async HTTP session")
+        elif session_loop.is_running():
+            # Loop of another thread: close there
+            session_loop.call_soon_threadsafe(guard.cancel)
+        else:
+            # Idle loop: the session is closed when that loop runs again
+            guard.cancel()
+        logger.debug("Event loop changed, released previous async HTTP session")
+    
+    async def _make_async_request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Make non-blocking HTTP request with error handling.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Additional request parameters (params, json, timeout)
+            
+        Returns:
+            Response object
+            
+        Raises:
+            WildberriesAPIError: If request fails
+        """
+        try:
+            kwargs.setdefault('timeout', self.timeout)
+            
+            logger.debug(f"Making async {method} request to {url}")
+            
+            response = await self._get_async_session().request(method, url, **kwargs)
+            
+            # Handle non-success status codes
+            if not response.is_success:
+                handle_api_error(response, url)
+            
+            return response
+            
+        except httpx.TimeoutException:
+            raise WildberriesAPIError(f"Request timeout after {self.timeout}s", endpoint=url)
+        except httpx.TransportError:
+            raise WildberriesAPIError(f"Connection failed to {url}", endpoint=url)
+        except httpx.HTTPError as e:
+            raise WildberriesAPIError(f"Request failed: {e}", endpoint=url)
+    
+    async def _stream_json_array(self, method: str, url: str, **kwargs) -> AsyncIterator[Any]:
+        """
+        Make non-blocking HTTP request and yield elements of its JSON array body.
+        
+        Elements are parsed while the body is received, so memory use does
+        not grow with the response size.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Additional request parameters (params, json, timeout)
+            
+        Yields:
+            Array elements in response order
+            
+        Raises:
+            WildberriesAPIError: If request fails or the body is not a JSON array
+        """
+        try:
+            kwargs.setdefault('timeout', self.timeout)
+            
+            logger.debug(f"Making async streamed {method} request to {url}")
+            
+            async with self._get_async_session().stream(method, url, **kwargs) as response:
+                if not response.is_success:
+                    await response.aread()
+                    handle_api_error(response, url)
+                
+                async for item in aiter_json_array(response.aiter_bytes()):
+                    yield item
+                    
+        except (WildberriesAPIError, RateLimitError):
+            raise
+        except APIError as e:
+            # Same error type as _make_async_request callers wrap into, so
+            # the remains poll loop sees a 404 "not ready" reply
+            raise WildberriesAPIError(
+                f"Request failed: {e}",
+                endpoint=url,
+                status_code=e.status_code,
+                response_data=e.response_data
+            )
+        except ValueError as e:
+            raise WildberriesAPIError(f"Invalid response: expected JSON array ({e})", endpoint=url)
+        except httpx.TimeoutException:
+            raise WildberriesAPIError(f"Request timeout after {self.timeout}s", endpoint=url)
+        except httpx.TransportError:
+            raise WildberriesAPIError(f"Connection failed to {url}", endpoint=url)
+        except httpx.HTTPError as e:
+            raise WildberriesAPIError(f"Request failed: {e}", endpoint=url)
+    
     def _get_last_week_period(self) -> Dict[str, str]:
         """
         Get period for last 7 days in required format.
@@ -228,7 +558,7 @@ class WildberriesAPIClient:
         logger.debug(f"Request body: {request_body}")
         
         try:
-            response = self._make_request("POST", url, json=request_body)
+            response = await self._make_async_request("POST", url, json=request_body)
             
             # Record response for rate limiter  
             self.rate_limiter.record_response(response.status_code, dict(response.headers))
@@ -254,49 +584,58 @@ class WildberriesAPIClient:
                 raise
             raise WildberriesAPIError(f"Failed to get product stock data: {e}", endpoint=url)
     
-    async def get_all_product_stock_data(self, **kwargs) -> List[Dict[str, Any]]:
+    def _product_stock_checkpoint(self, filters: Dict[str, Any]) -> PaginationCheckpoint:
+        """Checkpoint of a full-catalog fetch with these filters in the current period."""
+        identity = json.dumps(
+            {"filters": filters, "period": self._get_last_week_period()},
+            sort_keys=True, default=str
+        )
+        digest = hashlib.sha256(identity.encode()).hexdigest()[:16]
+        return PaginationCheckpoint(get_cache(), api_key_id(self.api_key), f"wb:stocks-report:{digest}")
+    
+    async def get_all_product_stock_data(self, resume: bool = True, **kwargs) -> List[Dict[str, Any]]:
         """
         Get all product stock data with pagination.
         
-        This method handles pagination automatically to retrieve all available data.
+        Pages of PRODUCT_STOCK_PAGE_LIMIT products are requested as fast as the
+        rate limiter allows (3 req/min per API key for Analytics API v2),
+        instead of small pages with a fixed 20 second pause. Completed pages
+        are checkpointed, so an interrupted fetch resumes at the last offset.
         
         Args:
+            resume: Continue a previously interrupted fetch with the same filters
             **kwargs: Arguments passed to get_product_stock_data
             
         Returns:
             List of all product stock records
         """
-        all_items = []
-        offset = 0
-        limit = kwargs.get("limit", 100)
+        kwargs.pop("offset", None)
+        limit = min(kwargs.pop("limit", PRODUCT_STOCK_PAGE_LIMIT), PRODUCT_STOCK_PAGE_LIMIT)
         
-        logger.info("Starting paginated retrieval of all product stock data")
+        checkpoint = self._product_stock_checkpoint(kwargs)
+        offset, all_items = checkpoint.load(limit) if resume else (0, [])
+        
+        if offset:
+            logger.info(f"Resuming paginated retrieval of product stock data at offset {offset} "
+                        f"({len(all_items)} records from checkpoint)")
+        else:
+            logger.info("Starting paginated retrieval of all product stock data")
         
         while True:
-            # Update offset in kwargs
-            kwargs_with_offset = {**kwargs, "offset": offset, "limit": limit}
-            
-            # Get current page
-            response = await self.get_product_stock_data(**kwargs_with_offset)
+            # Pacing is done by the rate limiter of get_product_stock_data
+            response = await self.get_product_stock_data(**kwargs, offset=offset, limit=limit)
             items = response["data"].get("items", [])
-            
-            if not items:
-                # No more data
-                break
-                
             all_items.extend(items)
             logger.debug(f"Retrieved page at offset {offset}, got {len(items)} items")
             
             # Check if we got fewer items than requested (last page)
             if len(items) < limit:
                 break
-                
-            # Move to next page
-            offset += limit
             
-            # Respect rate limiting between requests
-            await asyncio.sleep(20)  # 20 second intervals for v2 API
+            checkpoint.save(offset, limit, items)
+            offset += limit
         
+        checkpoint.clear()
         logger.info(f"Retrieved total of {len(all_items)} product stock records")
         return all_items
 
@@ -336,7 +675,7 @@ class WildberriesAPIClient:
         logger.debug(f"Task parameters: {task_params}")
         
         try:
-            response = self._make_request("GET", url, params=task_params)
+            response = await self._make_async_request("GET", url, params=task_params)
             
             # Record response for rate limiter
             self.rate_limiter.record_response(response.status_code, dict(response.headers))
@@ -385,7 +724,7 @@ class WildberriesAPIClient:
         logger.info(f"Downloading warehouse remains data for task: {task_id}")
         
         try:
-            response = self._make_request("GET", url)
+            response = await self._make_async_request("GET", url)
             
             # Record response for rate limiter
             self.rate_limiter.record_response(response.status_code, dict(response.headers))
@@ -408,13 +747,39 @@ class WildberriesAPIClient:
                 raise
             raise WildberriesAPIError(f"Failed to download warehouse remains: {e}", endpoint=url)
 
+    @rate_limited("/api/v1/warehouse_remains/tasks", priority=2)
+    async def iter_warehouse_remains(self, task_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream warehouse remains records of a task as they are downloaded.
+        
+        Streaming counterpart of download_warehouse_remains for large
+        reports. Not retried automatically: a failed stream may already
+        have yielded records.
+        
+        Args:
+            task_id: Task ID from create_warehouse_remains_task
+            
+        Yields:
+            Warehouse remains records
+            
+        Raises:
+            WildberriesAPIError: If download fails
+        """
+        url = f"https://seller-analytics-api.wildberries.ru/api/v1/warehouse_remains/tasks/{task_id}/download"
+        
+        logger.info(f"Streaming warehouse remains data for task: {task_id}")
+        
+        async for item in self._stream_json_array("GET", url):
+            yield item
+    
     async def get_warehouse_remains_with_retry(self, max_wait_time: int = 900, **params) -> List[Dict[str, Any]]:
         """
         Get warehouse remains data with automatic task creation and polling.
         
-        Implements proper timing according to WAREHOUSE_IMPROVEMENT_PROMPT.md:
-        - Mandatory 60 second wait after task creation
-        - 30-90 second polling intervals with exponential backoff
+        Polling follows RemainsTaskTimings:
+        - 60 second wait before the first attempt until completion times are known,
+          then just under the median observed completion time
+        - Further attempts aimed at the 90th percentile, 30-90 second backoff after it
         - 15 minute maximum wait time
         - Proper interpretation of 404 as "task still processing"
         
@@ -428,40 +793,120 @@ class WildberriesAPIClient:
         Raises:
             WildberriesAPIError: If task fails or times out
         """
-        logger.info("Starting warehouse remains data retrieval with improved task polling")
+        logger.info("Starting warehouse remains data retrieval with adaptive task polling")
+        
+        task_id = await self.create_warehouse_remains_task(**params)
+        return await self.wait_for_warehouse_remains(task_id, max_wait_time=max_wait_time)
+    
+    async def wait_for_warehouse_remains(
+        self,
+        task_id: str,
+        max_wait_time: int = 900,
+        created_at: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Poll a created warehouse remains task until its report can be downloaded.
+        
+        Args:
+            task_id: Task ID from create_warehouse_remains_task
+            max_wait_time: Maximum time to wait for task completion in seconds
+            created_at: time.monotonic() of task creation (default: now)
+            
+        Returns:
+            List of warehouse remains records
+            
+        Raises:
+            TaskTimeoutError: If the task is not ready within max_wait_time
+            WildberriesAPIError: On non-retriable download errors
+        """
+        data = await self._poll_warehouse_remains(
+            task_id, lambda: self.download_warehouse_remains(task_id), max_wait_time, created_at
+        )
+        logger.info(f"✅ Successfully retrieved warehouse remains data: {len(data)} records")
+        return data
+    
+    async def stream_warehouse_remains_with_retry(
+        self,
+        consumer: Callable[[Dict[str, Any]], None],
+        max_wait_time: int = 900,
+        **params
+    ) -> int:
+        """
+        Create a warehouse remains task and stream its records into consumer.
+        
+        Same polling as get_warehouse_remains_with_retry, but records are
+        handed over as they are parsed instead of being collected in a list.
+        
+        Args:
+            consumer: Called once per record
+            max_wait_time: Maximum time to wait for task completion in seconds
+            **params: Parameters for warehouse remains task
+            
+        Returns:
+            Number of records consumed
+            
+        Raises:
+            TaskTimeoutError: If the task is not ready within max_wait_time
+            WildberriesAPIError: If task creation or download fails
+        """
+        logger.info("Starting streamed warehouse remains retrieval with adaptive task polling")
         
-        # Create task
         task_id = await self.create_warehouse_remains_task(**params)
         
-        # CRITICAL: Mandatory 60 second wait for WB to process the task
-        logger.info(f"Task {task_id} created, waiting 60s for WB processing...")
-        await asyncio.sleep(60)
+        async def consume() -> int:
+            count = 0
+            async for item in self.iter_warehouse_remains(task_id):
+                consumer(item)
+                count += 1
+            return count
         
-        # Start polling with proper intervals
-        start_time = time.time()
-        poll_interval = 30  # Start with 30 seconds
+        count = await self._poll_warehouse_remains(task_id, consume, max_wait_time)
+        logger.info(f"✅ Successfully streamed warehouse remains data: {count} records")
+        return count
+    
+    async def _poll_warehouse_remains(
+        self,
+        task_id: str,
+        download: Callable[[], Awaitable[T]],
+        max_wait_time: int,
+        created_at: Optional[float] = None
+    ) -> T:
+        """
+        Retry download() until the task is ready, following RemainsTaskTimings.
         
-        while time.time() - start_time < max_wait_time:
+        "Not ready" errors (404) are raised before the body is read, so a
+        streaming download() has consumed nothing when it is retried.
+        """
+        if created_at is None:
+            created_at = time.monotonic()
+        
+        first_delay = remains_task_timings.first_poll_delay()
+        logger.info(f"Task {task_id} created, waiting {first_delay:.0f}s for WB processing...")
+        await asyncio.sleep(max(0.0, first_delay - (time.monotonic() - created_at)))
+        
+        attempt = 0
+        
+        while time.monotonic() - created_at < max_wait_time:
             try:
                 # Try to download data
-                data = await self.download_warehouse_remains(task_id)
-                logger.info(f"✅ Successfully retrieved warehouse remains data: {len(data)} records")
-                return data
+                result = await download()
+                remains_task_timings.record(time.monotonic() - created_at)
+                return result
                 
             except WildberriesAPIError as e:
                 # Check if task is not ready (404 means still processing on WB side)
                 error_message = str(e).lower()
-                if ("404" in error_message or 
+                if (e.status_code == 404 or
+                    "404" in error_message or 
                     "not found" in error_message or 
                     "not ready" in error_message or 
                     "processing" in error_message):
                     
-                    elapsed = time.time() - start_time
-                    logger.info(f"Task {task_id} still processing... waiting {poll_interval}s (elapsed: {elapsed:.1f}s)")
+                    attempt += 1
+                    elapsed = time.monotonic() - created_at
+                    poll_interval = remains_task_timings.next_poll_interval(elapsed, attempt)
+                    logger.info(f"Task {task_id} still processing... waiting {poll_interval:.0f}s (elapsed: {elapsed:.1f}s)")
                     await asyncio.sleep(poll_interval)
-                    
-                    # Exponential backoff: increase poll interval gradually (30->60->90 seconds)
-                    poll_interval = min(poll_interval + 30, 90)
                     continue
                 else:
                     # Other error (authentication, rate limit, etc.), reraise
@@ -469,14 +914,14 @@ class WildberriesAPIClient:
                     raise
         
         # Task timed out
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - created_at
         raise TaskTimeoutError(
             f"Warehouse remains task {task_id} timed out after {elapsed:.1f} seconds (max: {max_wait_time}s)",
             endpoint="warehouse_remains_task",
             task_id=task_id
         )
     
-    @rate_limited("wildberries")
+    @rate_limited("/api/v1/supplier/orders")
     async def get_supplier_orders(self, date_from: str, flag: int = 0) -> List[Dict[str, Any]]:
         """
         Get supplier orders from statistics API v1.
@@ -502,7 +947,7 @@ class WildberriesAPIClient:
         logger.info(f"Fetching supplier orders from {date_from} (flag={flag})")
         
         try:
-            response = self._make_request("GET", url, params=params)
+            response = await self._make_async_request("GET", url, params=params)
             
             # Parse response
             data = response.json()
@@ -521,6 +966,33 @@ class WildberriesAPIClient:
                 raise
             raise WildberriesAPIError(f"Failed to get supplier orders: {e}", endpoint=url)
     
+    @rate_limited("/api/v1/supplier/orders")
+    async def iter_supplier_orders(self, date_from: str, flag: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream supplier orders from statistics API v1 as they are downloaded.
+        
+        Streaming counterpart of get_supplier_orders: a full page holds up
+        to ~80000 orders.
+        
+        Args:
+            date_from: Date in RFC3339 format
+            flag: 0 or 1
+            
+        Yields:
+            Order records
+        """
+        url = "https://statistics-api.wildberries.ru/api/v1/supplier/orders"
+        
+        params = {
+            "dateFrom": date_from,
+            "flag": flag
+        }
+        
+        logger.info(f"Streaming supplier orders from {date_from} (flag={flag})")
+        
+        async for item in self._stream_json_array("GET", url, params=params):
+            yield item
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test connection to Wildberries Analytics API v2.
@@ -554,6 +1026,7 @@ class WildberriesAPIClient:
                 return result
                 
             finally:
+                loop.run_until_complete(self.aclose())
                 loop.close()
             
         except Exception as e:
@@ -565,10 +1038,27 @@ class WildberriesAPIClient:
                 "base_url": self.base_url
             }
     
+    async def aclose(self) -> None:
+        """Close the async HTTP session (must run on the loop that created it)."""
+        if self._async_session is not None:
+            if not self._async_session_loop.is_closed():
+                await self._async_session.aclose()
+                guard = self._async_session_guard
+                if guard is not None and not guard.done():
+                    guard.cancel()
+                    await asyncio.gather(guard, return_exceptions=True)
+            self._async_session = None
+            self._async_session_loop = None
+            self._async_session_guard = None
+        logger.debug("Closed Wildberries API async session")
+    
     def close(self) -> None:
         """Close the HTTP session."""
         if self.session:
             self.session.close()
+        self._async_session = None
+        self._async_session_loop = None
+        self._async_session_guard = None
         logger.debug("Closed Wildberries API client")
 
 
@@ -26,6 +26,7 @@ from stock_tracker.api.routes import auth, tenants, products, health, analytics,
 from stock_tracker.api.middleware.tenant_context import TenantContextMiddleware
 from stock_tracker.api.middleware.error_handler import ErrorHandlerMiddleware
 from stock_tracker.api.middleware.rate_limiter import RateLimitMiddleware
+from stock_tracker.database.connection import dispose_async_engine
 from stock_tracker.monitoring import (
     MetricsMiddleware,
     setup_sentry,
@@ -59,6 +60,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown tasks
     logger.info("🛑 Shutting down Stock Tracker API...")
+    await dispose_async_engine()
 
 
 # Create FastAPI application
@@ -11,10 +11,13 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from jose import JWTError
 
 from stock_tracker.auth import verify_token
-from stock_tracker.database.connection import get_db
+from stock_tracker.auth.principal_cache import Principal, get_principal_cache
+from stock_tracker.database.connection import get_db, get_async_db
 from stock_tracker.database.models import Tenant, User
 from stock_tracker.utils.logger import get_logger
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 logger = get_logger(__name__)
 
@@ -51,40 +54,27 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
         token = auth_header.split(" ")[1]
         
         try:
-            # Verify JWT token
+            # Verify JWT token once; dependencies reuse request.state.principal
             payload = verify_token(token, token_type="access")
-            user_id = payload.get("sub")
-            tenant_id = payload.get("tenant_id")
+            principal = await self._resolve_principal(payload)
             
-            # Load tenant and user from database
-            # Note: This creates a new DB session per request
-            # In production, consider connection pooling
-            from stock_tracker.database.connection import SessionLocal
-            db = SessionLocal()
-            
-            try:
-                tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-                user = db.query(User).filter(User.id == user_id).first()
-                
-                if not tenant or not user:
-                    logger.warning(f"Tenant or user not found: tenant_id={tenant_id}, user_id={user_id}")
-                    db.close()
-                    return await call_next(request)
+            if principal is None:
+                logger.warning(
+                    f"Tenant or user not found: tenant_id={payload.get('tenant_id')}, "
+                    f"user_id={payload.get('sub')}"
+                )
+            else:
+                request.state.principal = principal
                 
                 # Check if tenant is active
-                if not tenant.is_active:
-                    logger.warning(f"Inactive tenant attempted access: {tenant_id}")
-                    db.close()
-                    return await call_next(request)
-                
-                # Set context variables
-                current_tenant_context.set(tenant)
-                current_user_context.set(user)
-                
-                logger.debug(f"Set tenant context: {tenant.name} ({tenant_id})")
-                
-            finally:
-                db.close()
+                if not principal.tenant["is_active"]:
+                    logger.warning(f"Inactive tenant attempted access: {principal.tenant_id}")
+                else:
+                    # Set context variables
+                    current_tenant_context.set(principal.to_tenant())
+                    current_user_context.set(principal.to_user())
+                    
+                    logger.debug(f"Set tenant context: {principal.tenant['name']} ({principal.tenant_id})")
             
         except JWTError as e:
             logger.warning(f"JWT verification failed: {e}")
@@ -94,65 +84,147 @@ class TenantContextMiddleware(BaseHTTPMiddleware):
         
         response = await call_next(request)
         return response
-
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Dependency to get current authenticated user.
-    
-    Usage:
-        @app.get("/protected")
-        def protected_route(user: User = Depends(get_current_user)):
-            return {"user_id": user.id}
-    """
-    token = credentials.credentials
     
-    try:
-        payload = verify_token(token, token_type="access")
+    async def _resolve_principal(self, payload: dict) -> Optional[Principal]:
+        """
+        Get principal for verified token payload.
+        
+        Served from the principal cache; on a miss user and tenant are
+        loaded in one async query and cached until the token expires
+        (at most PRINCIPAL_CACHE_TTL seconds). Cache round trips run off
+        the event loop.
+        """
         user_id = payload.get("sub")
+        tenant_id = payload.get("tenant_id")
+        jti = payload.get("jti")
         
         if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload"
-            )
+            return None
         
-        user = db.query(User).filter(User.id == user_id).first()
+        principal_cache = get_principal_cache()
+        if tenant_id and jti:
+            principal = await principal_cache.get_async(tenant_id, user_id, jti)
+            if principal is not None:
+                return principal
         
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        from stock_tracker.database.connection import AsyncSessionLocal, get_async_engine
+        get_async_engine()
         
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="User account is disabled"
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User).options(selectinload(User.tenant)).where(User.id == user_id)
             )
+            user = result.scalar_one_or_none()
+            
+            if not user or not user.tenant:
+                return None
+            
+            principal = Principal.from_models(user, user.tenant, jti or "")
         
-        return user
+        # Token issued for another tenant than the user's current one is not cached
+        if jti and principal.tenant_id == str(tenant_id):
+            await principal_cache.set_async(principal, expires_at=payload.get("exp"))
         
+        return principal
+
+
+def _user_id_from_token(token: str) -> str:
+    """Extract user id from access token or raise 401."""
+    try:
+        payload = verify_token(token, token_type="access")
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+    
+    return user_id
 
 
-def get_current_tenant(user: User = Depends(get_current_user)) -> Tenant:
+def _check_user(user: Optional[User]) -> User:
+    """Validate loaded user or raise."""
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is disabled"
+        )
+    
+    return user
+
+
+def _request_principal(request: Request) -> Optional[Principal]:
+    """Principal resolved by TenantContextMiddleware for this request."""
+    return getattr(request.state, "principal", None)
+
+
+def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
     """
-    Dependency to get current tenant from authenticated user.
+    Dependency to get current authenticated user.
+    
+    The token is not verified again when the middleware already did.
+    The user is still loaded through the request session, routes using
+    this dependency modify it.
     
     Usage:
-        @app.get("/tenant-info")
-        def tenant_info(tenant: Tenant = Depends(get_current_tenant)):
-            return {"tenant_name": tenant.name}
+        @app.get("/protected")
+        def protected_route(user: User = Depends(get_current_user)):
+            return {"user_id": user.id}
+    """
+    principal = _request_principal(request)
+    user_id = principal.user_id if principal else _user_id_from_token(credentials.credentials)
+    user = db.query(User).filter(User.id == user_id).first()
+    return _check_user(user)
+
+
+async def get_current_user_async(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
     """
+    Async variant of get_current_user for read-only routes.
+    
+    Returns the cached principal's detached User (with tenant) without
+    touching the database. Without a principal the user is loaded with
+    the tenant relationship eager, lazy loads are not available on
+    async sessions.
+    
+    Usage:
+        @app.get("/protected")
+        async def protected_route(user: User = Depends(get_current_user_async)):
+            return {"user_id": user.id}
+    """
+    principal = _request_principal(request)
+    if principal is not None:
+        return _check_user(principal.to_user())
+    
+    user_id = _user_id_from_token(credentials.credentials)
+    result = await db.execute(
+        select(User).options(selectinload(User.tenant)).where(User.id == user_id)
+    )
+    return _check_user(result.scalar_one_or_none())
+
+
+def _check_tenant(user: User) -> Tenant:
+    """Validate user's tenant or raise."""
     if not user.tenant:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -168,6 +240,30 @@ def get_current_tenant(user: User = Depends(get_current_user)) -> Tenant:
     return user.tenant
 
 
+def get_current_tenant(user: User = Depends(get_current_user)) -> Tenant:
+    """
+    Dependency to get current tenant from authenticated user.
+    
+    Usage:
+        @app.get("/tenant-info")
+        def tenant_info(tenant: Tenant = Depends(get_current_tenant)):
+            return {"tenant_name": tenant.name}
+    """
+    return _check_tenant(user)
+
+
+async def get_current_tenant_async(user: User = Depends(get_current_user_async)) -> Tenant:
+    """
+    Async variant of get_current_tenant for routes using AsyncSession.
+    
+    Usage:
+        @app.get("/tenant-info")
+        async def tenant_info(tenant: Tenant = Depends(get_current_tenant_async)):
+            return {"tenant_name": tenant.name}
+    """
+    return _check_tenant(user)
+
+
 def get_current_active_user(user: User = Depends(get_current_user)) -> User:
     """Get current active user (alias for get_current_user with active check)."""
     return user
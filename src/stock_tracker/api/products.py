@@ -16,6 +16,9 @@ import json
 from stock_tracker.api.client import WildberriesAPIClient
 from stock_tracker.core.models import Product, Warehouse
 from stock_tracker.core.calculator import is_real_warehouse, validate_warehouse_name
+from stock_tracker.core.columnar import (
+    columnar_enabled, group_records_by_product, is_columnar_available
+)
 from stock_tracker.utils.logger import get_logger
 from stock_tracker.utils.exceptions import APIError, ValidationError, DataFormatError
 
@@ -532,7 +535,8 @@ def extract_warehouse_data_from_response(warehouse_response: List[Dict[str, Any]
         return []
 
 
-def group_orders_by_product(orders_data: List[Dict[str, Any]]) -> Dict[Tuple[str, int], List[Dict]]:
+def group_orders_by_product(orders_data: List[Dict[str, Any]],
+                            columnar: Optional[bool] = None) -> Dict[Tuple[str, int], List[Dict]]:
     """
     Group orders data by product following urls.md grouping logic.
     
@@ -540,11 +544,18 @@ def group_orders_by_product(orders_data: List[Dict[str, Any]]) -> Dict[Tuple[str
     
     Args:
         orders_data: List of order records
+        columnar: Group with the NumPy columnar backend
+                  (default: WB_COLUMNAR_PROCESSING)
         
     Returns:
         Dict mapping (supplier_article, nm_id) to list of orders
     """
     try:
+        if columnar is None:
+            columnar = columnar_enabled()
+        if columnar and is_columnar_available():
+            return group_records_by_product(orders_data)
+        
         grouped = {}
         
         for order in orders_data:
@@ -564,7 +575,8 @@ def group_orders_by_product(orders_data: List[Dict[str, Any]]) -> Dict[Tuple[str
         return {}
 
 
-def group_warehouse_by_product(warehouse_data: List[Dict[str, Any]]) -> Dict[Tuple[str, int], List[Dict]]:
+def group_warehouse_by_product(warehouse_data: List[Dict[str, Any]],
+                               columnar: Optional[bool] = None) -> Dict[Tuple[str, int], List[Dict]]:
     """
     Group warehouse data by product following urls.md grouping logic.
     
@@ -572,11 +584,18 @@ def group_warehouse_by_product(warehouse_data: List[Dict[str, Any]]) -> Dict[Tup
     
     Args:
         warehouse_data: List of warehouse records (flat format)
+        columnar: Group with the NumPy columnar backend
+                  (default: WB_COLUMNAR_PROCESSING)
         
     Returns:
         Dict mapping (supplier_article, nm_id) to list of warehouse records
     """
     try:
+        if columnar is None:
+            columnar = columnar_enabled()
+        if columnar and is_columnar_available():
+            return group_records_by_product(warehouse_data)
+        
         grouped = {}
         
         for record in warehouse_data:
@@ -2,14 +2,16 @@
 Analytics and Dashboard API routes.
 """
 
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Callable
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from stock_tracker.database.connection import get_db
+from stock_tracker.database.connection import get_async_db
 from stock_tracker.database.models import Tenant, User
-from stock_tracker.api.middleware.tenant_context import get_current_user, get_current_tenant
+from stock_tracker.api.middleware.tenant_context import get_current_user_async, get_current_tenant_async
+from stock_tracker.cache import cached
 from stock_tracker.services.analytics_service import AnalyticsService
 from stock_tracker.utils.logger import get_logger
 
@@ -17,6 +19,70 @@ logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Aggregates only change on sync, which drops analytics:* keys for the tenant.
+# No early/stale refresh (beta=0, no stale_ttl): a background refresh would
+# outlive the request's DB session, so only misses recompute, single-flight.
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+
+
+async def _run_analytics(
+    db: AsyncSession,
+    tenant: Tenant,
+    method: Callable[[AnalyticsService], Any]
+) -> Any:
+    """
+    Run AnalyticsService on the async session.
+    
+    The service is written against the synchronous ORM API; run_sync
+    executes it over the asyncpg connection so the event loop is not
+    blocked while the aggregates are computed.
+    """
+    return await db.run_sync(
+        lambda session: method(AnalyticsService(tenant=tenant, db_session=session))
+    )
+
+
+def _cached_report(name: str) -> Callable:
+    """
+    Cache an analytics report per tenant under analytics:{name}.
+    
+    The key holds the report name and query params, not the session or
+    tenant row passed alongside tenant_id.
+    """
+    def build_key(tenant_id: str, db: AsyncSession, tenant: Tenant, **params) -> str:
+        query = ":".join(f"{key}={value}" for key, value in sorted(params.items()))
+        return f"analytics:{name}:{query}".rstrip(":")
+    
+    return cached(f"analytics:{name}", ttl=ANALYTICS_CACHE_TTL, key_builder=build_key, beta=0)
+
+
+@_cached_report("dashboard")
+async def _dashboard_summary(tenant_id: str, db: AsyncSession, tenant: Tenant) -> Dict[str, Any]:
+    return await _run_analytics(db, tenant, lambda analytics: analytics.get_dashboard_summary())
+
+
+@_cached_report("low-stock")
+async def _low_stock_products(tenant_id: str, db: AsyncSession, tenant: Tenant,
+                              threshold: int, limit: int) -> List[Dict[str, Any]]:
+    return await _run_analytics(
+        db, tenant, lambda analytics: analytics.get_low_stock_products(threshold=threshold, limit=limit)
+    )
+
+
+@_cached_report("top-products")
+async def _top_products(tenant_id: str, db: AsyncSession, tenant: Tenant, limit: int) -> List[Dict[str, Any]]:
+    return await _run_analytics(db, tenant, lambda analytics: analytics.get_top_products_by_orders(limit=limit))
+
+
+@_cached_report("stock-distribution")
+async def _stock_distribution(tenant_id: str, db: AsyncSession, tenant: Tenant) -> Dict[str, int]:
+    return await _run_analytics(db, tenant, lambda analytics: analytics.get_stock_distribution())
+
+
+@_cached_report("warehouses")
+async def _warehouse_breakdown(tenant_id: str, db: AsyncSession, tenant: Tenant) -> List[Dict[str, Any]]:
+    return await _run_analytics(db, tenant, lambda analytics: analytics.get_warehouse_breakdown())
+
 
 class DashboardSummary(BaseModel):
     """Dashboard summary response."""
@@ -79,21 +145,21 @@ class WarehouseStats(BaseModel):
     total_stock: int
     total_orders: int
     product_count: int
+    turnover_days: float = 0.0
 
 
 @router.get("/dashboard", response_model=DashboardSummary)
 async def get_dashboard(
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get dashboard summary with key metrics.
     """
     logger.info(f"Dashboard requested by user {user.id} for tenant {tenant.id}")
     
-    analytics = AnalyticsService(tenant=tenant, db_session=db)
-    summary = analytics.get_dashboard_summary()
+    summary = await _dashboard_summary(str(tenant.id), db, tenant)
     
     return DashboardSummary(**summary)
 
@@ -102,17 +168,16 @@ async def get_dashboard(
 async def get_low_stock_products(
     threshold: int = Query(10, ge=0, le=100, description="Stock threshold"),
     limit: int = Query(50, ge=1, le=200, description="Maximum results"),
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get products with low stock levels.
     """
     logger.info(f"Low stock products requested (threshold={threshold})")
     
-    analytics = AnalyticsService(tenant=tenant, db_session=db)
-    products = analytics.get_low_stock_products(threshold=threshold, limit=limit)
+    products = await _low_stock_products(str(tenant.id), db, tenant, threshold=threshold, limit=limit)
     
     return [LowStockProduct(**p) for p in products]
 
@@ -120,17 +185,16 @@ async def get_low_stock_products(
 @router.get("/top-products", response_model=List[TopProduct])
 async def get_top_products(
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get top products by order count.
     """
     logger.info(f"Top products requested (limit={limit})")
     
-    analytics = AnalyticsService(tenant=tenant, db_session=db)
-    products = analytics.get_top_products_by_orders(limit=limit)
+    products = await _top_products(str(tenant.id), db, tenant, limit=limit)
     
     return [TopProduct(**p) for p in products]
 
@@ -139,50 +203,49 @@ async def get_top_products(
 async def get_sync_history(
     days: int = Query(7, ge=1, le=90, description="Days to look back"),
     limit: int = Query(50, ge=1, le=200, description="Maximum results"),
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get sync history for the past N days.
     """
     logger.info(f"Sync history requested (days={days})")
     
-    analytics = AnalyticsService(tenant=tenant, db_session=db)
-    history = analytics.get_sync_history(days=days, limit=limit)
+    history = await _run_analytics(
+        db, tenant, lambda analytics: analytics.get_sync_history(days=days, limit=limit)
+    )
     
     return [SyncHistoryItem(**h) for h in history]
 
 
 @router.get("/stock-distribution", response_model=StockDistribution)
 async def get_stock_distribution(
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get stock distribution across different ranges.
     """
     logger.info("Stock distribution requested")
     
-    analytics = AnalyticsService(tenant=tenant, db_session=db)
-    distribution = analytics.get_stock_distribution()
+    distribution = await _stock_distribution(str(tenant.id), db, tenant)
     
     return StockDistribution(**distribution)
 
 
 @router.get("/warehouses", response_model=List[WarehouseStats])
 async def get_warehouse_breakdown(
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get stock breakdown by warehouse.
     """
     logger.info("Warehouse breakdown requested")
     
-    analytics = AnalyticsService(tenant=tenant, db_session=db)
-    warehouses = analytics.get_warehouse_breakdown()
+    warehouses = await _warehouse_breakdown(str(tenant.id), db, tenant)
     
     return [WarehouseStats(**w) for w in warehouses]
@@ -6,12 +6,12 @@ from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, func, select
 
-from stock_tracker.database.connection import get_db
+from stock_tracker.database.connection import get_async_db
 from stock_tracker.database.models import Tenant, User, Product
-from stock_tracker.api.middleware.tenant_context import get_current_user, get_current_tenant
+from stock_tracker.api.middleware.tenant_context import get_current_user_async, get_current_tenant_async
 from stock_tracker.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -60,9 +60,9 @@ async def list_products(
     low_stock_only: bool = Query(False, description="Show only low stock products"),
     sort_by: str = Query("updated_at", description="Sort field"),
     sort_order: str = Query("desc", description="Sort order (asc/desc)"),
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List products with filtering, search, and pagination.
@@ -70,12 +70,12 @@ async def list_products(
     logger.info(f"Listing products for tenant {tenant.id} (page={page}, size={page_size})")
     
     # Base query
-    query = db.query(Product).filter(Product.tenant_id == tenant.id)
+    query = select(Product).where(Product.tenant_id == tenant.id)
     
     # Search filter
     if search:
         search_pattern = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 Product.marketplace_article.ilike(search_pattern),
                 Product.seller_article.ilike(search_pattern),
@@ -85,26 +85,28 @@ async def list_products(
     
     # Stock filters
     if low_stock_only:
-        query = query.filter(Product.total_stock < 10)
+        query = query.where(Product.total_stock < 10)
     elif min_stock is not None or max_stock is not None:
         if min_stock is not None:
-            query = query.filter(Product.total_stock >= min_stock)
+            query = query.where(Product.total_stock >= min_stock)
         if max_stock is not None:
-            query = query.filter(Product.total_stock <= max_stock)
+            query = query.where(Product.total_stock <= max_stock)
+    
+    # Count total
+    total = await db.scalar(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
     
     # Sorting
-    sort_field = getattr(Product, sort_by, Product.updated_at)
+    sort_field = getattr(Product, sort_by, None) or Product.last_synced_at
     if sort_order.lower() == "desc":
         query = query.order_by(desc(sort_field))
     else:
         query = query.order_by(sort_field)
     
-    # Count total
-    total = query.count()
-    
     # Pagination
     offset = (page - 1) * page_size
-    products = query.offset(offset).limit(page_size).all()
+    products = (await db.scalars(query.offset(offset).limit(page_size))).all()
     
     # Calculate total pages
     total_pages = (total + page_size - 1) // page_size
@@ -121,19 +123,21 @@ async def list_products(
 @router.get("/{product_id}", response_model=ProductDetailResponse)
 async def get_product(
     product_id: str,
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get detailed product information.
     """
-    product = db.query(Product).filter(
-        and_(
-            Product.id == product_id,
-            Product.tenant_id == tenant.id
+    product = await db.scalar(
+        select(Product).where(
+            and_(
+                Product.id == product_id,
+                Product.tenant_id == tenant.id
+            )
         )
-    ).first()
+    )
     
     if not product:
         raise HTTPException(
@@ -146,9 +150,8 @@ async def get_product(
 
 @router.post("/sync")
 async def sync_products(
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(get_current_user_async)
 ):
     """
     Trigger product synchronization from marketplace.
@@ -4,6 +4,7 @@ Authentication utilities for Stock Tracker.
 
 from .jwt_manager import JWTManager, create_access_token, create_refresh_token, verify_token
 from .password import PasswordManager, hash_password, verify_password
+from .principal_cache import Principal, PrincipalCache, get_principal_cache
 
 __all__ = [
     "JWTManager",
@@ -13,4 +14,7 @@ __all__ = [
     "PasswordManager",
     "hash_password",
     "verify_password",
+    "Principal",
+    "PrincipalCache",
+    "get_principal_cache",
 ]
@@ -0,0 +1,268 @@
+"""
+Cache of authenticated principals (user + tenant) per access token.
+
+TenantContextMiddleware verifies the JWT once, loads the principal from
+this cache (or the database on a miss) and stores it on request.state;
+the tenant context dependencies reuse it instead of verifying the token
+again and re-querying User/Tenant.
+
+Entries are keyed by token jti under the tenant namespace:
+
+    tenant:{tenant_id}:principal:{user_id}:{jti}
+
+TTL is short and never exceeds the token expiry. Changes that affect
+authorization (user deactivation, role/admin change, tenant move,
+tenant deactivation) are detected by SQLAlchemy session events and drop
+the affected entries right after commit.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from stock_tracker.database.models import Tenant, User
+from stock_tracker.database.models.user import UserRole
+from stock_tracker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+# Columns kept in the cached snapshot
+USER_FIELDS = ("id", "tenant_id", "email", "full_name", "role", "is_active", "is_verified", "is_admin")
+TENANT_FIELDS = ("id", "name", "slug", "is_active")
+
+# Changes to these columns invalidate cached principals
+WATCHED_USER_FIELDS = ("is_active", "role", "is_admin", "tenant_id", "email")
+WATCHED_TENANT_FIELDS = ("is_active", "name", "slug")
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+def _snapshot(obj: Any, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """JSON-safe column values."""
+    values = {}
+    for name in fields:
+        value = getattr(obj, name)
+        if isinstance(value, uuid.UUID):
+            value = str(value)
+        elif isinstance(value, UserRole):
+            value = value.value
+        values[name] = value
+    return values
+
+
+def _detached(model, values: Dict[str, Any]):
+    """
+    Rebuild ORM instance from snapshot as a detached object.
+
+    Only snapshot columns are loaded; the object behaves like one loaded
+    by a closed session and can be merged into a session if needed.
+    """
+    values = dict(values)
+    for name in ("id", "tenant_id"):
+        if values.get(name):
+            values[name] = uuid.UUID(values[name])
+    if model is User and values.get("role"):
+        values["role"] = UserRole(values["role"])
+
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+@dataclass
+class Principal:
+    """Authenticated user and tenant for one access token."""
+    jti: str
+    user: Dict[str, Any]
+    tenant: Dict[str, Any]
+    _user_obj: Optional[User] = field(default=None, repr=False, compare=False)
+    _tenant_obj: Optional[Tenant] = field(default=None, repr=False, compare=False)
+
+    @property
+    def user_id(self) -> str:
+        return self.user["id"]
+
+    @property
+    def tenant_id(self) -> str:
+        return self.tenant["id"]
+
+    @classmethod
+    def from_models(cls, user: User, tenant: Tenant, jti: str) -> "Principal":
+        return cls(
+            jti=jti,
+            user=_snapshot(user, USER_FIELDS),
+            tenant=_snapshot(tenant, TENANT_FIELDS)
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Principal":
+        return cls(jti=data["jti"], user=data["user"], tenant=data["tenant"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"jti": self.jti, "user": self.user, "tenant": self.tenant}
+
+    def to_tenant(self) -> Tenant:
+        """Detached Tenant built from snapshot (memoized)."""
+        if self._tenant_obj is None:
+            self._tenant_obj = _detached(Tenant, self.tenant)
+        return self._tenant_obj
+
+    def to_user(self) -> User:
+        """Detached User with user.tenant populated (memoized)."""
+        if self._user_obj is None:
+            user = _detached(User, self.user)
+            set_committed_value(user, "tenant", self.to_tenant())
+            self._user_obj = user
+        return self._user_obj
+
+
+class PrincipalCache:
+    """Principal storage on top of the shared cache (L1 + Redis)."""
+
+    def __init__(self, cache=None, ttl: int = PRINCIPAL_CACHE_TTL):
+        """
+        Args:
+            cache: RedisCache/TieredCache (default: get_cache())
+            ttl: Max entry lifetime in seconds
+        """
+        self._cache = cache
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from stock_tracker.cache.redis_cache import get_cache
+            return get_cache()
+        return self._cache
+
+    @staticmethod
+    def _key(user_id: str, jti: str) -> str:
+        return f"principal:{user_id}:{jti}"
+
+    def get(self, tenant_id: str, user_id: str, jti: str) -> Optional[Principal]:
+        """Cached principal for token or None."""
+        data = self.cache.get(tenant_id, self._key(user_id, jti))
+        if not isinstance(data, dict):
+            return None
+        try:
+            return Principal.from_dict(data)
+        except KeyError:
+            return None
+
+    def set(self, principal: Principal, expires_at: Optional[float] = None) -> bool:
+        """
+        Store principal.
+
+        Args:
+            principal: Principal to cache
+            expires_at: Token expiry (epoch seconds); the entry never outlives it
+        """
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - time.time()))
+        if ttl <= 0:
+            return False
+
+        return self.cache.set(
+            principal.tenant_id,
+            self._key(principal.user_id, principal.jti),
+            principal.to_dict(),
+            ttl=ttl
+        )
+
+    async def get_async(self, tenant_id: str, user_id: str, jti: str) -> Optional[Principal]:
+        """get() in the default executor, the cache client is blocking."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, tenant_id, user_id, jti)
+
+    async def set_async(self, principal: Principal, expires_at: Optional[float] = None) -> bool:
+        """set() in the default executor, the cache client is blocking."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.set, principal, expires_at)
+
+    def invalidate_user(self, tenant_id: str, user_id: str) -> int:
+        """Drop all cached tokens of user (tenant key set only, no SCAN)."""
+        return self.cache.invalidate_tracked(tenant_id, [f"principal:{user_id}:*"])
+
+    def invalidate_tenant(self, tenant_id: str) -> int:
+        """Drop all cached principals of tenant (tenant key set only, no SCAN)."""
+        return self.cache.invalidate_tracked(tenant_id, ["principal:*"])
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get global principal cache."""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
+
+
+# ----------------------------------------------------------------------
+# Event-based invalidation
+# ----------------------------------------------------------------------
+
+def _history_values(obj: Any, name: str) -> Set[str]:
+    """Current and previous values of attribute (as strings)."""
+    history = inspect(obj).attrs[name].history
+    values = set()
+    for value in list(history.unchanged or ()) + list(history.added or ()) + list(history.deleted or ()):
+        if value is not None:
+            values.add(str(value))
+    return values
+
+
+def _changed(obj: Any, fields: Tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session: Session, flush_context):
+    """Remember principals affected by this flush (applied after commit)."""
+    pending = session.info.setdefault(_PENDING_KEY, set())
+
+    for obj in list(session.dirty) + list(session.deleted):
+        deleted = obj in session.deleted
+
+        if isinstance(obj, User) and (deleted or _changed(obj, WATCHED_USER_FIELDS)):
+            for tenant_id in _history_values(obj, "tenant_id"):
+                pending.add(("user", tenant_id, str(obj.id)))
+
+        elif isinstance(obj, Tenant) and (deleted or _changed(obj, WATCHED_TENANT_FIELDS)):
+            pending.add(("tenant", str(obj.id), None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_invalidations(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    principal_cache = get_principal_cache()
+    for kind, tenant_id, user_id in pending:
+        try:
+            if kind == "user":
+                principal_cache.invalidate_user(tenant_id, user_id)
+            else:
+                principal_cache.invalidate_tenant(tenant_id)
+            logger.debug(f"Principal cache invalidated: {kind} tenant={tenant_id} user={user_id}")
+        except Exception as e:
+            logger.error(f"Principal cache invalidation failed ({kind} {tenant_id} {user_id}): {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -3,5 +3,8 @@ Caching layer for Stock Tracker.
 """
 
 from .redis_cache import RedisCache, get_cache, cached
+from .codec import CacheCodec, CodecError, get_codec
+from .local_cache import LocalCache, TieredCache
 
-__all__ = ["RedisCache", "get_cache", "cached"]
+__all__ = ["RedisCache", "get_cache", "cached", "CacheCodec", "CodecError", "get_codec",
+           "LocalCache", "TieredCache"]
@@ -0,0 +1,240 @@
+"""
+Value codecs for Redis cache entries.
+
+Entry layout (format version 1):
+
+    b"\x01" | serializer id (1 byte) | compression id (1 byte) | payload
+
+Entries written before the codec layer are plain JSON text. JSON text never
+starts with byte 0x01, so such entries are still decoded by the json path.
+
+Serializers: json (stdlib), orjson, msgpack.
+Compression: none, zlib (stdlib), zstd, lz4. Only applied when the
+serialized payload is larger than the configured threshold.
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from stock_tracker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame as lz4_frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4_frame = None
+    LZ4_AVAILABLE = False
+
+
+FORMAT_VERSION = 1
+
+SERIALIZER_IDS = {"json": 0, "orjson": 1, "msgpack": 2}
+COMPRESSION_IDS = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+
+
+class CodecError(ValueError):
+    """Cache entry can not be encoded or decoded."""
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    # OPT_NON_STR_KEYS keeps stdlib json semantics for int dict keys
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _serializers() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    serializers = {"json": (_json_dumps, json.loads)}
+    if ORJSON_AVAILABLE:
+        serializers["orjson"] = (_orjson_dumps, orjson.loads)
+    if MSGPACK_AVAILABLE:
+        serializers["msgpack"] = (_msgpack_dumps, _msgpack_loads)
+    return serializers
+
+
+def _compressors() -> Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {"zlib": (lambda data: zlib.compress(data, 6), zlib.decompress)}
+    if ZSTD_AVAILABLE:
+        compressors["zstd"] = (
+            zstandard.ZstdCompressor(level=3).compress,
+            zstandard.ZstdDecompressor().decompress
+        )
+    if LZ4_AVAILABLE:
+        compressors["lz4"] = (lz4_frame.compress, lz4_frame.decompress)
+    return compressors
+
+
+class CacheCodec:
+    """
+    Serializer + optional compression for cache values.
+
+    Unavailable libraries fall back to stdlib (json / zlib) with a warning,
+    so a missing optional dependency never disables the cache. Decoding
+    handles every known format regardless of the configured one, which
+    keeps entries readable while settings are changed.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "none",
+        compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES
+    ):
+        """
+        Args:
+            serializer: json, orjson or msgpack
+            compression: none, zlib, zstd or lz4
+            compress_min_bytes: Payloads up to this size are stored uncompressed
+        """
+        serializers = _serializers()
+        compressors = _compressors()
+
+        if serializer not in SERIALIZER_IDS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in COMPRESSION_IDS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+
+        if serializer not in serializers:
+            logger.warning(f"Cache serializer {serializer} is not installed, using json")
+            serializer = "json"
+        if compression != "none" and compression not in compressors:
+            logger.warning(f"Cache compression {compression} is not installed, using zlib")
+            compression = "zlib"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+
+        self._dumps = serializers[serializer][0]
+        self._compress = compressors[compression][0] if compression != "none" else None
+        self._loaders = {SERIALIZER_IDS[name]: loads for name, (_, loads) in serializers.items()}
+        self._decompressors = {
+            COMPRESSION_IDS[name]: decompress for name, (_, decompress) in compressors.items()
+        }
+
+    @classmethod
+    def from_env(cls) -> "CacheCodec":
+        """
+        Create codec from environment.
+
+        CACHE_SERIALIZER (default: orjson), CACHE_COMPRESSION (default: none),
+        CACHE_COMPRESS_MIN_BYTES (default: 1024).
+        """
+        return cls(
+            serializer=os.getenv("CACHE_SERIALIZER", "orjson").lower(),
+            compression=os.getenv("CACHE_COMPRESSION", "none").lower(),
+            compress_min_bytes=int(os.getenv("CACHE_COMPRESS_MIN_BYTES", str(DEFAULT_COMPRESS_MIN_BYTES)))
+        )
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Encode value for storage.
+
+        Raises:
+            CodecError: If value is not serializable
+        """
+        try:
+            payload = self._dumps(value)
+        except (TypeError, ValueError, OverflowError) as e:
+            raise CodecError(str(e)) from e
+
+        compression = "none"
+        if self._compress is not None and len(payload) > self.compress_min_bytes:
+            compressed = self._compress(payload)
+            # Keep raw payload when compression does not help
+            if len(compressed) < len(payload):
+                payload = compressed
+                compression = self.compression
+
+        header = bytes((FORMAT_VERSION, SERIALIZER_IDS[self.serializer], COMPRESSION_IDS[compression]))
+        return header + payload
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode stored entry (versioned or legacy plain JSON).
+
+        Raises:
+            CodecError: If entry is corrupted or its codec is not installed
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        try:
+            if not data or data[0] != FORMAT_VERSION:
+                return json.loads(data)
+
+            if len(data) < 3:
+                raise CodecError("Truncated cache entry header")
+
+            serializer_id, compression_id = data[1], data[2]
+            payload = data[3:]
+
+            if compression_id != COMPRESSION_IDS["none"]:
+                decompress = self._decompressors.get(compression_id)
+                if decompress is None:
+                    raise CodecError(f"Compression id {compression_id} is not available")
+                payload = decompress(payload)
+
+            loads = self._loaders.get(serializer_id)
+            if loads is None:
+                raise CodecError(f"Serializer id {serializer_id} is not available")
+            return loads(payload)
+
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(str(e)) from e
+
+
+_default_codec: Optional[CacheCodec] = None
+
+
+def get_codec() -> CacheCodec:
+    """Get codec configured from environment (created once)."""
+    global _default_codec
+
+    if _default_codec is None:
+        _default_codec = CacheCodec.from_env()
+        logger.info(
+            f"Cache codec: serializer={_default_codec.serializer}, "
+            f"compression={_default_codec.compression} (> {_default_codec.compress_min_bytes} bytes)"
+        )
+
+    return _default_codec
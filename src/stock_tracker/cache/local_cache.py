@@ -0,0 +1,463 @@
+"""
+In-process L1 cache in front of RedisCache.
+
+Hot small entries (tenant/user rows, subscription status, warehouse
+mappings) are kept in a size-bounded LRU inside every worker process, so
+repeated reads do not go over the network. Entries are stored encoded
+(bytes produced by the cache codec): memory accounting is exact and
+callers can never mutate a shared cached object.
+
+Every write/delete/flush is published on a Redis pub/sub channel and all
+uvicorn and Celery workers drop the affected L1 entries. L1 TTL is kept
+short, which bounds staleness if an invalidation message is lost.
+"""
+
+import fnmatch
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from stock_tracker.cache.codec import CodecError
+from stock_tracker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+INVALIDATION_CHANNEL = "stock_tracker:cache:invalidate"
+
+# Approximate per-entry bookkeeping cost (OrderedDict node, tuple, key object)
+ENTRY_OVERHEAD_BYTES = 200
+
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class LocalCache:
+    """
+    Thread-safe LRU with per-entry TTL and memory accounting.
+
+    Both max_bytes and max_entries are enforced; least recently used
+    entries are evicted first, expired entries are dropped on access.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_entries: int = 10000,
+        max_entry_bytes: int = 256 * 1024,
+        default_ttl: float = 30.0
+    ):
+        """
+        Args:
+            max_bytes: Memory budget for stored entries (keys included)
+            max_entries: Maximum number of entries
+            max_entry_bytes: Larger entries are not kept in L1
+            default_ttl: TTL in seconds when none is given
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+
+        self._entries: "OrderedDict[str, Tuple[bytes, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        # Bumped by every invalidation; a fill that started before an
+        # invalidation must not store the value it read
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get entry (moves it to the MRU end) or None if missing/expired."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data, expires_at, _ = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(
+        self,
+        key: str,
+        data: bytes,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None
+    ) -> bool:
+        """
+        Store entry.
+
+        Args:
+            key: Full cache key
+            data: Encoded entry
+            ttl: TTL in seconds (default: self.default_ttl)
+            generation: Value of self.generation before the entry was read
+                from Redis; the entry is skipped if an invalidation happened since
+
+        Returns:
+            False if entry was not stored (too large or invalidated meanwhile)
+        """
+        size = len(data) + len(key) + ENTRY_OVERHEAD_BYTES
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_entry_bytes:
+                return False
+
+            ttl = self.default_ttl if ttl is None else ttl
+            self._entries[key] = (data, time.monotonic() + ttl, size)
+            self.size_bytes += size
+
+            while self._entries and (
+                self.size_bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Drop single entry."""
+        with self._lock:
+            self.generation += 1
+            return self._remove(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop all entries whose key starts with prefix."""
+        with self._lock:
+            self.generation += 1
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def delete_matching(self, pattern: str) -> int:
+        """Drop all entries matching glob pattern (Redis MATCH syntax)."""
+        with self._lock:
+            self.generation += 1
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        """Drop everything."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Usage counters."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size_bytes -= entry[2]
+        return True
+
+
+class TieredCache:
+    """
+    L1 (in-process LocalCache) + L2 (RedisCache) with pub/sub invalidation.
+
+    Exposes the RedisCache interface; anything not overridden here
+    (locks, ping, TTL queries, client) is delegated to the Redis tier.
+    """
+
+    def __init__(
+        self,
+        remote,
+        local: Optional[LocalCache] = None,
+        channel: str = INVALIDATION_CHANNEL,
+        subscribe: bool = True
+    ):
+        """
+        Args:
+            remote: RedisCache instance (L2)
+            local: LocalCache instance (L1)
+            channel: Pub/sub channel for invalidation messages
+            subscribe: Start background listener for other workers' messages
+        """
+        self.remote = remote
+        self.local = local or LocalCache()
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+
+        self._subscribe = subscribe
+        self._listener: Optional[threading.Thread] = None
+        self._listener_pid: Optional[int] = None
+        self._pubsub = None
+        self._stopped = threading.Event()
+        self._listener_lock = threading.Lock()
+
+        if subscribe:
+            self._ensure_listener()
+
+        logger.info(
+            f"L1 cache enabled (max_bytes={self.local.max_bytes}, "
+            f"max_entries={self.local.max_entries}, ttl={self.local.default_ttl}s)"
+        )
+
+    def __getattr__(self, name: str):
+        if name == "remote":
+            raise AttributeError(name)
+        return getattr(self.remote, name)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, tenant_id: str, key: str) -> Optional[Any]:
+        """Get value: L1 first, then Redis (result is kept in L1)."""
+        self._ensure_listener()
+        cache_key = self.remote._make_key(tenant_id, key)
+
+        data = self.local.get(cache_key)
+        if data is None:
+            generation = self.local.generation
+            data = self.remote.get_raw(tenant_id, key)
+            if data is None:
+                return None
+            self.local.set(cache_key, data, generation=generation)
+
+        try:
+            return self.remote.codec.decode(data)
+        except CodecError as e:
+            logger.error(f"Cache decode error for {cache_key}: {e}")
+            self.local.delete(cache_key)
+            return None
+
+    def get_many(self, tenant_id: str, keys: List[str]) -> Dict[str, Any]:
+        """Get several values: L1 hits are served locally, the rest in one MGET."""
+        self._ensure_listener()
+
+        raw: Dict[str, bytes] = {}
+        missing = []
+        for key in keys:
+            data = self.local.get(self.remote._make_key(tenant_id, key))
+            if data is None:
+                missing.append(key)
+            else:
+                raw[key] = data
+
+        if missing:
+            generation = self.local.generation
+            fetched = self.remote.get_many_raw(tenant_id, missing)
+            for key, data in fetched.items():
+                self.local.set(self.remote._make_key(tenant_id, key), data, generation=generation)
+            raw.update(fetched)
+
+        result = {}
+        for key, data in raw.items():
+            try:
+                result[key] = self.remote.codec.decode(data)
+            except CodecError as e:
+                logger.error(f"Cache decode error for {self.remote._make_key(tenant_id, key)}: {e}")
+        return result
+
+    # ------------------------------------------------------------------
+    # Writes (all of them invalidate other workers' L1)
+    # ------------------------------------------------------------------
+
+    def set(self, tenant_id: str, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Set value in Redis and L1, other workers drop their copy."""
+        cache_key = self.remote._make_key(tenant_id, key)
+
+        try:
+            data = self.remote.codec.encode(value)
+        except CodecError as e:
+            logger.error(f"Cache serialization error for {cache_key}: {e}")
+            return False
+
+        ok = self.remote.set_raw(tenant_id, key, data, ttl=ttl)
+        if ok:
+            self.local.set(cache_key, data, ttl=min(self.local.default_ttl, ttl or self.remote.default_ttl))
+        else:
+            self.local.delete(cache_key)
+        self._publish("key", cache_key)
+        return ok
+
+    def set_many(self, tenant_id: str, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set several values in one pipeline, other workers drop their copies."""
+        try:
+            encoded = {key: self.remote.codec.encode(value) for key, value in items.items()}
+        except CodecError as e:
+            logger.error(f"Cache serialization error for tenant {tenant_id}: {e}")
+            return False
+
+        ok = self.remote.set_many_raw(tenant_id, encoded, ttl=ttl)
+        l1_ttl = min(self.local.default_ttl, ttl or self.remote.default_ttl)
+        for key, data in encoded.items():
+            cache_key = self.remote._make_key(tenant_id, key)
+            if ok:
+                self.local.set(cache_key, data, ttl=l1_ttl)
+            else:
+                self.local.delete(cache_key)
+            self._publish("key", cache_key)
+        return ok
+
+    def delete(self, tenant_id: str, key: str) -> bool:
+        """Delete key everywhere."""
+        cache_key = self.remote._make_key(tenant_id, key)
+        self.local.delete(cache_key)
+        result = self.remote.delete(tenant_id, key)
+        self._publish("key", cache_key)
+        return result
+
+    def delete_many(self, tenant_id: str, keys: List[str]) -> int:
+        """Delete several keys everywhere in one Redis round trip."""
+        cache_keys = [self.remote._make_key(tenant_id, key) for key in keys]
+        for cache_key in cache_keys:
+            self.local.delete(cache_key)
+        deleted = self.remote.delete_many(tenant_id, keys)
+        for cache_key in cache_keys:
+            self._publish("key", cache_key)
+        return deleted
+
+    def invalidate_pattern(self, tenant_id: str, pattern: str) -> int:
+        """Invalidate pattern in Redis and in every worker's L1."""
+        cache_pattern = self.remote._make_key(tenant_id, pattern)
+        self.local.delete_matching(cache_pattern)
+        deleted = self.remote.invalidate_pattern(tenant_id, pattern)
+        self._publish("pattern", cache_pattern)
+        return deleted
+
+    def invalidate_tracked(self, tenant_id: str, patterns: List[str]) -> int:
+        """Invalidate tracked tenant keys in Redis and in every worker's L1."""
+        cache_patterns = [self.remote._make_key(tenant_id, pattern) for pattern in patterns]
+        for cache_pattern in cache_patterns:
+            self.local.delete_matching(cache_pattern)
+        deleted = self.remote.invalidate_tracked(tenant_id, patterns)
+        for cache_pattern in cache_patterns:
+            self._publish("pattern", cache_pattern)
+        return deleted
+
+    def flush_tenant(self, tenant_id: str) -> int:
+        """Flush tenant in Redis and in every worker's L1."""
+        prefix = self.remote._make_key(tenant_id, "")
+        self.local.delete_prefix(prefix)
+        deleted = self.remote.flush_tenant(tenant_id)
+        self._publish("prefix", prefix)
+        return deleted
+
+    def close(self):
+        """Stop listener and close Redis tier."""
+        self._stopped.set()
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+        self.remote.close()
+
+    # ------------------------------------------------------------------
+    # Pub/sub
+    # ------------------------------------------------------------------
+
+    def _publish(self, op: str, target: str):
+        message = json.dumps({"origin": self.origin, "op": op, "target": target})
+        try:
+            self.remote.client.publish(self.channel, message)
+        except Exception as e:
+            logger.warning(f"L1 invalidation publish failed ({op} {target}): {e}")
+
+    def handle_message(self, payload: Any):
+        """Apply invalidation message from another worker."""
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning(f"Malformed L1 invalidation message: {payload!r}")
+            return
+
+        if message.get("origin") == self.origin:
+            return
+
+        op, target = message.get("op"), message.get("target", "")
+        if op == "key":
+            self.local.delete(target)
+        elif op == "pattern":
+            self.local.delete_matching(target)
+        elif op == "prefix":
+            self.local.delete_prefix(target)
+        else:
+            # Unknown operation: be safe
+            self.local.clear()
+
+    def _ensure_listener(self):
+        """Start listener thread (again after fork: threads do not survive it)."""
+        if not self._subscribe or self._stopped.is_set():
+            return
+
+        pid = os.getpid()
+        if self._listener_pid == pid and self._listener is not None and self._listener.is_alive():
+            return
+
+        with self._listener_lock:
+            if self._listener_pid == pid and self._listener is not None and self._listener.is_alive():
+                return
+            if self._listener_pid is not None and self._listener_pid != pid:
+                # Forked child inherits parent's L1 but none of its messages
+                self.local.clear()
+            self._listener_pid = pid
+            self._listener = threading.Thread(
+                target=self._listen, name="cache-l1-invalidation", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            try:
+                self._pubsub = self.remote.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(self.channel)
+                # Messages may have been missed while (re)connecting
+                self.local.clear()
+
+                for message in self._pubsub.listen():
+                    if self._stopped.is_set():
+                        break
+                    if message.get("type") == "message":
+                        self.handle_message(message.get("data"))
+
+            except Exception as e:
+                if self._stopped.is_set():
+                    break
+                logger.warning(f"L1 invalidation listener error, reconnecting: {e}")
+                self.local.clear()
+                self._stopped.wait(RECONNECT_DELAY_SECONDS)
@@ -3,19 +3,69 @@ Redis caching implementation for Stock Tracker.
 """
 
 import os
-import json
+import math
+import fnmatch
+import time
+import uuid
+import random
+import asyncio
+import inspect
 import functools
-from typing import Optional, Any, Callable
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Set, Tuple
 from datetime import timedelta
 
 import redis
 from redis.connection import ConnectionPool
 
+from stock_tracker.cache.codec import CacheCodec, CodecError, get_codec
 from stock_tracker.utils.logger import get_logger
 
+try:
+    from stock_tracker.monitoring.prometheus_metrics import get_metrics
+except ImportError:
+    get_metrics = None
+
 logger = get_logger(__name__)
 
 
+# Keys per UNLINK / SCAN batch: large enough to amortise round trips,
+# small enough that a single command never blocks Redis noticeably
+INVALIDATE_BATCH_SIZE = 500
+
+# TTL of the per-tenant key set, refreshed on every write. Members whose
+# keys already expired are harmless: UNLINK of a missing key is a no-op.
+KEY_INDEX_TTL = 24 * 3600
+
+
+# @cached stampede protection
+ENTRY_MARKER = "__cached__"
+DEFAULT_XFETCH_BETA = 1.0
+DEFAULT_LOCK_TIMEOUT = 30.0
+LOCK_POLL_INTERVAL = 0.05
+REFRESH_WORKERS = 4
+
+# Compare-and-delete, so a worker never releases a lock re-acquired by another
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _as_str(key: Any) -> str:
+    """Redis key as str (clients without decode_responses return bytes)."""
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    """Split list into batches of size."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 class RedisCache:
     """
     Redis cache manager with connection pooling.
@@ -23,8 +73,11 @@ class RedisCache:
     Supports:
     - Get/Set/Delete operations
     - TTL management
-    - JSON serialization
+    - Pluggable serialization/compression (see cache.codec)
     - Connection pooling for 20-30 concurrent tenants
+    - Per-tenant key sets, so a tenant flush never scans the keyspace
+    - Non-blocking SCAN/UNLINK pattern invalidation
+    - Pipelined get_many/set_many
     """
     
     def __init__(
@@ -32,7 +85,8 @@ class RedisCache:
         redis_url: Optional[str] = None,
         default_ttl: int = 300,
         max_connections: int = 50,
-        decode_responses: bool = True
+        decode_responses: bool = False,
+        codec: Optional[CacheCodec] = None
     ):
         """
         Initialize Redis cache.
@@ -41,10 +95,13 @@ class RedisCache:
             redis_url: Redis connection URL (default from env REDIS_URL)
             default_ttl: Default TTL in seconds (5 minutes)
             max_connections: Maximum pool connections
-            decode_responses: Auto-decode bytes to strings
+            decode_responses: Auto-decode bytes to strings (must stay False
+                for binary codecs such as msgpack or compressed entries)
+            codec: Value codec (default: configured from CACHE_* env)
         """
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self.default_ttl = default_ttl
+        self.codec = codec or get_codec()
         
         # Create connection pool
         self.pool = ConnectionPool.from_url(
@@ -71,53 +128,92 @@ class RedisCache:
         """
         return f"tenant:{tenant_id}:{key}"
     
-    def get(self, tenant_id: str, key: str) -> Optional[Any]:
+    def _index_key(self, tenant_id: str) -> str:
         """
-        Get value from cache.
+        Key of the set tracking all cache keys written for tenant.
+        
+        Kept outside the tenant:{tenant_id}: namespace so pattern
+        invalidation never removes the index itself.
+        """
+        return f"tenant_keys:{tenant_id}"
+    
+    def _track(self, pipe, tenant_id: str, cache_keys: List[str]):
+        """Queue key set registration on pipeline."""
+        index_key = self._index_key(tenant_id)
+        pipe.sadd(index_key, *cache_keys)
+        pipe.expire(index_key, KEY_INDEX_TTL)
+    
+    def _unlink(self, keys: List[str]) -> int:
+        """UNLINK keys in batches (memory is reclaimed in background)."""
+        deleted = 0
+        for batch in _chunks(keys, INVALIDATE_BATCH_SIZE):
+            deleted += self.client.unlink(*batch)
+        return deleted
+    
+    def get_raw(self, tenant_id: str, key: str) -> Optional[bytes]:
+        """
+        Get encoded entry without decoding (used by the L1 layer).
         
         Args:
             tenant_id: Tenant UUID
             key: Cache key
             
         Returns:
-            Cached value or None if not found
+            Stored bytes or None if not found / on error
         """
         cache_key = self._make_key(tenant_id, key)
         
         try:
             value = self.client.get(cache_key)
-            
-            if value is None:
-                logger.debug(f"Cache miss: {cache_key}")
-                return None
-            
-            # Deserialize JSON
-            result = json.loads(value)
-            logger.debug(f"Cache hit: {cache_key}")
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Cache JSON decode error for {cache_key}: {e}")
-            return None
         except Exception as e:
             logger.error(f"Cache get error for {cache_key}: {e}")
             return None
+        
+        if value is None:
+            logger.debug(f"Cache miss: {cache_key}")
+        return value
     
-    def set(
+    def get(self, tenant_id: str, key: str) -> Optional[Any]:
+        """
+        Get value from cache.
+        
+        Args:
+            tenant_id: Tenant UUID
+            key: Cache key
+            
+        Returns:
+            Cached value or None if not found
+        """
+        value = self.get_raw(tenant_id, key)
+        if value is None:
+            return None
+        
+        try:
+            result = self.codec.decode(value)
+            logger.debug(f"Cache hit: {self._make_key(tenant_id, key)}")
+            return result
+        except CodecError as e:
+            logger.error(f"Cache decode error for {self._make_key(tenant_id, key)}: {e}")
+            return None
+    
+    def set_raw(
         self,
         tenant_id: str,
         key: str,
-        value: Any,
-        ttl: Optional[int] = None
+        data: bytes,
+        ttl: Optional[int] = None,
+        track: bool = True
     ) -> bool:
         """
-        Set value in cache with TTL.
+        Store already encoded entry with TTL (used by the L1 layer).
         
         Args:
             tenant_id: Tenant UUID
             key: Cache key
-            value: Value to cache (must be JSON-serializable)
+            data: Entry produced by self.codec.encode
             ttl: TTL in seconds (default: self.default_ttl)
+            track: Register key in tenant key set (untracked keys survive
+                flush_tenant and expire only by TTL or explicit delete)
             
         Returns:
             True if successful, False otherwise
@@ -126,22 +222,49 @@ class RedisCache:
         ttl = ttl or self.default_ttl
         
         try:
-            # Serialize to JSON
-            serialized = json.dumps(value)
-            
-            # Set with TTL
-            self.client.setex(cache_key, ttl, serialized)
+            # Set with TTL and register in tenant key set (one round trip)
+            pipe = self.client.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, data)
+            if track:
+                self._track(pipe, tenant_id, [cache_key])
+            pipe.execute()
             
             logger.debug(f"Cache set: {cache_key} (ttl={ttl}s)")
             return True
             
-        except (TypeError, ValueError) as e:
-            logger.error(f"Cache serialization error for {cache_key}: {e}")
-            return False
         except Exception as e:
             logger.error(f"Cache set error for {cache_key}: {e}")
             return False
     
+    def set(
+        self,
+        tenant_id: str,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        track: bool = True
+    ) -> bool:
+        """
+        Set value in cache with TTL.
+        
+        Args:
+            tenant_id: Tenant UUID
+            key: Cache key
+            value: Value to cache (must be serializable by the codec)
+            ttl: TTL in seconds (default: self.default_ttl)
+            track: Register key in tenant key set (see set_raw)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            serialized = self.codec.encode(value)
+        except CodecError as e:
+            logger.error(f"Cache serialization error for {self._make_key(tenant_id, key)}: {e}")
+            return False
+        
+        return self.set_raw(tenant_id, key, serialized, ttl=ttl, track=track)
+    
     def delete(self, tenant_id: str, key: str) -> bool:
         """
         Delete key from cache.
@@ -156,17 +279,48 @@ class RedisCache:
         cache_key = self._make_key(tenant_id, key)
         
         try:
-            result = self.client.delete(cache_key)
+            pipe = self.client.pipeline(transaction=False)
+            pipe.unlink(cache_key)
+            pipe.srem(self._index_key(tenant_id), cache_key)
+            result = pipe.execute()[0]
             logger.debug(f"Cache delete: {cache_key} (deleted={result})")
             return result > 0
         except Exception as e:
             logger.error(f"Cache delete error for {cache_key}: {e}")
             return False
     
+    def delete_many(self, tenant_id: str, keys: List[str]) -> int:
+        """
+        Delete several known keys in one pipelined round trip.
+        
+        Args:
+            tenant_id: Tenant UUID
+            keys: Cache keys
+            
+        Returns:
+            Number of keys deleted
+        """
+        if not keys:
+            return 0
+        
+        cache_keys = [self._make_key(tenant_id, key) for key in keys]
+        
+        try:
+            deleted = self._unlink_tracked(tenant_id, cache_keys)
+            logger.debug(f"Cache delete_many: {len(cache_keys)} keys (tenant={tenant_id}, deleted={deleted})")
+            return deleted
+        except Exception as e:
+            logger.error(f"Cache delete_many error for tenant {tenant_id}: {e}")
+            return 0
+    
     def invalidate_pattern(self, tenant_id: str, pattern: str) -> int:
         """
         Invalidate all keys matching pattern for tenant.
         
+        Uses cursor-based SCAN instead of KEYS, so Redis keeps serving
+        other tenants while the keyspace is walked. Matching keys are
+        removed with UNLINK in batches.
+        
         Args:
             tenant_id: Tenant UUID
             pattern: Key pattern (e.g., "products:*")
@@ -174,24 +328,181 @@ class RedisCache:
         Returns:
             Number of keys deleted
         """
+        if pattern == "*":
+            return self.flush_tenant(tenant_id)
+        
         cache_pattern = self._make_key(tenant_id, pattern)
         
         try:
-            # Find matching keys
-            keys = self.client.keys(cache_pattern)
+            deleted = 0
+            batch: List[str] = []
+            
+            for key in self.client.scan_iter(match=cache_pattern, count=INVALIDATE_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= INVALIDATE_BATCH_SIZE:
+                    deleted += self._unlink_tracked(tenant_id, batch)
+                    batch = []
             
-            if not keys:
-                return 0
+            if batch:
+                deleted += self._unlink_tracked(tenant_id, batch)
             
-            # Delete all matching keys
-            deleted = self.client.delete(*keys)
-            logger.info(f"Cache invalidated: {cache_pattern} ({deleted} keys)")
+            if deleted:
+                logger.info(f"Cache invalidated: {cache_pattern} ({deleted} keys)")
             return deleted
             
         except Exception as e:
             logger.error(f"Cache invalidate error for {cache_pattern}: {e}")
             return 0
     
+    def invalidate_tracked(self, tenant_id: str, patterns: Iterable[str]) -> int:
+        """
+        Invalidate tenant keys matching any of patterns.
+        
+        Only the tenant key set is walked (SSCAN), the shared keyspace is
+        not scanned. Unlike flush_tenant, keys outside patterns (long-lived
+        tenant state) are kept.
+        
+        Args:
+            tenant_id: Tenant UUID
+            patterns: Key patterns (e.g., ["products:*", "analytics:*"])
+            
+        Returns:
+            Number of keys deleted
+        """
+        patterns = list(patterns)
+        cache_patterns = [self._make_key(tenant_id, pattern) for pattern in patterns]
+        index_key = self._index_key(tenant_id)
+        
+        try:
+            keys = [
+                key for key in self.client.sscan_iter(index_key, count=INVALIDATE_BATCH_SIZE)
+                if any(fnmatch.fnmatchcase(_as_str(key), pattern) for pattern in cache_patterns)
+            ]
+            deleted = 0
+            for batch in _chunks(keys, INVALIDATE_BATCH_SIZE):
+                deleted += self._unlink_tracked(tenant_id, batch)
+            
+            if deleted:
+                logger.info(f"Cache invalidated for tenant {tenant_id}: {', '.join(patterns)} ({deleted} keys)")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Cache invalidate error for tenant {tenant_id}: {e}")
+            return 0
+    
+    def _unlink_tracked(self, tenant_id: str, keys: List[str]) -> int:
+        """UNLINK keys and drop them from tenant key set in one round trip."""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.unlink(*keys)
+        pipe.srem(self._index_key(tenant_id), *keys)
+        return pipe.execute()[0]
+    
+    def get_many_raw(self, tenant_id: str, keys: List[str]) -> Dict[str, bytes]:
+        """
+        Get several encoded entries in one round trip (MGET).
+        
+        Args:
+            tenant_id: Tenant UUID
+            keys: Cache keys
+            
+        Returns:
+            Dict key -> stored bytes for cache hits only
+        """
+        if not keys:
+            return {}
+        
+        cache_keys = [self._make_key(tenant_id, key) for key in keys]
+        
+        try:
+            values = self.client.mget(cache_keys)
+        except Exception as e:
+            logger.error(f"Cache get_many error for tenant {tenant_id}: {e}")
+            return {}
+        
+        return {key: value for key, value in zip(keys, values) if value is not None}
+    
+    def get_many(self, tenant_id: str, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values in one round trip (MGET).
+        
+        Args:
+            tenant_id: Tenant UUID
+            keys: Cache keys
+            
+        Returns:
+            Dict key -> value for cache hits only
+        """
+        result = {}
+        for key, value in self.get_many_raw(tenant_id, keys).items():
+            try:
+                result[key] = self.codec.decode(value)
+            except CodecError as e:
+                logger.error(f"Cache decode error for {self._make_key(tenant_id, key)}: {e}")
+        
+        logger.debug(f"Cache get_many: {len(result)}/{len(keys)} hits (tenant={tenant_id})")
+        return result
+    
+    def set_many_raw(
+        self,
+        tenant_id: str,
+        items: Dict[str, bytes],
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Store several encoded entries with the same TTL in one pipelined round trip.
+        
+        Args:
+            tenant_id: Tenant UUID
+            items: Dict key -> entry produced by self.codec.encode
+            ttl: TTL in seconds (default: self.default_ttl)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not items:
+            return True
+        
+        ttl = ttl or self.default_ttl
+        cache_keys = [self._make_key(tenant_id, key) for key in items]
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for cache_key, value in zip(cache_keys, items.values()):
+                pipe.setex(cache_key, ttl, value)
+            self._track(pipe, tenant_id, cache_keys)
+            pipe.execute()
+            
+            logger.debug(f"Cache set_many: {len(cache_keys)} keys (tenant={tenant_id}, ttl={ttl}s)")
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_many error for tenant {tenant_id}: {e}")
+            return False
+    
+    def set_many(
+        self,
+        tenant_id: str,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Set several values with the same TTL in one pipelined round trip.
+        
+        Args:
+            tenant_id: Tenant UUID
+            items: Dict key -> value (values must be serializable by the codec)
+            ttl: TTL in seconds (default: self.default_ttl)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            serialized = {key: self.codec.encode(value) for key, value in items.items()}
+        except CodecError as e:
+            logger.error(f"Cache serialization error for tenant {tenant_id}: {e}")
+            return False
+        
+        return self.set_many_raw(tenant_id, serialized, ttl=ttl)
+    
     def exists(self, tenant_id: str, key: str) -> bool:
         """
         Check if key exists in cache.
@@ -230,6 +541,44 @@ class RedisCache:
             logger.error(f"Cache TTL error for {cache_key}: {e}")
             return -2
     
+    def acquire_lock(self, tenant_id: str, key: str, timeout: float) -> Optional[str]:
+        """
+        Acquire short-lived lock for recomputing key (SET NX PX).
+        
+        Args:
+            tenant_id: Tenant UUID
+            key: Cache key being recomputed
+            timeout: Lock expiry in seconds (protects against crashed holders)
+            
+        Returns:
+            Lock token if acquired, None if another worker holds the lock.
+            On Redis errors a token is returned so callers still compute.
+        """
+        lock_key = self._make_key(tenant_id, f"{key}:lock")
+        token = uuid.uuid4().hex
+        
+        try:
+            acquired = self.client.set(lock_key, token, nx=True, px=max(1, int(timeout * 1000)))
+            return token if acquired else None
+        except Exception as e:
+            logger.error(f"Cache lock error for {lock_key}: {e}")
+            return token
+    
+    def release_lock(self, tenant_id: str, key: str, token: str) -> bool:
+        """
+        Release lock acquired by acquire_lock (only if still owned).
+        
+        Returns:
+            True if released, False otherwise
+        """
+        lock_key = self._make_key(tenant_id, f"{key}:lock")
+        
+        try:
+            return bool(self.client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token))
+        except Exception as e:
+            logger.error(f"Cache unlock error for {lock_key}: {e}")
+            return False
+    
     def ping(self) -> bool:
         """
         Check Redis connection.
@@ -247,13 +596,28 @@ class RedisCache:
         """
         Flush all cache entries for tenant.
         
+        Only the keys recorded in the tenant key set are touched, the
+        shared keyspace is not scanned.
+        
         Args:
             tenant_id: Tenant UUID
             
         Returns:
             Number of keys deleted
         """
-        return self.invalidate_pattern(tenant_id, "*")
+        index_key = self._index_key(tenant_id)
+        
+        try:
+            keys = list(self.client.sscan_iter(index_key, count=INVALIDATE_BATCH_SIZE))
+            deleted = self._unlink(keys) if keys else 0
+            self.client.unlink(index_key)
+            
+            logger.info(f"Cache flushed for tenant {tenant_id} ({deleted} keys)")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Cache flush error for tenant {tenant_id}: {e}")
+            return 0
     
     def close(self):
         """Close Redis connection pool."""
@@ -276,15 +640,39 @@ class NoOpCache:
     def get(self, tenant_id: str, key: str) -> None:
         return None
     
-    def set(self, tenant_id: str, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def set(self, tenant_id: str, key: str, value: Any, ttl: Optional[int] = None, track: bool = True) -> bool:
         return True
     
     def delete(self, tenant_id: str, key: str) -> bool:
         return True
     
+    def delete_many(self, tenant_id: str, keys: List[str]) -> int:
+        return 0
+    
     def exists(self, tenant_id: str, key: str) -> bool:
         return False
     
+    def get_many(self, tenant_id: str, keys: List[str]) -> Dict[str, Any]:
+        return {}
+    
+    def set_many(self, tenant_id: str, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        return True
+    
+    def invalidate_pattern(self, tenant_id: str, pattern: str) -> int:
+        return 0
+    
+    def invalidate_tracked(self, tenant_id: str, patterns: Iterable[str]) -> int:
+        return 0
+    
+    def flush_tenant(self, tenant_id: str) -> int:
+        return 0
+    
+    def acquire_lock(self, tenant_id: str, key: str, timeout: float) -> Optional[str]:
+        return "noop"
+    
+    def release_lock(self, tenant_id: str, key: str, token: str) -> bool:
+        return True
+    
     def ping(self) -> bool:
         return False
     
@@ -297,18 +685,23 @@ def get_cache() -> RedisCache:
     Get or create global Redis cache instance.
     Falls back to NoOpCache if Redis is unavailable.
     
+    Unless CACHE_L1_ENABLED=false, the Redis cache is fronted by an
+    in-process L1 (see cache.local_cache) sized by CACHE_L1_MAX_BYTES,
+    CACHE_L1_MAX_ENTRIES, CACHE_L1_MAX_ENTRY_BYTES and CACHE_L1_TTL.
+    
     Returns:
-        RedisCache instance or NoOpCache fallback
+        RedisCache (or TieredCache wrapping it) instance or NoOpCache fallback
     """
     global _cache_instance, _cache_available
     
     if _cache_instance is None:
         if _cache_available:
             try:
-                _cache_instance = RedisCache()
+                redis_cache = RedisCache()
                 # Test connection
-                if not _cache_instance.ping():
+                if not redis_cache.ping():
                     raise Exception("Redis ping failed")
+                _cache_instance = _with_local_tier(redis_cache)
             except Exception as e:
                 logger.warning(f"Redis unavailable, using NoOp cache: {e}")
                 _cache_available = False
@@ -319,25 +712,242 @@ def get_cache() -> RedisCache:
     return _cache_instance
 
 
+def _with_local_tier(redis_cache: RedisCache):
+    """Wrap Redis cache with in-process L1 when enabled."""
+    if os.getenv("CACHE_L1_ENABLED", "true").lower() in ("0", "false", "no"):
+        return redis_cache
+    
+    from stock_tracker.cache.local_cache import LocalCache, TieredCache
+    
+    local = LocalCache(
+        max_bytes=int(os.getenv("CACHE_L1_MAX_BYTES", str(32 * 1024 * 1024))),
+        max_entries=int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000")),
+        max_entry_bytes=int(os.getenv("CACHE_L1_MAX_ENTRY_BYTES", str(256 * 1024))),
+        default_ttl=float(os.getenv("CACHE_L1_TTL", "30")),
+    )
+    return TieredCache(redis_cache, local)
+
+
+def _track_cache_event(event: str, key_prefix: str):
+    """Send hit/miss/stale counter to Prometheus (if available)."""
+    if get_metrics is None:
+        return
+    try:
+        getattr(get_metrics(), f"track_cache_{event}")(key_prefix)
+    except Exception as e:
+        logger.debug(f"Cache metrics error: {e}")
+
+
+def _wrap_entry(value: Any, ttl: int, delta: float) -> Dict[str, Any]:
+    """
+    Envelope stored by @cached.
+    
+    fresh_until - value is fresh before this moment (epoch seconds)
+    delta - how long the recomputation took, drives early refresh
+    """
+    return {ENTRY_MARKER: 1, "value": value, "fresh_until": time.time() + ttl, "delta": delta}
+
+
+def _entry_state(entry: Any, beta: float) -> Tuple[Any, str]:
+    """
+    Classify cached entry.
+    
+    Returns:
+        (value, state) where state is one of:
+        fresh - serve as is
+        refresh - still fresh, but probabilistic early refresh fired (XFetch)
+        stale - past freshness, inside stale-while-revalidate window
+        miss - nothing cached
+    """
+    if entry is None:
+        return None, "miss"
+    
+    # Entries written before the envelope existed are served as fresh
+    if not isinstance(entry, dict) or ENTRY_MARKER not in entry:
+        return entry, "fresh"
+    
+    value = entry.get("value")
+    now = time.time()
+    fresh_until = entry.get("fresh_until", 0)
+    
+    if now >= fresh_until:
+        return value, "stale"
+    
+    # XFetch: refresh early with probability growing towards expiry and
+    # proportional to recomputation cost
+    delta = entry.get("delta", 0) or 0
+    if beta > 0 and delta > 0:
+        if now - delta * beta * math.log(max(random.random(), 1e-12)) >= fresh_until:
+            return value, "refresh"
+    
+    return value, "fresh"
+
+
+class _ThreadSingleFlight:
+    """In-process single-flight for sync callers: one computation per key."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Dict[str, Any]] = {}
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+        
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+
+_thread_flights = _ThreadSingleFlight()
+_async_flights: Dict[Tuple[int, str], "asyncio.Future"] = {}
+_background_tasks: Set["asyncio.Task"] = set()
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+_refresh_executor_lock = threading.Lock()
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    """Thread pool for background refresh of sync functions."""
+    global _refresh_executor
+    with _refresh_executor_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+            )
+    return _refresh_executor
+
+
+async def _async_single_flight(key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """In-process single-flight for coroutines: concurrent callers share one future."""
+    flight_key = (id(asyncio.get_running_loop()), key)
+    future = _async_flights.get(flight_key)
+    if future is not None:
+        return await asyncio.shield(future)
+    
+    future = asyncio.ensure_future(factory())
+    _async_flights[flight_key] = future
+    future.add_done_callback(lambda _: _async_flights.pop(flight_key, None))
+    return await asyncio.shield(future)
+
+
 def cached(
     key_prefix: str,
     ttl: Optional[int] = None,
-    key_builder: Optional[Callable] = None
+    key_builder: Optional[Callable] = None,
+    stale_ttl: int = 0,
+    beta: float = DEFAULT_XFETCH_BETA,
+    lock_timeout: float = DEFAULT_LOCK_TIMEOUT
 ):
     """
     Decorator to cache function results.
     
+    Stampede protection:
+    - single-flight: concurrent misses in one process share one call, across
+      processes a short Redis lock lets one worker recompute while others
+      wait for its result
+    - early probabilistic refresh (XFetch) shortly before expiry
+    - stale-while-revalidate (opt-in): within stale_ttl after expiry the
+      previous value is served while one worker refreshes it in background
+    
     Usage:
         @cached("products:list", ttl=300)
         async def get_products(tenant_id: str):
             return await fetch_products()
     
     Args:
-        key_prefix: Cache key prefix
-        ttl: TTL in seconds (default: cache default)
+        key_prefix: Cache key prefix (also the metrics label)
+        ttl: Freshness in seconds (default: cache default)
         key_builder: Custom function to build cache key from args
+        stale_ttl: How long an expired value may still be served
+                   (default: 0, keys expire after ttl)
+        beta: XFetch aggressiveness, 0 disables early refresh
+        lock_timeout: Recompute lock expiry / max wait for another worker
     """
+    def build_key(args, kwargs) -> str:
+        if key_builder:
+            return key_builder(*args, **kwargs)
+        # Default: prefix + function args
+        args_str = ":".join(str(a) for a in args[1:])  # Skip tenant_id
+        kwargs_str = ":".join(f"{k}={v}" for k, v in sorted(kwargs.items()) if k != "tenant_id")
+        return f"{key_prefix}:{args_str}:{kwargs_str}".rstrip(":")
+    
+    def store(cache, tenant_id: str, cache_key: str, result: Any, delta: float):
+        fresh = ttl or getattr(cache, "default_ttl", 300)
+        cache.set(tenant_id, cache_key, _wrap_entry(result, fresh, delta), ttl=fresh + stale_ttl)
+    
+    async def off_loop(call: Callable, *call_args):
+        # Cache clients are synchronous: keep Redis round trips off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(call, *call_args))
+    
     def decorator(func: Callable):
+        async def recompute_async(cache, tenant_id, cache_key, args, kwargs, background: bool):
+            token = await off_loop(cache.acquire_lock, tenant_id, cache_key, lock_timeout)
+            
+            if token is None:
+                if background:
+                    return None  # Another worker is already refreshing
+                # Wait for the lock holder to publish the value
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(LOCK_POLL_INTERVAL)
+                    value, state = _entry_state(await off_loop(cache.get, tenant_id, cache_key), 0)
+                    if state != "miss":
+                        return value
+                logger.warning(f"@cached: lock wait timed out for {cache_key}, computing")
+            
+            try:
+                started = time.monotonic()
+                result = await func(*args, **kwargs)
+                await off_loop(store, cache, tenant_id, cache_key, result, time.monotonic() - started)
+                return result
+            finally:
+                if token is not None:
+                    await off_loop(cache.release_lock, tenant_id, cache_key, token)
+        
+        def recompute_sync(cache, tenant_id, cache_key, args, kwargs, background: bool):
+            token = cache.acquire_lock(tenant_id, cache_key, lock_timeout)
+            
+            if token is None:
+                if background:
+                    return None
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    value, state = _entry_state(cache.get(tenant_id, cache_key), 0)
+                    if state != "miss":
+                        return value
+                logger.warning(f"@cached: lock wait timed out for {cache_key}, computing")
+            
+            try:
+                started = time.monotonic()
+                result = func(*args, **kwargs)
+                store(cache, tenant_id, cache_key, result, time.monotonic() - started)
+                return result
+            finally:
+                if token is not None:
+                    cache.release_lock(tenant_id, cache_key, token)
+        
+        def log_refresh_error(future):
+            if not future.cancelled() and future.exception() is not None:
+                logger.error(f"@cached: background refresh failed for {func.__name__}: {future.exception()}")
+        
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             cache = get_cache()
@@ -349,27 +959,31 @@ def cached(
                 logger.warning(f"@cached: No tenant_id found, skipping cache for {func.__name__}")
                 return await func(*args, **kwargs)
             
-            # Build cache key
-            if key_builder:
-                cache_key = key_builder(*args, **kwargs)
-            else:
-                # Default: prefix + function args
-                args_str = ":".join(str(a) for a in args[1:])  # Skip tenant_id
-                kwargs_str = ":".join(f"{k}={v}" for k, v in sorted(kwargs.items()) if k != "tenant_id")
-                cache_key = f"{key_prefix}:{args_str}:{kwargs_str}".rstrip(":")
+            cache_key = build_key(args, kwargs)
+            flight_key = f"{tenant_id}:{cache_key}"
             
-            # Try cache
-            cached_value = cache.get(tenant_id, cache_key)
-            if cached_value is not None:
-                return cached_value
+            value, state = _entry_state(await off_loop(cache.get, tenant_id, cache_key), beta)
             
-            # Execute function
-            result = await func(*args, **kwargs)
+            if state == "miss":
+                _track_cache_event("miss", key_prefix)
+                return await _async_single_flight(
+                    flight_key,
+                    lambda: recompute_async(cache, tenant_id, cache_key, args, kwargs, background=False)
+                )
             
-            # Cache result
-            cache.set(tenant_id, cache_key, result, ttl=ttl)
+            _track_cache_event("stale" if state == "stale" else "hit", key_prefix)
             
-            return result
+            refresh_key = f"{flight_key}:refresh"
+            if state != "fresh" and (id(asyncio.get_running_loop()), refresh_key) not in _async_flights:
+                task = asyncio.ensure_future(_async_single_flight(
+                    refresh_key,
+                    lambda: recompute_async(cache, tenant_id, cache_key, args, kwargs, background=True)
+                ))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+                task.add_done_callback(log_refresh_error)
+            
+            return value
         
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
@@ -382,29 +996,31 @@ def cached(
                 logger.warning(f"@cached: No tenant_id found, skipping cache for {func.__name__}")
                 return func(*args, **kwargs)
             
-            # Build cache key
-            if key_builder:
-                cache_key = key_builder(*args, **kwargs)
-            else:
-                args_str = ":".join(str(a) for a in args[1:])
-                kwargs_str = ":".join(f"{k}={v}" for k, v in sorted(kwargs.items()) if k != "tenant_id")
-                cache_key = f"{key_prefix}:{args_str}:{kwargs_str}".rstrip(":")
+            cache_key = build_key(args, kwargs)
+            flight_key = f"{tenant_id}:{cache_key}"
             
-            # Try cache
-            cached_value = cache.get(tenant_id, cache_key)
-            if cached_value is not None:
-                return cached_value
+            value, state = _entry_state(cache.get(tenant_id, cache_key), beta)
             
-            # Execute function
-            result = func(*args, **kwargs)
+            if state == "miss":
+                _track_cache_event("miss", key_prefix)
+                return _thread_flights.do(
+                    flight_key,
+                    lambda: recompute_sync(cache, tenant_id, cache_key, args, kwargs, background=False)
+                )
             
-            # Cache result
-            cache.set(tenant_id, cache_key, result, ttl=ttl)
+            _track_cache_event("stale" if state == "stale" else "hit", key_prefix)
             
-            return result
+            if state != "fresh":
+                future = _get_refresh_executor().submit(
+                    _thread_flights.do,
+                    f"{flight_key}:refresh",
+                    lambda: recompute_sync(cache, tenant_id, cache_key, args, kwargs, background=True)
+                )
+                future.add_done_callback(log_refresh_error)
+            
+            return value
         
         # Return appropriate wrapper based on function type
-        import inspect
         if inspect.iscoroutinefunction(func):
             return async_wrapper
         else:
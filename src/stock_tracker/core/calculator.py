@@ -16,6 +16,9 @@ from stock_tracker.core.models import Product, Warehouse
 from stock_tracker.utils.logger import get_logger
 from stock_tracker.utils.exceptions import CalculationError
 from stock_tracker.core.validator import WildberriesDataValidator
+from stock_tracker.core.columnar import (
+    ColumnarFeeds, calculate_turnover_array, columnar_enabled, is_columnar_available
+)
 from stock_tracker.utils.warehouse_mapper import normalize_warehouse_name, is_marketplace_warehouse
 
 
@@ -156,6 +159,129 @@ def debug_warehouse_data(warehouse_data: List[Dict], source: str = "unknown"):
     }
 
 
+class AggregationIndex:
+    """
+    Single-pass nmId → warehouse → (stock, orders) index.
+    
+    Built once from /warehouse_remains and /supplier/orders data and then
+    answers every per-product and per-warehouse total with dict lookups,
+    instead of rescanning the input lists for each nmId/warehouse pair.
+    
+    Results match the WildberriesCalculator.calculate_* reference functions:
+    - warehouse_stock / total_stock: sum of validated quantity
+    - warehouse_orders: non-canceled orders for nmId + stripped warehouseName
+    - total_orders: all order rows for nmId (canceled included)
+    """
+    
+    def __init__(self, warehouse_remains_data: Optional[List[Dict[str, Any]]] = None,
+                 orders_data: Optional[List[Dict[str, Any]]] = None):
+        """
+        Build indexes from raw API data.
+        
+        Args:
+            warehouse_remains_data: Data from /warehouse_remains API
+            orders_data: Data from /supplier/orders API
+        """
+        self.stock_by_warehouse: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.total_stock_by_product: Dict[int, int] = defaultdict(int)
+        self.orders_by_warehouse: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.total_orders_by_product: Dict[int, int] = defaultdict(int)
+        self.orders_by_article: Dict[Tuple[str, int], int] = defaultdict(int)
+        
+        if warehouse_remains_data:
+            self.add_remains(warehouse_remains_data)
+        if orders_data:
+            self.add_orders(orders_data)
+    
+    def add_remains(self, warehouse_remains_data: List[Dict[str, Any]]) -> None:
+        """Index warehouse remains records in one pass."""
+        validate_quantity = WildberriesDataValidator.validate_quantity
+        
+        for item in warehouse_remains_data:
+            if "warehouses" not in item:
+                continue
+            
+            nm_id = item.get("nmId")
+            product_stock = self.stock_by_warehouse[nm_id]
+            
+            for warehouse in item["warehouses"]:
+                quantity = validate_quantity(warehouse.get("quantity", 0))
+                product_stock[warehouse.get("warehouseName")] += quantity
+                self.total_stock_by_product[nm_id] += quantity
+    
+    def add_orders(self, orders_data: List[Dict[str, Any]]) -> None:
+        """Index supplier orders records in one pass."""
+        for order in orders_data:
+            nm_id = order.get("nmId")
+            self.total_orders_by_product[nm_id] += 1
+            
+            if order.get("isCancel", False):
+                continue
+            
+            warehouse_name = order.get("warehouseName", "").strip()
+            self.orders_by_warehouse[nm_id][warehouse_name] += 1
+            self.orders_by_article[(order.get("supplierArticle"), nm_id)] += 1
+    
+    def warehouse_stock(self, nm_id: int, warehouse_name: str) -> int:
+        """Stock for nmId at a specific warehouse."""
+        product_stock = self.stock_by_warehouse.get(nm_id)
+        return product_stock.get(warehouse_name, 0) if product_stock else 0
+    
+    def total_stock(self, nm_id: int) -> int:
+        """Total stock for nmId across all warehouses."""
+        return self.total_stock_by_product.get(nm_id, 0)
+    
+    def warehouse_orders(self, nm_id: int, warehouse_name: str) -> int:
+        """Non-canceled orders for nmId at a specific warehouse."""
+        product_orders = self.orders_by_warehouse.get(nm_id)
+        return product_orders.get(warehouse_name, 0) if product_orders else 0
+    
+    def total_orders(self, nm_id: int) -> int:
+        """Total order rows for nmId."""
+        return self.total_orders_by_product.get(nm_id, 0)
+    
+    def article_orders(self, supplier_article: str, nm_id: int) -> int:
+        """Non-canceled orders for a supplierArticle + nmId pair."""
+        return self.orders_by_article.get((supplier_article, nm_id), 0)
+    
+    def product_warehouses(self, nm_id: int) -> Dict[str, Dict[str, int]]:
+        """
+        Per-warehouse stock and orders for one product.
+        
+        Returns:
+            Dict mapping warehouse name to {"stock": int, "orders": int}
+        """
+        product_stock = self.stock_by_warehouse.get(nm_id, {})
+        product_orders = self.orders_by_warehouse.get(nm_id, {})
+        
+        return {
+            name: {
+                "stock": product_stock.get(name, 0),
+                "orders": product_orders.get(name, 0)
+            }
+            for name in {**product_stock, **product_orders}
+        }
+    
+    def warehouse_totals(self) -> Dict[str, Dict[str, int]]:
+        """
+        Totals per warehouse across all products.
+        
+        Returns:
+            Dict mapping warehouse name to total_stock/total_orders
+        """
+        totals = defaultdict(lambda: {"total_stock": 0, "total_orders": 0})
+        
+        for product_stock in self.stock_by_warehouse.values():
+            for name, stock in product_stock.items():
+                totals[name]["total_stock"] += stock
+        
+        for product_orders in self.orders_by_warehouse.values():
+            for name, orders in product_orders.items():
+                totals[name]["total_orders"] += orders
+        
+        return dict(totals)
+
+
 class WildberriesCalculator:
     """
     Calculator implementing exact calculation logic from urls.md.
@@ -689,15 +815,13 @@ class WildberriesCalculator:
         # ДОБАВЛЕНО 27.10.2025: Валидация соответствия заказов
         logger.info(f"\n📊 ORDERS VALIDATION:")
         validation_errors = 0
+        orders_index = AggregationIndex(orders_data=orders_data)
         
         for (article, nm_id), group in grouped_data.items():
             warehouse_orders_sum = sum(wh["orders"] for wh in group["warehouses"].values())
             
             # Считаем raw заказы для этого продукта (для валидации)
-            raw_orders = sum(1 for order in orders_data 
-                           if order.get("supplierArticle") == article 
-                           and order.get("nmId") == nm_id
-                           and not order.get("isCancel", False))
+            raw_orders = orders_index.article_orders(article, nm_id)
             
             if warehouse_orders_sum != raw_orders:
                 validation_errors += 1
@@ -1324,16 +1448,23 @@ class TurnoverCalculator:
             return 0.0
     
     @staticmethod
-    def calculate_turnover_batch(products: List[Product]) -> List[float]:
+    def calculate_turnover_batch(products: List[Product], columnar: bool = False) -> List[float]:
         """
         Calculate turnover for multiple products safely.
         
         Args:
             products: List of Product instances
+            columnar: Compute over whole arrays with NumPy when available
             
         Returns:
             List of turnover ratios
         """
+        if columnar and is_columnar_available():
+            try:
+                return TurnoverCalculator._calculate_turnover_batch_columnar(products)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Columnar turnover failed ({e}), falling back to per-product calculation")
+        
         turnovers = []
         
         for product in products:
@@ -1354,6 +1485,19 @@ class TurnoverCalculator:
         
         return turnovers
     
+    @staticmethod
+    def _calculate_turnover_batch_columnar(products: List[Product]) -> List[float]:
+        """Vectorised calculate_turnover_batch over orders/stock arrays."""
+        orders = [product.total_orders or 0 for product in products]
+        stock = [product.total_stock or 0 for product in products]
+        turnovers = calculate_turnover_array(orders, stock).tolist()
+        
+        for product, turnover in zip(products, turnovers):
+            if abs(product.turnover - turnover) > 0.000001:
+                product.turnover = turnover
+        
+        return turnovers
+    
     @staticmethod
     def get_turnover_category(turnover: float) -> str:
         """
@@ -1564,6 +1708,66 @@ class AutomaticAggregator:
             logger.error(f"Failed to auto-calculate product totals: {e}")
             raise CalculationError(f"Automatic calculation failed: {e}")
     
+    def calculate_products_totals_automatic(self, products: List[Product],
+                                           orders_data: List[Dict[str, Any]],
+                                           warehouse_data: List[Dict[str, Any]],
+                                           columnar: Optional[bool] = None) -> List[Product]:
+        """
+        Calculate totals for many products from a single aggregation index.
+        
+        Same results as calling calculate_product_totals_automatic per product,
+        but orders and warehouse data are scanned once for the whole batch.
+        
+        Args:
+            products: Products to update
+            orders_data: Fresh orders data from API
+            warehouse_data: Fresh warehouse data from API
+            columnar: Compute totals and turnover over NumPy arrays
+                      (default: WB_COLUMNAR_PROCESSING)
+            
+        Returns:
+            Updated products with calculated totals
+        """
+        try:
+            logger.debug(f"Auto-calculating totals for {len(products)} products")
+            
+            if columnar is None:
+                columnar = columnar_enabled()
+            if columnar and is_columnar_available():
+                return self._calculate_products_totals_columnar(products, orders_data, warehouse_data)
+            
+            index = AggregationIndex(warehouse_data, orders_data)
+            
+            for product in products:
+                product.total_orders = index.total_orders(product.wildberries_article)
+                product.total_stock = index.total_stock(product.wildberries_article)
+            
+            self.turnover_calc.calculate_turnover_batch(products, columnar=columnar)
+            
+            return products
+            
+        except Exception as e:
+            logger.error(f"Failed to auto-calculate product totals: {e}")
+            raise CalculationError(f"Automatic calculation failed: {e}")
+    
+    @staticmethod
+    def _calculate_products_totals_columnar(products: List[Product],
+                                            orders_data: List[Dict[str, Any]],
+                                            warehouse_data: List[Dict[str, Any]]) -> List[Product]:
+        """Columnar calculate_products_totals_automatic: arrays from feeds to turnover."""
+        feeds = ColumnarFeeds(warehouse_data, orders_data)
+        orders, stock = feeds.totals_for([product.wildberries_article for product in products])
+        turnovers = calculate_turnover_array(orders, stock).tolist()
+        
+        for product, total_orders, total_stock, turnover in zip(
+            products, orders.tolist(), stock.tolist(), turnovers
+        ):
+            product.total_orders = total_orders
+            product.total_stock = total_stock
+            product.turnover = turnover
+        
+        return products
+    
     def recalculate_on_warehouse_change(self, product: Product) -> Product:
         """
         Automatically recalculate product totals when warehouse data changes.
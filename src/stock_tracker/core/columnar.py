@@ -0,0 +1,381 @@
+"""
+Columnar processing backend for Wildberries feeds.
+
+Optional NumPy mode for large sellers: /supplier/orders and /warehouse_remains
+are loaded once into typed arrays (categorical nmId and warehouse codes,
+isCancel mask) and all group-by counts, sums and turnover are computed
+vectorised instead of walking lists of dicts per product. Product totals are
+gathered straight from the per-code arrays; (nmId, warehouse) group-bys are
+sparse: only pairs present in the feeds are materialised, never a
+products x warehouses matrix.
+
+Results match AggregationIndex / TurnoverCalculator and the list-of-dicts
+group_*_by_product helpers exactly; callers fall back to the pure Python path
+when NumPy is not installed.
+
+Enabled for sync pipelines with WB_COLUMNAR_PROCESSING=true.
+"""
+
+import os
+from typing import List, Dict, Any, Tuple, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from stock_tracker.core.validator import WildberriesDataValidator
+from stock_tracker.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def is_columnar_available() -> bool:
+    """Check whether the columnar backend can be used."""
+    return NUMPY_AVAILABLE
+
+
+def columnar_enabled() -> bool:
+    """Whether sync pipelines should use the columnar backend (WB_COLUMNAR_PROCESSING)."""
+    flag = os.getenv("WB_COLUMNAR_PROCESSING", "false").lower() in ("1", "true", "yes")
+    return flag and NUMPY_AVAILABLE
+
+
+def _require_numpy() -> None:
+    """Raise a clear error when columnar mode is requested without NumPy."""
+    if not NUMPY_AVAILABLE:
+        raise ImportError("Columnar mode requires numpy (pip install numpy)")
+
+
+def _encode(*columns):
+    """
+    Shared categorical encoding of several raw columns.
+
+    Codes index the sorted unique values, so one vocabulary is shared by
+    the orders and remains feeds and lookups use np.searchsorted.
+
+    Returns:
+        (sorted unique values, int32 code array per column)
+    """
+    values, inverse = np.unique(np.concatenate(columns), return_inverse=True)
+    inverse = inverse.reshape(-1).astype(np.int32)
+    split_at = np.cumsum([len(column) for column in columns])[:-1]
+    return values, np.split(inverse, split_at)
+
+
+def _lookup(values, keys):
+    """
+    Codes of keys in a sorted vocabulary.
+
+    Returns:
+        (int64 codes, bool mask of keys present in the vocabulary)
+    """
+    keys = np.asarray(keys, dtype=values.dtype)
+    codes = np.minimum(np.searchsorted(values, keys), len(values) - 1)
+    return codes, values[codes] == keys
+
+
+def _quantities(raw: List[Any]):
+    """Validated int64 quantities; per-value validation only for non-int feeds."""
+    quantities = np.asarray(raw)
+    if quantities.dtype.kind == "i" and not (quantities < 0).any():
+        return quantities.astype(np.int64)
+    validate_quantity = WildberriesDataValidator.validate_quantity
+    return np.array([validate_quantity(value) for value in raw], dtype=np.int64)
+
+
+def _pair_keys(nm_codes, warehouse_codes, n_warehouses: int):
+    """Flat int64 keys nm_code * n_warehouses + warehouse_code of (nmId, warehouse) pairs."""
+    return nm_codes.astype(np.int64) * n_warehouses + warehouse_codes
+
+
+def _group_sum(keys, weights=None):
+    """
+    Sparse group-by over flat keys.
+
+    Returns:
+        (sorted unique keys, int64 sums of weights per key; counts if no weights)
+    """
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse.reshape(-1), weights=weights, minlength=len(unique))
+    return unique, sums.astype(np.int64)
+
+
+class ColumnarOrders:
+    """
+    Typed-array view of /supplier/orders data.
+
+    Columns:
+    - nm_codes: int32 codes into the shared nmId vocabulary
+    - warehouse_codes: int32 codes into the shared warehouse vocabulary (stripped names)
+    - is_cancel: bool mask
+    """
+
+    def __init__(self, nm_codes, warehouse_codes, is_cancel, n_products: int, n_warehouses: int):
+        self.nm_codes = nm_codes
+        self.warehouse_codes = warehouse_codes
+        self.is_cancel = is_cancel
+        self.n_products = n_products
+        self.n_warehouses = n_warehouses
+
+    def __len__(self) -> int:
+        return len(self.nm_codes)
+
+    def product_counts(self, include_canceled: bool = True):
+        """
+        Order counts per nmId code.
+
+        Args:
+            include_canceled: Count canceled orders too (matches total_orders)
+
+        Returns:
+            int64 array indexed by nm code
+        """
+        nm_codes = self.nm_codes if include_canceled else self.nm_codes[~self.is_cancel]
+        return np.bincount(nm_codes, minlength=self.n_products)
+
+    def warehouse_counts(self):
+        """
+        Non-canceled order counts per (nmId, warehouse) pair, sparse.
+
+        Returns:
+            (pair keys, int64 counts), keys as in _pair_keys
+        """
+        active = ~self.is_cancel
+        keys = _pair_keys(self.nm_codes[active], self.warehouse_codes[active], self.n_warehouses)
+        return _group_sum(keys)
+
+
+class ColumnarRemains:
+    """
+    Typed-array view of /warehouse_remains data, one row per warehouse entry.
+
+    Columns:
+    - nm_codes: int32 codes into the shared nmId vocabulary
+    - warehouse_codes: int32 codes into the shared warehouse vocabulary
+    - quantities: int64 validated quantities
+    """
+
+    def __init__(self, nm_codes, warehouse_codes, quantities, n_products: int, n_warehouses: int):
+        self.nm_codes = nm_codes
+        self.warehouse_codes = warehouse_codes
+        self.quantities = quantities
+        self.n_products = n_products
+        self.n_warehouses = n_warehouses
+
+    def __len__(self) -> int:
+        return len(self.quantities)
+
+    def product_stock(self):
+        """
+        Total stock per nmId code.
+
+        Returns:
+            int64 array indexed by nm code
+        """
+        sums = np.bincount(self.nm_codes, weights=self.quantities, minlength=self.n_products)
+        return sums.astype(np.int64)
+
+    def warehouse_stock(self):
+        """
+        Stock per (nmId, warehouse) pair present in the feed (zero stock included), sparse.
+
+        Returns:
+            (pair keys, int64 sums), keys as in _pair_keys
+        """
+        keys = _pair_keys(self.nm_codes, self.warehouse_codes, self.n_warehouses)
+        return _group_sum(keys, weights=self.quantities)
+
+
+class ColumnarFeeds:
+    """
+    Orders and remains loaded with shared nmId/warehouse vocabularies.
+
+    Per-product and per-warehouse group-by results line up by code, so
+    stock, orders and turnover are combined with plain array arithmetic.
+    """
+
+    def __init__(self, warehouse_remains_data: Optional[List[Dict[str, Any]]] = None,
+                 orders_data: Optional[List[Dict[str, Any]]] = None):
+        """
+        Load both feeds once.
+
+        Args:
+            warehouse_remains_data: Data from /warehouse_remains API
+            orders_data: Data from /supplier/orders API
+        """
+        _require_numpy()
+
+        remains = [
+            (item.get("nmId") or 0, warehouse.get("warehouseName") or "", warehouse.get("quantity", 0))
+            for item in warehouse_remains_data or []
+            if "warehouses" in item
+            for warehouse in item["warehouses"]
+        ]
+        orders = orders_data or []
+
+        remains_nm = np.array([row[0] for row in remains], dtype=np.int64)
+        orders_nm = np.array([order.get("nmId") or 0 for order in orders], dtype=np.int64)
+        remains_wh = np.array([row[1] for row in remains], dtype=str)
+        orders_wh = np.array([(order.get("warehouseName") or "").strip() for order in orders], dtype=str)
+
+        self.nm_values, (remains_nm_codes, orders_nm_codes) = _encode(remains_nm, orders_nm)
+        self.warehouse_values, (remains_wh_codes, orders_wh_codes) = _encode(remains_wh, orders_wh)
+        n_products, n_warehouses = len(self.nm_values), len(self.warehouse_values)
+
+        self.remains = ColumnarRemains(
+            remains_nm_codes, remains_wh_codes, _quantities([row[2] for row in remains]),
+            n_products, n_warehouses
+        )
+        self.orders = ColumnarOrders(
+            orders_nm_codes, orders_wh_codes,
+            np.array([bool(order.get("isCancel", False)) for order in orders], dtype=bool),
+            n_products, n_warehouses
+        )
+
+        logger.debug(f"Loaded {len(self.remains)} warehouse entries and {len(self.orders)} orders "
+                    f"into columnar arrays ({n_products} products, {n_warehouses} warehouses)")
+
+    def totals_for(self, nm_ids: Sequence[int]):
+        """
+        Total orders and stock for a batch of products, aligned with nm_ids.
+
+        Args:
+            nm_ids: Product nmIds (unknown ids get zeros)
+
+        Returns:
+            (int64 total_orders, int64 total_stock) arrays
+        """
+        if not len(self.nm_values):
+            return np.zeros(len(nm_ids), dtype=np.int64), np.zeros(len(nm_ids), dtype=np.int64)
+
+        codes, found = _lookup(self.nm_values, nm_ids)
+        orders = np.where(found, self.orders.product_counts()[codes], 0)
+        stock = np.where(found, self.remains.product_stock()[codes], 0)
+        return orders.astype(np.int64), stock.astype(np.int64)
+
+    def product_totals(self) -> Dict[Any, Dict[str, Any]]:
+        """
+        Per-product stock, orders and turnover.
+
+        Returns:
+            Dict mapping nmId to total_stock, total_orders, active_orders, turnover
+        """
+        stock = self.remains.product_stock().tolist()
+        orders = self.orders.product_counts()
+        active_orders = self.orders.product_counts(include_canceled=False).tolist()
+        turnover = calculate_turnover_array(orders, stock).tolist()
+        orders = orders.tolist()
+
+        return {
+            nm_id: {
+                "total_stock": stock[code],
+                "total_orders": orders[code],
+                "active_orders": active_orders[code],
+                "turnover": turnover[code]
+            }
+            for code, nm_id in enumerate(self.nm_values.tolist())
+        }
+
+    def warehouse_totals(self) -> Dict[str, Dict[str, int]]:
+        """
+        Totals per warehouse across all products.
+
+        Returns:
+            Dict mapping warehouse name to total_stock/total_orders/product_count
+        """
+        n_warehouses = len(self.warehouse_values)
+        if not n_warehouses:
+            return {}
+
+        stock_keys, stock = self.remains.warehouse_stock()
+        order_keys, orders = self.orders.warehouse_counts()
+
+        stock_totals = np.bincount(stock_keys % n_warehouses, weights=stock, minlength=n_warehouses)
+        order_totals = np.bincount(order_keys % n_warehouses, weights=orders, minlength=n_warehouses)
+        # Pairs with stock or orders (order pairs always have a positive count)
+        active_pairs = np.union1d(stock_keys[stock > 0], order_keys)
+        product_counts = np.bincount(active_pairs % n_warehouses, minlength=n_warehouses)
+
+        return {
+            name: {
+                "total_stock": int(stock_totals[code]),
+                "total_orders": int(order_totals[code]),
+                "product_count": int(product_counts[code])
+            }
+            for code, name in enumerate(self.warehouse_values.tolist())
+            if stock_totals[code] or order_totals[code]
+        }
+
+
+def group_records_by_product(records: List[Dict[str, Any]]) -> Dict[Tuple[str, int], List[Dict]]:
+    """
+    Vectorised group_orders_by_product / group_warehouse_by_product.
+
+    Records are grouped by (supplierArticle, nmId) codes with one stable
+    argsort; records without supplierArticle or nmId are skipped. Groups
+    keep first-appearance order and records keep feed order, as in the
+    dict-based helpers.
+
+    Args:
+        records: Order or flat warehouse records
+
+    Returns:
+        Dict mapping (supplier_article, nm_id) to list of records
+    """
+    _require_numpy()
+
+    articles = np.array([record.get("supplierArticle") or "" for record in records], dtype=str)
+    nm_ids = np.array([record.get("nmId") or 0 for record in records], dtype=np.int64)
+
+    rows = np.flatnonzero((articles != "") & (nm_ids != 0))
+    if not len(rows):
+        return {}
+
+    _, (article_codes,) = _encode(articles[rows])
+    nm_values, (nm_codes,) = _encode(nm_ids[rows])
+    keys = article_codes.astype(np.int64) * len(nm_values) + nm_codes
+
+    _, first_seen, inverse, counts = np.unique(
+        keys, return_index=True, return_inverse=True, return_counts=True
+    )
+    # Renumber groups by first appearance, then sort rows stably by group
+    group_rank = np.empty(len(first_seen), dtype=np.int64)
+    group_rank[np.argsort(first_seen, kind="stable")] = np.arange(len(first_seen))
+    order = np.argsort(group_rank[inverse.reshape(-1)], kind="stable")
+    bounds = np.cumsum(counts[np.argsort(first_seen, kind="stable")])[:-1]
+
+    grouped = {}
+    for chunk in np.split(rows[order], bounds):
+        first = chunk[0]
+        key = (records[first].get("supplierArticle"), records[first].get("nmId"))
+        grouped[key] = [records[i] for i in chunk.tolist()]
+
+    return grouped
+
+
+def calculate_turnover_array(orders, stock):
+    """
+    Vectorised TurnoverCalculator.calculate_turnover.
+
+    Negative values are treated as zero, zero stock gives 0.0 and results
+    are rounded to 6 decimal places.
+
+    Args:
+        orders: Array-like of order counts
+        stock: Array-like of stock quantities
+
+    Returns:
+        float64 array of turnover ratios
+    """
+    _require_numpy()
+
+    orders_arr = np.maximum(np.asarray(orders, dtype=np.float64), 0.0)
+    stock_arr = np.maximum(np.asarray(stock, dtype=np.float64), 0.0)
+
+    turnover = np.zeros_like(stock_arr)
+    np.divide(orders_arr, stock_arr, out=turnover, where=stock_arr > 0)
+    return np.round(turnover, 6)
@@ -0,0 +1,153 @@
+"""
+Snapshot diff engine for product catalogs.
+
+Each product is reduced to a 64-bit fingerprint of its per-warehouse
+(name, stock, orders) vector. Two snapshots are aligned by key hash and
+their fingerprint arrays compared in one vectorised step, so only the
+products that actually changed reach the detailed
+AutomaticAggregator.detect_data_changes comparison.
+
+Equal fingerprints mean equal warehouse vectors (up to a 2^-64 hash
+collision), so unchanged products are never reported. A changed
+fingerprint may still yield no detailed change (e.g. reordered
+warehouses); the detailed diff stays authoritative.
+
+Fingerprints use Python's hash() and are only comparable within one
+process. Callers fall back to dict comparison when NumPy is not installed.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from stock_tracker.core.models import Product
+from stock_tracker.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def product_key(product: Product) -> str:
+    """Product key following urls.md grouping: supplierArticle + nmId."""
+    return f"{product.seller_article}_{product.wildberries_article}"
+
+
+def product_fingerprint(product: Product) -> int:
+    """Fingerprint of warehouse (name, stock, orders) vector in list order."""
+    return hash(tuple((wh.name, wh.stock, wh.orders) for wh in product.warehouses or ()))
+
+
+@dataclass
+class SnapshotDiff:
+    """Keys of added, removed and changed products."""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+class ProductSnapshot:
+    """
+    Fingerprinted catalog state.
+
+    Products with the same key keep the last occurrence, as in
+    RecalculationTriggerManager._group_products_by_key.
+    """
+
+    def __init__(self, products: List[Product], columnar: Optional[bool] = None):
+        """
+        Args:
+            products: Catalog state
+            columnar: Use NumPy arrays (default: when available)
+        """
+        self.source = products
+        self.products: Dict[str, Product] = {}
+        for product in products:
+            self.products[product_key(product)] = product
+
+        self.keys: List[str] = list(self.products)
+        fingerprints = [product_fingerprint(product) for product in self.products.values()]
+
+        self.columnar = NUMPY_AVAILABLE if columnar is None else columnar and NUMPY_AVAILABLE
+        if self.columnar:
+            count = len(self.keys)
+            self.key_hashes = np.fromiter((hash(key) for key in self.keys), dtype=np.int64, count=count)
+            self.fingerprints = np.array(fingerprints, dtype=np.int64)
+            # Key hash collision would break array alignment
+            self.unique_hashes = len(np.unique(self.key_hashes)) == count
+        else:
+            self.fingerprints = dict(zip(self.keys, fingerprints))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def fingerprint_map(self) -> Dict[str, int]:
+        """Fingerprints by product key."""
+        if self.columnar:
+            return dict(zip(self.keys, self.fingerprints.tolist()))
+        return self.fingerprints
+
+
+def _diff_columnar(old: ProductSnapshot, new: ProductSnapshot) -> SnapshotDiff:
+    _, old_idx, new_idx = np.intersect1d(
+        old.key_hashes, new.key_hashes, assume_unique=True, return_indices=True
+    )
+    changed_idx = new_idx[old.fingerprints[old_idx] != new.fingerprints[new_idx]]
+
+    added_mask = np.ones(len(new), dtype=bool)
+    added_mask[new_idx] = False
+    removed_mask = np.ones(len(old), dtype=bool)
+    removed_mask[old_idx] = False
+
+    return SnapshotDiff(
+        added=[new.keys[i] for i in np.flatnonzero(added_mask)],
+        removed=[old.keys[i] for i in np.flatnonzero(removed_mask)],
+        changed=[new.keys[i] for i in changed_idx],
+    )
+
+
+def _diff_python(old: ProductSnapshot, new: ProductSnapshot) -> SnapshotDiff:
+    old_fps = old.fingerprint_map()
+    new_fps = new.fingerprint_map()
+
+    diff = SnapshotDiff()
+    for key, fingerprint in new_fps.items():
+        old_fingerprint = old_fps.get(key)
+        if old_fingerprint is None:
+            diff.added.append(key)
+        elif old_fingerprint != fingerprint:
+            diff.changed.append(key)
+    diff.removed = [key for key in old_fps if key not in new_fps]
+    return diff
+
+
+def diff_snapshots(old: ProductSnapshot, new: ProductSnapshot) -> SnapshotDiff:
+    """
+    Find added, removed and changed products between two snapshots.
+
+    Args:
+        old: Previous catalog state
+        new: Current catalog state
+
+    Returns:
+        SnapshotDiff with product keys
+    """
+    if old.columnar and new.columnar and old.unique_hashes and new.unique_hashes:
+        diff = _diff_columnar(old, new)
+    else:
+        diff = _diff_python(old, new)
+
+    logger.debug(
+        f"Snapshot diff: {len(diff.added)} added, {len(diff.removed)} removed, "
+        f"{len(diff.changed)} changed of {len(new)} products"
+    )
+    return diff
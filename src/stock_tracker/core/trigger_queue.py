@@ -0,0 +1,168 @@
+"""
+Pending recalculation trigger queue.
+
+Trigger types, events and the debounced pending queue used by
+RecalculationTriggerManager (stock_tracker.services.triggers). Kept free of
+service dependencies so the queue can be used and tested on its own.
+"""
+
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from stock_tracker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TriggerType(Enum):
+    """Types of recalculation triggers."""
+    WAREHOUSE_DATA_CHANGE = "warehouse_data_change"
+    ORDER_DATA_CHANGE = "order_data_change" 
+    PERIODIC_SYNC = "periodic_sync"
+    MANUAL_TRIGGER = "manual_trigger"
+    DATA_VALIDATION_FAILURE = "data_validation_failure"
+
+
+@dataclass
+class TriggerEvent:
+    """Represents a trigger event for recalculation."""
+    trigger_id: str
+    trigger_type: TriggerType
+    product_ids: List[str]  # seller_article + nmId combinations
+    triggered_at: datetime
+    details: Dict[str, Any]
+    is_processed: bool = False
+
+
+TriggerKey = Tuple[TriggerType, FrozenSet[str]]
+
+
+class PendingTriggerQueue:
+    """
+    Pending trigger queue with O(1) debouncing.
+    
+    Triggers are kept in arrival order (deque) and indexed by
+    (trigger_type, frozenset(product_ids)), so duplicate detection and
+    trimming of the oldest entries do not scan the queue.
+    """
+    
+    def __init__(self, max_size: int = 1000):
+        """
+        Args:
+            max_size: Maximum number of pending triggers (oldest are dropped)
+        """
+        self.max_size = max_size
+        self._order: deque = deque()
+        self._latest: Dict[TriggerKey, TriggerEvent] = {}
+        self._type_counts: Counter = Counter()
+    
+    @staticmethod
+    def key(trigger_event: TriggerEvent) -> TriggerKey:
+        """Debounce key of trigger."""
+        return trigger_event.trigger_type, frozenset(trigger_event.product_ids)
+    
+    def __len__(self) -> int:
+        return len(self._order)
+    
+    def __iter__(self) -> Iterator[TriggerEvent]:
+        return iter(self._order)
+    
+    def find_similar(self, trigger_event: TriggerEvent, cutoff_time: datetime) -> Optional[TriggerEvent]:
+        """
+        Find pending trigger with the same type and products newer than cutoff.
+        
+        Args:
+            trigger_event: Trigger to check for duplicates
+            cutoff_time: Only triggers after this time are considered
+            
+        Returns:
+            Similar trigger if found, None otherwise
+        """
+        latest = self._latest.get(self.key(trigger_event))
+        if latest is not None and latest.triggered_at > cutoff_time:
+            return latest
+        return None
+    
+    def append(self, trigger_event: TriggerEvent) -> int:
+        """
+        Add trigger, dropping the oldest ones above max_size.
+        
+        Returns:
+            Number of dropped triggers
+        """
+        key = self.key(trigger_event)
+        latest = self._latest.get(key)
+        if latest is None or trigger_event.triggered_at >= latest.triggered_at:
+            self._latest[key] = trigger_event
+        
+        self._order.append(trigger_event)
+        self._type_counts[trigger_event.trigger_type] += 1
+        
+        removed_count = 0
+        while len(self._order) > self.max_size:
+            self._remove_oldest()
+            removed_count += 1
+        return removed_count
+    
+    def add_batch(self, trigger_events: Iterable[TriggerEvent], debounce_seconds: float,
+                  now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Debounce and add a batch of triggers.
+        
+        The whole batch shares one debounce window: a trigger is skipped if
+        a trigger with the same type and products was added after
+        now - debounce_seconds (including earlier triggers of this batch).
+        
+        Args:
+            trigger_events: Triggers to add
+            debounce_seconds: Debounce window
+            now: Reference time (defaults to datetime.now())
+            
+        Returns:
+            Counts of added, duplicate and dropped (queue overflow) triggers
+        """
+        stats = {"added": 0, "duplicates": 0, "dropped": 0}
+        cutoff_time = (now or datetime.now()) - timedelta(seconds=debounce_seconds)
+        
+        for trigger_event in trigger_events:
+            if self.find_similar(trigger_event, cutoff_time):
+                logger.debug(f"Skipping duplicate trigger: {trigger_event.trigger_id}")
+                stats["duplicates"] += 1
+                continue
+            
+            stats["dropped"] += self.append(trigger_event)
+            stats["added"] += 1
+            logger.debug(f"Added trigger: {trigger_event.trigger_id}")
+        
+        return stats
+    
+    def _remove_oldest(self):
+        oldest = self._order.popleft()
+        self._type_counts[oldest.trigger_type] -= 1
+        key = self.key(oldest)
+        if self._latest.get(key) is oldest:
+            del self._latest[key]
+    
+    def oldest(self) -> Optional[TriggerEvent]:
+        """Earliest added pending trigger."""
+        return self._order[0] if self._order else None
+    
+    def count_by_type(self, trigger_type: TriggerType) -> int:
+        """Number of pending triggers of type."""
+        return self._type_counts[trigger_type]
+    
+    def clear(self) -> List[TriggerEvent]:
+        """
+        Remove all pending triggers.
+        
+        Returns:
+            Removed triggers in arrival order
+        """
+        triggers = list(self._order)
+        self._order.clear()
+        self._latest.clear()
+        self._type_counts.clear()
+        return triggers
@@ -9,7 +9,7 @@ CRITICAL: All validation rules MUST match the data types from urls.md
 """
 
 import re
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 from datetime import datetime
 
 from stock_tracker.utils.exceptions import ValidationError
@@ -339,9 +339,24 @@ class WildberriesDataValidator:
                 expected_type="array"
             )
         
-        validated_data = []
+        return list(WildberriesDataValidator.iter_valid_warehouse_remains(data))
+    
+    @staticmethod
+    def iter_valid_warehouse_remains(items: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Validate warehouse remains records one by one.
         
-        for i, item in enumerate(data):
+        Streaming counterpart of validate_warehouse_remains_response: items
+        can come straight from a streamed download and are yielded without
+        collecting them. Invalid items are logged and skipped.
+        
+        Args:
+            items: Warehouse remains records
+            
+        Yields:
+            Valid records
+        """
+        for i, item in enumerate(items):
             try:
                 if not isinstance(item, dict):
                     raise ValidationError(
@@ -393,14 +408,12 @@ class WildberriesDataValidator:
                                 f"response[{i}].warehouses[{j}].quantity"
                             )
                 
-                validated_data.append(item)
-                
             except ValidationError as e:
                 logger.warning(f"Validation failed for warehouse remains item {i}: {e}")
                 # Continue processing other items, but log the error
                 continue
-        
-        return validated_data
+            
+            yield item
     
     @staticmethod
     def validate_supplier_orders_response(data: Any) -> List[Dict[str, Any]]:
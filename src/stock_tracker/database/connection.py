@@ -3,7 +3,7 @@ Database connection and session management.
 """
 
 from contextlib import contextmanager
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 import os
 from pathlib import Path
 
@@ -16,6 +16,8 @@ if _env_file.exists():
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from stock_tracker.utils.logger import get_logger
 
@@ -46,6 +48,67 @@ SessionLocal = sessionmaker(
 )
 
 
+# Async engine for FastAPI routes (asyncpg driver). Created lazily so that
+# Celery workers and CLI tools do not require asyncpg to be installed.
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_DATABASE_POOL_SIZE", "20"))
+ASYNC_MAX_OVERFLOW = int(os.getenv("ASYNC_DATABASE_MAX_OVERFLOW", "20"))
+ASYNC_POOL_TIMEOUT = float(os.getenv("ASYNC_DATABASE_POOL_TIMEOUT", "10"))
+ASYNC_POOL_RECYCLE = int(os.getenv("ASYNC_DATABASE_POOL_RECYCLE", "1800"))
+
+_async_engine: Optional[AsyncEngine] = None
+
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # Objects stay usable after commit without lazy reloads
+)
+
+
+def get_async_database_url(url: str = DATABASE_URL) -> str:
+    """
+    Convert DATABASE_URL to its asyncpg equivalent.
+    
+    postgresql:// and postgresql+psycopg2:// become postgresql+asyncpg://,
+    URLs that already name an async driver are returned unchanged.
+    """
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get (or create) the shared async engine."""
+    global _async_engine
+    
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            get_async_database_url(),
+            pool_size=ASYNC_POOL_SIZE,
+            max_overflow=ASYNC_MAX_OVERFLOW,
+            pool_timeout=ASYNC_POOL_TIMEOUT,  # Fail fast instead of queueing requests forever
+            pool_recycle=ASYNC_POOL_RECYCLE,
+            pool_pre_ping=True,
+            echo=False,
+        )
+        AsyncSessionLocal.configure(bind=_async_engine)
+        logger.info(
+            f"Async database engine created (pool_size={ASYNC_POOL_SIZE}, "
+            f"max_overflow={ASYNC_MAX_OVERFLOW})"
+        )
+    
+    return _async_engine
+
+
+async def dispose_async_engine():
+    """Close all pooled async connections (call on application shutdown)."""
+    global _async_engine
+    
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency for FastAPI to get database session.
@@ -62,6 +125,24 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for FastAPI to get async database session.
+    
+    Queries do not block the event loop, so one slow query does not stall
+    other requests served by the same worker.
+    
+    Usage:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Item))
+            ...
+    """
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @contextmanager
 def get_db_context() -> Generator[Session, None, None]:
     """
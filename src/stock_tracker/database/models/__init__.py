@@ -8,6 +8,10 @@ Models:
 - SyncLog: Sync operation history
 - RefreshToken: JWT refresh token management
 - WebhookConfig: Webhook configurations per tenant
+- WebhookDelivery: Outbox of pending webhook deliveries
+- TenantWarehouseStats: Per-tenant warehouse rollup for analytics
+- SupplierOrder: Incremental store of supplier/orders records per tenant
+- SupplierOrderCursor: lastChangeDate cursor of the orders sync
 """
 
 from .base import Base
@@ -16,8 +20,10 @@ from .user import User, UserRole
 from .subscription import Subscription
 from .sync_log import SyncLog
 from .refresh_token import RefreshToken
-from .webhook import WebhookConfig
+from .webhook import WebhookConfig, WebhookDelivery
 from .product import Product
+from .warehouse_stats import TenantWarehouseStats
+from .supplier_order import SupplierOrder, SupplierOrderCursor
 
 __all__ = [
     "Base",
@@ -31,5 +37,9 @@ __all__ = [
     "SyncLog",
     "RefreshToken",
     "WebhookConfig",
+    "WebhookDelivery",
     "Product",
+    "TenantWarehouseStats",
+    "SupplierOrder",
+    "SupplierOrderCursor",
 ]
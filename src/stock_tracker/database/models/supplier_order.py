@@ -0,0 +1,67 @@
+"""
+SupplierOrder models - incremental per-tenant store of WB supplier orders.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from .base import Base
+
+
+class SupplierOrder(Base):
+    """
+    Latest known version of a supplier/orders record, keyed on srid.
+
+    Filled incrementally by SupplierOrdersStore.sync (flag=0 paging by
+    lastChangeDate), so syncs read order windows locally instead of
+    re-downloading them. Timestamps are WB local time, as in the API.
+    """
+
+    __tablename__ = "supplier_orders"
+
+    # Composite primary key
+    tenant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    srid = Column(String(255), primary_key=True)
+
+    # Fields used for filtering and warehouse classification
+    nm_id = Column(Integer, nullable=True)
+    supplier_article = Column(String(255), nullable=True)
+    warehouse_name = Column(String(255), nullable=True)
+    warehouse_type = Column(String(100), nullable=True)
+    is_cancel = Column(Boolean, nullable=False, default=False)
+    order_date = Column(DateTime, nullable=True)
+    last_change_date = Column(DateTime, nullable=False)
+
+    # Raw API record, returned unchanged to callers
+    data = Column(JSONB, nullable=False)
+
+    __table_args__ = (
+        Index("ix_supplier_orders_tenant_last_change", "tenant_id", "last_change_date"),
+        Index("ix_supplier_orders_tenant_date", "tenant_id", "order_date"),
+    )
+
+    def __repr__(self):
+        return f"<SupplierOrder(tenant={self.tenant_id}, srid='{self.srid}', nm_id={self.nm_id})>"
+
+
+class SupplierOrderCursor(Base):
+    """lastChangeDate cursor of the incremental supplier/orders sync per tenant."""
+
+    __tablename__ = "supplier_order_cursors"
+
+    tenant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    last_change_date = Column(DateTime, nullable=False)
+    synced_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SupplierOrderCursor(tenant={self.tenant_id}, last_change_date={self.last_change_date})>"
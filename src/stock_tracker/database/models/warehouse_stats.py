@@ -0,0 +1,48 @@
+"""
+TenantWarehouseStats model - per-tenant warehouse rollup.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base
+
+
+class TenantWarehouseStats(Base):
+    """
+    Rollup of products.warehouse_data per tenant and warehouse.
+    
+    Refreshed at the end of each sync (AnalyticsService.refresh_warehouse_stats)
+    so analytics reads touch one row per warehouse instead of every product.
+    """
+    
+    __tablename__ = "tenant_warehouse_stats"
+    
+    # Composite primary key
+    tenant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    warehouse_name = Column(String(255), primary_key=True)
+    
+    # Aggregates
+    total_stock = Column(Integer, nullable=False, default=0)
+    total_orders = Column(Integer, nullable=False, default=0)
+    product_count = Column(Integer, nullable=False, default=0)
+    turnover_days = Column(Float, nullable=False, default=0.0)  # stock * 7 / orders
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_tenant_warehouse_stats_tenant_stock", "tenant_id", "total_stock"),
+    )
+    
+    def __repr__(self):
+        return (
+            f"<TenantWarehouseStats(tenant={self.tenant_id}, warehouse='{self.warehouse_name}', "
+            f"stock={self.total_stock}, orders={self.total_orders})>"
+        )
@@ -5,7 +5,7 @@ WebhookConfig model - webhook configuration per tenant.
 from datetime import datetime
 import uuid
 
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -62,3 +62,61 @@ class WebhookConfig(Base):
         """Reset failure count on successful delivery."""
         self.failure_count = 0
         self.last_failure_at = None
+
+
+class WebhookDelivery(Base):
+    """
+    Outbox entry for one webhook delivery.
+    
+    Sync tasks only insert rows here; the deliver_webhooks task sends them
+    asynchronously and reschedules failures with exponential backoff.
+    
+    Status: pending -> delivered | failed
+    """
+    
+    __tablename__ = "webhook_deliveries"
+    
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Relationships
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
+    webhook_config_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("webhook_configs.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    
+    # Event
+    event_type = Column(String(100), nullable=False)
+    data = Column(JSONB, nullable=False)
+    
+    # Delivery State
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    config = relationship("WebhookConfig")
+    
+    __table_args__ = (
+        # Due pending deliveries, scanned by the delivery worker
+        Index(
+            "ix_webhook_deliveries_due",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+    
+    def __repr__(self):
+        return (
+            f"<WebhookDelivery(id={self.id}, event='{self.event_type}', "
+            f"status={self.status}, attempts={self.attempts})>"
+        )
@@ -1548,6 +1548,7 @@ class SheetsOperations:
                 try:
                     return new_loop.run_until_complete(wb_client.get_all_product_stock_data())
                 finally:
+                    new_loop.run_until_complete(wb_client.aclose())
                     new_loop.close()
             
             # Запускаем в отдельном потоке
@@ -1575,6 +1576,7 @@ class SheetsOperations:
                 try:
                     return new_loop.run_until_complete(wb_client.get_warehouse_remains_with_retry(max_wait_time=900))
                 finally:
+                    new_loop.run_until_complete(wb_client.aclose())
                     new_loop.close()
             
             # Запускаем в отдельном потоке
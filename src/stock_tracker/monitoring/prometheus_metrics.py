@@ -111,6 +111,13 @@ class PrometheusMetrics:
             registry=registry,
         )
         
+        self.cache_stale = Counter(
+            "stock_tracker_cache_stale_total",
+            "Total stale cache values served while refreshing",
+            ["cache_key"],
+            registry=registry,
+        )
+        
         # Celery task metrics
         self.celery_tasks_total = Counter(
             "stock_tracker_celery_tasks_total",
@@ -207,6 +214,10 @@ class PrometheusMetrics:
         """Track cache miss."""
         self.cache_misses.labels(cache_key=cache_key).inc()
     
+    def track_cache_stale(self, cache_key: str):
+        """Track stale value served (stale-while-revalidate)."""
+        self.cache_stale.labels(cache_key=cache_key).inc()
+    
     def track_celery_task(self, task_name: str, status: str):
         """
         Track Celery task execution.
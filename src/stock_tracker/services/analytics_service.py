@@ -5,10 +5,11 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc, case, cast, column, distinct, true, select, delete, literal, Integer, Float, Numeric
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.orm import Session
 
-from stock_tracker.database.models import Product, SyncLog, Tenant
+from stock_tracker.database.models import Product, SyncLog, Tenant, TenantWarehouseStats
 
 logger = logging.getLogger(__name__)
 
@@ -39,37 +40,23 @@ class AnalyticsService:
         """
         logger.info(f"Generating dashboard summary for tenant {self.tenant.id}")
         
-        # Total products
-        total_products = self.db.query(func.count(Product.id)).filter(
-            Product.tenant_id == self.tenant.id
-        ).scalar() or 0
-        
-        # Total stock
-        total_stock = self.db.query(func.sum(Product.total_stock)).filter(
-            Product.tenant_id == self.tenant.id
-        ).scalar() or 0
-        
-        # Total orders
-        total_orders = self.db.query(func.sum(Product.total_orders)).filter(
-            Product.tenant_id == self.tenant.id
-        ).scalar() or 0
-        
-        # Low stock products (< 10 units)
-        low_stock_count = self.db.query(func.count(Product.id)).filter(
-            and_(
-                Product.tenant_id == self.tenant.id,
-                Product.total_stock < 10,
-                Product.total_stock > 0
-            )
-        ).scalar() or 0
-        
-        # Out of stock products
-        out_of_stock_count = self.db.query(func.count(Product.id)).filter(
-            and_(
-                Product.tenant_id == self.tenant.id,
-                Product.total_stock == 0
-            )
-        ).scalar() or 0
+        # All product metrics in one pass over the tenant's rows
+        tenant_filter = Product.tenant_id == self.tenant.id
+        totals = self.db.query(
+            func.count(Product.id).label("total_products"),
+            func.coalesce(func.sum(Product.total_stock), 0).label("total_stock"),
+            func.coalesce(func.sum(Product.total_orders), 0).label("total_orders"),
+            func.count(Product.id).filter(
+                and_(Product.total_stock < 10, Product.total_stock > 0)
+            ).label("low_stock_count"),
+            func.count(Product.id).filter(Product.total_stock == 0).label("out_of_stock_count"),
+        ).filter(tenant_filter).one()
+        
+        total_products = totals.total_products or 0
+        total_stock = totals.total_stock or 0
+        total_orders = totals.total_orders or 0
+        low_stock_count = totals.low_stock_count or 0
+        out_of_stock_count = totals.out_of_stock_count or 0
         
         # Last sync info
         last_sync = self.db.query(SyncLog).filter(
@@ -227,33 +214,30 @@ class AnalyticsService:
         """
         logger.info("Calculating stock distribution")
         
-        # Query all products
-        products = self.db.query(Product.total_stock).filter(
+        stock = func.coalesce(Product.total_stock, 0)
+        bucket = case(
+            (stock == 0, "out_of_stock"),   # 0
+            (stock <= 5, "critical"),       # 1-5
+            (stock <= 20, "low"),           # 6-20
+            (stock <= 50, "medium"),        # 21-50
+            (stock <= 100, "good"),         # 51-100
+            else_="excellent"               # 100+
+        ).label("bucket")
+        
+        rows = self.db.query(bucket, func.count(Product.id)).filter(
             Product.tenant_id == self.tenant.id
-        ).all()
+        ).group_by("bucket").all()
         
         distribution = {
-            "out_of_stock": 0,      # 0
-            "critical": 0,           # 1-5
-            "low": 0,                # 6-20
-            "medium": 0,             # 21-50
-            "good": 0,               # 51-100
-            "excellent": 0           # 100+
+            "out_of_stock": 0,
+            "critical": 0,
+            "low": 0,
+            "medium": 0,
+            "good": 0,
+            "excellent": 0
         }
-        
-        for (stock,) in products:
-            if stock == 0:
-                distribution["out_of_stock"] += 1
-            elif stock <= 5:
-                distribution["critical"] += 1
-            elif stock <= 20:
-                distribution["low"] += 1
-            elif stock <= 50:
-                distribution["medium"] += 1
-            elif stock <= 100:
-                distribution["good"] += 1
-            else:
-                distribution["excellent"] += 1
+        for name, count in rows:
+            distribution[name] = count
         
         return distribution
     
@@ -261,45 +245,136 @@ class AnalyticsService:
         """
         Get stock breakdown by warehouse
         
+        Reads the tenant_warehouse_stats rollup refreshed after each sync and
+        falls back to aggregating products.warehouse_data when the tenant has
+        no rollup rows yet.
+        
         Returns:
             List of warehouse statistics
         """
         logger.info("Calculating warehouse breakdown")
         
-        products = self.db.query(Product).filter(
-            Product.tenant_id == self.tenant.id
+        stats = self.db.query(TenantWarehouseStats).filter(
+            TenantWarehouseStats.tenant_id == self.tenant.id
+        ).order_by(desc(TenantWarehouseStats.total_stock)).all()
+        
+        if stats:
+            return [
+                {
+                    "warehouse_name": row.warehouse_name,
+                    "total_stock": row.total_stock,
+                    "total_orders": row.total_orders,
+                    "product_count": row.product_count,
+                    "turnover_days": row.turnover_days
+                }
+                for row in stats
+            ]
+        
+        rows = self.db.execute(
+            self._warehouse_rollup_select().order_by(desc("total_stock"))
         ).all()
         
-        warehouse_stats: Dict[str, Dict[str, int]] = {}
+        return [
+            {
+                "warehouse_name": row.warehouse_name,
+                "total_stock": int(row.total_stock or 0),
+                "total_orders": int(row.total_orders or 0),
+                "product_count": row.product_count,
+                "turnover_days": float(row.turnover_days or 0)
+            }
+            for row in rows
+        ]
+    
+    def refresh_warehouse_stats(self) -> Dict[str, int]:
+        """
+        Refresh the tenant_warehouse_stats rollup for this tenant.
         
-        for product in products:
-            if product.warehouse_data:
-                for warehouse_name, data in product.warehouse_data.items():
-                    if warehouse_name not in warehouse_stats:
-                        warehouse_stats[warehouse_name] = {
-                            "total_stock": 0,
-                            "total_orders": 0,
-                            "product_count": 0
-                        }
-                    
-                    warehouse_stats[warehouse_name]["total_stock"] += data.get("stock", 0)
-                    warehouse_stats[warehouse_name]["total_orders"] += data.get("orders", 0)
-                    warehouse_stats[warehouse_name]["product_count"] += 1
-        
-        # Convert to list
-        result = []
-        for warehouse_name, stats in warehouse_stats.items():
-            result.append({
-                "warehouse_name": warehouse_name,
-                "total_stock": stats["total_stock"],
-                "total_orders": stats["total_orders"],
-                "product_count": stats["product_count"]
-            })
+        Upserts only warehouses whose aggregates changed and deletes
+        warehouses that no longer appear in any product. Does not commit.
         
-        # Sort by total stock
-        result.sort(key=lambda x: x["total_stock"], reverse=True)
+        Returns:
+            Dictionary with upserted and deleted row counts
+        """
+        logger.info(f"Refreshing warehouse stats for tenant {self.tenant.id}")
+        
+        source = self._warehouse_rollup_select().subquery("rollup")
+        
+        stmt = pg_insert(TenantWarehouseStats).from_select(
+            ["tenant_id", "warehouse_name", "total_stock", "total_orders",
+             "product_count", "turnover_days", "updated_at"],
+            select(
+                literal(self.tenant.id, TenantWarehouseStats.tenant_id.type),
+                source.c.warehouse_name,
+                source.c.total_stock,
+                source.c.total_orders,
+                source.c.product_count,
+                source.c.turnover_days,
+                func.now()
+            )
+        )
         
-        return result
+        # Unchanged warehouses are left alone
+        changed = or_(
+            TenantWarehouseStats.total_stock.is_distinct_from(stmt.excluded.total_stock),
+            TenantWarehouseStats.total_orders.is_distinct_from(stmt.excluded.total_orders),
+            TenantWarehouseStats.product_count.is_distinct_from(stmt.excluded.product_count),
+            TenantWarehouseStats.turnover_days.is_distinct_from(stmt.excluded.turnover_days)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TenantWarehouseStats.tenant_id, TenantWarehouseStats.warehouse_name],
+            set_={
+                "total_stock": stmt.excluded.total_stock,
+                "total_orders": stmt.excluded.total_orders,
+                "product_count": stmt.excluded.product_count,
+                "turnover_days": stmt.excluded.turnover_days,
+                "updated_at": stmt.excluded.updated_at
+            },
+            where=changed
+        )
+        upserted = self.db.execute(stmt).rowcount
+        
+        current_names = select(source.c.warehouse_name)
+        deleted = self.db.execute(
+            delete(TenantWarehouseStats).where(
+                TenantWarehouseStats.tenant_id == self.tenant.id,
+                TenantWarehouseStats.warehouse_name.not_in(current_names)
+            )
+        ).rowcount
+        
+        logger.info(f"Warehouse stats refreshed: {upserted} upserted, {deleted} deleted")
+        return {"upserted": upserted, "deleted": deleted}
+    
+    def _warehouse_rollup_select(self):
+        """
+        Per-warehouse aggregate over products.warehouse_data.
+        
+        Expands warehouse_data->'warehouses' with jsonb_array_elements.
+        Turnover is days of stock: total_stock * 7 / total_orders.
+        """
+        # warehouse_data = {"warehouses": [{"name": ..., "stock": ..., "orders": ...}, ...]}
+        warehouses = Product.warehouse_data["warehouses"]
+        entry = func.jsonb_array_elements(warehouses).table_valued(
+            column("value", JSONB)
+        ).alias("wh")
+        warehouse_name = entry.c.value.op("->>")("name")
+        total_stock = func.sum(func.coalesce(cast(entry.c.value.op("->>")("stock"), Integer), 0))
+        total_orders = func.sum(func.coalesce(cast(entry.c.value.op("->>")("orders"), Integer), 0))
+        turnover_days = case(
+            (total_orders > 0, func.round(cast(total_stock * 7, Numeric) / total_orders, 1)),
+            else_=0
+        )
+        
+        return select(
+            warehouse_name.label("warehouse_name"),
+            total_stock.label("total_stock"),
+            total_orders.label("total_orders"),
+            func.count(distinct(Product.id)).label("product_count"),
+            cast(turnover_days, Float).label("turnover_days")
+        ).select_from(Product).join(entry, true()).where(
+            Product.tenant_id == self.tenant.id,
+            func.jsonb_typeof(warehouses) == "array",
+            warehouse_name.isnot(None)
+        ).group_by("warehouse_name")
     
     def _calculate_health_score(
         self,
@@ -21,7 +21,7 @@ from stock_tracker.core.models import Product, Warehouse
 from stock_tracker.database.operations import SheetsOperations
 from stock_tracker.core.formatter import ProductDataFormatter
 from stock_tracker.utils.logger import get_logger
-from stock_tracker.utils.exceptions import BatchProcessingError, ValidationError
+from stock_tracker.utils.exceptions import BatchProcessingError, CalculationError, ValidationError
 
 logger = get_logger(__name__)
 
@@ -365,6 +365,13 @@ class MultiWarehouseBatchProcessor:
         try:
             logger.info(f"Processing warehouse data for {len(products)} products")
             
+            # Orders and warehouse data are indexed once for all products
+            updated_products = self._aggregate_batch(products, orders_data, warehouse_data)
+            if updated_products is not None:
+                batch_result.processed_products += len(updated_products)
+                logger.info(f"Warehouse data processing completed: {len(updated_products)} products")
+                return updated_products
+            
             updated_products = []
             
             # Process products in batches for memory efficiency
@@ -407,6 +414,24 @@ class MultiWarehouseBatchProcessor:
             batch_result.errors.append(f"Data processing failed: {e}")
             raise BatchProcessingError(f"Warehouse data processing failed: {e}")
     
+    def _aggregate_batch(self, products: List[Product],
+                         orders_data: List[Dict[str, Any]],
+                         warehouse_data: List[Dict[str, Any]]) -> Optional[List[Product]]:
+        """
+        Aggregate products from one orders/warehouse index.
+        
+        Returns:
+            Updated products, or None if they have to be processed
+            product by product
+        """
+        try:
+            return self.aggregator.calculate_products_totals_automatic(
+                products, orders_data, warehouse_data
+            )
+        except CalculationError as e:
+            logger.warning(f"Batch aggregation failed ({e}), updating products one by one")
+            return None
+    
     async def _update_sheets_batches(self, products: List[Product],
                                    batch_result: BatchProcessingResult) -> Dict[str, Any]:
         """
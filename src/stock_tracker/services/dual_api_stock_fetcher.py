@@ -266,10 +266,14 @@ class DualAPIStockFetcher:
         
         return result
     
-    def get_all_stocks_summary(self) -> Dict[str, int]:
+    def get_all_stocks_summary(self, stocks: Dict[str, any] = None) -> Dict[str, int]:
         """
         Get summary of all stocks
         
+        Args:
+            stocks: Result of get_combined_stocks_by_article() if already fetched
+                    (avoids fetching all stocks a second time)
+        
         Returns:
             {
                 "total_fbo": 1000,
@@ -280,7 +284,8 @@ class DualAPIStockFetcher:
             }
         """
         try:
-            stocks = self.get_combined_stocks_by_article()
+            if stocks is None:
+                stocks = self.get_combined_stocks_by_article()
             
             # Validate stocks is a dictionary
             if not isinstance(stocks, dict):
@@ -11,8 +11,11 @@ Each tenant gets their own Google Sheet with automatic updates.
 - Улучшенное форматирование с толстыми границами между секциями
 """
 
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
 import time
@@ -21,9 +24,11 @@ from functools import wraps
 import gspread
 from gspread.http_client import BackOffHTTPClient
 from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound, GSpreadException
+from gspread.utils import ValueRenderOption
 from google.oauth2.service_account import Credentials
 from sqlalchemy.orm import Session
 
+from stock_tracker.cache import get_cache
 from stock_tracker.database.models import Tenant, Product
 from stock_tracker.services.tenant_credentials import get_encryptor
 from stock_tracker.utils.exceptions import (
@@ -85,6 +90,166 @@ def retry_on_api_error(max_retries: int = 3, backoff_factor: float = 1.5):
     return decorator
 
 
+# Колонка "Артикул товара (nmid)" (0-based) - по ней отпечаток сверяется с листом
+NM_ID_COL = 3
+
+# Время жизни общего отпечатка: после истечения следующая синхронизация
+# будет полной, так что ручные правки листа исправляются не позже этого срока
+GRID_FINGERPRINT_TTL = int(os.getenv("SHEETS_GRID_FINGERPRINT_TTL", "3600"))
+
+# Блокировка записи в лист на время batch_update
+GRID_WRITE_LOCK_TIMEOUT = 300
+
+
+def _digest(values: List[Any]) -> str:
+    """Стабильный между процессами хэш значений (тип учитывается: 5 и '5' пишутся по-разному)"""
+    payload = json.dumps(
+        [[type(value).__name__, value] for value in values],
+        ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _nm_id_column_digest(values: List[Any]) -> str:
+    """Хэш колонки nmId в виде, одинаковом для сетки и значений, прочитанных из листа"""
+    normalized = []
+    for value in values:
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        normalized.append("" if value is None else str(value))
+    while normalized and normalized[-1] == "":
+        normalized.pop()  # Sheets API не возвращает пустой хвост колонки
+    return _digest(normalized)
+
+
+@dataclass
+class GridFingerprint:
+    """
+    Отпечаток последней записанной в лист сетки.
+    
+    Хранит sha1-хэши строк (включая 2 строки заголовков), раскладку складов
+    и хэш колонки nmId. Используется инкрементальным режимом синхронизации,
+    чтобы отправлять в Sheets API только изменившиеся строки.
+    """
+    warehouses: Tuple[str, ...]
+    num_cols: int
+    rows: List[str] = field(default_factory=list)
+    nm_ids: str = ""
+    
+    @staticmethod
+    def hash_row(row: List[Any]) -> str:
+        """Хэш строки"""
+        return _digest(row)
+    
+    @classmethod
+    def from_grid(cls, warehouses: List[str], grid: List[List[Any]]) -> "GridFingerprint":
+        num_cols = len(grid[1]) if len(grid) > 1 else 0
+        return cls(
+            warehouses=tuple(warehouses),
+            num_cols=num_cols,
+            rows=[cls.hash_row(row) for row in grid],
+            nm_ids=_nm_id_column_digest([row[NM_ID_COL] for row in grid[2:]])
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"warehouses": list(self.warehouses), "num_cols": self.num_cols,
+                "rows": self.rows, "nm_ids": self.nm_ids}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GridFingerprint":
+        return cls(
+            warehouses=tuple(data["warehouses"]),
+            num_cols=data["num_cols"],
+            rows=list(data["rows"]),
+            nm_ids=data.get("nm_ids", "")
+        )
+    
+    def matches_sheet(self, nm_id_column: List[Any]) -> bool:
+        """
+        Сверить отпечаток с колонкой nmId, прочитанной из листа.
+        
+        Ловит удалённые, добавленные и пересортированные вручную строки.
+        
+        Args:
+            nm_id_column: Значения колонки nmId листа (без двух строк заголовков)
+        """
+        return _nm_id_column_digest(nm_id_column) == self.nm_ids
+    
+    def changed_blocks(self, other: "GridFingerprint") -> List[Tuple[int, int, int, int]]:
+        """
+        Вычислить изменившиеся прямоугольники относительно нового отпечатка.
+        
+        Изменённая строка переписывается целиком; соседние изменённые строки
+        объединяются в один блок.
+        
+        Args:
+            other: Отпечаток новой сетки
+            
+        Returns:
+            Список (start_row, end_row, start_col, end_col), полуинтервалы
+        """
+        blocks: List[Tuple[int, int, int, int]] = []
+        current: Optional[List[int]] = None
+        
+        for row_idx, new_row in enumerate(other.rows):
+            old_row = self.rows[row_idx] if row_idx < len(self.rows) else None
+            if old_row == new_row:
+                if current:
+                    blocks.append(tuple(current))
+                    current = None
+                continue
+            
+            if current:
+                current[1] = row_idx + 1
+            else:
+                current = [row_idx, row_idx + 1, 0, other.num_cols]
+        
+        if current:
+            blocks.append(tuple(current))
+        
+        return blocks
+
+
+class GridFingerprintStore:
+    """
+    Общий для всех процессов отпечаток листа в Redis.
+    
+    Ключ - tenant / spreadsheet / worksheet. Ключ не регистрируется в наборе
+    ключей tenant, поэтому сброс кэша tenant его не удаляет. Без Redis
+    (NoOpCache) отпечаток не сохраняется и каждая синхронизация выполняется
+    полностью.
+    """
+    
+    def __init__(self, tenant_id: Any, spreadsheet_id: str, worksheet_id: int, cache=None):
+        cache = cache if cache is not None else get_cache()
+        # Читаем мимо L1: устаревшая локальная копия пропустила бы изменения
+        self.cache = getattr(cache, "remote", cache)
+        self.tenant_id = str(tenant_id)
+        self.key = f"sheets:fingerprint:{spreadsheet_id}:{worksheet_id}"
+    
+    def load(self) -> Optional[GridFingerprint]:
+        data = self.cache.get(self.tenant_id, self.key)
+        if not data:
+            return None
+        try:
+            return GridFingerprint.from_dict(data)
+        except (KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed grid fingerprint {self.key}: {e}")
+            return None
+    
+    def save(self, fingerprint: GridFingerprint) -> None:
+        self.cache.set(self.tenant_id, self.key, fingerprint.to_dict(), ttl=GRID_FINGERPRINT_TTL, track=False)
+    
+    def invalidate(self) -> None:
+        self.cache.delete(self.tenant_id, self.key)
+    
+    def acquire_write_lock(self) -> Optional[str]:
+        return self.cache.acquire_lock(self.tenant_id, self.key, GRID_WRITE_LOCK_TIMEOUT)
+    
+    def release_write_lock(self, token: str) -> None:
+        self.cache.release_lock(self.tenant_id, self.key, token)
+
+
 class GoogleSheetsService:
     """Service for managing tenant Google Sheets with horizontal warehouse layout"""
     
@@ -787,6 +952,21 @@ class GoogleSheetsService:
             }
         }
     
+    def _build_clear_rows_request(self, sheet_id: int, start_row: int, end_row: int, cols: int) -> dict:
+        """Построить request для очистки хвостовых строк (значения и формат)"""
+        return {
+            'updateCells': {
+                'range': {
+                    'sheetId': sheet_id,
+                    'startRowIndex': start_row,
+                    'endRowIndex': end_row,
+                    'startColumnIndex': 0,
+                    'endColumnIndex': cols
+                },
+                'fields': 'userEnteredValue,userEnteredFormat'
+            }
+        }
+    
     def _build_merge_requests(self, sheet_id: int, num_warehouses: int) -> List[dict]:
         """
         Построить requests для объединения ячеек заголовков.
@@ -867,14 +1047,34 @@ class GoogleSheetsService:
         """
         all_rows = [header_row1, header_row2] + data_rows
         
+        return self._build_cells_update_request(sheet_id, all_rows, 0, 0, len(header_row2))
+    
+    @staticmethod
+    def _build_cells_update_request(
+        sheet_id: int,
+        rows: List[List],
+        start_row: int,
+        start_col: int,
+        end_col: int
+    ) -> dict:
+        """
+        Построить updateCells request для прямоугольника значений.
+        
+        Args:
+            sheet_id: ID листа
+            rows: Строки сетки (каждая срезается до [start_col:end_col])
+            start_row: Индекс первой строки (0-based)
+            start_col: Индекс первой колонки (0-based)
+            end_col: Индекс колонки после последней (0-based)
+        """
         return {
             'updateCells': {
                 'range': {
                     'sheetId': sheet_id,
-                    'startRowIndex': 0,
-                    'endRowIndex': len(all_rows),
-                    'startColumnIndex': 0,
-                    'endColumnIndex': len(header_row2)
+                    'startRowIndex': start_row,
+                    'endRowIndex': start_row + len(rows),
+                    'startColumnIndex': start_col,
+                    'endColumnIndex': end_col
                 },
                 'rows': [
                     {
@@ -886,10 +1086,10 @@ class GoogleSheetsService:
                                     else {}
                                 )
                             }
-                            for cell in row
+                            for cell in row[start_col:end_col]
                         ]
                     }
-                    for row in all_rows
+                    for row in rows
                 ],
                 'fields': 'userEnteredValue'
             }
@@ -1118,18 +1318,66 @@ class GoogleSheetsService:
         
         return warehouse_list
     
+    def _build_incremental_requests(
+        self,
+        sheet_id: int,
+        grid: List[List],
+        previous: GridFingerprint,
+        current: GridFingerprint,
+        num_warehouses: int
+    ) -> Tuple[List[dict], int]:
+        """
+        Построить requests только для изменившихся строк.
+        
+        Раскладка складов не изменилась, поэтому merge/dimension requests
+        не нужны. Форматирование и границы переотправляются только при
+        изменении количества строк.
+        
+        Returns:
+            (requests, количество изменённых диапазонов)
+        """
+        requests = []
+        blocks = previous.changed_blocks(current)
+        
+        for start_row, end_row, start_col, end_col in blocks:
+            requests.append(self._build_cells_update_request(
+                sheet_id, grid[start_row:end_row], start_row, start_col, end_col
+            ))
+        
+        if len(previous.rows) != len(current.rows):
+            data_rows_count = len(grid) - 2
+            if len(previous.rows) > len(current.rows):
+                requests.append(self._build_clear_rows_request(
+                    sheet_id, len(current.rows), len(previous.rows), current.num_cols
+                ))
+            requests.extend(self._build_format_requests(sheet_id, data_rows_count, current.num_cols))
+            requests.extend(self._build_border_requests(sheet_id, data_rows_count, current.num_cols, num_warehouses))
+        
+        return requests, len(blocks)
+    
     def sync_products_to_sheet(
         self,
         products: List[Product],
-        db: Session
+        db: Session,
+        incremental: bool = False
     ) -> Dict[str, Any]:
         """
         Synchronize products to Google Sheet - ОПТИМИЗИРОВАННАЯ ВЕРСИЯ с batch_update.
         ВСЕ операции выполняются в ОДНОМ API вызове.
         
+        В инкрементальном режиме сетка сравнивается с отпечатком последней
+        записи в этот лист и отправляются только изменившиеся строки.
+        Отпечаток общий для всех воркеров (Redis, GridFingerprintStore),
+        живёт SHEETS_GRID_FINGERPRINT_TTL секунд и перед использованием
+        сверяется с колонкой nmId листа. Полная перезапись
+        (unmerge/clear/merge/format/borders/dimensions) выполняется, если
+        отпечатка нет, он не совпал с листом, изменилась раскладка складов
+        или лист сейчас пишет другой процесс.
+        
         Args:
             products: List of Product instances to sync
             db: Database session
+            incremental: Send only changed ranges when possible
             
         Returns:
             Dict with sync statistics
@@ -1217,42 +1465,100 @@ class GoogleSheetsService:
                 worksheet.resize(rows=new_rows, cols=new_cols)
                 logger.info(f"Resized to {new_rows}x{new_cols}")
             
+            grid = [header_row1, header_row2] + data_rows
+            fingerprint = GridFingerprint.from_grid(self._warehouse_names, grid)
+            fingerprint_store = GridFingerprintStore(self.tenant.id, spreadsheet.id, worksheet.id)
+            api_calls = 1
+            
+            # Пока идёт запись, другие процессы не сравнивают себя с этим листом
+            lock_token = fingerprint_store.acquire_write_lock()
+            
+            previous = None
+            if incremental and lock_token is not None:
+                previous = fingerprint_store.load()
+                if previous is not None:
+                    # Ручные правки, удалённые или пересортированные строки - полная перезапись
+                    nm_id_column = worksheet.col_values(
+                        NM_ID_COL + 1, value_render_option=ValueRenderOption.unformatted
+                    )[2:]
+                    api_calls += 1
+                    if not previous.matches_sheet(nm_id_column):
+                        logger.info("Sheet differs from stored fingerprint, falling back to full rewrite")
+                        previous = None
+            
+            full_rewrite = (
+                previous is None
+                or previous.warehouses != fingerprint.warehouses
+                or previous.num_cols != fingerprint.num_cols
+            )
+            
             # === BATCH_UPDATE ДЛЯ ВСЕХ ОПЕРАЦИЙ ===
             all_requests = []
+            changed_ranges = 0
             
-            all_requests.append(self._build_unmerge_request(worksheet.id, num_cols_needed))
-            all_requests.append(self._build_clear_request(worksheet.id, current_rows, current_cols))
-            all_requests.append(self._build_data_update_request(worksheet.id, header_row1, header_row2, data_rows))
-            all_requests.extend(self._build_merge_requests(worksheet.id, num_warehouses))
-            all_requests.extend(self._build_format_requests(worksheet.id, len(data_rows), num_cols_needed))
-            all_requests.extend(self._build_border_requests(worksheet.id, len(data_rows), num_cols_needed, num_warehouses))
-            all_requests.extend(self._build_dimension_requests(worksheet.id, num_cols_needed))
+            if full_rewrite:
+                all_requests.append(self._build_unmerge_request(worksheet.id, num_cols_needed))
+                all_requests.append(self._build_clear_request(worksheet.id, current_rows, current_cols))
+                all_requests.append(self._build_data_update_request(worksheet.id, header_row1, header_row2, data_rows))
+                all_requests.extend(self._build_merge_requests(worksheet.id, num_warehouses))
+                all_requests.extend(self._build_format_requests(worksheet.id, len(data_rows), num_cols_needed))
+                all_requests.extend(self._build_border_requests(worksheet.id, len(data_rows), num_cols_needed, num_warehouses))
+                all_requests.extend(self._build_dimension_requests(worksheet.id, num_cols_needed))
+            else:
+                all_requests, changed_ranges = self._build_incremental_requests(
+                    worksheet.id, grid, previous, fingerprint, num_warehouses
+                )
+                logger.info(f"Incremental sync: {changed_ranges} changed ranges")
             
             prep_time = time.time() - t_start
-            logger.info(f"Executing batch with {len(all_requests)} requests...")
+            batch_time = 0.0
+            freeze_time = 0.0
             
-            batch_start = time.time()
-            # Применяем retry для критичной операции
-            @retry_on_api_error(max_retries=3)
-            def execute_batch():
-                return spreadsheet.batch_update({'requests': all_requests})
-            
-            execute_batch()
-            batch_time = time.time() - batch_start
-            
-            freeze_start = time.time()
-            worksheet.freeze(rows=2, cols=0)
-            freeze_time = time.time() - freeze_start
+            try:
+                if all_requests:
+                    logger.info(f"Executing batch with {len(all_requests)} requests...")
+                    
+                    batch_start = time.time()
+                    # Применяем retry для критичной операции
+                    @retry_on_api_error(max_retries=3)
+                    def execute_batch():
+                        return spreadsheet.batch_update({'requests': all_requests})
+                    
+                    try:
+                        execute_batch()
+                    except Exception:
+                        # Состояние листа неизвестно - следующая синхронизация будет полной
+                        fingerprint_store.invalidate()
+                        raise
+                    batch_time = time.time() - batch_start
+                    api_calls += 1
+                else:
+                    logger.info("Sheet is up to date, nothing to write")
+                
+                if full_rewrite:
+                    freeze_start = time.time()
+                    worksheet.freeze(rows=2, cols=0)
+                    freeze_time = time.time() - freeze_start
+                    api_calls += 1
+                
+                if lock_token is not None:
+                    fingerprint_store.save(fingerprint)
+                else:
+                    # Параллельная запись другого процесса - отпечаток недостоверен
+                    fingerprint_store.invalidate()
+            finally:
+                if lock_token is not None:
+                    fingerprint_store.release_write_lock(lock_token)
             
             elapsed = time.time() - t_start
             duration = (datetime.utcnow() - start_time).total_seconds()
             
             logger.info(
-                f"✅ Synced in {elapsed:.2f}s | "
+                f"✅ Synced in {elapsed:.2f}s ({'full' if full_rewrite else 'incremental'}) | "
                 f"Prep: {prep_time:.2f}s | "
                 f"Batch: {batch_time:.2f}s | "
                 f"Freeze: {freeze_time:.2f}s | "
-                f"API calls: 3 (open/batch/freeze) | "
+                f"API calls: {api_calls} | "
                 f"Requests in batch: {len(all_requests)}"
             )
             
@@ -1267,8 +1573,10 @@ class GoogleSheetsService:
                     "prep_time": round(prep_time, 2),
                     "batch_time": round(batch_time, 2),
                     "freeze_time": round(freeze_time, 2),
-                    "api_calls": 3,
-                    "batch_requests": len(all_requests)
+                    "api_calls": api_calls,
+                    "batch_requests": len(all_requests),
+                    "mode": "full" if full_rewrite else "incremental",
+                    "changed_ranges": changed_ranges
                 }
             }
             
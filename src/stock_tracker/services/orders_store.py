@@ -0,0 +1,260 @@
+"""
+Incremental supplier orders store.
+
+supplier/orders (flag=0) returns every order whose lastChangeDate is at or
+after dateFrom, so re-requesting a 7 or 90 day window re-downloads tens of
+thousands of unchanged rows on every sync. The store keeps the latest
+version of each order (keyed on srid) per tenant in Postgres together with
+a lastChangeDate cursor; a sync only fetches what changed since the cursor
+and order windows are computed locally.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from stock_tracker.database.models import SupplierOrder, SupplierOrderCursor
+from stock_tracker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Longest window read from the store (WarehouseClassifier uses 90 days)
+ORDERS_RETENTION_DAYS = 90
+
+# supplier/orders returns at most ~80000 rows per request; a full page
+# means more rows may follow from the last lastChangeDate
+WB_ORDERS_PAGE_LIMIT = 80000
+
+# Rows per INSERT ... ON CONFLICT statement
+UPSERT_CHUNK_SIZE = 500
+
+# Safety stop for one sync run
+MAX_PAGES_PER_SYNC = 50
+
+
+def parse_wb_datetime(value: Any) -> Optional[datetime]:
+    """Parse WB timestamp ("2025-01-05T12:34:56", optional Z/offset) as naive datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def format_wb_datetime(value: datetime) -> str:
+    """Format datetime as RFC3339 dateFrom parameter."""
+    return value.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def order_row(tenant_id: UUID, order: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map an API record to a supplier_orders row (None if it has no srid)."""
+    srid = order.get("srid")
+    last_change = parse_wb_datetime(order.get("lastChangeDate"))
+    if not srid or last_change is None:
+        return None
+    return {
+        "tenant_id": tenant_id,
+        "srid": srid,
+        "nm_id": order.get("nmId"),
+        "supplier_article": order.get("supplierArticle"),
+        "warehouse_name": order.get("warehouseName"),
+        "warehouse_type": order.get("warehouseType"),
+        "is_cancel": bool(order.get("isCancel", False)),
+        "order_date": parse_wb_datetime(order.get("date")),
+        "last_change_date": last_change,
+        "data": order,
+    }
+
+
+class SupplierOrdersStore:
+    """
+    Per-tenant store of supplier orders with a lastChangeDate cursor.
+
+    sync() is async because it calls the API client; reads and writes use
+    the synchronous session, as in SyncService.
+    """
+
+    def __init__(self, db_session: Session, tenant_id: UUID,
+                 retention_days: int = ORDERS_RETENTION_DAYS):
+        """
+        Initialize store.
+
+        Args:
+            db_session: Database session
+            tenant_id: Tenant UUID
+            retention_days: Orders older than this are pruned; also the
+                window of the first sync
+        """
+        self.db = db_session
+        self.tenant_id = tenant_id
+        self.retention_days = retention_days
+
+    def get_cursor(self) -> Optional[datetime]:
+        """lastChangeDate the next sync starts from (None before the first sync)."""
+        return self.db.scalar(
+            select(SupplierOrderCursor.last_change_date)
+            .where(SupplierOrderCursor.tenant_id == self.tenant_id)
+        )
+
+    def _save_cursor(self, last_change_date: datetime) -> None:
+        stmt = pg_insert(SupplierOrderCursor).values(
+            tenant_id=self.tenant_id,
+            last_change_date=last_change_date,
+            synced_at=func.now()
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[SupplierOrderCursor.tenant_id],
+            set_={"last_change_date": stmt.excluded.last_change_date,
+                  "synced_at": stmt.excluded.synced_at}
+        ))
+
+    def upsert(self, orders: List[Dict[str, Any]]) -> int:
+        """
+        Upsert API records, skipping rows that did not change.
+
+        Does not commit.
+
+        Returns:
+            Number of inserted or updated rows
+        """
+        # Latest version per srid: ON CONFLICT cannot touch a row twice
+        rows: Dict[str, Dict[str, Any]] = {}
+        for order in orders:
+            row = order_row(self.tenant_id, order)
+            if row is None:
+                continue
+            known = rows.get(row["srid"])
+            if known is None or row["last_change_date"] >= known["last_change_date"]:
+                rows[row["srid"]] = row
+
+        values = list(rows.values())
+        written = 0
+        for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+            stmt = pg_insert(SupplierOrder).values(values[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SupplierOrder.tenant_id, SupplierOrder.srid],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in ("nm_id", "supplier_article", "warehouse_name", "warehouse_type",
+                                   "is_cancel", "order_date", "last_change_date", "data")
+                },
+                # Re-delivered boundary rows and unchanged orders are left alone
+                where=SupplierOrder.last_change_date < stmt.excluded.last_change_date
+            )
+            written += self.db.execute(stmt).rowcount
+        return written
+
+    async def sync(self, api_client, max_pages: int = MAX_PAGES_PER_SYNC) -> Dict[str, Any]:
+        """
+        Fetch orders changed since the cursor and store them.
+
+        Pages by lastChangeDate (flag=0); the cursor is committed after
+        every page, so an interrupted sync resumes from the last page.
+
+        Args:
+            api_client: WildberriesAPIClient (iter_supplier_orders)
+            max_pages: Maximum requests in this run
+
+        Returns:
+            Dictionary with fetched/written row counts and the cursor
+        """
+        cursor = self.get_cursor()
+        if cursor is None:
+            cursor = datetime.now() - timedelta(days=self.retention_days)
+            logger.info(f"Initial supplier orders sync for tenant {self.tenant_id} "
+                        f"(last {self.retention_days} days)")
+
+        stats = {"pages": 0, "fetched": 0, "written": 0}
+        for _ in range(max_pages):
+            # Records are upserted while the page is downloaded, so at most
+            # UPSERT_CHUNK_SIZE of up to WB_ORDERS_PAGE_LIMIT rows are held
+            page_size = 0
+            page_cursor = cursor
+            batch: List[Dict[str, Any]] = []
+            async for order in api_client.iter_supplier_orders(date_from=format_wb_datetime(cursor), flag=0):
+                page_size += 1
+                change = parse_wb_datetime(order.get("lastChangeDate"))
+                if change and change > page_cursor:
+                    page_cursor = change
+                batch.append(order)
+                if len(batch) >= UPSERT_CHUNK_SIZE:
+                    stats["written"] += self.upsert(batch)
+                    batch = []
+            stats["written"] += self.upsert(batch)
+            stats["pages"] += 1
+            stats["fetched"] += page_size
+
+            advanced = page_cursor > cursor
+            if advanced:
+                cursor = page_cursor
+                self._save_cursor(cursor)
+            self.db.commit()
+
+            if page_size < WB_ORDERS_PAGE_LIMIT or not advanced:
+                break
+        else:
+            logger.warning(f"Supplier orders sync stopped after {max_pages} pages, "
+                           f"resuming from {cursor} next time")
+
+        stats["pruned"] = self.prune()
+        self.db.commit()
+
+        stats["cursor"] = cursor.isoformat()
+        logger.info(f"Supplier orders synced for tenant {self.tenant_id}: {stats['fetched']} fetched, "
+                    f"{stats['written']} changed in {stats['pages']} page(s)")
+        return stats
+
+    def get_orders(self, date_from: datetime, flag: int = 0) -> List[Dict[str, Any]]:
+        """
+        Stored orders with the semantics of supplier/orders.
+
+        Args:
+            date_from: Window start
+            flag: 0 - lastChangeDate >= date_from, 1 - order date >= date_from
+
+        Returns:
+            Raw API records ordered like the API response
+        """
+        column = SupplierOrder.last_change_date if flag == 0 else SupplierOrder.order_date
+        return list(self.db.scalars(
+            select(SupplierOrder.data)
+            .where(SupplierOrder.tenant_id == self.tenant_id, column >= date_from)
+            .order_by(column)
+        ))
+
+    def warehouse_types(self, date_from: datetime) -> List[Tuple[str, str, int]]:
+        """
+        Warehouses with their warehouseType and order count since date_from.
+
+        Returns:
+            (warehouse_name, warehouse_type, orders) tuples in the order the
+            warehouses first appeared
+        """
+        first_seen = func.min(SupplierOrder.last_change_date)
+        rows = self.db.execute(
+            select(SupplierOrder.warehouse_name, SupplierOrder.warehouse_type, func.count())
+            .where(
+                SupplierOrder.tenant_id == self.tenant_id,
+                SupplierOrder.last_change_date >= date_from,
+                SupplierOrder.warehouse_name.is_not(None)
+            )
+            .group_by(SupplierOrder.warehouse_name, SupplierOrder.warehouse_type)
+            .order_by(first_seen)
+        )
+        return [(name, warehouse_type or "", count) for name, warehouse_type, count in rows]
+
+    def prune(self) -> int:
+        """Delete orders that left the retention window. Does not commit."""
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        return self.db.execute(
+            delete(SupplierOrder).where(
+                SupplierOrder.tenant_id == self.tenant_id,
+                SupplierOrder.last_change_date < cutoff
+            )
+        ).rowcount
@@ -24,6 +24,7 @@ from stock_tracker.database.operations import SheetsOperations
 from stock_tracker.database.sheets import GoogleSheetsClient
 from stock_tracker.services.warehouse_classifier import WarehouseClassifier, create_warehouse_classifier
 from stock_tracker.services.dual_api_stock_fetcher import DualAPIStockFetcher
+from stock_tracker.services.orders_store import SupplierOrdersStore
 from stock_tracker.utils.config import get_config
 from stock_tracker.utils.logger import get_logger
 from stock_tracker.utils.exceptions import SyncError, ValidationError, APIError
@@ -244,6 +245,42 @@ class ProductService:
             # Legacy: use wb_client
             return self.wb_client
     
+    async def _sync_orders_store(self) -> Optional[SupplierOrdersStore]:
+        """
+        Bring the tenant's local supplier orders store up to date.
+        
+        Returns:
+            Synced store, or None in legacy mode or if the incremental
+            sync failed (callers then fetch orders from the API)
+        """
+        if not (self.tenant and self.db_session):
+            return None
+        
+        store = SupplierOrdersStore(self.db_session, self.tenant.id)
+        try:
+            await store.sync(self._get_api_client())
+        except Exception as e:
+            self.db_session.rollback()
+            logger.warning(f"Incremental orders sync failed, fetching orders from API: {e}")
+            return None
+        return store
+    
+    async def _load_orders(self, data_fetcher, date_from: str,
+                           orders_store: Optional[SupplierOrdersStore] = None) -> List[Dict[str, Any]]:
+        """
+        Orders window starting at date_from (flag=0 semantics).
+        
+        Read from the local orders store when available instead of
+        re-downloading the whole window.
+        """
+        if orders_store is None:
+            orders_store = await self._sync_orders_store()
+        if orders_store is not None:
+            orders = orders_store.get_orders(datetime.fromisoformat(date_from), flag=0)
+            logger.info(f"Read {len(orders)} orders from local orders store")
+            return orders
+        return await data_fetcher.fetch_supplier_orders(date_from, flag=0)
+    
     async def sync_all_products(self) -> dict:
         """
         Synchronize all products with Wildberries API.
@@ -392,13 +429,18 @@ class ProductService:
             sync_session.start()
             
             # Step 0: Initialize warehouse classifier if not already done
+            orders_store = None
             if not self.warehouse_classifier:
                 logger.info("Initializing warehouse classifier...")
                 api_client = self._get_api_client()
+                orders_store = await self._sync_orders_store()
                 self.warehouse_classifier = await create_warehouse_classifier(
                     api_client,
                     days=90,  # Analyze last 90 days of orders
-                    auto_build=True
+                    auto_build=True,
+                    tenant_id=str(self.tenant.id) if self.tenant else None,
+                    cache=self.cache,
+                    orders_store=orders_store
                 )
                 stats = self.warehouse_classifier.get_mapping_stats()
                 logger.info(f"Warehouse classifier initialized: {stats['total_warehouses']} warehouses " +
@@ -441,8 +483,8 @@ class ProductService:
             date_from = (datetime.now() - timedelta(days=ORDER_LOOKBACK_DAYS)).strftime("%Y-%m-%dT00:00:00")
             logger.info(f"Using date_from: {date_from} (last {ORDER_LOOKBACK_DAYS} days)")
             
-            orders_data_raw = await data_fetcher.fetch_supplier_orders(date_from, flag=0)
-            logger.info(f"Downloaded {len(orders_data_raw)} orders from supplier/orders API")
+            orders_data_raw = await self._load_orders(data_fetcher, date_from, orders_store)
+            logger.info(f"Loaded {len(orders_data_raw)} orders from supplier/orders")
             
             # ИСПРАВЛЕНИЕ 28.10.2025: Фильтровать отменённые заказы
             valid_orders = [
@@ -581,15 +623,28 @@ class ProductService:
             logger.info("="*80)
             sync_session.start()
             
-            # Step 1: Get combined FBO+FBS stocks using Dual API
+            # Step 1-2: Stocks (Dual API, blocking requests) run in a worker thread
+            # while supplier orders are fetched, so the slower source sets the pace
             logger.info("\n📊 Step 1: Fetching stocks from Dual API (Statistics + Marketplace)...")
+            logger.info("\n📦 Step 2: Fetching orders from supplier/orders API (concurrently)...")
             
-            stocks_by_article = self.dual_api_fetcher.get_combined_stocks_by_article()
+            from stock_tracker.api.products import WildberriesProductDataFetcher
+            data_fetcher = WildberriesProductDataFetcher(self.wb_client)
+            
+            # Calculate date_from as ORDER_LOOKBACK_DAYS ago
+            date_from = (datetime.now() - timedelta(days=ORDER_LOOKBACK_DAYS)).strftime("%Y-%m-%dT00:00:00")
+            logger.info(f"   Date range: {date_from} to now (last {ORDER_LOOKBACK_DAYS} days)")
+            
+            loop = asyncio.get_running_loop()
+            stocks_by_article, orders_data_raw = await asyncio.gather(
+                loop.run_in_executor(None, self.dual_api_fetcher.get_combined_stocks_by_article),
+                self._load_orders(data_fetcher, date_from)
+            )
             
             logger.info(f"✅ Retrieved stocks for {len(stocks_by_article)} articles")
             
             # Log summary
-            summary = self.dual_api_fetcher.get_all_stocks_summary()
+            summary = self.dual_api_fetcher.get_all_stocks_summary(stocks_by_article)
             logger.info(f"\n📈 Stocks Summary:")
             logger.info(f"   FBO (WB warehouses):    {summary['total_fbo']:>6} шт")
             logger.info(f"   FBS (Seller warehouses): {summary['total_fbs']:>6} шт")
@@ -603,17 +658,6 @@ class ProductService:
                 sync_session.complete()
                 return sync_session
             
-            # Step 2: Fetch orders from supplier/orders endpoint
-            logger.info("\n📦 Step 2: Fetching orders from supplier/orders API...")
-            
-            from stock_tracker.api.products import WildberriesProductDataFetcher
-            data_fetcher = WildberriesProductDataFetcher(self.wb_client)
-            
-            # Calculate date_from as ORDER_LOOKBACK_DAYS ago
-            date_from = (datetime.now() - timedelta(days=ORDER_LOOKBACK_DAYS)).strftime("%Y-%m-%dT00:00:00")
-            logger.info(f"   Date range: {date_from} to now (last {ORDER_LOOKBACK_DAYS} days)")
-            
-            orders_data_raw = await data_fetcher.fetch_supplier_orders(date_from, flag=0)
             logger.info(f"   Raw orders: {len(orders_data_raw)}")
             
             # Filter cancelled orders
@@ -1510,7 +1554,7 @@ class ProductService:
             
             # Import here to avoid circular imports
             from stock_tracker.api.products import WildberriesProductDataFetcher
-            from stock_tracker.core.calculator import WildberriesCalculator
+            from stock_tracker.core.calculator import WildberriesCalculator, AggregationIndex
             from stock_tracker.utils.calculation_verifier import CalculationVerifier
             
             # Initialize data fetcher
@@ -1531,11 +1575,14 @@ class ProductService:
                 orders_data, wildberries_article
             )
             
+            # Index orders and stock once instead of rescanning per warehouse
+            index = AggregationIndex(warehouse_data, orders_data)
+            
             # Calculate orders per warehouse
             warehouse_orders = {}
             for warehouse_name in debug_info["warehouse_breakdown"]:
-                warehouse_orders[warehouse_name] = calculator.calculate_warehouse_orders(
-                    orders_data, wildberries_article, warehouse_name
+                warehouse_orders[warehouse_name] = index.warehouse_orders(
+                    wildberries_article, warehouse_name
                 )
             
             # Validate calculation consistency
@@ -1548,9 +1595,7 @@ class ProductService:
             
             # Add warehouses including zero-stock ones with orders
             for warehouse_name, orders_count in warehouse_orders.items():
-                stock = calculator.calculate_warehouse_stock(
-                    warehouse_data, wildberries_article, warehouse_name
-                )
+                stock = index.warehouse_stock(wildberries_article, warehouse_name)
                 warehouse = Warehouse(
                     name=warehouse_name, 
                     orders=orders_count, 
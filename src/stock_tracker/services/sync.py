@@ -20,7 +20,7 @@ from stock_tracker.core.calculator import AutomaticAggregator
 from stock_tracker.core.models import Product, Warehouse
 from stock_tracker.database.operations import GoogleSheetsOperations
 from stock_tracker.utils.logger import get_logger
-from stock_tracker.utils.exceptions import SyncError
+from stock_tracker.utils.exceptions import SyncError, CalculationError
 
 logger = get_logger(__name__)
 
@@ -287,6 +287,16 @@ class DataSynchronizationService:
         try:
             logger.info("Processing and aggregating fetched data")
             
+            try:
+                # Orders and warehouse data are indexed once for all products
+                updated_products = self.aggregator.calculate_products_totals_automatic(
+                    products, orders_data, warehouse_data
+                )
+                logger.info(f"Processed {len(updated_products)} products with fresh data")
+                return updated_products
+            except CalculationError as e:
+                logger.warning(f"Batch aggregation failed ({e}), updating products one by one")
+            
             updated_products = []
             
             for product in products:
@@ -3,9 +3,12 @@ Sync service for Celery tasks - synchronous product synchronization.
 """
 
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime, timedelta
+from uuid import uuid4
 
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from stock_tracker.database.models import Tenant, Product
@@ -14,6 +17,17 @@ from stock_tracker.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Rows per INSERT ... ON CONFLICT statement in bulk mode
+BULK_UPSERT_CHUNK_SIZE = 500
+
+# Служебные склады для исключения
+SERVICE_WAREHOUSES = frozenset({
+    'В пути до получателей',
+    'В пути возвраты на склад WB',
+    'Всего находится на складах',
+    'Остальные'
+})
+
 
 class SyncService:
     """
@@ -22,16 +36,22 @@ class SyncService:
     Provides blocking methods suitable for Celery workers.
     """
     
-    def __init__(self, tenant: Tenant, db_session: Session):
+    def __init__(self, tenant: Tenant, db_session: Session, bulk_mode: bool = False,
+                 chunk_size: int = BULK_UPSERT_CHUNK_SIZE):
         """
         Initialize sync service with tenant context.
         
         Args:
             tenant: Tenant instance
             db_session: Database session
+            bulk_mode: Stage all rows and apply them with chunked
+                       INSERT ... ON CONFLICT instead of per-row SELECT FOR UPDATE
+            chunk_size: Rows per upsert statement in bulk mode
         """
         self.tenant = tenant
         self.db = db_session
+        self.bulk_mode = bulk_mode
+        self.chunk_size = chunk_size
         self.marketplace_client = create_marketplace_client(tenant)
         logger.info(f"SyncService initialized for tenant {tenant.id} ({tenant.name})")
     
@@ -61,44 +81,41 @@ class SyncService:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                # Получаем продукты из Analytics API v2
-                marketplace_products = loop.run_until_complete(
-                    self.marketplace_client.fetch_products(limit=1000)
+                marketplace_products, warehouse_data = loop.run_until_complete(
+                    self._fetch_marketplace_data()
                 )
-                
-                # Получаем данные по складам из Warehouse API v1
-                warehouse_data = {}
-                try:
-                    warehouse_remains = loop.run_until_complete(
-                        self.marketplace_client.api_client.get_warehouse_remains_with_retry(max_wait_time=600)
-                    )
-                    # Индексируем данные по nmId для быстрого поиска
-                    warehouse_data = self._index_warehouse_data(warehouse_remains)
-                    logger.info(f"Fetched warehouse data for {len(warehouse_data)} products")
-                except Exception as e:
-                    logger.warning(f"Failed to fetch warehouse data: {e}. Products will have no warehouse breakdown.")
             finally:
+                # Release pooled connections before the loop they are bound to goes away
+                api_client = getattr(self.marketplace_client, "api_client", None)
+                if api_client is not None and hasattr(api_client, "aclose"):
+                    try:
+                        loop.run_until_complete(api_client.aclose())
+                    except Exception as e:
+                        logger.warning(f"Failed to close marketplace HTTP session: {e}")
                 loop.close()
             
             logger.info(f"Fetched {len(marketplace_products)} products from {self.marketplace_client.marketplace_name}")
             
-            # Process each product
-            for mp_product in marketplace_products:
-                try:
-                    # Получаем данные о складах для этого товара
-                    # wildberries_article — это int (nmId из API)
-                    nm_id = mp_product.wildberries_article
-                    product_warehouse_data = warehouse_data.get(nm_id, {})
-                    
-                    if product_warehouse_data:
-                        logger.debug(f"Found warehouse data for nmId {nm_id}: {len(product_warehouse_data.get('warehouses', []))} warehouses")
-                    
-                    self._upsert_product(mp_product, product_warehouse_data)
-                    stats["products_synced"] += 1
-                except Exception as e:
-                    error_msg = f"Failed to sync product {mp_product.wildberries_article}: {e}"
-                    logger.error(error_msg)
-                    stats["errors"].append(error_msg)
+            if self.bulk_mode:
+                self._bulk_upsert_products(marketplace_products, warehouse_data, stats)
+            else:
+                # Process each product
+                for mp_product in marketplace_products:
+                    try:
+                        # Получаем данные о складах для этого товара
+                        # wildberries_article — это int (nmId из API)
+                        nm_id = mp_product.wildberries_article
+                        product_warehouse_data = warehouse_data.get(nm_id, {})
+                        
+                        if product_warehouse_data:
+                            logger.debug(f"Found warehouse data for nmId {nm_id}: {len(product_warehouse_data.get('warehouses', []))} warehouses")
+                        
+                        self._upsert_product(mp_product, product_warehouse_data, stats)
+                        stats["products_synced"] += 1
+                    except Exception as e:
+                        error_msg = f"Failed to sync product {mp_product.wildberries_article}: {e}"
+                        logger.error(error_msg)
+                        stats["errors"].append(error_msg)
             
             # Commit all changes
             self.db.commit()
@@ -120,61 +137,93 @@ class SyncService:
             self.db.rollback()
             raise
     
-    def _index_warehouse_data(self, warehouse_remains: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    async def _fetch_marketplace_data(self) -> Tuple[List[Any], Dict[int, Dict[str, Any]]]:
         """
-        Индексирует данные о складах по nmId для быстрого поиска.
+        Fetch products and warehouse remains with overlapping requests.
+        
+        The warehouse remains task is created first; Analytics API v2 products
+        are fetched while WB builds the remains report, so the sync waits for
+        the slower of the two sources instead of their sum.
         
-        Args:
-            warehouse_remains: Данные из Warehouse API v1
-            
         Returns:
-            Dict[nmId -> warehouse_data_dict]
+            (marketplace products, warehouse data indexed by nmId)
         """
-        indexed = {}
-        
-        # Служебные склады для исключения
-        service_warehouses = {
-            'В пути до получателей',
-            'В пути возвраты на склад WB',
-            'Всего находится на складах',
-            'Остальные'
-        }
+        # Остатки индексируются по nmId по мере разбора ответа, без полного списка в памяти
+        warehouse_data: Dict[int, Dict[str, Any]] = {}
         
-        logger.debug(f"Indexing warehouse data from {len(warehouse_remains)} items")
+        # Задача остатков создаётся первой - её обработка на стороне WB самая долгая
+        remains_job = asyncio.ensure_future(
+            self.marketplace_client.api_client.stream_warehouse_remains_with_retry(
+                lambda item: self._index_warehouse_item(warehouse_data, item),
+                max_wait_time=600
+            )
+        )
         
-        for item in warehouse_remains:
-            nm_id = item.get("nmId")
-            if not nm_id:
-                continue
-            
-            # Обрабатываем склады из записи
-            warehouses_list = []
-            for wh in item.get("warehouses", []):
-                wh_name = wh.get("warehouseName", "")
-                if wh_name and wh_name not in service_warehouses:
-                    warehouses_list.append({
-                        "name": wh_name,
-                        "stock": wh.get("quantity", 0),
-                        "orders": 0  # API v1 не содержит заказы, добавим позже из v2
-                    })
-            
-            if nm_id not in indexed:
-                indexed[nm_id] = {"warehouses": warehouses_list}
-            else:
-                # Объединяем склады если продукт уже есть
-                indexed[nm_id]["warehouses"].extend(warehouses_list)
+        try:
+            # Получаем продукты из Analytics API v2, пока WB готовит отчёт по складам
+            marketplace_products = await self.marketplace_client.fetch_products(limit=1000)
+        except BaseException:
+            remains_job.cancel()
+            await asyncio.gather(remains_job, return_exceptions=True)
+            raise
+        
+        # Получаем данные по складам из Warehouse API v1
+        try:
+            await remains_job
+        except Exception as e:
+            # Частично разобранный отчёт не используется. Без остатков синк
+            # перезаписал бы разбивку по складам пустой, поэтому повторяем
+            # загрузку списком, а при повторной ошибке синк падает
+            logger.warning(f"Streamed warehouse remains failed: {e}. Retrying with list download.")
+            warehouse_data = {}
+            try:
+                warehouse_remains = await self.marketplace_client.api_client.get_warehouse_remains_with_retry(
+                    max_wait_time=600
+                )
+            except Exception as fallback_error:
+                logger.error(f"Failed to fetch warehouse data: {fallback_error}")
+                raise
+            for item in warehouse_remains:
+                self._index_warehouse_item(warehouse_data, item)
+        
+        total_warehouses = sum(len(v["warehouses"]) for v in warehouse_data.values())
+        logger.info(f"Fetched warehouse data for {len(warehouse_data)} products "
+                    f"with {total_warehouses} total warehouse entries")
+        
+        return marketplace_products, warehouse_data
+    
+    @staticmethod
+    def _index_warehouse_item(indexed: Dict[int, Dict[str, Any]], item: Dict[str, Any]) -> None:
+        """
+        Добавляет одну запись Warehouse API v1 в индекс по nmId.
         
-        # Логируем статистику
-        total_warehouses = sum(len(v.get("warehouses", [])) for v in indexed.values())
-        logger.info(f"Indexed {len(indexed)} products with {total_warehouses} total warehouse entries")
+        Args:
+            indexed: Индекс, дополняется на месте
+            item: Запись остатков товара
+        """
+        nm_id = item.get("nmId")
+        if not nm_id:
+            return
         
-        if indexed:
-            sample_keys = list(indexed.keys())[:3]
-            logger.debug(f"Sample indexed nmIds: {sample_keys}")
+        # Обрабатываем склады из записи
+        warehouses_list = []
+        for wh in item.get("warehouses", []):
+            wh_name = wh.get("warehouseName", "")
+            if wh_name and wh_name not in SERVICE_WAREHOUSES:
+                warehouses_list.append({
+                    "name": wh_name,
+                    "stock": wh.get("quantity", 0),
+                    "orders": 0  # API v1 не содержит заказы, добавим позже из v2
+                })
         
-        return indexed
+        if nm_id not in indexed:
+            indexed[nm_id] = {"warehouses": warehouses_list}
+        else:
+            # Объединяем склады если продукт уже есть
+            indexed[nm_id]["warehouses"].extend(warehouses_list)
     
-    def _upsert_product(self, mp_product, warehouse_data: Dict[str, Any] = None) -> Product:
+    def _upsert_product(self, mp_product, warehouse_data: Dict[str, Any] = None,
+                        stats: Dict[str, Any] = None) -> Product:
         """
         Insert or update product in database.
         
@@ -183,6 +232,8 @@ class SyncService:
         Args:
             mp_product: Product object from marketplace client
             warehouse_data: Данные о складах из Warehouse API v1
+            stats: Sync statistics dict; products_created/products_updated
+                   are incremented when given
             
         Returns:
             Product database model
@@ -199,18 +250,8 @@ class SyncService:
             Product.marketplace_article == str(mp_product.wildberries_article)
         ).with_for_update(skip_locked=False).first()
         
-        # Подготавливаем warehouse_data с заказами, распределёнными пропорционально
-        wh_list = warehouse_data.get("warehouses", [])
-        total_stock = sum(wh.get("stock", 0) for wh in wh_list)
-        total_orders = mp_product.total_orders
-        
-        if total_stock > 0 and total_orders > 0:
-            for wh in wh_list:
-                wh_stock = wh.get("stock", 0)
-                # Распределяем заказы пропорционально остаткам
-                wh["orders"] = int(total_orders * (wh_stock / total_stock))
-        
-        warehouse_data_to_save = {"warehouses": wh_list} if wh_list else {}
+        warehouse_data_to_save = self._build_warehouse_data(mp_product, warehouse_data)
+        wh_list = warehouse_data_to_save.get("warehouses", [])
         
         if existing:
             # Update existing
@@ -219,6 +260,8 @@ class SyncService:
             existing.total_orders = mp_product.total_orders
             existing.warehouse_data = warehouse_data_to_save
             existing.last_synced_at = datetime.utcnow()
+            if stats is not None:
+                stats["products_updated"] += 1
             logger.debug(f"Updated product {existing.marketplace_article} with {len(wh_list)} warehouses")
             return existing
         else:
@@ -234,9 +277,171 @@ class SyncService:
                 created_at=datetime.utcnow(),
             )
             self.db.add(new_product)
+            if stats is not None:
+                stats["products_created"] += 1
             logger.debug(f"Created product {new_product.marketplace_article} with {len(wh_list)} warehouses")
             return new_product
     
+    @staticmethod
+    def _build_warehouse_data(mp_product, warehouse_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prepare warehouse_data JSONB with orders distributed by stock share.
+        
+        Args:
+            mp_product: Product object from marketplace client
+            warehouse_data: Данные о складах из Warehouse API v1
+            
+        Returns:
+            {"warehouses": [...]} or empty dict when there is no breakdown
+        """
+        # Подготавливаем warehouse_data с заказами, распределёнными пропорционально
+        wh_list = warehouse_data.get("warehouses", [])
+        total_stock = sum(wh.get("stock", 0) for wh in wh_list)
+        total_orders = mp_product.total_orders
+        
+        if total_stock > 0 and total_orders > 0:
+            for wh in wh_list:
+                wh_stock = wh.get("stock", 0)
+                # Распределяем заказы пропорционально остаткам
+                wh["orders"] = int(total_orders * (wh_stock / total_stock))
+        
+        return {"warehouses": wh_list} if wh_list else {}
+    
+    def _stage_product_rows(self, marketplace_products: List[Any],
+                            warehouse_data: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build insert-ready rows for bulk upsert.
+        
+        Duplicate articles are collapsed (last one wins, as in row mode) because
+        a single ON CONFLICT statement cannot touch the same row twice.
+        
+        Args:
+            marketplace_products: Products from marketplace client
+            warehouse_data: Indexed warehouse data by nmId
+            
+        Returns:
+            List of column dicts for the products table
+        """
+        now = datetime.utcnow()
+        staged = {}
+        
+        for mp_product in marketplace_products:
+            article = str(mp_product.wildberries_article)
+            product_warehouse_data = warehouse_data.get(mp_product.wildberries_article, {})
+            
+            staged[article] = {
+                "id": uuid4(),
+                "tenant_id": self.tenant.id,
+                "marketplace_article": article,
+                "seller_article": mp_product.seller_article or f"WB-{article}",
+                "total_stock": mp_product.total_stock,
+                "total_orders": mp_product.total_orders,
+                "warehouse_data": self._build_warehouse_data(mp_product, product_warehouse_data),
+                "last_synced_at": now,
+                "last_updated": now,
+                "created_at": now,
+                # Existing seller_article is kept when marketplace does not send one
+                "_has_seller_article": bool(mp_product.seller_article),
+            }
+        
+        return list(staged.values())
+    
+    def _upsert_statement(self, rows: List[Dict[str, Any]], update_seller_article: bool):
+        """
+        Build INSERT ... ON CONFLICT (tenant_id, marketplace_article) DO UPDATE.
+        
+        Targets the unique idx_tenant_marketplace_article index and returns
+        whether each row was inserted (xmax = 0) or updated.
+        """
+        stmt = pg_insert(Product).values(rows)
+        
+        update_columns = {
+            "total_stock": stmt.excluded.total_stock,
+            "total_orders": stmt.excluded.total_orders,
+            "warehouse_data": stmt.excluded.warehouse_data,
+            "last_synced_at": stmt.excluded.last_synced_at,
+            "last_updated": stmt.excluded.last_updated,
+        }
+        if update_seller_article:
+            update_columns["seller_article"] = stmt.excluded.seller_article
+        
+        return stmt.on_conflict_do_update(
+            index_elements=[Product.tenant_id, Product.marketplace_article],
+            set_=update_columns
+        ).returning(literal_column("(xmax = 0)").label("inserted"))
+    
+    def _bulk_upsert_products(self, marketplace_products: List[Any],
+                              warehouse_data: Dict[int, Dict[str, Any]],
+                              stats: Dict[str, Any]) -> None:
+        """
+        Apply all products with chunked INSERT ... ON CONFLICT DO UPDATE.
+        
+        One statement per chunk replaces a SELECT FOR UPDATE round trip per
+        product. A failing chunk is rolled back to its savepoint and retried
+        row by row so a single bad product does not fail the whole sync.
+        
+        Args:
+            marketplace_products: Products from marketplace client
+            warehouse_data: Indexed warehouse data by nmId
+            stats: Sync statistics dict to update
+        """
+        rows = self._stage_product_rows(marketplace_products, warehouse_data)
+        products_by_article = {
+            str(mp_product.wildberries_article): mp_product
+            for mp_product in marketplace_products
+        }
+        
+        logger.info(f"Bulk upserting {len(rows)} products in chunks of {self.chunk_size}")
+        
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            
+            try:
+                with self.db.begin_nested():
+                    inserted = 0
+                    for update_seller_article in (True, False):
+                        group = [
+                            {k: v for k, v in row.items() if k != "_has_seller_article"}
+                            for row in chunk
+                            if row["_has_seller_article"] == update_seller_article
+                        ]
+                        if not group:
+                            continue
+                        
+                        result = self.db.execute(self._upsert_statement(group, update_seller_article))
+                        inserted += sum(1 for row in result if row.inserted)
+                
+                stats["products_synced"] += len(chunk)
+                stats["products_created"] += inserted
+                stats["products_updated"] += len(chunk) - inserted
+                
+            except Exception as e:
+                logger.warning(f"Bulk upsert chunk at offset {start} failed ({e}), retrying row by row")
+                
+                for row in chunk:
+                    mp_product = products_by_article[row["marketplace_article"]]
+                    # Counted only once the row's savepoint is released
+                    row_stats = {"products_created": 0, "products_updated": 0}
+                    try:
+                        with self.db.begin_nested():
+                            self._upsert_product(
+                                mp_product,
+                                warehouse_data.get(mp_product.wildberries_article, {}),
+                                row_stats
+                            )
+                        stats["products_synced"] += 1
+                        for key, count in row_stats.items():
+                            stats[key] += count
+                    except Exception as row_error:
+                        error_msg = f"Failed to sync product {row['marketplace_article']}: {row_error}"
+                        logger.error(error_msg)
+                        stats["errors"].append(error_msg)
+        
+        logger.info(
+            f"Bulk upsert finished: {stats['products_created']} created, "
+            f"{stats['products_updated']} updated"
+        )
+    
     def get_product_count(self) -> int:
         """Get total product count for tenant."""
         return self.db.query(Product).filter(
@@ -10,12 +10,17 @@ Grouping by supplierArticle + nmId combination as documented.
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Callable, Set
-from dataclasses import dataclass
-from enum import Enum
+from typing import List, Dict, Any, Optional, Callable, Set, Iterable
 
 from stock_tracker.core.calculator import AutomaticAggregator
 from stock_tracker.core.models import Product, Warehouse
+from stock_tracker.core.snapshot_diff import ProductSnapshot, diff_snapshots
+from stock_tracker.core.trigger_queue import (
+    PendingTriggerQueue,
+    TriggerEvent,
+    TriggerKey,
+    TriggerType,
+)
 from stock_tracker.database.operations import SheetsOperations
 from stock_tracker.services.sync import DataSynchronizationService
 from stock_tracker.utils.logger import get_logger
@@ -24,26 +29,6 @@ from stock_tracker.utils.exceptions import DataSyncError
 logger = get_logger(__name__)
 
 
-class TriggerType(Enum):
-    """Types of recalculation triggers."""
-    WAREHOUSE_DATA_CHANGE = "warehouse_data_change"
-    ORDER_DATA_CHANGE = "order_data_change" 
-    PERIODIC_SYNC = "periodic_sync"
-    MANUAL_TRIGGER = "manual_trigger"
-    DATA_VALIDATION_FAILURE = "data_validation_failure"
-
-
-@dataclass
-class TriggerEvent:
-    """Represents a trigger event for recalculation."""
-    trigger_id: str
-    trigger_type: TriggerType
-    product_ids: List[str]  # seller_article + nmId combinations
-    triggered_at: datetime
-    details: Dict[str, Any]
-    is_processed: bool = False
-
-
 class RecalculationTriggerManager:
     """
     Manages automatic recalculation triggers for User Story 3.
@@ -69,16 +54,19 @@ class RecalculationTriggerManager:
         self.sheets_ops = sheets_operations
         self.aggregator = AutomaticAggregator()
         
-        # Track events and handlers
-        self.pending_triggers: List[TriggerEvent] = []
-        self.trigger_handlers: Dict[TriggerType, Callable] = {}
-        self.processed_triggers: List[TriggerEvent] = []
-        
         # Configuration
         self.batch_size = 50
         self.trigger_debounce_seconds = 10
         self.max_pending_triggers = 1000
         
+        # Track events and handlers
+        self.pending_triggers = PendingTriggerQueue(max_size=self.max_pending_triggers)
+        self.trigger_handlers: Dict[TriggerType, Callable] = {}
+        self.processed_triggers: List[TriggerEvent] = []
+        
+        # Fingerprints of the last seen catalog (reused as "old" on next call)
+        self._last_snapshot: Optional[ProductSnapshot] = None
+        
         # Set up default handlers
         self._setup_default_handlers()
         
@@ -114,72 +102,71 @@ class RecalculationTriggerManager:
             
             trigger_events = []
             
-            # Create product lookup by urls.md grouping key
-            old_products_dict = self._group_products_by_key(old_products)
-            new_products_dict = self._group_products_by_key(new_products)
-            
-            # Check all products for changes
-            all_keys = set(old_products_dict.keys()) | set(new_products_dict.keys())
-            
-            for product_key in all_keys:
-                old_product = old_products_dict.get(product_key)
-                new_product = new_products_dict.get(product_key)
+            # Fingerprint snapshots keyed by urls.md grouping key; only
+            # products with changed fingerprints get a detailed diff
+            old_snapshot = self._snapshot(old_products)
+            new_snapshot = ProductSnapshot(new_products)
+            self._last_snapshot = new_snapshot
+            
+            diff = diff_snapshots(old_snapshot, new_snapshot)
+            
+            # Handle new products
+            for product_key in diff.added:
+                new_product = new_snapshot.products[product_key]
+                trigger_events.append(TriggerEvent(
+                    trigger_id=f"new_product_{product_key}_{datetime.now().timestamp()}",
+                    trigger_type=TriggerType.WAREHOUSE_DATA_CHANGE,
+                    product_ids=[product_key],
+                    triggered_at=datetime.now(),
+                    details={
+                        "change_type": "new_product",
+                        "product_key": product_key,
+                        "seller_article": new_product.seller_article,
+                        "wildberries_article": new_product.wildberries_article
+                    }
+                ))
+            
+            # Handle removed products
+            for product_key in diff.removed:
+                old_product = old_snapshot.products[product_key]
+                trigger_events.append(TriggerEvent(
+                    trigger_id=f"removed_product_{product_key}_{datetime.now().timestamp()}",
+                    trigger_type=TriggerType.WAREHOUSE_DATA_CHANGE,
+                    product_ids=[product_key],
+                    triggered_at=datetime.now(),
+                    details={
+                        "change_type": "removed_product",
+                        "product_key": product_key,
+                        "seller_article": old_product.seller_article,
+                        "wildberries_article": old_product.wildberries_article
+                    }
+                ))
+            
+            # Handle modified products
+            for product_key in diff.changed:
+                old_product = old_snapshot.products[product_key]
+                new_product = new_snapshot.products[product_key]
+                changes = self.aggregator.detect_data_changes(old_product, new_product)
                 
-                # Handle new products
-                if old_product is None and new_product is not None:
+                if changes["has_changes"]:
+                    # Determine trigger type based on change
+                    trigger_type = TriggerType.WAREHOUSE_DATA_CHANGE
+                    if changes["orders_changes"]:
+                        trigger_type = TriggerType.ORDER_DATA_CHANGE
+                    
                     trigger_events.append(TriggerEvent(
-                        trigger_id=f"new_product_{product_key}_{datetime.now().timestamp()}",
-                        trigger_type=TriggerType.WAREHOUSE_DATA_CHANGE,
+                        trigger_id=f"change_{product_key}_{datetime.now().timestamp()}",
+                        trigger_type=trigger_type,
                         product_ids=[product_key],
                         triggered_at=datetime.now(),
                         details={
-                            "change_type": "new_product",
+                            "change_type": "product_modified",
                             "product_key": product_key,
                             "seller_article": new_product.seller_article,
-                            "wildberries_article": new_product.wildberries_article
+                            "wildberries_article": new_product.wildberries_article,
+                            "changes_detected": changes
                         }
                     ))
-                    continue
-                
-                # Handle removed products
-                if old_product is not None and new_product is None:
-                    trigger_events.append(TriggerEvent(
-                        trigger_id=f"removed_product_{product_key}_{datetime.now().timestamp()}",
-                        trigger_type=TriggerType.WAREHOUSE_DATA_CHANGE,
-                        product_ids=[product_key],
-                        triggered_at=datetime.now(),
-                        details={
-                            "change_type": "removed_product",
-                            "product_key": product_key,
-                            "seller_article": old_product.seller_article,
-                            "wildberries_article": old_product.wildberries_article
-                        }
-                    ))
-                    continue
-                
-                # Handle modified products
-                if old_product is not None and new_product is not None:
-                    changes = self.aggregator.detect_data_changes(old_product, new_product)
-                    
-                    if changes["has_changes"]:
-                        # Determine trigger type based on change
-                        trigger_type = TriggerType.WAREHOUSE_DATA_CHANGE
-                        if changes["orders_changes"]:
-                            trigger_type = TriggerType.ORDER_DATA_CHANGE
-                        
-                        trigger_events.append(TriggerEvent(
-                            trigger_id=f"change_{product_key}_{datetime.now().timestamp()}",
-                            trigger_type=trigger_type,
-                            product_ids=[product_key],
-                            triggered_at=datetime.now(),
-                            details={
-                                "change_type": "product_modified",
-                                "product_key": product_key,
-                                "seller_article": new_product.seller_article,
-                                "wildberries_article": new_product.wildberries_article,
-                                "changes_detected": changes
-                            }
-                        ))
             
             logger.info(f"Detected {len(trigger_events)} data changes requiring recalculation")
             return trigger_events
@@ -188,6 +175,12 @@ class RecalculationTriggerManager:
             logger.error(f"Failed to detect data changes: {e}")
             return []
     
+    def _snapshot(self, products: List[Product]) -> ProductSnapshot:
+        """Snapshot of products, reusing the one built on the previous call."""
+        if self._last_snapshot is not None and self._last_snapshot.source is products:
+            return self._last_snapshot
+        return ProductSnapshot(products)
+    
     def _group_products_by_key(self, products: List[Product]) -> Dict[str, Product]:
         """
         Group products by urls.md key: supplierArticle + nmId.
@@ -216,27 +209,51 @@ class RecalculationTriggerManager:
         Args:
             trigger_event: Trigger event to add
         """
-        try:
-            # Check for duplicate triggers (debouncing)
-            existing_trigger = self._find_similar_trigger(trigger_event)
-            if existing_trigger:
-                logger.debug(f"Skipping duplicate trigger: {trigger_event.trigger_id}")
-                return
-            
-            # Add to pending queue
-            self.pending_triggers.append(trigger_event)
+        await self.add_triggers([trigger_event])
+    
+    async def add_triggers(self, trigger_events: Iterable[TriggerEvent]) -> Dict[str, int]:
+        """
+        Add batch of trigger events to processing queue.
+        
+        Each trigger is debounced and queued in O(1), so the whole
+        detect_data_changes result is ingested in linear time.
+        
+        Args:
+            trigger_events: Trigger events to add
             
-            # Limit queue size
-            if len(self.pending_triggers) > self.max_pending_triggers:
-                # Remove oldest triggers
-                removed_count = len(self.pending_triggers) - self.max_pending_triggers
-                self.pending_triggers = self.pending_triggers[removed_count:]
-                logger.warning(f"Removed {removed_count} oldest triggers to maintain queue size")
+        Returns:
+            Counts of added, duplicate and dropped (queue overflow) triggers
+        """
+        stats = {"added": 0, "duplicates": 0, "dropped": 0}
+        
+        try:
+            self.pending_triggers.max_size = self.max_pending_triggers
+            stats = self.pending_triggers.add_batch(trigger_events, self.trigger_debounce_seconds)
             
-            logger.debug(f"Added trigger: {trigger_event.trigger_id}")
+            if stats["dropped"]:
+                logger.warning(f"Removed {stats['dropped']} oldest triggers to maintain queue size")
             
         except Exception as e:
             logger.error(f"Failed to add trigger: {e}")
+        
+        return stats
+    
+    async def ingest_data_changes(self, old_products: List[Product],
+                                  new_products: List[Product]) -> Dict[str, int]:
+        """
+        Detect product changes and queue all resulting triggers in one batch.
+        
+        Args:
+            old_products: Previous product state
+            new_products: New product state
+            
+        Returns:
+            Counts of detected, added, duplicate and dropped triggers
+        """
+        trigger_events = await self.detect_data_changes(old_products, new_products)
+        stats = await self.add_triggers(trigger_events)
+        stats["detected"] = len(trigger_events)
+        return stats
     
     def _find_similar_trigger(self, trigger_event: TriggerEvent) -> Optional[TriggerEvent]:
         """
@@ -249,14 +266,7 @@ class RecalculationTriggerManager:
             Similar trigger if found, None otherwise
         """
         cutoff_time = datetime.now() - timedelta(seconds=self.trigger_debounce_seconds)
-        
-        for pending_trigger in self.pending_triggers:
-            if (pending_trigger.trigger_type == trigger_event.trigger_type and
-                pending_trigger.triggered_at > cutoff_time and
-                set(pending_trigger.product_ids) == set(trigger_event.product_ids)):
-                return pending_trigger
-        
-        return None
+        return self.pending_triggers.find_similar(trigger_event, cutoff_time)
     
     async def process_pending_triggers(self) -> Dict[str, Any]:
         """
@@ -310,8 +320,7 @@ class RecalculationTriggerManager:
                     results["errors"].append(f"{trigger_type}: {str(e)}")
             
             # Move processed triggers to history
-            self.processed_triggers.extend(self.pending_triggers)
-            self.pending_triggers.clear()
+            self.processed_triggers.extend(self.pending_triggers.clear())
             
             # Cleanup old processed triggers
             self._cleanup_processed_triggers()
@@ -544,12 +553,12 @@ class RecalculationTriggerManager:
             "pending_triggers": len(self.pending_triggers),
             "processed_triggers": len(self.processed_triggers),
             "trigger_types_pending": {
-                trigger_type.value: len([t for t in self.pending_triggers if t.trigger_type == trigger_type])
+                trigger_type.value: self.pending_triggers.count_by_type(trigger_type)
                 for trigger_type in TriggerType
             },
             "oldest_pending": (
-                min(self.pending_triggers, key=lambda t: t.triggered_at).triggered_at.isoformat()
-                if self.pending_triggers else None
+                self.pending_triggers.oldest().triggered_at.isoformat()
+                if len(self.pending_triggers) else None
             ),
             "latest_processed": (
                 max(self.processed_triggers, key=lambda t: t.triggered_at).triggered_at.isoformat()
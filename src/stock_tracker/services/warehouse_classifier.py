@@ -14,7 +14,7 @@ Warehouse Classifier Module.
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from collections import Counter
 
 from stock_tracker.utils.logger import get_logger
@@ -23,6 +23,9 @@ from stock_tracker.api.client import WildberriesAPIClient
 
 logger = get_logger(__name__)
 
+# Ключ общего (межпроцессного) кэша мапинга складов тенанта
+MAPPING_CACHE_KEY = "warehouse_mapping"
+
 
 class WarehouseType:
     """Константы для типов складов."""
@@ -40,14 +43,27 @@ class WarehouseClassifier:
     последующего использования при обработке остатков.
     """
     
-    def __init__(self, wb_client: WildberriesAPIClient):
+    def __init__(
+        self,
+        wb_client: WildberriesAPIClient,
+        tenant_id: Optional[str] = None,
+        cache: Optional[Any] = None,
+        orders_store: Optional[Any] = None
+    ):
         """
         Инициализация классификатора складов.
         
         Args:
             wb_client: Клиент Wildberries API для получения данных
+            tenant_id: ID тенанта - мапинг разделяется между процессами через кэш
+            cache: Кэш (RedisCache / TieredCache) для общего мапинга
+            orders_store: Локальное хранилище заказов (SupplierOrdersStore) -
+                мапинг строится запросом к БД вместо выгрузки заказов из API
         """
         self.wb_client = wb_client
+        self.tenant_id = tenant_id
+        self.cache = cache
+        self.orders_store = orders_store
         self._warehouse_mapping: Dict[str, str] = {}
         self._mapping_updated_at: Optional[datetime] = None
         self._cache_ttl_hours = 24  # Обновлять мапинг раз в сутки
@@ -77,22 +93,35 @@ class WarehouseClassifier:
             logger.info(f"Using cached warehouse mapping ({len(self._warehouse_mapping)} warehouses)")
             return self._warehouse_mapping
         
-        logger.info(f"Building warehouse mapping from orders (last {days} days)...")
+        # Мапинг мог построить другой воркер (берётся из L1/Redis)
+        if not force_refresh and self.tenant_id and self.cache is not None:
+            shared = self.cache.get(self.tenant_id, MAPPING_CACHE_KEY)
+            if isinstance(shared, dict) and shared:
+                self._warehouse_mapping = shared
+                self._mapping_updated_at = datetime.now()
+                logger.info(f"Using shared warehouse mapping ({len(shared)} warehouses)")
+                return self._warehouse_mapping
         
-        # Получаем заказы за указанный период
-        date_from = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        orders = await self.wb_client.get_supplier_orders(date_from=date_from, flag=0)
+        logger.info(f"Building warehouse mapping from orders (last {days} days)...")
         
-        logger.info(f"Retrieved {len(orders)} orders for warehouse classification")
+        # Склады с типом и числом заказов за указанный период
+        since = datetime.now() - timedelta(days=days)
+        if self.orders_store is not None:
+            warehouse_rows = self.orders_store.warehouse_types(since)
+            logger.info(f"Loaded {len(warehouse_rows)} warehouse types from local orders store")
+        else:
+            orders = await self.wb_client.get_supplier_orders(date_from=since.strftime("%Y-%m-%d"), flag=0)
+            logger.info(f"Retrieved {len(orders)} orders for warehouse classification")
+            warehouse_rows = [
+                (order.get("warehouseName"), order.get("warehouseType", ""), 1)
+                for order in orders
+            ]
         
         # Извлекаем информацию о складах
         warehouse_mapping = {}
         warehouse_stats = Counter()
         
-        for order in orders:
-            warehouse_name = order.get("warehouseName")
-            warehouse_type_raw = order.get("warehouseType", "")
-            
+        for warehouse_name, warehouse_type_raw, orders_count in warehouse_rows:
             if not warehouse_name:
                 continue
             
@@ -109,12 +138,18 @@ class WarehouseClassifier:
                 warehouse_mapping[warehouse_name] = warehouse_type
             
             # Статистика для логирования
-            warehouse_stats[f"{warehouse_name} ({warehouse_type})"] += 1
+            warehouse_stats[f"{warehouse_name} ({warehouse_type})"] += orders_count
         
         # Сохраняем в кэш
         self._warehouse_mapping = warehouse_mapping
         self._mapping_updated_at = datetime.now()
         
+        if self.tenant_id and self.cache is not None and warehouse_mapping:
+            self.cache.set(
+                self.tenant_id, MAPPING_CACHE_KEY, warehouse_mapping,
+                ttl=self._cache_ttl_hours * 3600
+            )
+        
         # Логируем результаты
         logger.info(f"Built warehouse mapping: {len(warehouse_mapping)} unique warehouses")
         
@@ -265,7 +300,10 @@ class WarehouseClassifier:
 
 async def create_warehouse_classifier(wb_client: WildberriesAPIClient,
                                       days: int = 90,
-                                      auto_build: bool = True) -> WarehouseClassifier:
+                                      auto_build: bool = True,
+                                      tenant_id: Optional[str] = None,
+                                      cache: Optional[Any] = None,
+                                      orders_store: Optional[Any] = None) -> WarehouseClassifier:
     """
     Factory function для создания и инициализации классификатора складов.
     
@@ -273,11 +311,14 @@ async def create_warehouse_classifier(wb_client: WildberriesAPIClient,
         wb_client: Клиент Wildberries API
         days: Количество дней для анализа заказов
         auto_build: Автоматически построить мапинг при создании
+        tenant_id: ID тенанта для общего кэша мапинга
+        cache: Кэш для общего мапинга
+        orders_store: Локальное хранилище заказов (SupplierOrdersStore)
         
     Returns:
         Инициализированный WarehouseClassifier
     """
-    classifier = WarehouseClassifier(wb_client)
+    classifier = WarehouseClassifier(wb_client, tenant_id=tenant_id, cache=cache, orders_store=orders_store)
     
     if auto_build:
         await classifier.build_warehouse_mapping(days=days)
@@ -3,151 +3,439 @@ Webhook dispatcher for sending notifications to external services.
 
 Supports:
 - Telegram bot notifications
-- Custom webhook endpoints
-- Retry logic for failed deliveries
+- Custom webhook endpoints via a persistent outbox (webhook_deliveries)
+
+Delivery flow:
+1. enqueue_webhook() inserts one WebhookDelivery row per matching endpoint
+   and returns immediately (called from sync tasks)
+2. deliver_pending_webhooks() (deliver_webhooks Celery task) claims due
+   rows with FOR UPDATE SKIP LOCKED, sends them concurrently over a pooled
+   async HTTP client with a per-endpoint concurrency limit; a run is capped
+   below the claim lease, unfinished requests are released for the next run
+3. Failures are retried with exponential backoff; low_stock_alert bursts
+   are delayed by a short window and sent as one batched payload
 """
 
+import asyncio
+import hashlib
+import hmac
 import logging
 import json
-from typing import Dict, Any, Optional
-from datetime import datetime
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+
+import httpx
 import requests
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 
-from ..database.models import Tenant, WebhookConfig
+from ..database.models import Tenant, WebhookConfig, WebhookDelivery
 
 logger = logging.getLogger(__name__)
 
 # Webhook timeout in seconds
 WEBHOOK_TIMEOUT = 10
-MAX_RETRIES = 3
 
+# Retry policy
+MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+RETRY_BASE_DELAY = int(os.getenv("WEBHOOK_RETRY_BASE_DELAY", "30"))  # seconds
+RETRY_MAX_DELAY = int(os.getenv("WEBHOOK_RETRY_MAX_DELAY", "3600"))  # seconds
+
+# Delivery worker
+DELIVERY_BATCH_SIZE = int(os.getenv("WEBHOOK_DELIVERY_BATCH_SIZE", "200"))
+PER_ENDPOINT_CONCURRENCY = int(os.getenv("WEBHOOK_PER_ENDPOINT_CONCURRENCY", "4"))
+MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "50"))
+# Hard cap on sending in one run (one slow endpoint can otherwise hold a
+# 200-row run for minutes); requests still queued at the deadline are released
+DELIVERY_RUN_TIMEOUT = int(os.getenv("WEBHOOK_DELIVERY_RUN_TIMEOUT", "120"))
+# Claimed rows are hidden from other workers for this long: the whole run
+# plus time to claim and record results, so rows are never re-claimed mid-run
+CLAIM_LEASE_SECONDS = DELIVERY_RUN_TIMEOUT + WEBHOOK_TIMEOUT * 3
+
+# Events coalesced into one batched payload per endpoint
+COALESCED_EVENTS = {"low_stock_alert"}
+COALESCE_WINDOW_SECONDS = int(os.getenv("WEBHOOK_COALESCE_SECONDS", "30"))
+
+# 4xx responses worth retrying; other 4xx are permanent failures
+RETRYABLE_CLIENT_ERRORS = {408, 409, 425, 429}
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
 
-def dispatch_webhook(
+
+def _subscribed(webhook: WebhookConfig, event_type: str) -> bool:
+    """Check if webhook listens to event type."""
+    events = webhook.events or []
+    return event_type in events or "*" in events
+
+
+def enqueue_webhook(
     tenant: Tenant,
     event_type: str,
     data: Dict[str, Any],
-    db_session: Optional[Session] = None,
-) -> bool:
+    db_session: Session,
+    commit: bool = True,
+) -> int:
     """
-    Dispatch webhook notification to tenant's configured endpoints.
+    Queue webhook notification for tenant's configured endpoints.
+    
+    Only writes outbox rows, no HTTP requests are made here.
     
     Args:
         tenant: Tenant to send webhook for
         event_type: Type of event (sync_started, sync_completed, sync_failed, low_stock_alert)
-        data: Event data payload
-        db_session: Optional database session for updating webhook config
+        data: Event data payload (JSON serializable)
+        db_session: Database session
+        commit: Commit the session after queuing
         
     Returns:
-        bool: True if webhook delivered successfully, False otherwise
+        int: Number of queued deliveries
     """
-    if not tenant.webhook_configs:
-        logger.debug(f"No webhooks configured for tenant {tenant.id}")
-        return False
-    
-    # Get active webhook configs for this event type
-    active_webhooks = [
-        wh for wh in tenant.webhook_configs
-        if wh.is_active and event_type in wh.event_types
+    webhooks = [
+        wh for wh in db_session.query(WebhookConfig).filter(
+            WebhookConfig.tenant_id == tenant.id,
+            WebhookConfig.is_active == True,
+        ).all()
+        if _subscribed(wh, event_type)
     ]
     
-    if not active_webhooks:
+    if not webhooks:
         logger.debug(f"No active webhooks for event {event_type} on tenant {tenant.id}")
-        return False
+        return 0
     
-    success_count = 0
-    
-    for webhook in active_webhooks:
-        try:
-            delivered = _send_webhook(webhook, event_type, data)
-            if delivered:
-                success_count += 1
-                # Reset failure count on success
-                if db_session and webhook.failure_count > 0:
-                    webhook.failure_count = 0
-                    webhook.last_success_at = datetime.utcnow()
-                    db_session.commit()
-            else:
-                # Increment failure count
-                if db_session:
-                    webhook.failure_count += 1
-                    if webhook.failure_count >= MAX_RETRIES:
-                        logger.warning(
-                            f"Webhook {webhook.id} exceeded max failures, deactivating"
-                        )
-                        webhook.is_active = False
-                    db_session.commit()
-                    
-        except Exception as e:
-            logger.error(f"Error dispatching webhook {webhook.id}: {e}", exc_info=True)
-            if db_session:
-                webhook.failure_count += 1
-                db_session.commit()
-    
-    return success_count > 0
-
-
-def _send_webhook(
-    webhook_config: WebhookConfig,
-    event_type: str,
-    data: Dict[str, Any],
-) -> bool:
+    now = _now()
+    # Give bursts of coalesced events time to accumulate
+    next_attempt_at = now + timedelta(seconds=COALESCE_WINDOW_SECONDS) if event_type in COALESCED_EVENTS else now
+    
+    for webhook in webhooks:
+        db_session.add(WebhookDelivery(
+            tenant_id=tenant.id,
+            webhook_config_id=webhook.id,
+            event_type=event_type,
+            data=data,
+            status="pending",
+            attempts=0,
+            next_attempt_at=next_attempt_at,
+            created_at=now,
+        ))
+    
+    if commit:
+        db_session.commit()
+    
+    logger.debug(f"Queued {len(webhooks)} webhook deliveries for event {event_type} on tenant {tenant.id}")
+    return len(webhooks)
+
+
+@dataclass
+class DeliveryBatch:
+    """One HTTP request: a single delivery or coalesced deliveries to one endpoint."""
+    webhook_id: Any
+    url: str
+    secret: Optional[str]
+    event_type: str
+    deliveries: List[WebhookDelivery] = field(default_factory=list)
+    
+    def payload(self) -> Dict[str, Any]:
+        """Request body (batched events carry data.alerts)."""
+        if len(self.deliveries) == 1:
+            data = self.deliveries[0].data
+        else:
+            data = {
+                "count": len(self.deliveries),
+                "alerts": [delivery.data for delivery in self.deliveries],
+            }
+        return {
+            "event_type": self.event_type,
+            "timestamp": _now().isoformat(),
+            "batched": len(self.deliveries) > 1,
+            "data": data,
+        }
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of one HTTP request."""
+    ok: bool
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    retryable: bool = True
+
+
+def build_batches(deliveries: List[WebhookDelivery]) -> List[DeliveryBatch]:
     """
-    Send webhook HTTP request.
+    Group claimed deliveries into HTTP requests.
     
-    Args:
-        webhook_config: Webhook configuration
-        event_type: Event type
-        data: Event payload
+    Coalesced events for the same endpoint become one request, other
+    events are sent one per request in creation order.
+    """
+    batches: List[DeliveryBatch] = []
+    coalesced: Dict[Any, DeliveryBatch] = {}
+    
+    for delivery in deliveries:
+        webhook = delivery.config
+        key = (webhook.id, delivery.event_type)
         
-    Returns:
-        bool: True if delivered successfully
+        if delivery.event_type in COALESCED_EVENTS and key in coalesced:
+            coalesced[key].deliveries.append(delivery)
+            continue
+        
+        batch = DeliveryBatch(
+            webhook_id=webhook.id,
+            url=webhook.url,
+            secret=webhook.secret,
+            event_type=delivery.event_type,
+            deliveries=[delivery],
+        )
+        batches.append(batch)
+        if delivery.event_type in COALESCED_EVENTS:
+            coalesced[key] = batch
+    
+    return batches
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """HMAC-SHA256 signature of request body."""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class WebhookSender:
     """
-    payload = {
-        "event_type": event_type,
-        "timestamp": datetime.utcnow().isoformat(),
-        "data": data,
-    }
+    Async HTTP sender for webhook batches.
     
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "StockTracker/1.0",
-    }
+    Uses one pooled httpx.AsyncClient and limits concurrent requests per
+    endpoint, so one slow receiver does not hold up the others.
+    """
     
-    # Add custom headers if configured
-    if webhook_config.headers:
-        headers.update(webhook_config.headers)
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        per_endpoint_concurrency: int = PER_ENDPOINT_CONCURRENCY,
+    ):
+        """
+        Args:
+            client: HTTP client (default: pooled client with WEBHOOK_TIMEOUT)
+            per_endpoint_concurrency: Max in-flight requests per webhook URL
+        """
+        self._client = client
+        self.per_endpoint_concurrency = per_endpoint_concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
     
-    try:
-        logger.info(f"Sending webhook to {webhook_config.url} for event {event_type}")
+    async def __aenter__(self) -> "WebhookSender":
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=WEBHOOK_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                ),
+            )
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+    
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(url)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_endpoint_concurrency)
+            self._semaphores[url] = semaphore
+        return semaphore
+    
+    async def send(self, batch: DeliveryBatch) -> DeliveryResult:
+        """Send one batch."""
+        body = json.dumps(batch.payload(), default=str).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "StockTracker/1.0",
+            "X-StockTracker-Event": batch.event_type,
+        }
+        if batch.secret:
+            headers["X-StockTracker-Signature"] = sign_payload(batch.secret, body)
         
-        response = requests.post(
-            webhook_config.url,
-            json=payload,
-            headers=headers,
-            timeout=WEBHOOK_TIMEOUT,
-        )
+        async with self._semaphore(batch.url):
+            try:
+                response = await self._client.post(batch.url, content=body, headers=headers)
+            except httpx.TimeoutException:
+                logger.warning(f"Webhook timeout: {batch.url}")
+                return DeliveryResult(ok=False, error="timeout")
+            except httpx.HTTPError as e:
+                logger.error(f"Webhook request failed: {batch.url} - {e}")
+                return DeliveryResult(ok=False, error=str(e))
         
         # Consider 2xx responses as success
         if 200 <= response.status_code < 300:
             logger.info(
-                f"Webhook delivered successfully: {webhook_config.url} "
-                f"(status: {response.status_code})"
+                f"Webhook delivered successfully: {batch.url} "
+                f"(status: {response.status_code}, events: {len(batch.deliveries)})"
             )
-            return True
+            return DeliveryResult(ok=True, status_code=response.status_code)
+        
+        logger.warning(
+            f"Webhook delivery failed: {batch.url} "
+            f"(status: {response.status_code}, body: {response.text[:200]})"
+        )
+        retryable = response.status_code >= 500 or response.status_code in RETRYABLE_CLIENT_ERRORS
+        return DeliveryResult(
+            ok=False,
+            status_code=response.status_code,
+            error=response.text[:500],
+            retryable=retryable,
+        )
+    
+    async def send_all(
+        self,
+        batches: List[DeliveryBatch],
+        timeout: Optional[float] = None,
+    ) -> List[Optional[DeliveryResult]]:
+        """
+        Send batches concurrently (results in input order).
+        
+        Args:
+            batches: Batches to send
+            timeout: Deadline for the whole run; batches not finished by then
+                are cancelled and get None instead of a result
+        """
+        if not batches:
+            return []
+        
+        tasks = [asyncio.ensure_future(self.send(batch)) for batch in batches]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        
+        if pending:
+            logger.warning(f"Webhook run deadline reached, releasing {len(pending)} unsent requests")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        return [task.result() if task in done else None for task in tasks]
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given attempt number."""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.75, 1.25)
+
+
+def claim_due_deliveries(db_session: Session, limit: int = DELIVERY_BATCH_SIZE) -> List[WebhookDelivery]:
+    """
+    Claim due pending deliveries.
+    
+    Rows are locked with SKIP LOCKED and their next attempt is moved past
+    the lease, so concurrent workers never send the same delivery and rows
+    of a crashed worker become due again.
+    """
+    now = _now()
+    deliveries = list(db_session.scalars(
+        select(WebhookDelivery)
+        .where(
+            WebhookDelivery.status == "pending",
+            WebhookDelivery.next_attempt_at <= now,
+        )
+        .order_by(WebhookDelivery.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .options(selectinload(WebhookDelivery.config))
+    ))
+    
+    lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    for delivery in deliveries:
+        delivery.next_attempt_at = lease_until
+    db_session.commit()
+    
+    return deliveries
+
+
+def record_results(
+    db_session: Session,
+    batches: List[DeliveryBatch],
+    results: List[Optional[DeliveryResult]],
+) -> Dict[str, int]:
+    """
+    Store delivery outcomes and update endpoint circuit breaker state.
+    
+    A None result (cut off by the run deadline) is not an attempt: the
+    deliveries become due again immediately.
+    
+    Returns:
+        dict: Counts of delivered, retried, failed and deferred deliveries
+    """
+    stats = {"delivered": 0, "retried": 0, "failed": 0, "deferred": 0}
+    now = _now()
+    
+    for batch, result in zip(batches, results):
+        if result is None:
+            for delivery in batch.deliveries:
+                delivery.next_attempt_at = now
+            stats["deferred"] += len(batch.deliveries)
+            continue
+        
+        webhook = batch.deliveries[0].config
+        was_active = webhook.is_active
+        
+        if result.ok:
+            webhook.reset_failures()
         else:
-            logger.warning(
-                f"Webhook delivery failed: {webhook_config.url} "
-                f"(status: {response.status_code}, body: {response.text[:200]})"
-            )
-            return False
+            webhook.increment_failure()
+        
+        for delivery in batch.deliveries:
+            delivery.attempts += 1
+            delivery.last_status_code = result.status_code
             
-    except requests.exceptions.Timeout:
-        logger.warning(f"Webhook timeout: {webhook_config.url}")
-        return False
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Webhook request failed: {webhook_config.url} - {e}")
-        return False
+            if result.ok:
+                delivery.status = "delivered"
+                delivery.delivered_at = now
+                delivery.last_error = None
+                stats["delivered"] += 1
+            elif result.retryable and delivery.attempts < MAX_ATTEMPTS and webhook.is_active:
+                delivery.next_attempt_at = now + timedelta(seconds=retry_delay(delivery.attempts))
+                delivery.last_error = result.error
+                stats["retried"] += 1
+            else:
+                delivery.status = "failed"
+                delivery.last_error = result.error
+                stats["failed"] += 1
+        
+        if was_active and not webhook.is_active:
+            logger.warning(f"Webhook {webhook.id} exceeded max failures, deactivating")
+    
+    db_session.commit()
+    return stats
+
+
+def deliver_pending_webhooks(db_session: Session, limit: int = DELIVERY_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Send one batch of due deliveries.
+    
+    Args:
+        db_session: Database session
+        limit: Max deliveries claimed per run
+        
+    Returns:
+        dict: Claimed, request, delivered, retried, failed and deferred counts
+    """
+    deliveries = claim_due_deliveries(db_session, limit)
+    if not deliveries:
+        return {"claimed": 0, "requests": 0, "delivered": 0, "retried": 0, "failed": 0, "deferred": 0}
+    
+    batches = build_batches(deliveries)
+    
+    async def send():
+        async with WebhookSender() as sender:
+            return await sender.send_all(batches, timeout=DELIVERY_RUN_TIMEOUT)
+    
+    results = asyncio.run(send())
+    stats = record_results(db_session, batches, results)
+    
+    logger.info(
+        f"Webhook delivery run: {len(deliveries)} claimed, {len(batches)} requests, "
+        f"{stats['delivered']} delivered, {stats['retried']} retried, {stats['failed']} failed, "
+        f"{stats['deferred']} deferred"
+    )
+    return {"claimed": len(deliveries), "requests": len(batches), **stats}
 
 
 def send_telegram_notification(
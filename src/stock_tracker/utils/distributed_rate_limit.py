@@ -0,0 +1,220 @@
+"""
+Cluster-wide Wildberries rate limiting backed by Redis.
+
+WB enforces its quotas per API key and API category, while every Celery
+worker, the API process and the Telegram bot used to pace themselves with
+in-process buckets. Budgets are therefore kept in Redis as a GCRA
+(generic cell rate algorithm) theoretical arrival time per
+(API key hash, endpoint group), updated by one atomic Lua script.
+
+The script reserves the next free slot instead of answering yes/no: each
+caller gets its own start time in arrival order and sleeps until then.
+Callers never poll, so a busy key is served first-come first-served and
+its budget is used back to back without bursts that trigger 429s.
+A 429 pushes the slot of the whole key forward by Retry-After, so other
+processes stop hitting the key too.
+
+Keys: ratelimit:wb:{key_id}:{group}, where key_id is the first 16 hex
+digits of SHA-256 of the API key (the Telegram bot uses the same scheme).
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+from typing import Optional
+
+from stock_tracker.utils.logger import get_logger
+from stock_tracker.utils.exceptions import RateLimitError
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+logger = get_logger(__name__)
+
+
+KEY_PREFIX = "ratelimit:wb"
+
+# Reserve the next slot: returns {reserved, wait_ms}. Time comes from the
+# Redis server, so processes on different hosts share one clock.
+GCRA_RESERVE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local wait = tat - tolerance - now
+if wait < 0 then
+    wait = 0
+end
+if wait > max_wait then
+    return {0, wait}
+end
+
+local new_tat = tat + interval
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now + interval)
+return {1, wait}
+"""
+
+# Move the next slot of the key to now + ARGV[1] ms unless it is later already
+GCRA_PENALIZE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+
+local tat = tonumber(redis.call("GET", KEYS[1]) or 0)
+if until_ms > tat then
+    redis.call("SET", KEYS[1], until_ms, "PX", tonumber(ARGV[1]))
+end
+return until_ms
+"""
+
+
+def api_key_id(api_key: str) -> str:
+    """Stable identifier of an API key (the key itself is never stored)."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class DistributedRateLimiter:
+    """
+    GCRA limiter with per (API key, endpoint group) budgets in Redis.
+
+    Budgets are passed on every call, so all processes only have to agree
+    on the configuration, not on any local state.
+    """
+
+    def __init__(self, client: "redis.Redis", key_prefix: str = KEY_PREFIX):
+        """
+        Initialize distributed limiter.
+
+        Args:
+            client: Synchronous Redis client
+            key_prefix: Prefix of budget keys
+        """
+        self.client = client
+        self.key_prefix = key_prefix
+        self._reserve = client.register_script(GCRA_RESERVE_SCRIPT)
+        self._penalize = client.register_script(GCRA_PENALIZE_SCRIPT)
+
+    def _key(self, api_key: str, group: str) -> str:
+        return f"{self.key_prefix}:{api_key_id(api_key)}:{group}"
+
+    def reserve(self, api_key: str, group: str, requests_per_minute: float,
+                burst_size: int = 1, max_wait: float = 300.0) -> float:
+        """
+        Reserve the next request slot of the key.
+
+        Args:
+            api_key: Wildberries API key
+            group: Endpoint group sharing one WB quota
+            requests_per_minute: Sustained rate of the group
+            burst_size: Requests allowed back to back
+            max_wait: Longest acceptable wait in seconds
+
+        Returns:
+            Seconds to wait before sending the request
+
+        Raises:
+            RateLimitError: If the slot is further away than max_wait
+                (nothing is reserved in this case)
+        """
+        interval_ms = math.ceil(60000.0 / requests_per_minute)
+        tolerance_ms = interval_ms * max(burst_size - 1, 0)
+        reserved, wait_ms = self._reserve(
+            keys=[self._key(api_key, group)],
+            args=[interval_ms, tolerance_ms, math.floor(max_wait * 1000)]
+        )
+        wait = int(wait_ms) / 1000.0
+        if not int(reserved):
+            raise RateLimitError(
+                f"Required wait time {wait:.1f}s exceeds timeout",
+                retry_after=math.ceil(wait),
+                endpoint=group
+            )
+        return wait
+
+    async def acquire(self, api_key: str, group: str, requests_per_minute: float,
+                      burst_size: int = 1, max_wait: float = 300.0) -> float:
+        """
+        Wait for the next request slot of the key.
+
+        Returns:
+            Seconds waited
+        """
+        # Synchronous Redis client: keep the round trip off the event loop
+        loop = asyncio.get_running_loop()
+        wait = await loop.run_in_executor(
+            None, self.reserve, api_key, group, requests_per_minute, burst_size, max_wait
+        )
+        if wait > 0:
+            logger.debug(f"Waiting {wait:.2f}s for cluster rate limit ({group})")
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, api_key: str, group: str, retry_after: float,
+                 requests_per_minute: float = 1.0, burst_size: int = 1) -> None:
+        """
+        Block the key group for all processes after a 429 response.
+
+        Args:
+            api_key: Wildberries API key
+            group: Endpoint group that was rate limited
+            retry_after: Seconds to hold requests back
+            requests_per_minute: Sustained rate of the group
+            burst_size: Requests allowed back to back
+        """
+        # Burst tolerance would let the first requests in before retry_after
+        tolerance_ms = math.ceil(60000.0 / requests_per_minute) * max(burst_size - 1, 0)
+        self._penalize(
+            keys=[self._key(api_key, group)],
+            args=[math.ceil(retry_after * 1000) + tolerance_ms]
+        )
+        logger.warning(f"Rate limited by WB, holding {group} requests of key for {retry_after:.0f}s")
+
+
+# Global distributed limiter instance
+_distributed_limiter: Optional[DistributedRateLimiter] = None
+_distributed_available = True
+
+
+def get_distributed_limiter() -> Optional[DistributedRateLimiter]:
+    """
+    Get global distributed limiter.
+
+    Disabled by WB_RATE_LIMIT_DISTRIBUTED=false. Uses REDIS_URL and
+    returns None (in-process limiting only) if Redis is unavailable.
+
+    Returns:
+        DistributedRateLimiter instance or None
+    """
+    global _distributed_limiter, _distributed_available
+
+    if _distributed_limiter is None and _distributed_available:
+        enabled = os.getenv("WB_RATE_LIMIT_DISTRIBUTED", "true").lower() not in ("0", "false", "no")
+        if not enabled or redis is None:
+            _distributed_available = False
+            return None
+
+        try:
+            client = redis.Redis.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                socket_timeout=2.0,
+                socket_connect_timeout=2.0
+            )
+            client.ping()
+            _distributed_limiter = DistributedRateLimiter(client)
+            logger.info("Distributed WB rate limiting enabled")
+        except Exception as e:
+            logger.warning(f"Redis unavailable, WB rate limits are per process: {e}")
+            _distributed_available = False
+
+    return _distributed_limiter
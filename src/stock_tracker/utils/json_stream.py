@@ -0,0 +1,134 @@
+"""
+Incremental parsing of large JSON array responses.
+
+warehouse_remains downloads and supplier/orders responses are top-level
+arrays that can reach hundreds of MB for big sellers. Parsing them with
+response.json() keeps the raw body, its decoded text and every record
+in memory at once. JSONArrayStreamParser instead takes the body chunk by
+chunk and returns each element as soon as it is complete, so only the
+current element and one network chunk are buffered.
+
+Elements are decoded with the C-accelerated json.JSONDecoder.raw_decode;
+no extra dependency is needed.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, List
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Numbers and literals are only complete once a delimiter follows them
+# ("-0" may continue as "-0.5")
+_OPEN_ENDED = frozenset("-0123456789tfn")
+_DELIMITERS = frozenset(",] \t\n\r")
+
+
+class JSONArrayStreamParser:
+    """
+    Push parser for a top-level JSON array.
+
+    feed() returns the elements completed by a chunk; close() checks that
+    the array was terminated.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "start"  # start -> first -> (value <-> separator) -> done
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Add a chunk of the response body.
+
+        Returns:
+            Elements completed by this chunk
+
+        Raises:
+            ValueError: If the body is not a JSON array
+        """
+        self._buffer += self._utf8.decode(chunk)
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        """
+        Finish parsing.
+
+        Returns:
+            Remaining elements
+
+        Raises:
+            ValueError: If the array is truncated or malformed
+        """
+        self._buffer += self._utf8.decode(b"", final=True)
+        items = self._drain(final=True)
+        if self._state != "done":
+            raise ValueError("Truncated JSON array")
+        return items
+
+    def _drain(self, final: bool) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        size = len(buffer)
+        pos = _WHITESPACE.match(buffer, 0).end()
+
+        while pos < size:
+            char = buffer[pos]
+            if self._state == "start":
+                if char != "[":
+                    raise ValueError(f"Expected JSON array, got {char!r}")
+                self._state = "first"
+                pos += 1
+            elif self._state == "separator":
+                if char == ",":
+                    self._state = "value"
+                elif char == "]":
+                    self._state = "done"
+                else:
+                    raise ValueError(f"Expected ',' or ']' at position {pos}, got {char!r}")
+                pos += 1
+            elif self._state == "done":
+                raise ValueError("Unexpected data after JSON array")
+            elif self._state == "first" and char == "]":
+                self._state = "done"
+                pos += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # Element continues in the next chunk
+                if char in _OPEN_ENDED and not final and (end == size or buffer[end] not in _DELIMITERS):
+                    break  # A number or literal may continue in the next chunk
+                items.append(item)
+                self._state = "separator"
+                pos = end
+            pos = _WHITESPACE.match(buffer, pos).end()
+
+        self._buffer = buffer[pos:]
+        return items
+
+
+async def aiter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Yield elements of a JSON array body as its chunks arrive.
+
+    Args:
+        chunks: Response body chunks (e.g. httpx Response.aiter_bytes())
+
+    Yields:
+        Array elements in order
+
+    Raises:
+        ValueError: If the body is not a well-formed JSON array
+    """
+    parser = JSONArrayStreamParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
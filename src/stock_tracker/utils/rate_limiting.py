@@ -7,6 +7,8 @@ request scheduling and queue management.
 """
 
 import asyncio
+import inspect
+import os
 import time
 from asyncio import Queue
 from dataclasses import dataclass, field
@@ -17,6 +19,9 @@ from functools import wraps
 
 from stock_tracker.utils.logger import get_logger
 from stock_tracker.utils.exceptions import RateLimitError
+from stock_tracker.utils.distributed_rate_limit import (
+    DistributedRateLimiter, get_distributed_limiter
+)
 
 
 logger = get_logger(__name__)
@@ -42,6 +47,28 @@ class RateLimitConfig:
     
     # Per-endpoint configurations
     endpoint_configs: Dict[str, 'EndpointRateLimit'] = field(default_factory=dict)
+    
+    # Cluster-wide per-API-key budgets (see utils.distributed_rate_limit)
+    distributed: bool = False
+    key_groups: Dict[str, 'EndpointRateLimit'] = field(default_factory=dict)  # group -> budget
+    endpoint_groups: Dict[str, str] = field(default_factory=dict)  # endpoint prefix -> group
+    
+    def group_for(self, endpoint: str) -> str:
+        """Endpoint group sharing one per-key budget (longest prefix match)."""
+        matches = [prefix for prefix in self.endpoint_groups if endpoint.startswith(prefix)]
+        if not matches:
+            return "default"
+        return self.endpoint_groups[max(matches, key=len)]
+    
+    def key_group_limit(self, group: str) -> 'EndpointRateLimit':
+        """Per-key budget of an endpoint group."""
+        limit = self.key_groups.get(group)
+        if limit is None:
+            limit = EndpointRateLimit(
+                requests_per_minute=self.requests_per_minute,
+                burst_size=self.burst_size
+            )
+        return limit
 
 
 @dataclass
@@ -139,10 +166,18 @@ class RateLimiter:
     - Adaptive rate adjustment based on API responses
     - Request queuing and prioritization
     - Thread-safe operation
+    - Optional per-API-key budgets shared by all processes via Redis
     """
     
-    def __init__(self, config: RateLimitConfig):
+    def __init__(self, config: RateLimitConfig,
+                 distributed: Optional[DistributedRateLimiter] = None):
+        """
+        Args:
+            config: Rate limit configuration
+            distributed: Cluster-wide limiter for calls made with an API key
+        """
         self.config = config
+        self.distributed = distributed
         self.lock = RLock()
         
         # Global rate limiter
@@ -168,11 +203,13 @@ class RateLimiter:
             "rate_limited_requests": 0,
             "queued_requests": 0,
             "failed_requests": 0,
+            "distributed_requests": 0,
             "last_rate_limit": None
         }
         
         logger.info(f"Initialized rate limiter: {config.requests_per_minute} req/min, "
-                   f"{config.requests_per_second} req/s, burst={config.burst_size}")
+                   f"{config.requests_per_second} req/s, burst={config.burst_size}, "
+                   f"distributed={distributed is not None}")
     
     def _get_endpoint_bucket(self, endpoint: str) -> TokenBucket:
         """Get or create token bucket for specific endpoint."""
@@ -238,13 +275,42 @@ class RateLimiter:
                 logger.warning(f"Rate limited! Reduced rate factor from {old_factor:.2f} "
                              f"to {self.current_rate_factor:.2f}, waiting {wait_time}s")
     
-    async def acquire(self, endpoint: str = "default", priority: int = 1) -> None:
+    def _acquire_distributed(self, api_key: str, endpoint: str) -> Optional[float]:
+        """
+        Reserve a slot in the cluster-wide budget of the key.
+        
+        Returns:
+            Seconds to wait, or None if Redis failed (use local buckets)
+        """
+        group = self.config.group_for(endpoint)
+        limit = self.config.key_group_limit(group)
+        try:
+            return self.distributed.reserve(
+                api_key, group,
+                requests_per_minute=limit.requests_per_minute,
+                burst_size=limit.burst_size or 1,
+                max_wait=self.config.queue_timeout
+            )
+        except RateLimitError:
+            self.stats["failed_requests"] += 1
+            raise
+        except Exception as e:
+            logger.warning(f"Distributed rate limiter failed, using local buckets: {e}")
+            return None
+    
+    async def acquire(self, endpoint: str = "default", priority: int = 1,
+                      api_key: Optional[str] = None) -> None:
         """
         Acquire permission to make an API request.
         
+        Calls made with an API key use the cluster-wide budget of the key
+        when a distributed limiter is configured; the local buckets are
+        only a fallback then.
+        
         Args:
             endpoint: API endpoint identifier
             priority: Request priority (higher = faster processing)
+            api_key: API key the request is made with
             
         Raises:
             RateLimitError: If rate limit is exceeded and cannot be handled
@@ -260,6 +326,18 @@ class RateLimiter:
             logger.info(f"Waiting for rate limit recovery: {wait_time:.1f}s")
             await asyncio.sleep(wait_time)
         
+        if api_key and self.distributed is not None:
+            # Redis client is blocking: reserve the slot off the event loop
+            loop = asyncio.get_running_loop()
+            wait_time = await loop.run_in_executor(None, self._acquire_distributed, api_key, endpoint)
+            if wait_time is not None:
+                self.stats["distributed_requests"] += 1
+                if wait_time > 0:
+                    self.stats["queued_requests"] += 1
+                    logger.debug(f"Waiting {wait_time:.2f}s for cluster rate limit ({endpoint})")
+                    await asyncio.sleep(wait_time)
+                return
+        
         # Get endpoint-specific bucket
         endpoint_bucket = self._get_endpoint_bucket(endpoint)
         
@@ -289,28 +367,52 @@ class RateLimiter:
             self.stats["failed_requests"] += 1
             raise RateLimitError("Failed to acquire tokens after waiting")
     
-    def record_response(self, status_code: int, headers: Dict[str, str]):
+    def record_response(self, status_code: int, headers: Dict[str, str],
+                        endpoint: Optional[str] = None, api_key: Optional[str] = None):
         """
         Record API response for adaptive rate limiting.
         
         Args:
             status_code: HTTP status code
             headers: Response headers
+            endpoint: API endpoint identifier
+            api_key: API key the request was made with
         """
         if status_code == 429:
             self._handle_rate_limit_response(status_code, headers)
+            if api_key and endpoint and self.distributed is not None:
+                self._penalize_distributed(api_key, endpoint, headers)
         elif status_code is not None and 200 <= status_code < 300 and self.config.adaptive_rate_limiting:
             # Successful response - gradually increase rate if we were throttled
             if self.current_rate_factor < 1.0:
                 self.current_rate_factor = min(1.0, self.current_rate_factor * 1.01)
     
+    def _penalize_distributed(self, api_key: str, endpoint: str, headers: Dict[str, str]):
+        """Hold back requests of the key in all processes after a 429."""
+        try:
+            retry_after = float(headers.get('Retry-After', self.config.recovery_time))
+        except (TypeError, ValueError):
+            retry_after = self.config.recovery_time
+        
+        group = self.config.group_for(endpoint)
+        limit = self.config.key_group_limit(group)
+        try:
+            self.distributed.penalize(
+                api_key, group, retry_after,
+                requests_per_minute=limit.requests_per_minute,
+                burst_size=limit.burst_size or 1
+            )
+        except Exception as e:
+            logger.warning(f"Failed to share rate limit state: {e}")
+    
     def get_status(self) -> Dict[str, Any]:
         """Get comprehensive rate limiter status."""
         return {
             "config": {
                 "requests_per_minute": self.config.requests_per_minute,
                 "requests_per_second": self.config.requests_per_second,
-                "burst_size": self.config.burst_size
+                "burst_size": self.config.burst_size,
+                "distributed": self.distributed is not None
             },
             "state": {
                 "is_rate_limited": self.is_rate_limited,
@@ -348,17 +450,36 @@ def get_rate_limiter(config: Optional[RateLimitConfig] = None) -> RateLimiter:
     if _rate_limiter is None:
         if config is None:
             config = RateLimitConfig()
-        _rate_limiter = RateLimiter(config)
+        distributed = get_distributed_limiter() if config.distributed else None
+        _rate_limiter = RateLimiter(config, distributed=distributed)
     
     return _rate_limiter
 
 
+def _record_error_response(limiter: RateLimiter, error: Exception,
+                           endpoint: str, api_key: Optional[str]) -> None:
+    """Feed a failed call back into the limiter (429s slow down the key)."""
+    status_code = getattr(error, 'status_code', 500)
+    headers = {}
+    if hasattr(error, 'response') and error.response:
+        headers = dict(error.response.headers)
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after and 'Retry-After' not in headers:
+        headers['Retry-After'] = str(retry_after)
+    
+    limiter.record_response(status_code, headers, endpoint=endpoint, api_key=api_key)
+
+
 def rate_limited(endpoint: str = "default", 
                 priority: int = 1,
                 config: Optional[RateLimitConfig] = None):
     """
     Decorator for applying rate limiting to functions.
     
+    Methods of objects with an ``api_key`` attribute (API clients) are
+    limited per key, cluster-wide when a distributed limiter is configured.
+    Async generators (streamed downloads) take one slot per stream.
+    
     Args:
         endpoint: API endpoint identifier
         priority: Request priority
@@ -373,9 +494,10 @@ def rate_limited(endpoint: str = "default",
         async def async_wrapper(*args, **kwargs):
             """Async wrapper with rate limiting."""
             limiter = get_rate_limiter(config)
+            api_key = getattr(args[0], "api_key", None) if args else None
             
             # Acquire rate limit permission
-            await limiter.acquire(endpoint, priority)
+            await limiter.acquire(endpoint, priority, api_key=api_key)
             
             try:
                 # Execute function
@@ -387,13 +509,23 @@ def rate_limited(endpoint: str = "default",
                 return result
                 
             except Exception as e:
-                # Record error response
-                status_code = getattr(e, 'status_code', 500)
-                headers = {}
-                if hasattr(e, 'response') and e.response:
-                    headers = dict(e.response.headers)
-                
-                limiter.record_response(status_code, headers)
+                _record_error_response(limiter, e, endpoint, api_key)
+                raise
+        
+        @wraps(func)
+        async def async_gen_wrapper(*args, **kwargs):
+            """Async generator wrapper (streamed responses): one slot per stream."""
+            limiter = get_rate_limiter(config)
+            api_key = getattr(args[0], "api_key", None) if args else None
+            
+            await limiter.acquire(endpoint, priority, api_key=api_key)
+            
+            try:
+                async for item in func(*args, **kwargs):
+                    yield item
+                limiter.record_response(200, {})
+            except Exception as e:
+                _record_error_response(limiter, e, endpoint, api_key)
                 raise
         
         @wraps(func)
@@ -412,6 +544,8 @@ def rate_limited(endpoint: str = "default",
                 return asyncio.run(run_async())
         
         # Return appropriate wrapper
+        if inspect.isasyncgenfunction(func):
+            return async_gen_wrapper
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
@@ -433,11 +567,44 @@ def configure_wildberries_rate_limits() -> RateLimitConfig:
         burst_size=5,  # Small burst to handle quick operations
         adaptive_rate_limiting=True,
         cooldown_factor=0.5,
-        recovery_time=60.0
+        recovery_time=60.0,
+        distributed=True
     )
     
+    # WB quotas are per API key and API category; shared by all processes.
+    # Warehouse remains methods have their own WB quota: the remains task
+    # poll loop gets a separate budget so it cannot starve stocks-report
+    # pagination running at the same time
+    analytics_per_minute = int(os.getenv("WB_ANALYTICS_REQUESTS_PER_MINUTE", "3"))
+    config.key_groups = {
+        "analytics": EndpointRateLimit(
+            requests_per_minute=analytics_per_minute,
+            burst_size=1
+        ),
+        "warehouse_remains": EndpointRateLimit(
+            requests_per_minute=int(os.getenv("WB_REMAINS_REQUESTS_PER_MINUTE", "3")),
+            burst_size=1
+        ),
+        "statistics": EndpointRateLimit(
+            requests_per_minute=int(os.getenv("WB_STATISTICS_REQUESTS_PER_MINUTE", "1")),
+            burst_size=1
+        )
+    }
+    config.endpoint_groups = {
+        "/api/v2/stocks-report": "analytics",
+        "/api/v1/warehouse_remains": "warehouse_remains",
+        "/api/v1/supplier": "statistics"
+    }
+    
     # Endpoint-specific configurations per urls.md
     config.endpoint_configs = {
+        # Paced locally too when Redis is unavailable (3 req/min per key)
+        "/api/v2/stocks-report/products/products": EndpointRateLimit(
+            requests_per_minute=analytics_per_minute,
+            requests_per_second=analytics_per_minute / 60.0,
+            burst_size=1,
+            priority=1
+        ),
         "/api/v1/warehouse_remains": EndpointRateLimit(
             requests_per_minute=10,  # Lower limit for data generation
             requests_per_second=0.2,  # 1 request per 5 seconds
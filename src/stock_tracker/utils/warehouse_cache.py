@@ -8,10 +8,18 @@ Based on WAREHOUSE_IMPROVEMENT_PROMPT.md requirements:
 - TTL: 24 hours for cached warehouse data
 - Backup and restore mechanisms
 - Priority system for different data sources
+
+Storage: SQLite table in WAL mode (cache/warehouse_cache.db). Each
+set_warehouses call upserts one row in its own transaction, so concurrent
+Celery workers never see a half-written cache and never overwrite each
+other's unrelated entries. Legacy warehouse_cache.json files are imported
+on first use and renamed to *.json.migrated.
 """
 
 import json
+import sqlite3
 import time
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Set, Tuple
@@ -63,12 +71,17 @@ class WarehouseCache:
     - Statistics tracking
     """
     
+    # Wait for concurrent writers instead of failing with "database is locked"
+    BUSY_TIMEOUT_SECONDS = 5.0
+    
     def __init__(self, cache_file: Optional[str] = None, ttl_hours: int = 24):
         """
         Initialize warehouse cache.
         
         Args:
-            cache_file: Path to cache file (default: workspace cache)
+            cache_file: Path to cache database (default: workspace cache).
+                A *.json path is treated as a legacy file: the database is
+                created next to it and the JSON entries are imported.
             ttl_hours: Time to live for cache entries in hours
         """
         self.config = get_config()
@@ -76,61 +89,125 @@ class WarehouseCache:
         
         # Determine cache file path
         if cache_file:
-            self.cache_file = Path(cache_file)
+            path = Path(cache_file)
         else:
             # Use workspace cache directory
             cache_dir = Path.cwd() / "cache"
             cache_dir.mkdir(exist_ok=True)
-            self.cache_file = cache_dir / "warehouse_cache.json"
+            path = cache_dir / "warehouse_cache.db"
         
-        # In-memory cache
-        self._cache: Dict[str, WarehouseCacheEntry] = {}
+        self.cache_file = path.with_suffix(".db")
+        self.legacy_file = path.with_suffix(".json")
         
-        # Load existing cache
-        self._load_cache()
+        self._init_db()
+        self._migrate_legacy_file()
         
         logger.info(f"Initialized warehouse cache: {self.cache_file}")
-        logger.debug(f"TTL: {ttl_hours} hours, Entries: {len(self._cache)}")
+        logger.debug(f"TTL: {ttl_hours} hours")
     
-    def _load_cache(self) -> None:
-        """Load cache from disk."""
-        try:
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Convert to cache entries
-                for key, entry_data in data.items():
-                    try:
-                        self._cache[key] = WarehouseCacheEntry.from_dict(entry_data)
-                    except Exception as e:
-                        logger.warning(f"Failed to load cache entry {key}: {e}")
-                
-                logger.debug(f"Loaded {len(self._cache)} cache entries from disk")
-            else:
-                logger.debug("No existing cache file found")
-                
-        except Exception as e:
-            logger.error(f"Failed to load warehouse cache: {e}")
-            self._cache = {}
+    @contextmanager
+    def _connect(self):
+        """
+        Open connection for one operation.
+        
+        Connections are not kept between calls, so the cache is safe to use
+        from threads and forked worker processes.
+        """
+        with closing(sqlite3.connect(self.cache_file, timeout=self.BUSY_TIMEOUT_SECONDS)) as conn:
+            with conn:  # commit on success, rollback on error
+                yield conn
+    
+    def _init_db(self) -> None:
+        """Create cache table and switch database to WAL mode."""
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS warehouse_cache (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_warehouse_cache_timestamp ON warehouse_cache (timestamp)"
+            )
     
-    def _save_cache(self) -> None:
-        """Save cache to disk."""
+    def _migrate_legacy_file(self) -> None:
+        """Import entries from old JSON cache file (once)."""
+        if not self.legacy_file.exists():
+            return
+        
         try:
-            # Prepare data for serialization
-            data = {key: entry.to_dict() for key, entry in self._cache.items()}
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
             
-            # Ensure directory exists
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            rows = []
+            for key, entry_data in data.items():
+                try:
+                    rows.append(self._to_row(key, WarehouseCacheEntry.from_dict(entry_data)))
+                except Exception as e:
+                    logger.warning(f"Failed to migrate cache entry {key}: {e}")
             
-            # Save to file
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # Entries written after the migration started take precedence
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO warehouse_cache (key, source, timestamp, data) VALUES (?, ?, ?, ?)",
+                    rows
+                )
             
-            logger.debug(f"Saved {len(self._cache)} cache entries to disk")
+            self.legacy_file.replace(self.legacy_file.with_suffix(".json.migrated"))
+            logger.info(f"Migrated {len(rows)} warehouse cache entries from {self.legacy_file}")
             
+        except FileNotFoundError:
+            # Another process finished the migration first
+            pass
         except Exception as e:
-            logger.error(f"Failed to save warehouse cache: {e}")
+            logger.error(f"Failed to migrate legacy warehouse cache: {e}")
+    
+    @staticmethod
+    def _to_row(key: str, entry: WarehouseCacheEntry) -> Tuple[str, str, float, str]:
+        data = json.dumps(entry.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        return key, entry.source, entry.timestamp, data
+    
+    def _valid_since(self) -> float:
+        return time.time() - self.ttl_hours * 3600
+    
+    def _load_entries(self, query: str, params: Tuple = ()) -> Dict[str, WarehouseCacheEntry]:
+        """Load entries selected by query (key, data columns)."""
+        entries = {}
+        with self._connect() as conn:
+            for key, data in conn.execute(query, params):
+                try:
+                    entries[key] = WarehouseCacheEntry.from_dict(json.loads(data))
+                except Exception as e:
+                    logger.warning(f"Failed to load cache entry {key}: {e}")
+        return entries
+    
+    def get_entry(self, key: str) -> Optional[WarehouseCacheEntry]:
+        """
+        Get single non-expired entry by cache key.
+        
+        Args:
+            key: Cache key (see get_cache_key)
+            
+        Returns:
+            Cache entry or None
+        """
+        try:
+            entries = self._load_entries(
+                "SELECT key, data FROM warehouse_cache WHERE key = ? AND timestamp >= ?",
+                (key, self._valid_since())
+            )
+            return entries.get(key)
+        except Exception as e:
+            logger.error(f"Failed to get cache entry {key}: {e}")
+            return None
     
     def get_cache_key(self, **kwargs) -> str:
         """Generate cache key from parameters."""
@@ -167,12 +244,13 @@ class WarehouseCache:
                 api_success_rate=api_success_rate
             )
             
-            # Store in cache
+            # Upsert single row (atomic, other entries are not rewritten)
             cache_key = self.get_cache_key(**kwargs)
-            self._cache[cache_key] = entry
-            
-            # Save to disk
-            self._save_cache()
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO warehouse_cache (key, source, timestamp, data) VALUES (?, ?, ?, ?)",
+                    self._to_row(cache_key, entry)
+                )
             
             logger.info(f"Cached {len(warehouse_names)} warehouses from {source}")
             logger.debug(f"Warehouses: {warehouse_names}")
@@ -192,15 +270,11 @@ class WarehouseCache:
             Best available warehouse cache entry or None
         """
         try:
-            cache_key = self.get_cache_key(**kwargs)
-            
             # Get all valid (non-expired) entries
-            valid_entries = {}
-            for key, entry in self._cache.items():
-                if not entry.is_expired(self.ttl_hours):
-                    valid_entries[key] = entry
-                else:
-                    logger.debug(f"Cache entry {key} expired (age: {entry.age_hours():.1f}h)")
+            valid_entries = self._load_entries(
+                "SELECT key, data FROM warehouse_cache WHERE timestamp >= ?",
+                (self._valid_since(),)
+            )
             
             if not valid_entries:
                 logger.debug("No valid cache entries found")
@@ -284,19 +358,13 @@ class WarehouseCache:
     def clear_expired(self) -> int:
         """Remove expired cache entries."""
         try:
-            before_count = len(self._cache)
-            
-            # Remove expired entries
-            self._cache = {
-                key: entry for key, entry in self._cache.items()
-                if not entry.is_expired(self.ttl_hours)
-            }
-            
-            after_count = len(self._cache)
-            removed_count = before_count - after_count
+            with self._connect() as conn:
+                removed_count = conn.execute(
+                    "DELETE FROM warehouse_cache WHERE timestamp < ?",
+                    (self._valid_since(),)
+                ).rowcount
             
             if removed_count > 0:
-                self._save_cache()
                 logger.info(f"Removed {removed_count} expired cache entries")
             
             return removed_count
@@ -312,18 +380,18 @@ class WarehouseCache:
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         try:
-            total_entries = len(self._cache)
-            valid_entries = [entry for entry in self._cache.values() 
-                           if not entry.is_expired(self.ttl_hours)]
-            
-            sources = {}
-            for entry in valid_entries:
-                sources[entry.source] = sources.get(entry.source, 0) + 1
+            with self._connect() as conn:
+                total_entries = conn.execute("SELECT COUNT(*) FROM warehouse_cache").fetchone()[0]
+                sources = dict(conn.execute(
+                    "SELECT source, COUNT(*) FROM warehouse_cache WHERE timestamp >= ? GROUP BY source",
+                    (self._valid_since(),)
+                ).fetchall())
+            valid_entries = sum(sources.values())
             
             return {
                 "total_entries": total_entries,
-                "valid_entries": len(valid_entries),
-                "expired_entries": total_entries - len(valid_entries),
+                "valid_entries": valid_entries,
+                "expired_entries": total_entries - valid_entries,
                 "sources": sources,
                 "cache_file": str(self.cache_file),
                 "ttl_hours": self.ttl_hours,
@@ -5,8 +5,11 @@
 в разных источниках данных.
 """
 
+import os
 import re
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from stock_tracker.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -73,17 +76,181 @@ WAREHOUSE_NAME_MAPPINGS = {
 }
 
 
+# Явные индикаторы Маркетплейс (без коротких "мп" и "сп")
+MARKETPLACE_KEYWORDS = [
+    "маркетплейс", "marketplace", "маркет",
+    "склад продавца", "склад селлера", "seller",
+    "fbs", "fulfillment"
+]
+
+# Индикаторы для is_marketplace_warehouse (включая короткие)
+MARKETPLACE_INDICATORS = MARKETPLACE_KEYWORDS + ["мп", "mp", "сп"]
+
+# Размер LRU кэша нормализованных названий (на процесс)
+MAPPING_CACHE_SIZE = int(os.getenv("WAREHOUSE_MAPPING_CACHE_SIZE", "4096"))
+
+MARKETPLACE_CANONICAL = "Маркетплейс"
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик для поиска множества подстрок за один проход.
+    
+    Каждому шаблону сопоставлено значение; search() возвращает значения
+    всех шаблонов, входящих в текст. Время поиска зависит от длины текста
+    и числа совпадений, но не от количества шаблонов.
+    """
+    
+    def __init__(self, patterns: Dict[str, Any]):
+        """
+        Args:
+            patterns: шаблон -> значение
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+        
+        for pattern, value in patterns.items():
+            if pattern:
+                self._add(pattern, value)
+        self._build_links()
+    
+    def _add(self, pattern: str, value: Any):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(value)
+    
+    def _build_links(self):
+        """Построить суффиксные ссылки (BFS) и объединить выходы."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fallback = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def search(self, text: str) -> Iterator[Any]:
+        """Значения шаблонов, найденных в тексте."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield from output[state]
+    
+    def contains_any(self, text: str) -> bool:
+        """Есть ли в тексте хотя бы один шаблон."""
+        return next(self.search(text), None) is not None
+
+
+class CompiledWarehouseMatcher:
+    """
+    Скомпилированный справочник складов для частичных совпадений.
+    
+    Строится один раз при импорте модуля (до fork воркеров, поэтому
+    разделяется процессами через copy-on-write). Повторяет приоритеты
+    WarehouseNameMapper._find_partial_match:
+    
+    1. Совпадение варианта склада целиком или как префикса/суффикса
+       по границе пробела - поиск по словарю
+    2. Явные индикаторы Маркетплейс - автомат Ахо-Корасик
+    3. Вхождение слов канонического названия или вариантов - автомат
+       Ахо-Корасик, при нескольких совпадениях побеждает склад,
+       стоящий раньше в WAREHOUSE_NAME_MAPPINGS
+    """
+    
+    def __init__(self, mappings: Dict[str, List[str]]):
+        canonicals = [name for name in mappings if name != MARKETPLACE_CANONICAL]
+        
+        # Приоритет #1: вариант -> (порядковый номер, канонический)
+        self._variants: Dict[str, Tuple[int, str]] = {}
+        rank = 0
+        for canonical in canonicals:
+            for variant in mappings[canonical]:
+                self._variants.setdefault(variant.lower(), (rank, canonical))
+                rank += 1
+        
+        # Приоритет #2
+        self._marketplace = AhoCorasick({keyword: True for keyword in MARKETPLACE_KEYWORDS})
+        
+        # Приоритет #3: слово/вариант -> (порядковый номер склада, канонический)
+        substrings: Dict[str, Tuple[int, str]] = {}
+        for rank, canonical in enumerate(canonicals):
+            for pattern in canonical.lower().split() + [v.lower() for v in mappings[canonical]]:
+                substrings.setdefault(pattern, (rank, canonical))
+        self._substrings = AhoCorasick(substrings)
+    
+    def _affix_match(self, lower_name: str) -> Optional[str]:
+        """Вариант склада целиком, в начале или в конце названия."""
+        best = self._variants.get(lower_name)
+        
+        for index, char in enumerate(lower_name):
+            if char != " ":
+                continue
+            for candidate in (lower_name[:index], lower_name[index + 1:]):
+                match = self._variants.get(candidate)
+                if match is not None and (best is None or match < best):
+                    best = match
+        
+        return best[1] if best else None
+    
+    def match(self, warehouse_name: str) -> Optional[str]:
+        """
+        Найти каноническое название по частичному совпадению.
+        
+        Args:
+            warehouse_name: Название склада (без крайних пробелов)
+            
+        Returns:
+            Каноническое название если найдено, иначе None
+        """
+        lower_name = warehouse_name.lower()
+        
+        canonical = self._affix_match(lower_name)
+        if canonical:
+            return canonical
+        
+        if self._marketplace.contains_any(lower_name):
+            return MARKETPLACE_CANONICAL
+        
+        best = min(self._substrings.search(lower_name), default=None)
+        return best[1] if best else None
+
+
 class WarehouseNameMapper:
     """Класс для нормализации и сопоставления названий складов."""
     
-    def __init__(self):
-        self.mapping_cache = {}
+    def __init__(self, mappings: Optional[Dict[str, List[str]]] = None,
+                 cache_size: int = MAPPING_CACHE_SIZE):
+        """
+        Args:
+            mappings: Справочник соответствий (по умолчанию WAREHOUSE_NAME_MAPPINGS)
+            cache_size: Размер LRU кэша нормализованных названий
+        """
+        self.mappings = mappings if mappings is not None else WAREHOUSE_NAME_MAPPINGS
         self.reverse_mapping = self._build_reverse_mapping()
+        self.matcher = CompiledWarehouseMatcher(self.mappings)
+        self._normalize_cached = lru_cache(maxsize=cache_size)(self._normalize)
     
     def _build_reverse_mapping(self) -> Dict[str, str]:
         """Построить обратный справочник: вариант -> канонический."""
         reverse = {}
-        for canonical, variants in WAREHOUSE_NAME_MAPPINGS.items():
+        for canonical, variants in self.mappings.items():
             for variant in variants:
                 reverse[variant.lower()] = canonical
         return reverse
@@ -100,30 +267,29 @@ class WarehouseNameMapper:
         """
         if not warehouse_name:
             return warehouse_name
-            
-        original = warehouse_name.strip()
-        
-        # Проверяем кэш
-        if original in self.mapping_cache:
-            return self.mapping_cache[original]
         
+        return self._normalize_cached(warehouse_name.strip())
+    
+    def cache_info(self):
+        """Статистика LRU кэша нормализации."""
+        return self._normalize_cached.cache_info()
+    
+    def _normalize(self, original: str) -> str:
+        """Нормализация без кэша."""
         # Прямое соответствие
         lower_name = original.lower()
         if lower_name in self.reverse_mapping:
             canonical = self.reverse_mapping[lower_name]
-            self.mapping_cache[original] = canonical
             logger.debug(f"Direct mapping: '{original}' -> '{canonical}'")
             return canonical
         
         # Поиск частичного соответствия
         partial_match = self._find_partial_match(original)
         if partial_match:
-            self.mapping_cache[original] = partial_match
             logger.debug(f"Partial mapping: '{original}' -> '{partial_match}'")
             return partial_match
         
         # Не найдено - возвращаем исходное
-        self.mapping_cache[original] = original
         logger.debug(f"No mapping found for: '{original}'")
         return original
     
@@ -133,8 +299,11 @@ class WarehouseNameMapper:
         
         ИСПРАВЛЕНО 09.11.2025:
         - Приоритет #1: полные названия складов (например "Подольск 3")
-        - Приоритет #2: частичные совпадения без маркетплейс-маркеров
-        - Приоритет #3: только явный "маркетплейс"
+        - Приоритет #2: только явный "маркетплейс"
+        - Приоритет #3: частичные совпадения для обычных складов
+        
+        Поиск выполняется скомпилированным справочником
+        (CompiledWarehouseMatcher), а не перебором всех вариантов.
         
         Args:
             warehouse_name: Название склада для поиска
@@ -142,66 +311,7 @@ class WarehouseNameMapper:
         Returns:
             Каноническое название если найдено, иначе None
         """
-        lower_name = warehouse_name.lower()
-        original = warehouse_name.strip()
-        
-        # ПРИОРИТЕТ #1: ПОЛНЫЕ СОВПАДЕНИЯ СКЛАДОВ
-        # Сначала ищем точные совпадения с вариантами складов
-        for canonical, variants in WAREHOUSE_NAME_MAPPINGS.items():
-            # Пропускаем Маркетплейс на этом этапе
-            if canonical == "Маркетплейс":
-                continue
-                
-            for variant in variants:
-                variant_lower = variant.lower()
-                # Точное совпадение (без учета регистра)
-                if lower_name == variant_lower:
-                    logger.info(f"✅ EXACT MATCH: '{original}' -> '{canonical}'")
-                    return canonical
-                
-                # Совпадение с префиксом/суффиксом
-                if lower_name.startswith(variant_lower + " ") or lower_name.endswith(" " + variant_lower):
-                    logger.info(f"✅ PREFIX/SUFFIX MATCH: '{original}' -> '{canonical}'")
-                    return canonical
-        
-        # ПРИОРИТЕТ #2: МАРКЕТПЛЕЙС только с явными индикаторами
-        # Проверяем ТОЛЬКО явные индикаторы Маркетплейс (без коротких "мп" и "сп")
-        marketplace_keywords = [
-            "маркетплейс", "marketplace", "маркет",
-            "склад продавца", "склад селлера", "seller",
-            "fbs", "fulfillment"
-        ]
-        
-        # Если найден явный индикатор - возвращаем Маркетплейс
-        if any(keyword in lower_name for keyword in marketplace_keywords):
-            logger.info(f"✅ MARKETPLACE MATCH: '{original}' -> 'Маркетплейс'")
-            return "Маркетплейс"
-        
-        # ПРИОРИТЕТ #3: ЧАСТИЧНОЕ СОВПАДЕНИЕ для обычных складов
-        
-        # Убираем распространенные префиксы и суффиксы
-        cleaned_name = re.sub(r'\b(сц|склад|центр|филиал)\b', '', lower_name).strip()
-        cleaned_name = re.sub(r'[()]', '', cleaned_name).strip()
-        
-        # Поиск по ключевым словам для обычных складов
-        for canonical, variants in WAREHOUSE_NAME_MAPPINGS.items():
-            # Пропускаем Маркетплейс - он уже проверен выше
-            if canonical == "Маркетплейс":
-                continue
-            
-            canonical_lower = canonical.lower()
-            
-            # Проверяем вхождение канонического названия
-            if canonical_lower in lower_name or any(word in lower_name for word in canonical_lower.split()):
-                return canonical
-            
-            # Проверяем вхождение вариантов
-            for variant in variants:
-                variant_lower = variant.lower()
-                if variant_lower in lower_name:
-                    return canonical
-        
-        return None
+        return self.matcher.match(warehouse_name.strip())
     
     def get_warehouse_group(self, warehouse_names: List[str]) -> Dict[str, List[str]]:
         """
@@ -271,6 +381,7 @@ class WarehouseNameMapper:
 
 # Глобальный экземпляр для использования
 warehouse_mapper = WarehouseNameMapper()
+_marketplace_indicators = AhoCorasick({indicator: True for indicator in MARKETPLACE_INDICATORS})
 
 
 def normalize_warehouse_name(warehouse_name: str) -> str:
@@ -314,15 +425,8 @@ def is_marketplace_warehouse(warehouse_name: str) -> bool:
         return True
     
     # УЛУЧШЕНО: Проверяем прямые индикаторы (БЕЗ пробелов для лучшего поиска)
-    lower_name = warehouse_name.lower()
-    marketplace_indicators = [
-        "маркетплейс", "marketplace", "маркет",
-        "склад продавца", "склад селлера", "seller",
-        "fbs", "fulfillment",
-        "мп", "mp", "сп"  # ИСПРАВЛЕНО: убрали пробелы (было "мп ")
-    ]
-    
-    return any(indicator in lower_name for indicator in marketplace_indicators)
+    # ИСПРАВЛЕНО: индикаторы без пробелов (было "мп ")
+    return _marketplace_indicators.contains_any(warehouse_name.lower())
 
 
 def normalize_for_comparison(warehouse_name: str) -> str:
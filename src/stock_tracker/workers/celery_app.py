@@ -15,6 +15,7 @@ from kombu import Queue
 # Get Redis URL from environment
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
+WEBHOOK_DELIVERY_INTERVAL = float(os.getenv("WEBHOOK_DELIVERY_INTERVAL", "10"))  # seconds
 
 # Create Celery application
 celery_app = Celery(
@@ -30,6 +31,7 @@ celery_app.conf.update(
     task_routes={
         "stock_tracker.workers.tasks.sync_tenant_products": {"queue": "sync"},
         "stock_tracker.workers.tasks.cleanup_old_logs": {"queue": "maintenance"},
+        "stock_tracker.workers.tasks.deliver_webhooks": {"queue": "default"},
     },
     
     # Task queues
@@ -69,6 +71,12 @@ celery_app.conf.update(
             "schedule": crontab(hour=3, minute=0),
             "options": {"queue": "maintenance"},
         },
+        # Send queued webhook deliveries
+        "deliver-webhooks": {
+            "task": "stock_tracker.workers.tasks.deliver_webhooks",
+            "schedule": WEBHOOK_DELIVERY_INTERVAL,
+            "options": {"queue": "default", "expires": WEBHOOK_DELIVERY_INTERVAL},
+        },
         # Health check every 5 minutes
         "health-check": {
             "task": "stock_tracker.workers.tasks.health_check",
@@ -3,7 +3,8 @@ Celery tasks for background processing.
 
 Tasks:
 - sync_tenant_products: Sync products for a specific tenant
-- cleanup_old_logs: Clean up old sync logs
+- cleanup_old_logs: Clean up old sync logs and webhook deliveries
+- deliver_webhooks: Send queued webhook deliveries
 - health_check: Periodic health check
 """
 
@@ -15,15 +16,19 @@ from sqlalchemy.orm import Session
 
 from .celery_app import celery_app
 from ..database.connection import SessionLocal
-from ..database.models import Tenant, SyncLog
+from ..database.models import Tenant, SyncLog, WebhookDelivery
 from ..services.sync_service import SyncService
+from ..services.analytics_service import AnalyticsService
 from ..services.google_sheets_service import GoogleSheetsService
 from ..cache.redis_cache import get_cache
-from ..services.webhook_dispatcher import dispatch_webhook
+from ..services.webhook_dispatcher import enqueue_webhook, deliver_pending_webhooks
 from ..utils.exceptions import SheetsAPIError
 
 logger = logging.getLogger(__name__)
 
+# Cached keys built from synced product data, dropped after every sync
+SYNC_INVALIDATED_PATTERNS = ("products:*", "analytics:*", "sync_all_products")
+
 
 class DatabaseTask(Task):
     """
@@ -98,23 +103,26 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
         
         logger.info(f"Starting product sync for tenant {tenant_id} ({tenant.name})")
         
-        # Dispatch webhook: sync started
+        # Queue webhook: sync started (sent by deliver_webhooks)
         try:
-            dispatch_webhook(
+            enqueue_webhook(
                 tenant=tenant,
                 event_type="sync_started",
                 data={
                     "tenant_id": tenant_id,
                     "started_at": sync_log.started_at.isoformat(),
-                }
+                },
+                db_session=db
             )
         except Exception as e:
-            logger.error(f"Failed to dispatch sync_started webhook: {e}")
+            db.rollback()
+            logger.error(f"Failed to queue sync_started webhook: {e}")
         
         # Initialize SyncService with tenant context
         sync_service = SyncService(
             tenant=tenant,
             db_session=db,
+            bulk_mode=True,
         )
         
         # Perform synchronization
@@ -130,6 +138,22 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
         sync_log.duration_ms = int(duration * 1000)  # Convert to milliseconds
         db.commit()
         
+        # Refresh per-warehouse rollup used by analytics endpoints
+        try:
+            rollup = AnalyticsService(tenant=tenant, db_session=db).refresh_warehouse_stats()
+            db.commit()
+            logger.info(
+                f"Refreshed warehouse stats for tenant {tenant_id}: "
+                f"{rollup['upserted']} upserted, {rollup['deleted']} deleted"
+            )
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to refresh warehouse stats for tenant {tenant_id}: {e}")
+        
+        # Drop cached product data; long-lived tenant state (Sheets fingerprint,
+        # warehouse mapping, principals) does not go stale with a sync
+        cache.invalidate_tracked(str(tenant_id), SYNC_INVALIDATED_PATTERNS)
+        
         logger.info(
             f"Completed sync for tenant {tenant_id}: "
             f"{sync_log.products_synced} products in {duration:.2f}s"
@@ -149,7 +173,7 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
                     Product.tenant_id == tenant_id
                 ).all()
                 
-                sheets_sync_result = sheets_service.sync_products_to_sheet(products, db)
+                sheets_sync_result = sheets_service.sync_products_to_sheet(products, db, incremental=True)
                 
                 logger.info(
                     f"✅ Google Sheets sync completed: {sheets_sync_result.get('products_synced')} products "
@@ -166,7 +190,7 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
         else:
             logger.debug(f"Google Sheets not configured for tenant {tenant_id}, skipping sheets sync")
         
-        # Dispatch webhook: sync completed
+        # Queue webhook: sync completed
         try:
             webhook_data = {
                 "tenant_id": tenant_id,
@@ -179,13 +203,15 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
             if sheets_sync_result:
                 webhook_data["google_sheets"] = sheets_sync_result
             
-            dispatch_webhook(
+            enqueue_webhook(
                 tenant=tenant,
                 event_type="sync_completed",
-                data=webhook_data
+                data=webhook_data,
+                db_session=db
             )
         except Exception as e:
-            logger.error(f"Failed to dispatch sync_completed webhook: {e}")
+            db.rollback()
+            logger.error(f"Failed to queue sync_completed webhook: {e}")
         
         return {
             "status": "completed",
@@ -203,21 +229,23 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
         
         logger.error(f"Sync failed for tenant {tenant_id}: {exc}", exc_info=True)
         
-        # Dispatch webhook: sync failed
+        # Queue webhook: sync failed
         try:
             tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
             if tenant:
-                dispatch_webhook(
+                enqueue_webhook(
                     tenant=tenant,
                     event_type="sync_failed",
                     data={
                         "tenant_id": tenant_id,
                         "error": str(exc),
                         "failed_at": sync_log.completed_at.isoformat(),
-                    }
+                    },
+                    db_session=db
                 )
         except Exception as e:
-            logger.error(f"Failed to dispatch sync_failed webhook: {e}")
+            db.rollback()
+            logger.error(f"Failed to queue sync_failed webhook: {e}")
         
         # Retry task if retries remaining
         if self.request.retries < self.max_retries:
@@ -234,13 +262,13 @@ def sync_tenant_products(self, tenant_id: str) -> dict:
 )
 def cleanup_old_logs(self, days: int = 30) -> dict:
     """
-    Clean up sync logs older than specified days.
+    Clean up sync logs and finished webhook deliveries older than specified days.
     
     Args:
         days: Number of days to keep logs (default: 30)
         
     Returns:
-        dict: Cleanup statistics (deleted_count)
+        dict: Cleanup statistics (deleted_count, deleted_deliveries)
     """
     db: Session = self.db
     
@@ -251,16 +279,45 @@ def cleanup_old_logs(self, days: int = 30) -> dict:
         SyncLog.started_at < cutoff_date
     ).delete()
     
+    # Delete delivered/failed webhook deliveries
+    deleted_deliveries = db.query(WebhookDelivery).filter(
+        WebhookDelivery.status != "pending",
+        WebhookDelivery.created_at < cutoff_date
+    ).delete(synchronize_session=False)
+    
     db.commit()
     
-    logger.info(f"Cleaned up {deleted_count} sync logs older than {days} days")
+    logger.info(
+        f"Cleaned up {deleted_count} sync logs and {deleted_deliveries} webhook deliveries "
+        f"older than {days} days"
+    )
     
     return {
         "deleted_count": deleted_count,
+        "deleted_deliveries": deleted_deliveries,
         "cutoff_date": cutoff_date.isoformat(),
     }
 
 
+@celery_app.task(
+    bind=True,
+    base=DatabaseTask,
+    name="stock_tracker.workers.tasks.deliver_webhooks",
+    ignore_result=True,
+)
+def deliver_webhooks(self) -> dict:
+    """
+    Send due webhook deliveries from the outbox.
+    
+    Scheduled by Celery Beat; several workers may run it concurrently,
+    claimed rows are skipped by the others.
+    
+    Returns:
+        dict: Delivery statistics
+    """
+    return deliver_pending_webhooks(self.db)
+
+
 @celery_app.task(
     bind=True,
     name="stock_tracker.workers.tasks.health_check",
@@ -41,6 +41,17 @@ class Settings(BaseSettings):
     free_trial_days: int = 7  # Триальный период при payment_enabled=True
     subscription_price: int = 299  # Руб/мес (или другая валюта)
     
+    # Scheduled updates
+    max_concurrent_updates: int = 20  # Одновременных обновлений таблиц
+    update_spread_seconds: int = 600  # Окно, по которому распределяются старты обновлений
+    wb_requests_per_minute: int = 3  # Лимит WB на один API ключ
+    wb_remains_requests_per_minute: int = 3  # Лимит Warehouse Remains API на ключ
+    wb_statistics_requests_per_minute: int = 1  # Лимит Statistics API (заказы) на ключ
+    redis_url: str = ""  # Общий с воркерами бюджет WB по ключам (пусто - локальный)
+    sheets_writes_per_minute: int = 60  # Общий лимит записей в Google Sheets
+    sheets_writes_per_update: int = 2  # Запросов записи на одно обновление таблицы
+    sheets_fingerprint_ttl: int = 3600  # Время жизни отпечатка листа для инкрементальных обновлений
+    
     def get_database_url(self) -> str:
         """Возвращает URL подключения к базе данных."""
         # Если передан полный DATABASE_URL через переменную окружения, используем его
@@ -1,10 +1,13 @@
 """Сервис для работы с Google Sheets API."""
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from dataclasses import dataclass, field
 from pathlib import Path
+import hashlib
 import json
 import os
 import time
 import asyncio
+import uuid
 from functools import wraps
 
 from app.utils.logger import logger
@@ -22,6 +25,11 @@ except ImportError:
     GOOGLE_AVAILABLE = False
     logger.warning("Google API libraries not installed. Install: pip install gspread google-auth")
 
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 
 def retry_on_api_error(max_retries: int = 3, backoff_factor: float = 1.5):
     """
@@ -70,6 +78,194 @@ def retry_on_api_error(max_retries: int = 3, backoff_factor: float = 1.5):
     return decorator
 
 
+# Колонка "Артикул товара (nmid)" - по ней отпечаток сверяется с листом
+NM_ID_COL = 3
+
+# Блокировка записи в лист на время batch_update
+GRID_WRITE_LOCK_TIMEOUT = 300
+
+
+def _digest(values: List[Any]) -> str:
+    """Стабильный между процессами хэш значений (тип учитывается: 5 и '5' пишутся по-разному)"""
+    payload = json.dumps(
+        [[type(value).__name__, value] for value in values],
+        ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _nm_id_column_digest(values: List[Any]) -> str:
+    """Хэш колонки nmId в виде, одинаковом для сетки и значений, прочитанных из листа"""
+    normalized = []
+    for value in values:
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        normalized.append("" if value is None else str(value))
+    while normalized and normalized[-1] == "":
+        normalized.pop()  # Sheets API не возвращает пустой хвост колонки
+    return _digest(normalized)
+
+
+@dataclass
+class GridFingerprint:
+    """
+    Отпечаток последней записанной в лист сетки.
+    
+    Хранит sha1-хэши строк (включая 2 строки заголовков), раскладку складов
+    и хэш колонки nmId. Используется в инкрементальном режиме update_sheet,
+    чтобы отправлять только изменившиеся строки.
+    """
+    warehouses: Tuple[str, ...]
+    num_cols: int
+    rows: List[str] = field(default_factory=list)
+    nm_ids: str = ""
+    
+    @staticmethod
+    def hash_row(row: List[Any]) -> str:
+        """Хэш строки"""
+        return _digest(row)
+    
+    @classmethod
+    def from_grid(cls, warehouses: List[str], grid: List[List[Any]]) -> "GridFingerprint":
+        num_cols = len(grid[1]) if len(grid) > 1 else 0
+        return cls(
+            warehouses=tuple(warehouses),
+            num_cols=num_cols,
+            rows=[cls.hash_row(row) for row in grid],
+            nm_ids=_nm_id_column_digest([row[NM_ID_COL] for row in grid[2:]])
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"warehouses": list(self.warehouses), "num_cols": self.num_cols,
+                "rows": self.rows, "nm_ids": self.nm_ids}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GridFingerprint":
+        return cls(
+            warehouses=tuple(data["warehouses"]),
+            num_cols=data["num_cols"],
+            rows=list(data["rows"]),
+            nm_ids=data.get("nm_ids", "")
+        )
+    
+    def matches_sheet(self, nm_id_column: List[Any]) -> bool:
+        """
+        Сверить отпечаток с колонкой nmId, прочитанной из листа.
+        
+        Ловит удалённые, добавленные и пересортированные вручную строки.
+        """
+        return _nm_id_column_digest(nm_id_column) == self.nm_ids
+    
+    def changed_blocks(self, other: "GridFingerprint") -> List[Tuple[int, int, int, int]]:
+        """
+        Изменившиеся прямоугольники (start_row, end_row, start_col, end_col).
+        
+        Изменённая строка переписывается целиком; соседние изменённые строки
+        объединяются в один блок.
+        """
+        blocks: List[Tuple[int, int, int, int]] = []
+        current: Optional[List[int]] = None
+        
+        for row_idx, new_row in enumerate(other.rows):
+            old_row = self.rows[row_idx] if row_idx < len(self.rows) else None
+            if old_row == new_row:
+                if current:
+                    blocks.append(tuple(current))
+                    current = None
+                continue
+            
+            if current:
+                current[1] = row_idx + 1
+            else:
+                current = [row_idx, row_idx + 1, 0, other.num_cols]
+        
+        if current:
+            blocks.append(tuple(current))
+        
+        return blocks
+
+
+class GridFingerprintStore:
+    """
+    Хранилище отпечатков листов.
+    
+    Если задан REDIS_URL, отпечатки общие для всех процессов бота (как в
+    stock_tracker.services.google_sheets_service), иначе - в памяти процесса.
+    Отпечаток живёт sheets_fingerprint_ttl секунд.
+    """
+    
+    def __init__(self, redis_url: str = "", ttl: int = 3600):
+        self.ttl = ttl
+        self._memory: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._redis = None
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.Redis.from_url(redis_url, socket_timeout=2.0)
+    
+    @staticmethod
+    def _key(sheet_id: str, worksheet_id: int) -> str:
+        return f"sheets:fingerprint:{sheet_id}:{worksheet_id}"
+    
+    async def load(self, sheet_id: str, worksheet_id: int) -> Optional[GridFingerprint]:
+        key = self._key(sheet_id, worksheet_id)
+        try:
+            if self._redis is not None:
+                raw = await self._redis.get(key)
+                data = json.loads(raw) if raw else None
+            else:
+                expires_at, data = self._memory.get(key, (0.0, None))
+                if expires_at < time.time():
+                    data = None
+            return GridFingerprint.from_dict(data) if data else None
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать отпечаток листа {key}: {e}")
+            return None
+    
+    async def save(self, sheet_id: str, worksheet_id: int, fingerprint: GridFingerprint):
+        key = self._key(sheet_id, worksheet_id)
+        data = fingerprint.to_dict()
+        if self._redis is None:
+            self._memory[key] = (time.time() + self.ttl, data)
+            return
+        try:
+            await self._redis.set(key, json.dumps(data, ensure_ascii=False), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить отпечаток листа {key}: {e}")
+    
+    async def invalidate(self, sheet_id: str, worksheet_id: int):
+        key = self._key(sheet_id, worksheet_id)
+        self._memory.pop(key, None)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(key)
+            except Exception as e:
+                logger.warning(f"Не удалось удалить отпечаток листа {key}: {e}")
+    
+    async def acquire_write_lock(self, sheet_id: str, worksheet_id: int) -> Optional[str]:
+        """Токен блокировки записи или None, если лист пишет другой процесс."""
+        token = uuid.uuid4().hex
+        if self._redis is None:
+            return token
+        try:
+            acquired = await self._redis.set(
+                f"{self._key(sheet_id, worksheet_id)}:lock", token,
+                nx=True, px=GRID_WRITE_LOCK_TIMEOUT * 1000
+            )
+            return token if acquired else None
+        except Exception as e:
+            logger.warning(f"Не удалось взять блокировку листа: {e}")
+            return None
+    
+    async def release_write_lock(self, sheet_id: str, worksheet_id: int, token: str):
+        if self._redis is None:
+            return
+        lock_key = f"{self._key(sheet_id, worksheet_id)}:lock"
+        try:
+            if await self._redis.get(lock_key) == token.encode():
+                await self._redis.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Не удалось снять блокировку листа: {e}")
+
+
 class GoogleSheetsService:
     """Сервис для работы с Google Sheets API."""
     
@@ -89,6 +285,8 @@ class GoogleSheetsService:
         """Инициализация сервиса."""
         self.client = None
         self.oauth_client = None  # Клиент для создания файлов через OAuth
+        # Отпечатки последних записанных сеток (общие с воркерами через Redis)
+        self._fingerprints = GridFingerprintStore(settings.redis_url, settings.sheets_fingerprint_ttl)
         self._initialize()
     
     def _initialize(self):
@@ -302,6 +500,21 @@ class GoogleSheetsService:
             }
         }
     
+    def _build_clear_rows_request(self, sheet_id: int, start_row: int, end_row: int, cols: int) -> dict:
+        """Построить request для очистки хвостовых строк (значения и формат)"""
+        return {
+            'updateCells': {
+                'range': {
+                    'sheetId': sheet_id,
+                    'startRowIndex': start_row,
+                    'endRowIndex': end_row,
+                    'startColumnIndex': 0,
+                    'endColumnIndex': cols
+                },
+                'fields': 'userEnteredValue,userEnteredFormat'
+            }
+        }
+    
     def _build_merge_requests(self, sheet_id: int, num_warehouses: int) -> List[dict]:
         """
         Построить requests для объединения ячеек заголовков.
@@ -382,14 +595,25 @@ class GoogleSheetsService:
         """
         all_rows = [header_row1, header_row2] + data_rows
         
+        return self._build_cells_update_request(sheet_id, all_rows, 0, 0, len(header_row2))
+    
+    @staticmethod
+    def _build_cells_update_request(
+        sheet_id: int,
+        rows: List[List],
+        start_row: int,
+        start_col: int,
+        end_col: int
+    ) -> dict:
+        """Построить updateCells request для прямоугольника значений [start_col:end_col]"""
         return {
             'updateCells': {
                 'range': {
                     'sheetId': sheet_id,
-                    'startRowIndex': 0,
-                    'endRowIndex': len(all_rows),
-                    'startColumnIndex': 0,
-                    'endColumnIndex': len(header_row2)
+                    'startRowIndex': start_row,
+                    'endRowIndex': start_row + len(rows),
+                    'startColumnIndex': start_col,
+                    'endColumnIndex': end_col
                 },
                 'rows': [
                     {
@@ -401,10 +625,10 @@ class GoogleSheetsService:
                                     else {}
                                 )
                             }
-                            for cell in row
+                            for cell in row[start_col:end_col]
                         ]
                     }
-                    for row in all_rows
+                    for row in rows
                 ],
                 'fields': 'userEnteredValue'
             }
@@ -659,18 +883,62 @@ class GoogleSheetsService:
     
     # ===== END BATCH UPDATE HELPER METHODS =====
     
+    def _build_incremental_requests(
+        self,
+        sheet_id: int,
+        grid: List[List],
+        previous: GridFingerprint,
+        current: GridFingerprint,
+        num_warehouses: int
+    ) -> Tuple[List[dict], int]:
+        """
+        Построить requests только для изменившихся строк.
+        
+        Форматирование и границы переотправляются только при изменении
+        количества строк; merge/dimension requests не нужны.
+        
+        Returns:
+            (requests, количество изменённых диапазонов)
+        """
+        requests = []
+        blocks = previous.changed_blocks(current)
+        
+        for start_row, end_row, start_col, end_col in blocks:
+            requests.append(self._build_cells_update_request(
+                sheet_id, grid[start_row:end_row], start_row, start_col, end_col
+            ))
+        
+        if len(previous.rows) != len(current.rows):
+            data_rows_count = len(grid) - 2
+            if len(previous.rows) > len(current.rows):
+                requests.append(self._build_clear_rows_request(
+                    sheet_id, len(current.rows), len(previous.rows), current.num_cols
+                ))
+            requests.extend(self._build_format_requests(sheet_id, data_rows_count, current.num_cols))
+            requests.extend(self._build_border_requests(sheet_id, data_rows_count, current.num_cols, num_warehouses))
+        
+        return requests, len(blocks)
+    
     async def update_sheet(
         self,
         sheet_id: str,
-        data: List[Any]
+        data: List[Any],
+        incremental: bool = False
     ) -> bool:
         """
         Обновление существующей таблицы - ОПТИМИЗИРОВАННАЯ ВЕРСИЯ с batch_update.
         ВСЕ операции выполняются в ОДНОМ API вызове.
         
+        В инкрементальном режиме отправляются только изменившиеся строки
+        относительно последней записи в этот лист. Отпечаток перед
+        использованием сверяется с колонкой nmId листа; полная перезапись -
+        если отпечатка нет, он не совпал с листом, изменилась раскладка
+        складов или лист сейчас пишет другой процесс.
+        
         Args:
             sheet_id: ID таблицы
             data: Данные для обновления (список ProductMetrics)
+            incremental: Отправлять только изменения, если возможно
             
         Returns:
             True если успешно
@@ -721,75 +989,127 @@ class GoogleSheetsService:
                 worksheet.resize(rows=new_rows, cols=new_cols)
                 logger.info(f"Resized sheet to {new_rows}x{new_cols}")
             
+            grid = [header_row1, header_row2] + data_rows
+            fingerprint = GridFingerprint.from_grid(warehouse_names, grid)
+            
+            # Пока идёт запись, другие процессы не сравнивают себя с этим листом
+            lock_token = await self._fingerprints.acquire_write_lock(sheet_id, worksheet.id)
+            
+            previous = None
+            if incremental and lock_token is not None:
+                previous = await self._fingerprints.load(sheet_id, worksheet.id)
+                if previous is not None:
+                    # Ручные правки, удалённые или пересортированные строки - полная перезапись
+                    nm_id_column = worksheet.col_values(
+                        NM_ID_COL + 1, value_render_option="UNFORMATTED_VALUE"
+                    )[2:]
+                    if not previous.matches_sheet(nm_id_column):
+                        logger.info("Лист не совпадает с отпечатком, выполняем полную перезапись")
+                        previous = None
+            
+            full_rewrite = (
+                previous is None
+                or previous.warehouses != fingerprint.warehouses
+                or previous.num_cols != fingerprint.num_cols
+            )
+            
             # === ЕДИНСТВЕННЫЙ BATCH_UPDATE ДЛЯ ВСЕХ ОПЕРАЦИЙ ===
             all_requests = []
             
-            # 1. Размержирование существующих ячеек строки 1
-            all_requests.append(self._build_unmerge_request(worksheet.id, num_cols_needed))
-            
-            # 2. Очистка (не используем worksheet.clear())
-            all_requests.append(self._build_clear_request(
-                worksheet.id, 
-                current_rows, 
-                current_cols
-            ))
-            
-            # 3. Запись данных (заголовки + данные)
-            all_requests.append(self._build_data_update_request(
-                worksheet.id,
-                header_row1,
-                header_row2,
-                data_rows
-            ))
-            
-            # 4. Объединение ячеек заголовков
-            all_requests.extend(self._build_merge_requests(worksheet.id, num_warehouses))
-            
-            # 5. Форматирование
-            all_requests.extend(self._build_format_requests(
-                worksheet.id,
-                len(data_rows),
-                num_cols_needed
-            ))
-            
-            # 6. Границы
-            all_requests.extend(self._build_border_requests(
-                worksheet.id,
-                len(data_rows),
-                num_cols_needed,
-                num_warehouses
-            ))
-            
-            # 7. Размеры колонок и строк
-            all_requests.extend(self._build_dimension_requests(worksheet.id, num_cols_needed))
+            if full_rewrite:
+                # 1. Размержирование существующих ячеек строки 1
+                all_requests.append(self._build_unmerge_request(worksheet.id, num_cols_needed))
+                
+                # 2. Очистка (не используем worksheet.clear())
+                all_requests.append(self._build_clear_request(
+                    worksheet.id, 
+                    current_rows, 
+                    current_cols
+                ))
+                
+                # 3. Запись данных (заголовки + данные)
+                all_requests.append(self._build_data_update_request(
+                    worksheet.id,
+                    header_row1,
+                    header_row2,
+                    data_rows
+                ))
+                
+                # 4. Объединение ячеек заголовков
+                all_requests.extend(self._build_merge_requests(worksheet.id, num_warehouses))
+                
+                # 5. Форматирование
+                all_requests.extend(self._build_format_requests(
+                    worksheet.id,
+                    len(data_rows),
+                    num_cols_needed
+                ))
+                
+                # 6. Границы
+                all_requests.extend(self._build_border_requests(
+                    worksheet.id,
+                    len(data_rows),
+                    num_cols_needed,
+                    num_warehouses
+                ))
+                
+                # 7. Размеры колонок и строк
+                all_requests.extend(self._build_dimension_requests(worksheet.id, num_cols_needed))
+            else:
+                # Раскладка складов не изменилась - только изменённые диапазоны
+                all_requests, changed_ranges = self._build_incremental_requests(
+                    worksheet.id, grid, previous, fingerprint, num_warehouses
+                )
+                logger.info(f"Incremental update: {changed_ranges} changed ranges")
             
-            # ВЫПОЛНЯЕМ ВСЕ ОПЕРАЦИИ ОДНИМ ЗАПРОСОМ
             prep_time = time.time() - start_time
-            logger.info(f"Executing batch update with {len(all_requests)} requests...")
-            
-            batch_start = time.time()
+            batch_time = 0.0
+            freeze_time = 0.0
             
-            # Применяем retry для критичной операции
-            @retry_on_api_error(max_retries=3)
-            async def execute_batch():
-                return spreadsheet.batch_update({'requests': all_requests})
-            
-            batch_response = await execute_batch()
-            batch_time = time.time() - batch_start
-            
-            # 8. Замораживание заголовков (отдельный метод, но быстрый)
-            freeze_start = time.time()
-            worksheet.freeze(rows=2, cols=0)
-            freeze_time = time.time() - freeze_start
+            try:
+                if all_requests:
+                    # ВЫПОЛНЯЕМ ВСЕ ОПЕРАЦИИ ОДНИМ ЗАПРОСОМ
+                    logger.info(f"Executing batch update with {len(all_requests)} requests...")
+                    
+                    batch_start = time.time()
+                    
+                    # Применяем retry для критичной операции
+                    @retry_on_api_error(max_retries=3)
+                    async def execute_batch():
+                        return spreadsheet.batch_update({'requests': all_requests})
+                    
+                    try:
+                        await execute_batch()
+                    except Exception:
+                        # Состояние листа неизвестно - следующее обновление будет полным
+                        await self._fingerprints.invalidate(sheet_id, worksheet.id)
+                        raise
+                    batch_time = time.time() - batch_start
+                else:
+                    logger.info("Sheet is up to date, nothing to write")
+                
+                if full_rewrite:
+                    # 8. Замораживание заголовков (отдельный метод, но быстрый)
+                    freeze_start = time.time()
+                    worksheet.freeze(rows=2, cols=0)
+                    freeze_time = time.time() - freeze_start
+                
+                if lock_token is not None:
+                    await self._fingerprints.save(sheet_id, worksheet.id, fingerprint)
+                else:
+                    # Параллельная запись другого процесса - отпечаток недостоверен
+                    await self._fingerprints.invalidate(sheet_id, worksheet.id)
+            finally:
+                if lock_token is not None:
+                    await self._fingerprints.release_write_lock(sheet_id, worksheet.id, lock_token)
             
             elapsed = time.time() - start_time
             
             logger.info(
-                f"✅ Updated in {elapsed:.2f}s | "
+                f"✅ Updated in {elapsed:.2f}s ({'full' if full_rewrite else 'incremental'}) | "
                 f"Prep: {prep_time:.2f}s | "
                 f"Batch: {batch_time:.2f}s | "
                 f"Freeze: {freeze_time:.2f}s | "
-                f"API calls: 3 (open/batch/freeze) | "
                 f"Requests in batch: {len(all_requests)}"
             )
             
@@ -1,15 +1,15 @@
 """Сервис автоматического обновления таблиц по расписанию."""
-import asyncio
 from datetime import datetime
-from typing import List
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database.database import async_session_maker
 from app.database.models import User
+from app.services.update_planner import UpdatePlanner
 from app.services.wb_integration import wb_integration
 from app.utils.logger import logger
 
@@ -65,19 +65,19 @@ class AutoUpdateScheduler:
     
     async def update_all_user_tables(self):
         """
-        Параллельное обновление таблиц всех пользователей.
+        Обновление таблиц всех пользователей через UpdatePlanner.
         
-        Ключевое отличие: каждый пользователь имеет СВОЙ API ключ WB,
-        поэтому rate limit 3 req/min применяется ОТДЕЛЬНО к каждому.
-        Это позволяет обновлять всех пользователей ОДНОВРЕМЕННО!
+        Каждый API ключ WB имеет СВОЙ лимит 3 req/min, а квота записи
+        Google Sheets общая на весь сервис. Лимит ключа соблюдает KeyPacer
+        сборщика, планировщик ведёт общий бюджет записей, чередует
+        пользователей по ключам и распределяет старты по окну
+        update_spread_seconds.
         """
         logger.info("=" * 70)
-        logger.info("[UPDATE] PARALLEL TABLE UPDATE STARTED")
+        logger.info("[UPDATE] SCHEDULED TABLE UPDATE STARTED")
         logger.info(f"[TIME] Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 70)
         
-        start_time = datetime.now()
-        
         try:
             async with async_session_maker() as session:
                 # Получаем всех пользователей с API ключами и таблицами
@@ -88,93 +88,68 @@ class AutoUpdateScheduler:
                     )
                 )
                 users = result.scalars().all()
+            
+            total_users = len(users)
+            logger.info(f"[STATS] Found {total_users} users with configured tables")
+            
+            if total_users == 0:
+                logger.info("[INFO] No users to update")
+                return
+            
+            planner = UpdatePlanner(
+                sheets_writes_per_minute=settings.sheets_writes_per_minute,
+                sheets_writes_per_update=settings.sheets_writes_per_update,
+                spread_seconds=settings.update_spread_seconds,
+                max_concurrent=settings.max_concurrent_updates
+            )
+            
+            logger.info(
+                f"[PARALLEL] Will process {total_users} users with max "
+                f"{min(planner.max_concurrent, total_users)} concurrent tasks, "
+                f"spread over {planner.spread_seconds}s"
+            )
+            
+            async def update_single_user(user: User, index: int) -> bool:
+                """
+                Обновление одного пользователя.
                 
-                total_users = len(users)
-                logger.info(f"[STATS] Found {total_users} users with configured tables")
-                
-                if total_users == 0:
-                    logger.info("[INFO] No users to update")
-                    return
-                
-                # Определяем максимальное количество одновременных обновлений
-                # Ограничиваем для защиты от перегрузки сервера и Google Sheets API
-                max_concurrent = min(20, total_users)  # До 20 параллельных обновлений
-                semaphore = asyncio.Semaphore(max_concurrent)
-                
-                logger.info(f"[PARALLEL] Will process {total_users} users with max {max_concurrent} concurrent tasks")
-                
-                async def update_single_user(user: User, index: int) -> tuple[bool, str]:
-                    """
-                    Обновление одного пользователя с контролем параллелизма.
-                    
-                    Args:
-                        user: Объект пользователя
-                        index: Номер в списке (для логирования)
-                    
-                    Returns:
-                        (success: bool, message: str)
-                    """
-                    async with semaphore:
-                        try:
-                            logger.info(
-                                f"[{index}/{total_users}] Starting update for user {user.telegram_id} "
-                                f"({user.full_name})"
-                            )
-                            
-                            # Создаем отдельную сессию для каждого пользователя
-                            # Это критично для параллельной работы!
-                            async with async_session_maker() as user_session:
-                                result = await wb_integration.update_existing_table(user, user_session)
-                                
-                                if result:
-                                    logger.info(
-                                        f"[OK] [{index}/{total_users}] User {user.telegram_id} "
-                                        f"updated successfully"
-                                    )
-                                    return True, "success"
-                                else:
-                                    logger.warning(
-                                        f"[WARNING] [{index}/{total_users}] Failed to update "
-                                        f"user {user.telegram_id}"
-                                    )
-                                    return False, "update_failed"
-                        
-                        except Exception as e:
-                            logger.error(
-                                f"[ERROR] Error updating user {user.telegram_id}: {e}",
-                                exc_info=True
-                            )
-                            return False, f"exception: {type(e).__name__}"
-                
-                # Запускаем ВСЕ задачи параллельно с asyncio.gather
-                # gather автоматически управляет параллелизмом через semaphore
-                tasks = [
-                    update_single_user(user, i+1) 
-                    for i, user in enumerate(users)
-                ]
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                Args:
+                    user: Объект пользователя
+                    index: Номер в порядке запуска (для логирования)
                 
-                # Подсчет статистики
-                updated_count = sum(1 for r in results if isinstance(r, tuple) and r[0] is True)
-                error_count = sum(1 for r in results if isinstance(r, tuple) and r[0] is False)
-                exception_count = sum(1 for r in results if isinstance(r, Exception))
+                Returns:
+                    True если таблица обновлена
+                """
+                logger.info(
+                    f"[{index}/{total_users}] Starting update for user {user.telegram_id} "
+                    f"({user.full_name})"
+                )
                 
-                duration = (datetime.now() - start_time).total_seconds()
-                avg_time = duration / total_users if total_users > 0 else 0
+                # Создаем отдельную сессию для каждого пользователя
+                # Это критично для параллельной работы!
+                async with async_session_maker() as user_session:
+                    result = await wb_integration.update_existing_table(
+                        user,
+                        user_session,
+                        before_write=planner.acquire_sheets_write
+                    )
                 
-                # Итоговая статистика
-                logger.info("=" * 70)
-                logger.info("[SUMMARY] PARALLEL UPDATE SUMMARY")
-                logger.info(f"[OK] Successfully updated: {updated_count}/{total_users}")
-                logger.info(f"[ERROR] Failed: {error_count}/{total_users}")
-                logger.info(f"[EXCEPTION] Exceptions: {exception_count}/{total_users}")
-                logger.info(f"[TIME] Total duration: {duration:.1f}s")
-                logger.info(f"[TIME] Average per user: {avg_time:.1f}s")
-                logger.info(f"[TIME] Speedup vs sequential: ~{total_users * 60 / duration:.1f}x")
-                logger.info(f"[TIME] Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                logger.info("=" * 70)
+                if result:
+                    logger.info(
+                        f"[OK] [{index}/{total_users}] User {user.telegram_id} "
+                        f"updated successfully"
+                    )
+                    return True
                 
+                logger.warning(
+                    f"[WARNING] [{index}/{total_users}] Failed to update "
+                    f"user {user.telegram_id}"
+                )
+                return False
+            
+            stats = await planner.run(users, update_single_user)
+            stats.log_summary()
+            
         except Exception as e:
             logger.error(f"Critical error in update_all_user_tables: {e}", exc_info=True)
     
@@ -0,0 +1,231 @@
+"""Планирование массовых обновлений таблиц с учётом лимитов WB и Google Sheets."""
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.utils.logger import logger
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket с резервированием.
+
+    reserve() списывает токены сразу (баланс может уйти в минус) и
+    возвращает время ожидания, после которого резерв становится валидным.
+    Так несколько задач, претендующих на один бюджет, выстраиваются в
+    очередь без опроса и без простоя бюджета.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            rate_per_minute: Скорость пополнения (токенов в минуту)
+            capacity: Максимальный запас токенов (по умолчанию = rate_per_minute)
+            clock: Источник монотонного времени
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated_at = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Зарезервировать токены.
+
+        Returns:
+            Секунды ожидания до момента, когда резерв можно использовать
+        """
+        self._refill()
+        self.tokens -= tokens
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Дождаться токенов.
+
+        Returns:
+            Фактическое время ожидания в секундах
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+@dataclass
+class UpdateRunStats:
+    """Статистика одного прогона массового обновления."""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    exceptions: int = 0
+    duration: float = 0.0
+    latencies: List[float] = field(default_factory=list)  # время выполнения задачи
+    waits: List[float] = field(default_factory=list)  # ожидание бюджета/слота
+
+    @property
+    def throughput_per_minute(self) -> float:
+        """Обработано пользователей в минуту."""
+        return self.total * 60.0 / self.duration if self.duration > 0 else 0.0
+
+    @staticmethod
+    def percentile(values: List[float], p: float) -> float:
+        """Перцентиль (nearest-rank) по списку значений."""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        rank = max(1, min(len(ordered), math.ceil(p / 100.0 * len(ordered))))
+        return ordered[rank - 1]
+
+    def log_summary(self):
+        """Вывести итоговую статистику прогона."""
+        logger.info("=" * 70)
+        logger.info("[SUMMARY] SCHEDULED UPDATE SUMMARY")
+        logger.info(f"[OK] Successfully updated: {self.succeeded}/{self.total}")
+        logger.info(f"[ERROR] Failed: {self.failed}/{self.total}")
+        logger.info(f"[EXCEPTION] Exceptions: {self.exceptions}/{self.total}")
+        logger.info(f"[TIME] Total duration: {self.duration:.1f}s")
+        logger.info(f"[THROUGHPUT] {self.throughput_per_minute:.2f} users/min")
+        logger.info(
+            f"[LATENCY] p50: {self.percentile(self.latencies, 50):.1f}s | "
+            f"p95: {self.percentile(self.latencies, 95):.1f}s | "
+            f"max: {max(self.latencies, default=0.0):.1f}s"
+        )
+        logger.info(
+            f"[WAIT] p50: {self.percentile(self.waits, 50):.1f}s | "
+            f"p95: {self.percentile(self.waits, 95):.1f}s"
+        )
+        logger.info("=" * 70)
+
+
+class UpdatePlanner:
+    """
+    Планировщик прогона обновлений.
+
+    - Лимит WB по API ключу соблюдает KeyPacer сборщика
+      (wb_async_collector), планировщик его не дублирует
+    - Общий бюджет записей в Google Sheets на весь сервис
+    - Пользователи чередуются по ключам (round-robin), чтобы соседние
+      старты не упирались в один и тот же бюджет
+    - Старты равномерно распределяются по окну spread_seconds
+    """
+
+    def __init__(
+        self,
+        sheets_writes_per_minute: float = 60,
+        sheets_writes_per_update: int = 2,
+        spread_seconds: float = 0,
+        max_concurrent: int = 20
+    ):
+        """
+        Args:
+            sheets_writes_per_minute: Общий лимит записей в Google Sheets
+            sheets_writes_per_update: Запросов записи на одно обновление таблицы
+            spread_seconds: Окно, по которому распределяются старты
+            max_concurrent: Максимум одновременно выполняемых обновлений
+        """
+        self.sheets_writes_per_update = sheets_writes_per_update
+        self.spread_seconds = spread_seconds
+        self.max_concurrent = max_concurrent
+        self.sheets_bucket = TokenBucket(sheets_writes_per_minute)
+
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        """Идентификатор ключа для группировки (сам ключ не хранится)."""
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+    async def acquire_sheets_write(self) -> float:
+        """Дождаться бюджета на запись одной таблицы."""
+        return await self.sheets_bucket.acquire(self.sheets_writes_per_update)
+
+    def interleave(self, users: List[Any]) -> List[Any]:
+        """
+        Упорядочить пользователей round-robin по API ключам.
+
+        Пользователи с общим ключом разносятся как можно дальше друг от друга.
+        """
+        groups: "OrderedDict[str, List[Any]]" = OrderedDict()
+        for user in users:
+            groups.setdefault(self._key_id(user.wb_api_key), []).append(user)
+
+        ordered = []
+        queues = list(groups.values())
+        while queues:
+            for queue in queues:
+                ordered.append(queue.pop(0))
+            queues = [queue for queue in queues if queue]
+        return ordered
+
+    def start_offsets(self, count: int) -> List[float]:
+        """Смещения стартов, равномерно распределённые по окну."""
+        if count == 0 or self.spread_seconds <= 0:
+            return [0.0] * count
+        step = self.spread_seconds / count
+        return [i * step for i in range(count)]
+
+    async def run(
+        self,
+        users: List[Any],
+        job: Callable[[Any, int], Awaitable[bool]]
+    ) -> UpdateRunStats:
+        """
+        Выполнить job для всех пользователей с учётом бюджетов.
+
+        Args:
+            users: Пользователи с wb_api_key
+            job: Корутина (user, index) -> успех
+
+        Returns:
+            Статистика прогона
+        """
+        ordered = self.interleave(users)
+        offsets = self.start_offsets(len(ordered))
+        semaphore = asyncio.Semaphore(max(1, min(self.max_concurrent, len(ordered) or 1)))
+        stats = UpdateRunStats(total=len(ordered))
+        run_start = time.monotonic()
+
+        async def run_one(user: Any, index: int, offset: float):
+            delay = offset - (time.monotonic() - run_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            wait_start = time.monotonic()
+            async with semaphore:
+                stats.waits.append(time.monotonic() - wait_start)
+                job_start = time.monotonic()
+                try:
+                    ok = await job(user, index)
+                    if ok:
+                        stats.succeeded += 1
+                    else:
+                        stats.failed += 1
+                except Exception as e:
+                    stats.exceptions += 1
+                    logger.error(f"[ERROR] Update job failed for user {user.telegram_id}: {e}", exc_info=True)
+                finally:
+                    stats.latencies.append(time.monotonic() - job_start)
+
+        await asyncio.gather(*[
+            run_one(user, i + 1, offset)
+            for i, (user, offset) in enumerate(zip(ordered, offsets))
+        ])
+
+        stats.duration = time.monotonic() - run_start
+        return stats
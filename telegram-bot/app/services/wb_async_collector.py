@@ -0,0 +1,455 @@
+"""
+Асинхронный сборщик полных данных по товарам из Wildberries API.
+
+Те же три эндпоинта и тот же результат (ProductMetrics), что и у
+WildberriesDataCollector, но без блокировки event loop: HTTP через aiohttp,
+паузы rate limit и ожидание отчета остатков через asyncio.sleep.
+
+Паузы между запросами считаются по API ключу, а не по экземпляру:
+пользователи с общим ключом делят один бюджет 3 req/min, а пользователи
+с разными ключами обновляются параллельно. Если задан REDIS_URL, бюджет
+ключа общий с воркерами Celery и API (stock_tracker.utils.distributed_rate_limit).
+"""
+
+import asyncio
+import hashlib
+import math
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+from app.config import settings
+from app.services.update_planner import TokenBucket
+from app.services.wildberries_complete_data_collector import (
+    ProductMetrics,
+    WildberriesDataCollector,
+    merge_product_metrics,
+)
+from app.utils.logger import logger
+
+
+# Те же ключи и GCRA скрипты, что и в stock_tracker.utils.distributed_rate_limit:
+# ratelimit:wb:{sha256(ключ)[:16]}:{группа} хранит время следующего свободного слота
+REDIS_KEY_PREFIX = "ratelimit:wb"
+REDIS_MAX_WAIT_MS = 3600 * 1000  # Бот ждет свой слот, а не отказывается от запроса
+
+GCRA_RESERVE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+
+local tat = tonumber(redis.call("GET", KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local wait = tat - tolerance - now
+if wait < 0 then
+    wait = 0
+end
+if wait > max_wait then
+    return {0, wait}
+end
+
+local new_tat = tat + interval
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now + interval)
+return {1, wait}
+"""
+
+GCRA_PENALIZE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+
+local tat = tonumber(redis.call("GET", KEYS[1]) or 0)
+if until_ms > tat then
+    redis.call("SET", KEYS[1], until_ms, "PX", tonumber(ARGV[1]))
+end
+return until_ms
+"""
+
+
+def _key_id(api_key: str) -> str:
+    """Идентификатор ключа (сам ключ не хранится)."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class KeyPacer:
+    """
+    Бюджет запросов WB по API ключу.
+
+    С Redis бюджеты ведутся по группам эндпоинтов (analytics,
+    warehouse_remains, statistics)
+    и общие для всех процессов; без Redis - локальный поток запросов
+    ключа с паузой delay секунд, как в синхронном сборщике.
+    """
+
+    def __init__(self, delay: float, group_limits: Dict[str, float], redis_url: str = ""):
+        """
+        Args:
+            delay: Пауза между запросами ключа без Redis (секунд)
+            group_limits: Запросов в минуту на ключ по группам эндпоинтов
+            redis_url: URL Redis для общего бюджета (пусто - только локально)
+        """
+        self.delay = delay
+        self.group_limits = group_limits
+        self._local: Dict[str, TokenBucket] = {}
+        self._redis = None
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.Redis.from_url(redis_url, socket_timeout=2.0)
+            self._reserve = self._redis.register_script(GCRA_RESERVE_SCRIPT)
+            self._penalize = self._redis.register_script(GCRA_PENALIZE_SCRIPT)
+
+    def _bucket(self, api_key: str) -> TokenBucket:
+        key_id = _key_id(api_key)
+        bucket = self._local.get(key_id)
+        if bucket is None:
+            # Емкость 1: первый запрос сразу, следующие не чаще раза в delay секунд
+            bucket = TokenBucket(60.0 / self.delay, capacity=1)
+            self._local[key_id] = bucket
+        return bucket
+
+    def _redis_key(self, api_key: str, group: str) -> str:
+        return f"{REDIS_KEY_PREFIX}:{_key_id(api_key)}:{group}"
+
+    async def _reserve_shared(self, api_key: str, group: str) -> Optional[float]:
+        """Зарезервировать слот в общем бюджете (None - Redis недоступен)."""
+        interval_ms = math.ceil(60000.0 / self.group_limits[group])
+        try:
+            _, wait_ms = await self._reserve(
+                keys=[self._redis_key(api_key, group)],
+                args=[interval_ms, 0, REDIS_MAX_WAIT_MS]
+            )
+        except Exception as e:
+            logger.warning(f"Redis недоступен, лимит WB считается локально: {e}")
+            return None
+        return int(wait_ms) / 1000.0
+
+    async def wait(self, api_key: str, group: str) -> float:
+        """
+        Дождаться слота для запроса.
+
+        Returns:
+            Фактическое время ожидания в секундах
+        """
+        delay = None
+        if self._redis is not None:
+            delay = await self._reserve_shared(api_key, group)
+        if delay is None:
+            delay = self._bucket(api_key).reserve()
+        if delay > 0:
+            logger.debug(f"Ожидание {delay:.1f}с для соблюдения rate limit WB ({group})")
+            await asyncio.sleep(delay)
+        return delay
+
+    async def penalize(self, api_key: str, group: str, retry_after: float):
+        """Отложить запросы ключа после ответа 429."""
+        if self._redis is not None:
+            try:
+                await self._penalize(
+                    keys=[self._redis_key(api_key, group)],
+                    args=[math.ceil(retry_after * 1000)]
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Не удалось передать 429 в Redis: {e}")
+        bucket = self._bucket(api_key)
+        bucket.reserve(retry_after * bucket.rate)
+
+
+_key_pacer: Optional[KeyPacer] = None
+
+
+def get_key_pacer() -> KeyPacer:
+    """Общий для всех сборщиков бюджет запросов по API ключам."""
+    global _key_pacer
+    if _key_pacer is None:
+        _key_pacer = KeyPacer(
+            delay=WildberriesDataCollector.RATE_LIMIT_DELAY,
+            group_limits={
+                "analytics": settings.wb_requests_per_minute,
+                "warehouse_remains": settings.wb_remains_requests_per_minute,
+                "statistics": settings.wb_statistics_requests_per_minute
+            },
+            redis_url=settings.redis_url
+        )
+    return _key_pacer
+
+
+class AsyncWildberriesDataCollector:
+    """Асинхронный сборщик полных данных из Wildberries API."""
+
+    ANALYTICS_BASE_URL = WildberriesDataCollector.ANALYTICS_BASE_URL
+    STATISTICS_BASE_URL = WildberriesDataCollector.STATISTICS_BASE_URL
+
+    SALES_FUNNEL_ENDPOINT = WildberriesDataCollector.SALES_FUNNEL_ENDPOINT
+    WAREHOUSE_REMAINS_ENDPOINT = WildberriesDataCollector.WAREHOUSE_REMAINS_ENDPOINT
+    WAREHOUSE_DOWNLOAD_ENDPOINT = WildberriesDataCollector.WAREHOUSE_DOWNLOAD_ENDPOINT
+    SUPPLIER_ORDERS_ENDPOINT = WildberriesDataCollector.SUPPLIER_ORDERS_ENDPOINT
+
+    REMAINS_READY_DELAY = 5  # секунд на генерацию отчета остатков
+    SSL_MAX_RETRIES = 3
+
+    def __init__(self, api_key: str, session: Optional[aiohttp.ClientSession] = None):
+        """
+        Инициализация клиента.
+
+        Args:
+            api_key: API ключ Wildberries (категория Analytics)
+            session: Внешняя aiohttp сессия (по умолчанию создается своя)
+        """
+        self.api_key = api_key
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "User-Agent": "StockTracker-DataCollector/1.0"
+        }
+        self._session = session
+        self._owns_session = session is None
+        self._pacer = get_key_pacer()
+
+    async def __aenter__(self) -> "AsyncWildberriesDataCollector":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """aiohttp сессия (создается при первом запросе)."""
+        if self._session is None or self._session.closed:
+            # Как и в синхронном сборщике, SSL верификация отключена
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=False),
+                headers=self.headers
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """Закрыть собственную сессию."""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _wait_for_rate_limit(self, group: str = "analytics"):
+        """Ожидание бюджета API ключа без блокировки event loop."""
+        await self._pacer.wait(self.api_key, group)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        timeout: float,
+        group: str = "analytics",
+        **kwargs
+    ) -> Any:
+        """Выполнить запрос и вернуть JSON ответа."""
+        async with self.session.request(
+            method,
+            url,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            **kwargs
+        ) as response:
+            if response.status == 429:
+                try:
+                    retry_after = float(response.headers.get("Retry-After", 60))
+                except ValueError:
+                    retry_after = 60.0
+                await self._pacer.penalize(self.api_key, group, retry_after)
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def get_sales_funnel_data(
+        self,
+        period_start: str,
+        period_end: str,
+        nm_ids: Optional[List[int]] = None,
+        brand_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Получить данные из Sales Funnel API v3.
+
+        Args:
+            period_start: Начало периода (YYYY-MM-DD)
+            period_end: Конец периода (YYYY-MM-DD)
+            nm_ids: Список артикулов WB (опционально)
+            brand_names: Список брендов (опционально)
+
+        Returns:
+            Словарь с данными о товарах
+        """
+        await self._wait_for_rate_limit()
+
+        url = self.ANALYTICS_BASE_URL + self.SALES_FUNNEL_ENDPOINT
+
+        body = {
+            "selectedPeriod": {
+                "start": period_start,
+                "end": period_end
+            }
+        }
+
+        if nm_ids:
+            body["nmIds"] = nm_ids
+        if brand_names:
+            body["brandNames"] = brand_names
+
+        logger.info(f"Запрос Sales Funnel API: период {period_start} - {period_end}")
+
+        # Повторные попытки при SSL ошибках
+        for attempt in range(self.SSL_MAX_RETRIES):
+            try:
+                data = await self._request("POST", url, timeout=30, json=body)
+
+                products_count = len(data.get('data', {}).get('products', []))
+                logger.info(f"Sales Funnel API: получено товаров {products_count}")
+
+                return data
+            except aiohttp.ClientSSLError as e:
+                logger.warning(f"SSL ошибка Sales Funnel API (попытка {attempt + 1}/{self.SSL_MAX_RETRIES}): {e}")
+                if attempt < self.SSL_MAX_RETRIES - 1:
+                    await asyncio.sleep(2)  # Пауза перед повтором
+                    continue
+                logger.error(f"Не удалось получить данные после {self.SSL_MAX_RETRIES} попыток")
+                return {"data": {"products": []}}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Ошибка Sales Funnel API: {e}")
+                return {"data": {"products": []}}
+
+    async def get_warehouse_remains(
+        self,
+        group_by_nm: bool = True,
+        group_by_sa: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Получить остатки по складам из Warehouse Remains API.
+
+        Args:
+            group_by_nm: Группировать по артикулам WB
+            group_by_sa: Группировать по артикулам продавца
+
+        Returns:
+            Список товаров с остатками по складам
+        """
+        # Шаг 1: Создать задачу на генерацию отчета
+        # У Warehouse Remains отдельный лимит WB, не тратим бюджет analytics
+        await self._wait_for_rate_limit("warehouse_remains")
+
+        url = self.ANALYTICS_BASE_URL + self.WAREHOUSE_REMAINS_ENDPOINT
+        params = {
+            "groupByNm": str(group_by_nm).lower(),
+            "groupBySa": str(group_by_sa).lower(),
+            "locale": "ru"
+        }
+
+        try:
+            task_data = await self._request(
+                "GET", url, timeout=30, group="warehouse_remains", params=params
+            )
+            task_id = task_data.get('data', {}).get('taskId')
+
+            if not task_id:
+                logger.error(f"Warehouse Remains API: не получен task_id: {task_data}")
+                return []
+
+            # Шаг 2: Дождаться готовности и скачать результат
+            await asyncio.sleep(self.REMAINS_READY_DELAY)
+            await self._wait_for_rate_limit("warehouse_remains")
+
+            download_url = self.ANALYTICS_BASE_URL + self.WAREHOUSE_DOWNLOAD_ENDPOINT.format(
+                task_id=task_id
+            )
+            remains_data = await self._request(
+                "GET", download_url, timeout=60, group="warehouse_remains"
+            )
+
+            logger.info(f"Warehouse Remains API: получено записей {len(remains_data)}")
+
+            return remains_data
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Ошибка Warehouse Remains API: {e}")
+            return []
+
+    async def get_supplier_orders(
+        self,
+        date_from: str,
+        flag: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Получить заказы из Supplier Orders API.
+
+        Args:
+            date_from: Дата начала в формате RFC3339 (YYYY-MM-DD или с временем)
+            flag: 0 - по lastChangeDate, 1 - по date
+
+        Returns:
+            Список заказов
+        """
+        await self._wait_for_rate_limit("statistics")
+
+        url = self.STATISTICS_BASE_URL + self.SUPPLIER_ORDERS_ENDPOINT
+        params = {
+            "dateFrom": date_from,
+            "flag": flag
+        }
+
+        try:
+            orders = await self._request("GET", url, timeout=60, group="statistics", params=params)
+
+            logger.info(f"Supplier Orders API: получено заказов {len(orders)}")
+
+            return orders
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Ошибка Supplier Orders API: {e}")
+            return []
+
+    async def collect_complete_data(
+        self,
+        period_start: str,
+        period_end: str,
+        nm_ids: Optional[List[int]] = None,
+        brand_names: Optional[List[str]] = None
+    ) -> List[ProductMetrics]:
+        """
+        Собрать полные данные по товарам из всех источников.
+
+        Args:
+            period_start: Начало периода (YYYY-MM-DD)
+            period_end: Конец периода (YYYY-MM-DD)
+            nm_ids: Список артикулов WB (опционально)
+            brand_names: Список брендов (опционально)
+
+        Returns:
+            Список объектов ProductMetrics с полными данными
+        """
+        funnel_data = await self.get_sales_funnel_data(
+            period_start, period_end, nm_ids, brand_names
+        )
+        products = funnel_data.get('data', {}).get('products', [])
+
+        if not products:
+            logger.warning("Нет данных из Sales Funnel API")
+            return []
+
+        # Остатки и заказы запрашиваются конкурентно: порядок запросов задает
+        # бюджет ключа, а генерация отчета остатков идет во время запроса заказов
+        warehouse_data, orders = await asyncio.gather(
+            self.get_warehouse_remains(),
+            self.get_supplier_orders(period_start)
+        )
+
+        result = merge_product_metrics(products, warehouse_data, orders)
+
+        logger.info(f"Обработано товаров: {len(result)}")
+
+        return result
@@ -1,9 +1,9 @@
 """Интеграция с Wildberries API и Google Sheets."""
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.wildberries_complete_data_collector import WildberriesDataCollector
+from app.services.wb_async_collector import AsyncWildberriesDataCollector
 from app.services.google_sheets import google_sheets_service
 from app.database.crud import update_user_api_key
 from app.database.models import User
@@ -24,18 +24,16 @@ class WBIntegrationService:
             True если ключ валидный
         """
         try:
-            # Создаем коллектор
-            collector = WildberriesDataCollector(api_key=api_key)
-            
             # Пробуем запросить данные за последний день
             period_end = datetime.now()
             period_start = period_end - timedelta(days=1)
             
             # Делаем тестовый запрос
-            funnel_data = collector.get_sales_funnel_data(
-                period_start=period_start.strftime("%Y-%m-%d"),
-                period_end=period_end.strftime("%Y-%m-%d")
-            )
+            async with AsyncWildberriesDataCollector(api_key=api_key) as collector:
+                funnel_data = await collector.get_sales_funnel_data(
+                    period_start=period_start.strftime("%Y-%m-%d"),
+                    period_end=period_end.strftime("%Y-%m-%d")
+                )
             
             # Если данные получены (даже пустые) - ключ валидный
             if funnel_data and 'data' in funnel_data:
@@ -101,7 +99,8 @@ class WBIntegrationService:
     async def update_existing_table(
         self,
         user: User,
-        session: AsyncSession
+        session: AsyncSession,
+        before_write: Optional[Callable[[], Awaitable]] = None
     ) -> Optional[str]:
         """
         Обновление существующей таблицы пользователя.
@@ -109,6 +108,8 @@ class WBIntegrationService:
         Args:
             user: Объект пользователя
             session: Сессия БД
+            before_write: Корутина, ожидаемая перед записью в таблицу
+                (например, бюджет записей Google Sheets планировщика)
             
         Returns:
             URL таблицы или None
@@ -128,9 +129,13 @@ class WBIntegrationService:
                 return None
             
             # 2. Обновляем таблицу
+            if before_write is not None:
+                await before_write()
+            
             success = await google_sheets_service.update_sheet(
                 sheet_id=user.google_sheet_id,
-                data=wb_data
+                data=wb_data,
+                incremental=True
             )
             
             if not success:
@@ -227,18 +232,16 @@ class WBIntegrationService:
         try:
             logger.info("Fetching data from Wildberries API")
             
-            # Создаем коллектор
-            collector = WildberriesDataCollector(api_key=api_key)
-            
             # Период - последние 7 дней
             period_end = datetime.now()
             period_start = period_end - timedelta(days=7)
             
-            # Собираем полные данные
-            products = collector.collect_complete_data(
-                period_start=period_start.strftime("%Y-%m-%d"),
-                period_end=period_end.strftime("%Y-%m-%d")
-            )
+            # Собираем полные данные (не блокируя event loop)
+            async with AsyncWildberriesDataCollector(api_key=api_key) as collector:
+                products = await collector.collect_complete_data(
+                    period_start=period_start.strftime("%Y-%m-%d"),
+                    period_end=period_end.strftime("%Y-%m-%d")
+                )
             
             logger.info(f"Fetched {len(products)} products from WB API")
             return products
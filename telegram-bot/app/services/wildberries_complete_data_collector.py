@@ -15,8 +15,7 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass, asdict
 
-# Установка кодировки для вывода
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+from app.utils.logger import logger
 
 
 @dataclass
@@ -60,6 +59,160 @@ class ProductMetrics:
     buyout_sum: int
 
 
+def merge_product_metrics(
+    products: List[Dict[str, Any]],
+    warehouse_data: List[Dict[str, Any]],
+    orders: List[Dict[str, Any]]
+) -> List[ProductMetrics]:
+    """
+    Объединить ответы Sales Funnel, Warehouse Remains и Supplier Orders.
+    
+    Общая часть синхронного и асинхронного сборщиков.
+    
+    Args:
+        products: Товары из Sales Funnel API (data.products)
+        warehouse_data: Остатки из Warehouse Remains API
+        orders: Заказы из Supplier Orders API
+        
+    Returns:
+        Список объектов ProductMetrics с полными данными
+    """
+    # Индексируем по nmId для быстрого доступа
+    warehouse_by_nm = {}
+    total_warehouse_entries = 0
+    for item in warehouse_data:
+        nm_id = item.get('nmId')
+        if nm_id:
+            warehouse_by_nm[nm_id] = item
+            warehouses_in_item = item.get('warehouses', [])
+            total_warehouse_entries += len(warehouses_in_item)
+    
+    logger.debug(f"Индексировано {len(warehouse_by_nm)} товаров с {total_warehouse_entries} складскими записями")
+    
+    # Группируем заказы по nmId
+    orders_by_nm = {}
+    for order in orders:
+        nm_id = order.get('nmId')
+        if nm_id:
+            if nm_id not in orders_by_nm:
+                orders_by_nm[nm_id] = []
+            orders_by_nm[nm_id].append(order)
+    
+    # Объединяем все данные
+    logger.debug("Объединение данных...")
+    result = []
+    
+    for product in products:
+        product_info = product.get('product', {})
+        stats = product.get('statistic', {}).get('selected', {})
+        nm_id = product_info.get('nmId')
+        
+        if not nm_id:
+            continue
+        
+        # Данные из Sales Funnel
+        brand = product_info.get('brandName', '')
+        subject = product_info.get('subjectName', '')
+        subject_id = product_info.get('subjectId', 0)
+        vendor_code = product_info.get('vendorCode', '')
+        
+        stocks = product_info.get('stocks', {})
+        stocks_wb = stocks.get('wb', 0)
+        stocks_mp = stocks.get('mp', 0)
+        stocks_total = stocks_wb + stocks_mp
+        
+        orders_total = stats.get('orderCount', 0)
+        turnover = stats.get('timeToReady', {})
+        turnover_days = turnover.get('days', 0)
+        avg_orders_per_day = stats.get('avgOrdersCountPerDay', 0.0)
+        
+        conversions = stats.get('conversions', {})
+        conversion_to_cart = conversions.get('addToCartPercent', 0)
+        conversion_to_order = conversions.get('cartToOrderPercent', 0)
+        buyout_percent = conversions.get('buyoutPercent', 0)
+        
+        avg_price = stats.get('avgPrice', 0)
+        order_sum_total = stats.get('orderSum', 0)
+        buyout_count = stats.get('buyoutCount', 0)
+        buyout_sum = stats.get('buyoutSum', 0)
+        
+        # Данные из Warehouse Remains (разбивка по складам)
+        warehouse_info = warehouse_by_nm.get(nm_id, {})
+        warehouses = warehouse_info.get('warehouses', [])
+        
+        stocks_by_warehouse = {}
+        in_transit_to_wb = 0
+        in_transit_to_customer = 0  # Инициализируем здесь, из данных Warehouse Remains
+        
+        for wh in warehouses:
+            wh_name = wh.get('warehouseName', '')
+            quantity = wh.get('quantity', 0)
+            if wh_name:
+                stocks_by_warehouse[wh_name] = quantity
+                # "В пути до получателей" - это товары, которые едут к покупателю
+                if wh_name == 'В пути до получателей':
+                    in_transit_to_customer = quantity
+                # "В пути возвраты на склад WB" - товары возвращаются на склад
+                elif 'В пути' in wh_name or 'транзит' in wh_name.lower():
+                    in_transit_to_wb += quantity
+        
+        # Данные из Supplier Orders (разбивка заказов)
+        nm_orders = orders_by_nm.get(nm_id, [])
+        
+        orders_wb_warehouses = 0
+        orders_fbs_warehouses = 0
+        orders_by_warehouse = {}
+        
+        for order in nm_orders:
+            wh_name = order.get('warehouseName', '')
+            wh_type = order.get('warehouseType', '')
+            is_cancel = order.get('isCancel', False)
+            
+            # Считаем только не отмененные заказы
+            if not is_cancel:
+                # Разбивка по типу склада
+                if wh_type == 'Склад WB':
+                    orders_wb_warehouses += 1
+                elif wh_type == 'Склад продавца':
+                    orders_fbs_warehouses += 1
+                
+                # Разбивка по конкретным складам
+                if wh_name:
+                    orders_by_warehouse[wh_name] = orders_by_warehouse.get(wh_name, 0) + 1
+        
+        # Создаем объект с полными метриками
+        metrics = ProductMetrics(
+            brand=brand,
+            subject=subject,
+            subject_id=subject_id,
+            vendor_code=vendor_code,
+            nm_id=nm_id,
+            orders_total=orders_total,
+            orders_wb_warehouses=orders_wb_warehouses,
+            orders_fbs_warehouses=orders_fbs_warehouses,
+            orders_by_warehouse=orders_by_warehouse,
+            stocks_total=stocks_total,
+            stocks_wb=stocks_wb,
+            stocks_mp=stocks_mp,
+            stocks_by_warehouse=stocks_by_warehouse,
+            in_transit_to_customer=in_transit_to_customer,
+            in_transit_to_wb_warehouse=in_transit_to_wb,
+            turnover_days=turnover_days,
+            avg_orders_per_day=avg_orders_per_day,
+            conversion_to_cart=conversion_to_cart,
+            conversion_to_order=conversion_to_order,
+            buyout_percent=buyout_percent,
+            avg_price=avg_price,
+            order_sum_total=order_sum_total,
+            buyout_count=buyout_count,
+            buyout_sum=buyout_sum
+        )
+        
+        result.append(metrics)
+    
+    return result
+
+
 class WildberriesDataCollector:
     """Класс для сбора полных данных из Wildberries API."""
     
@@ -310,142 +463,12 @@ class WildberriesDataCollector:
         print("\n📦 ШАГ 2/3: Warehouse Remains API")
         warehouse_data = self.get_warehouse_remains()
         
-        # Индексируем по nmId для быстрого доступа
-        warehouse_by_nm = {}
-        total_warehouse_entries = 0
-        for item in warehouse_data:
-            nm_id = item.get('nmId')
-            if nm_id:
-                warehouse_by_nm[nm_id] = item
-                warehouses_in_item = item.get('warehouses', [])
-                total_warehouse_entries += len(warehouses_in_item)
-        
-        print(f"📦 Индексировано {len(warehouse_by_nm)} товаров с {total_warehouse_entries} складскими записями")
-        
         # 3. Получаем заказы
         print("\n🛒 ШАГ 3/3: Supplier Orders API")
         orders = self.get_supplier_orders(period_start)
         
-        # Группируем заказы по nmId
-        orders_by_nm = {}
-        for order in orders:
-            nm_id = order.get('nmId')
-            if nm_id:
-                if nm_id not in orders_by_nm:
-                    orders_by_nm[nm_id] = []
-                orders_by_nm[nm_id].append(order)
-        
         # 4. Объединяем все данные
-        print("\n🔄 Объединение данных...")
-        result = []
-        
-        for product in products:
-            product_info = product.get('product', {})
-            stats = product.get('statistic', {}).get('selected', {})
-            nm_id = product_info.get('nmId')
-            
-            if not nm_id:
-                continue
-            
-            # Данные из Sales Funnel
-            brand = product_info.get('brandName', '')
-            subject = product_info.get('subjectName', '')
-            subject_id = product_info.get('subjectId', 0)
-            vendor_code = product_info.get('vendorCode', '')
-            
-            stocks = product_info.get('stocks', {})
-            stocks_wb = stocks.get('wb', 0)
-            stocks_mp = stocks.get('mp', 0)
-            stocks_total = stocks_wb + stocks_mp
-            
-            orders_total = stats.get('orderCount', 0)
-            turnover = stats.get('timeToReady', {})
-            turnover_days = turnover.get('days', 0)
-            avg_orders_per_day = stats.get('avgOrdersCountPerDay', 0.0)
-            
-            conversions = stats.get('conversions', {})
-            conversion_to_cart = conversions.get('addToCartPercent', 0)
-            conversion_to_order = conversions.get('cartToOrderPercent', 0)
-            buyout_percent = conversions.get('buyoutPercent', 0)
-            
-            avg_price = stats.get('avgPrice', 0)
-            order_sum_total = stats.get('orderSum', 0)
-            buyout_count = stats.get('buyoutCount', 0)
-            buyout_sum = stats.get('buyoutSum', 0)
-            
-            # Данные из Warehouse Remains (разбивка по складам)
-            warehouse_info = warehouse_by_nm.get(nm_id, {})
-            warehouses = warehouse_info.get('warehouses', [])
-            
-            stocks_by_warehouse = {}
-            in_transit_to_wb = 0
-            in_transit_to_customer = 0  # Инициализируем здесь, из данных Warehouse Remains
-            
-            for wh in warehouses:
-                wh_name = wh.get('warehouseName', '')
-                quantity = wh.get('quantity', 0)
-                if wh_name:
-                    stocks_by_warehouse[wh_name] = quantity
-                    # "В пути до получателей" - это товары, которые едут к покупателю
-                    if wh_name == 'В пути до получателей':
-                        in_transit_to_customer = quantity
-                    # "В пути возвраты на склад WB" - товары возвращаются на склад
-                    elif 'В пути' in wh_name or 'транзит' in wh_name.lower():
-                        in_transit_to_wb += quantity
-            
-            # Данные из Supplier Orders (разбивка заказов)
-            nm_orders = orders_by_nm.get(nm_id, [])
-            
-            orders_wb_warehouses = 0
-            orders_fbs_warehouses = 0
-            orders_by_warehouse = {}
-            
-            for order in nm_orders:
-                wh_name = order.get('warehouseName', '')
-                wh_type = order.get('warehouseType', '')
-                is_cancel = order.get('isCancel', False)
-                
-                # Считаем только не отмененные заказы
-                if not is_cancel:
-                    # Разбивка по типу склада
-                    if wh_type == 'Склад WB':
-                        orders_wb_warehouses += 1
-                    elif wh_type == 'Склад продавца':
-                        orders_fbs_warehouses += 1
-                    
-                    # Разбивка по конкретным складам
-                    if wh_name:
-                        orders_by_warehouse[wh_name] = orders_by_warehouse.get(wh_name, 0) + 1
-            
-            # Создаем объект с полными метриками
-            metrics = ProductMetrics(
-                brand=brand,
-                subject=subject,
-                subject_id=subject_id,
-                vendor_code=vendor_code,
-                nm_id=nm_id,
-                orders_total=orders_total,
-                orders_wb_warehouses=orders_wb_warehouses,
-                orders_fbs_warehouses=orders_fbs_warehouses,
-                orders_by_warehouse=orders_by_warehouse,
-                stocks_total=stocks_total,
-                stocks_wb=stocks_wb,
-                stocks_mp=stocks_mp,
-                stocks_by_warehouse=stocks_by_warehouse,
-                in_transit_to_customer=in_transit_to_customer,
-                in_transit_to_wb_warehouse=in_transit_to_wb,
-                turnover_days=turnover_days,
-                avg_orders_per_day=avg_orders_per_day,
-                conversion_to_cart=conversion_to_cart,
-                conversion_to_order=conversion_to_order,
-                buyout_percent=buyout_percent,
-                avg_price=avg_price,
-                order_sum_total=order_sum_total,
-                buyout_count=buyout_count,
-                buyout_sum=buyout_sum
-            )
-            
-            result.append(metrics)
+        result = merge_product_metrics(products, warehouse_data, orders)
         
         print(f"\n✅ Обработано товаров: {len(result)}")
         print("=" * 80)
@@ -894,4 +917,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Установка кодировки для вывода (только при запуске скриптом,
+    # при импорте модуля ботом stdout не подменяется)
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     main()
@@ -0,0 +1,16 @@
+"""
+Test configuration for the Telegram bot
+
+Tests run from the telegram-bot directory without a .env file: the app
+package is put on sys.path and required settings get test defaults.
+"""
+import os
+import sys
+from pathlib import Path
+
+BOT_ROOT = Path(__file__).resolve().parent.parent
+if str(BOT_ROOT) not in sys.path:
+    sys.path.insert(0, str(BOT_ROOT))
+
+os.environ.setdefault("BOT_TOKEN", "test-token")
+os.environ["REDIS_URL"] = ""
@@ -0,0 +1,129 @@
+"""
+Unit tests for TokenBucket and UpdatePlanner ordering
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import update_planner
+from app.services.update_planner import TokenBucket, UpdatePlanner, UpdateRunStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def user(key, telegram_id):
+    return SimpleNamespace(wb_api_key=key, telegram_id=telegram_id)
+
+
+class TestTokenBucket:
+    """Reservations queue up without polling"""
+
+    def test_reserve_within_capacity_is_free(self, clock):
+        bucket = TokenBucket(60, capacity=2, clock=clock)
+
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+
+    def test_reserve_beyond_capacity_returns_wait(self, clock):
+        bucket = TokenBucket(60, capacity=2, clock=clock)
+        bucket.reserve(2)
+
+        assert bucket.reserve() == pytest.approx(1.0)
+        assert bucket.reserve() == pytest.approx(2.0)
+        assert bucket.reserve(2) == pytest.approx(4.0)
+
+    def test_refill_is_capped(self, clock):
+        bucket = TokenBucket(60, capacity=2, clock=clock)
+        bucket.reserve(2)
+
+        clock.now = 1000
+        assert bucket.reserve(2) == 0
+        assert bucket.reserve() == pytest.approx(1.0)
+
+    def test_capacity_defaults_to_rate(self, clock):
+        bucket = TokenBucket(3, clock=clock)
+
+        assert [bucket.reserve() for _ in range(4)] == [0, 0, 0, pytest.approx(20.0)]
+
+    def test_acquire_sleeps_for_reservation(self, clock, monkeypatch):
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        monkeypatch.setattr(update_planner.asyncio, "sleep", fake_sleep)
+        bucket = TokenBucket(60, capacity=1, clock=clock)
+
+        async def run():
+            return [await bucket.acquire() for _ in range(3)]
+
+        assert asyncio.run(run()) == [0, pytest.approx(1.0), pytest.approx(2.0)]
+        assert sleeps == [pytest.approx(1.0), pytest.approx(2.0)]
+
+
+class TestUpdatePlanner:
+    """Users sharing a WB key are spread apart and starts are staggered"""
+
+    def test_interleave_round_robins_keys(self):
+        users = [user("a", 1), user("a", 2), user("a", 3), user("b", 4), user("c", 5), user("c", 6)]
+
+        ordered = UpdatePlanner().interleave(users)
+
+        assert [u.telegram_id for u in ordered] == [1, 4, 5, 2, 6, 3]
+
+    def test_interleave_keeps_every_user(self):
+        users = [user("a", i) for i in range(5)]
+
+        assert [u.telegram_id for u in UpdatePlanner().interleave(users)] == list(range(5))
+        assert UpdatePlanner().interleave([]) == []
+
+    def test_start_offsets(self):
+        assert UpdatePlanner(spread_seconds=60).start_offsets(4) == [0, 15, 30, 45]
+        assert UpdatePlanner(spread_seconds=0).start_offsets(3) == [0, 0, 0]
+        assert UpdatePlanner(spread_seconds=60).start_offsets(0) == []
+
+    def test_run_counts_outcomes(self):
+        users = [user("a", 1), user("a", 2), user("b", 3)]
+        seen = []
+
+        async def job(u, index):
+            seen.append((u.telegram_id, index))
+            if u.telegram_id == 2:
+                raise RuntimeError("boom")
+            return u.telegram_id == 1
+
+        stats = asyncio.run(UpdatePlanner(max_concurrent=2).run(users, job))
+
+        assert seen == [(1, 1), (3, 2), (2, 3)]
+        assert (stats.total, stats.succeeded, stats.failed, stats.exceptions) == (3, 1, 1, 1)
+        assert len(stats.latencies) == len(stats.waits) == 3
+
+    def test_sheets_budget_per_update(self, clock, monkeypatch):
+        async def fake_sleep(delay):
+            pass
+
+        monkeypatch.setattr(update_planner.asyncio, "sleep", fake_sleep)
+        planner = UpdatePlanner(sheets_writes_per_update=3)
+        planner.sheets_bucket = TokenBucket(60, capacity=3, clock=clock)
+
+        async def run():
+            return [await planner.acquire_sheets_write() for _ in range(2)]
+
+        assert asyncio.run(run()) == [0, pytest.approx(3.0)]
+
+    def test_percentile(self):
+        assert UpdateRunStats.percentile([], 95) == 0
+        assert UpdateRunStats.percentile([1, 2, 3, 4], 50) == 2
+        assert UpdateRunStats.percentile([1, 2, 3, 4], 95) == 4
@@ -0,0 +1,178 @@
+"""
+Unit tests for the async WB collector and the per-key request budget
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import wb_async_collector
+from app.services.wb_async_collector import AsyncWildberriesDataCollector, KeyPacer
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep calls of the collector instead of waiting"""
+    calls = []
+
+    async def fake_sleep(delay):
+        calls.append(delay)
+
+    monkeypatch.setattr(wb_async_collector.asyncio, "sleep", fake_sleep)
+    return calls
+
+
+class TestKeyPacer:
+    """Requests are paced per API key, not per collector"""
+
+    def test_same_key_waits_between_requests(self, sleeps):
+        pacer = KeyPacer(delay=20, group_limits={"analytics": 3})
+
+        async def run():
+            return [await pacer.wait("key-a", "analytics") for _ in range(3)]
+
+        waits = asyncio.run(run())
+
+        assert waits[0] == 0
+        assert waits[1] == pytest.approx(20, abs=0.1)
+        assert waits[2] == pytest.approx(40, abs=0.1)
+        assert sleeps == waits[1:]
+
+    def test_different_keys_do_not_share_budget(self, sleeps):
+        pacer = KeyPacer(delay=20, group_limits={"analytics": 3})
+
+        async def run():
+            return [await pacer.wait(key, "analytics") for key in ("key-a", "key-b", "key-c")]
+
+        assert asyncio.run(run()) == [0, 0, 0]
+        assert sleeps == []
+
+    def test_penalize_defers_next_request(self, sleeps):
+        pacer = KeyPacer(delay=20, group_limits={"analytics": 3})
+
+        async def run():
+            await pacer.wait("key-a", "analytics")
+            await pacer.penalize("key-a", "analytics", retry_after=60)
+            return await pacer.wait("key-a", "analytics")
+
+        assert asyncio.run(run()) == pytest.approx(80, abs=0.1)
+
+    def test_shared_budget_from_redis(self, sleeps):
+        pacer = KeyPacer(delay=20, group_limits={"analytics": 3, "statistics": 1})
+        pacer._redis = MagicMock()
+        pacer._reserve = AsyncMock(return_value=[1, 1500])
+
+        wait = asyncio.run(pacer.wait("key-a", "statistics"))
+
+        assert wait == 1.5
+        kwargs = pacer._reserve.call_args.kwargs
+        assert kwargs["keys"] == [f"ratelimit:wb:{wb_async_collector._key_id('key-a')}:statistics"]
+        assert kwargs["args"][0] == 60000
+        assert "key-a" not in kwargs["keys"][0]
+
+    def test_redis_error_falls_back_to_local_budget(self, sleeps):
+        pacer = KeyPacer(delay=20, group_limits={"analytics": 3})
+        pacer._redis = MagicMock()
+        pacer._reserve = AsyncMock(side_effect=ConnectionError("down"))
+
+        async def run():
+            return [await pacer.wait("key-a", "analytics") for _ in range(2)]
+
+        waits = asyncio.run(run())
+
+        assert waits[0] == 0
+        assert waits[1] == pytest.approx(20, abs=0.1)
+
+
+class FakeResponse:
+    def __init__(self, payload, status=200, headers=None):
+        self.payload = payload
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise wb_async_collector.aiohttp.ClientResponseError(
+                MagicMock(), (), status=self.status
+            )
+
+    async def json(self, content_type=None):
+        return self.payload
+
+
+class FakeSession:
+    """aiohttp session stand-in that answers by URL suffix"""
+
+    closed = False
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        for suffix, response in self.routes.items():
+            if suffix in url:
+                return response
+        raise AssertionError(f"unexpected request {url}")
+
+
+@pytest.fixture
+def pacer():
+    pacer = MagicMock()
+    pacer.wait = AsyncMock(return_value=0)
+    pacer.penalize = AsyncMock()
+    return pacer
+
+
+def make_collector(pacer, routes):
+    collector = AsyncWildberriesDataCollector("key-a", session=FakeSession(routes))
+    collector._pacer = pacer
+    return collector
+
+
+class TestAsyncCollector:
+    """Collector requests go through the key budget and merge like the sync one"""
+
+    def test_collect_complete_data(self, sleeps, pacer):
+        funnel = {"data": {"products": [{
+            "product": {"nmId": 1, "vendorCode": "A-1", "brandName": "B"},
+            "statistic": {"selected": {"orderCount": 2}},
+        }]}}
+        remains = [{"nmId": 1, "warehouses": [{"warehouseName": "Коледино", "quantity": 5}]}]
+        orders = [{"nmId": 1, "warehouseName": "Коледино", "isCancel": False}]
+        collector = make_collector(pacer, {
+            "sales-funnel": FakeResponse(funnel),
+            "/download": FakeResponse(remains),
+            "warehouse_remains": FakeResponse({"data": {"taskId": "t-1"}}),
+            "supplier/orders": FakeResponse(orders),
+        })
+
+        result = asyncio.run(collector.collect_complete_data("2025-01-01", "2025-01-07"))
+
+        assert [m.nm_id for m in result] == [1]
+        groups = [c.args for c in pacer.wait.call_args_list]
+        assert groups.count(("key-a", "analytics")) == 1
+        assert groups.count(("key-a", "warehouse_remains")) == 2
+        assert groups.count(("key-a", "statistics")) == 1
+        assert collector.REMAINS_READY_DELAY in sleeps
+
+    def test_429_penalizes_key(self, sleeps, pacer):
+        collector = make_collector(pacer, {
+            "supplier/orders": FakeResponse([], status=429, headers={"Retry-After": "30"}),
+        })
+
+        assert asyncio.run(collector.get_supplier_orders("2025-01-01")) == []
+        pacer.penalize.assert_awaited_once_with("key-a", "statistics", 30.0)
+
+    def test_no_products_skips_other_endpoints(self, sleeps, pacer):
+        collector = make_collector(pacer, {"sales-funnel": FakeResponse({"data": {"products": []}})})
+
+        assert asyncio.run(collector.collect_complete_data("2025-01-01", "2025-01-07")) == []
+        assert len(collector.session.requests) == 1
@@ -87,48 +87,48 @@ class TestCeleryTasks:
 class TestWebhookDispatcher:
     """Test webhook notification system"""
     
-    @patch("requests.post")
-    def test_dispatch_webhook_success(self, mock_post, db_session, test_tenant):
-        """Test successful webhook dispatch"""
-        from stock_tracker.services.webhook_dispatcher import dispatch_webhook
-        from stock_tracker.db.models import WebhookConfig
+    def test_enqueue_webhook_queues_delivery(self, db_session, test_tenant):
+        """Test webhook is queued in the outbox for subscribed endpoints"""
+        from stock_tracker.services.webhook_dispatcher import enqueue_webhook
+        from stock_tracker.database.models import WebhookConfig, WebhookDelivery
         
         # Create webhook config
         webhook = WebhookConfig(
             tenant_id=test_tenant.id,
             url="https://example.com/webhook",
+            secret="s3cret",
             events=["sync_completed"],
             is_active=True
         )
         db_session.add(webhook)
         db_session.commit()
         
-        # Mock successful response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
-        
-        # Dispatch webhook
-        result = dispatch_webhook(
+        # Queue webhook
+        queued = enqueue_webhook(
             tenant=test_tenant,
             event_type="sync_completed",
             data={"products_synced": 10},
             db_session=db_session
         )
         
-        assert result is True
-        assert mock_post.called
+        assert queued == 1
+        delivery = db_session.query(WebhookDelivery).filter_by(webhook_config_id=webhook.id).one()
+        assert delivery.status == "pending"
+        assert delivery.attempts == 0
     
-    @patch("requests.post")
-    def test_dispatch_webhook_failure(self, mock_post, db_session, test_tenant):
-        """Test webhook dispatch failure handling"""
-        from stock_tracker.services.webhook_dispatcher import dispatch_webhook
-        from stock_tracker.db.models import WebhookConfig
+    @patch("stock_tracker.services.webhook_dispatcher.WebhookSender.send")
+    def test_deliver_pending_webhooks_failure(self, mock_send, db_session, test_tenant):
+        """Test failed delivery is rescheduled with backoff"""
+        from stock_tracker.services.webhook_dispatcher import (
+            DeliveryResult, deliver_pending_webhooks, enqueue_webhook
+        )
+        from stock_tracker.database.models import WebhookConfig, WebhookDelivery
         
         # Create webhook config
         webhook = WebhookConfig(
             tenant_id=test_tenant.id,
             url="https://example.com/webhook",
+            secret="s3cret",
             events=["sync_completed"],
             is_active=True,
             failure_count=0
@@ -136,43 +136,18 @@ class TestWebhookDispatcher:
         db_session.add(webhook)
         db_session.commit()
         
-        # Mock failed response
-        mock_post.side_effect = Exception("Connection error")
-        
-        # Dispatch webhook
-        result = dispatch_webhook(
-            tenant=test_tenant,
-            event_type="sync_completed",
-            data={"products_synced": 10},
-            db_session=db_session
-        )
+        enqueue_webhook(test_tenant, "sync_completed", {"products_synced": 10}, db_session)
         
-        assert result is False
+        # Mock failed request
+        mock_send.return_value = DeliveryResult(ok=False, error="Connection error")
         
-        # Check failure count incremented
-        db_session.refresh(webhook)
-        assert webhook.failure_count > 0
-    
-    @patch("requests.post")
-    def test_telegram_notification(self, mock_post):
-        """Test Telegram notification sending"""
-        from stock_tracker.services.webhook_dispatcher import send_telegram_notification
-        
-        # Mock successful response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"ok": True}
-        mock_post.return_value = mock_response
-        
-        # Send notification
-        result = send_telegram_notification(
-            chat_id="123456789",
-            message="Test message",
-            bot_token="test_token"
-        )
+        stats = deliver_pending_webhooks(db_session)
         
-        assert result is True
-        assert mock_post.called
+        assert stats["retried"] == 1
+        delivery = db_session.query(WebhookDelivery).filter_by(webhook_config_id=webhook.id).one()
+        assert delivery.status == "pending"
+        assert delivery.attempts == 1
+        assert delivery.last_error == "Connection error"
 
 
 class TestRateLimiter:
@@ -105,7 +105,7 @@ class TestSyncTenantProductsTask:
         assert test_tenant.last_sync > old_last_sync if old_last_sync else True
     
     @patch("stock_tracker.workers.tasks.SyncService")
-    @patch("stock_tracker.workers.tasks.dispatch_webhook")
+    @patch("stock_tracker.workers.tasks.enqueue_webhook")
     def test_sync_task_triggers_webhook(self, mock_webhook, mock_sync_service, db_session, test_tenant):
         """Test that successful sync triggers webhook notification"""
         from stock_tracker.workers.tasks import sync_tenant_products
@@ -122,8 +122,9 @@ class TestSyncTenantProductsTask:
         # Execute task
         sync_tenant_products(str(test_tenant.id))
         
-        # Verify webhook was called
-        mock_webhook.assert_called_once()
+        # Verify sync_completed webhook was queued
+        events = [call.kwargs["event_type"] for call in mock_webhook.call_args_list]
+        assert events == ["sync_started", "sync_completed"]
 
 
 class TestScheduleTenantSyncsTask:
@@ -11,7 +11,10 @@ import pytest
 from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime
 
-from stock_tracker.services.google_sheets_service import GoogleSheetsService
+from stock_tracker.services.google_sheets_service import (
+    GoogleSheetsService,
+    GridFingerprint
+)
 from stock_tracker.database.models import Tenant, Product
 
 
@@ -39,6 +42,20 @@ def mock_worksheet():
     return worksheet
 
 
+@pytest.fixture
+def fingerprint_cache():
+    """Кэш отпечатков листа в памяти вместо Redis."""
+    storage = {}
+    cache = MagicMock()
+    cache.get.side_effect = lambda tenant_id, key: storage.get((tenant_id, key))
+    cache.set.side_effect = lambda tenant_id, key, value, ttl=None, track=True: storage.__setitem__((tenant_id, key), value)
+    cache.delete.side_effect = lambda tenant_id, key: storage.pop((tenant_id, key), None) is not None
+    cache.acquire_lock.return_value = "lock-token"
+    cache.remote = cache
+    with patch("stock_tracker.services.google_sheets_service.get_cache", return_value=cache):
+        yield cache
+
+
 @pytest.fixture
 def sample_products():
     """Создать примеры продуктов с данными по складам."""
@@ -276,5 +293,117 @@ class TestBorderCalculations:
         assert len(borders) == len(warehouses) - 1
 
 
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
+class TestIncrementalSync:
+    """Тесты инкрементальной записи в лист."""
+    
+    def test_changed_blocks(self):
+        """Соседние изменённые строки объединяются, строка переписывается целиком."""
+        old = GridFingerprint.from_grid([], [["h"] * 5, ["h"] * 5, [1, 2, 3, 4, 5], [1, 2, 3, 4, 5], [1, 2, 3, 4, 5]])
+        new = GridFingerprint.from_grid([], [["h"] * 5, ["h"] * 5, [1, 9, 3, 4, 5], [1, 2, 3, 9, 5], [1, 2, 3, 4, 5], [7, 7, 7, 7, 7]])
+        
+        assert old.changed_blocks(new) == [(2, 4, 0, 5), (5, 6, 0, 5)]
+        assert new.changed_blocks(new) == []
+    
+    def test_cell_type_is_part_of_fingerprint(self):
+        """Число и строка с тем же текстом пишутся в лист по-разному."""
+        assert GridFingerprint.hash_row([5]) != GridFingerprint.hash_row(["5"])
+    
+    def test_fingerprint_round_trip(self):
+        """Отпечаток переживает сериализацию для Redis."""
+        fingerprint = GridFingerprint.from_grid(["Коледино"], [["h"] * 5, ["h"] * 5, ["b", "n", "a", 123456, 5]])
+        
+        assert GridFingerprint.from_dict(fingerprint.to_dict()) == fingerprint
+    
+    def test_matches_sheet_nm_id_column(self):
+        """Колонка nmId, прочитанная из листа, сверяется с отпечатком."""
+        fingerprint = GridFingerprint.from_grid([], [["h"] * 5, ["h"] * 5, ["b", "n", "a", 1, 5], ["b", "n", "a", 2, 5]])
+        
+        assert fingerprint.matches_sheet([1.0, 2])
+        assert not fingerprint.matches_sheet([2, 1])
+        assert not fingerprint.matches_sheet([1])
+    
+    def _sync(self, service, spreadsheet, products):
+        with patch.object(service, "_get_spreadsheet", return_value=spreadsheet), \
+                patch.object(service, "_check_spreadsheet_permissions", return_value=True):
+            return service.sync_products_to_sheet(products, Mock(), incremental=True)
+    
+    def _spreadsheet(self, worksheet, products):
+        spreadsheet = Mock()
+        spreadsheet.id = "test-sheet-id"
+        spreadsheet.worksheet.return_value = worksheet
+        worksheet.col_values.return_value = ["h", "h"] + [product.nm_id for product in products]
+        return spreadsheet
+    
+    def test_incremental_sync_sends_only_changes(self, mock_tenant, mock_worksheet, sample_products, fingerprint_cache):
+        """Вторая синхронизация отправляет только изменённые строки без форматирования."""
+        spreadsheet = self._spreadsheet(mock_worksheet, sample_products)
+        service = GoogleSheetsService(mock_tenant)
+        
+        first = self._sync(service, spreadsheet, sample_products)
+        assert first["performance"]["mode"] == "full"
+        
+        # Ничего не изменилось - в API ничего не отправляется
+        spreadsheet.batch_update.reset_mock()
+        unchanged = self._sync(service, spreadsheet, sample_products)
+        assert unchanged["performance"]["mode"] == "incremental"
+        spreadsheet.batch_update.assert_not_called()
+        
+        sample_products[1].total_stock = 151
+        changed = self._sync(service, spreadsheet, sample_products)
+        
+        requests = spreadsheet.batch_update.call_args[0][0]["requests"]
+        assert changed["performance"]["changed_ranges"] == 1
+        assert len(requests) == 1
+        assert requests[0]["updateCells"]["range"]["startRowIndex"] == 3
+        assert requests[0]["updateCells"]["range"]["startColumnIndex"] == 0
+        assert fingerprint_cache.release_lock.call_count == 3
+    
+    def test_fingerprint_is_shared_between_services(self, mock_tenant, mock_worksheet, sample_products, fingerprint_cache):
+        """Отпечаток, записанный одним воркером, используется другим."""
+        spreadsheet = self._spreadsheet(mock_worksheet, sample_products)
+        
+        self._sync(GoogleSheetsService(mock_tenant), spreadsheet, sample_products)
+        result = self._sync(GoogleSheetsService(mock_tenant), spreadsheet, sample_products)
+        
+        assert result["performance"]["mode"] == "incremental"
+    
+    def test_sheet_mismatch_forces_full_rewrite(self, mock_tenant, mock_worksheet, sample_products, fingerprint_cache):
+        """Строки, удалённые из листа вручную, - лист переписывается полностью."""
+        spreadsheet = self._spreadsheet(mock_worksheet, sample_products)
+        service = GoogleSheetsService(mock_tenant)
+        
+        self._sync(service, spreadsheet, sample_products)
+        
+        mock_worksheet.col_values.return_value = ["h", "h", sample_products[0].nm_id]
+        result = self._sync(service, spreadsheet, sample_products)
+        
+        assert result["performance"]["mode"] == "full"
+    
+    def test_concurrent_write_forces_full_rewrite(self, mock_tenant, mock_worksheet, sample_products, fingerprint_cache):
+        """Лист пишет другой процесс - отпечаток не используется и сбрасывается."""
+        spreadsheet = self._spreadsheet(mock_worksheet, sample_products)
+        service = GoogleSheetsService(mock_tenant)
+        
+        self._sync(service, spreadsheet, sample_products)
+        
+        fingerprint_cache.acquire_lock.return_value = None
+        result = self._sync(service, spreadsheet, sample_products)
+        
+        assert result["performance"]["mode"] == "full"
+        fingerprint_cache.delete.assert_called()
+        fingerprint_cache.release_lock.assert_called_once()
+    
+    def test_layout_change_forces_full_rewrite(self, mock_tenant, mock_worksheet, sample_products, fingerprint_cache):
+        """Новый склад меняет раскладку колонок - лист переписывается полностью."""
+        spreadsheet = self._spreadsheet(mock_worksheet, sample_products)
+        service = GoogleSheetsService(mock_tenant)
+        
+        self._sync(service, spreadsheet, sample_products)
+        
+        sample_products[1].warehouse_data["warehouses"].append({"name": "Казань", "stock": 1, "orders": 1})
+        service._warehouse_names_cache = None
+        result = self._sync(service, spreadsheet, sample_products)
+        
+        requests = spreadsheet.batch_update.call_args[0][0]["requests"]
+        assert result["performance"]["mode"] == "full"
+        assert any("mergeCells" in request for request in requests)
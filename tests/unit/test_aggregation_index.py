@@ -0,0 +1,220 @@
+"""
+Unit tests for AggregationIndex
+"""
+import random
+
+import pytest
+
+from stock_tracker.api.products import group_orders_by_product, group_warehouse_by_product
+from stock_tracker.core.calculator import AggregationIndex, WildberriesCalculator, TurnoverCalculator
+from stock_tracker.core.columnar import ColumnarFeeds, is_columnar_available
+from stock_tracker.core.models import Product
+
+
+WAREHOUSES = ["Коледино", "Подольск", "Казань", "Маркетплейс", " Электросталь "]
+
+
+@pytest.fixture
+def api_data():
+    """Generate random remains and orders feeds"""
+    rng = random.Random(42)
+    nm_ids = list(range(1000, 1040))
+
+    remains = []
+    for nm_id in nm_ids:
+        remains.append({
+            "nmId": nm_id,
+            "vendorCode": f"ART-{nm_id}",
+            "warehouses": [
+                {"warehouseName": name, "quantity": rng.randint(0, 50)}
+                for name in rng.sample(WAREHOUSES, 3)
+            ]
+        })
+    # Same product split across two records
+    remains.append({
+        "nmId": nm_ids[0],
+        "vendorCode": f"ART-{nm_ids[0]}",
+        "warehouses": [{"warehouseName": "Коледино", "quantity": 7}]
+    })
+
+    orders = [
+        {
+            "nmId": rng.choice(nm_ids),
+            "supplierArticle": "ART",
+            "warehouseName": rng.choice(WAREHOUSES),
+            "isCancel": rng.random() < 0.2,
+        }
+        for _ in range(500)
+    ]
+    for i, order in enumerate(orders):
+        order["supplierArticle"] = f"ART-{order['nmId']}"
+        order["date"] = f"2025-10-{1 + i % 28:02d}T10:00:00"
+
+    return remains, orders, nm_ids
+
+
+class TestAggregationIndex:
+    """Index results must match the reference per-product scans"""
+
+    def test_matches_reference_calculations(self, api_data):
+        """Every per-product and per-warehouse total matches"""
+        remains, orders, nm_ids = api_data
+        index = AggregationIndex(remains, orders)
+
+        for nm_id in nm_ids + [999999]:
+            assert index.total_stock(nm_id) == WildberriesCalculator.calculate_total_stock(remains, nm_id)
+            assert index.total_orders(nm_id) == WildberriesCalculator.calculate_total_orders(orders, nm_id)
+
+            for name in WAREHOUSES + ["Коледино ", "Нет такого"]:
+                assert index.warehouse_stock(nm_id, name) == \
+                    WildberriesCalculator.calculate_warehouse_stock(remains, nm_id, name)
+                assert index.warehouse_orders(nm_id, name) == \
+                    WildberriesCalculator.calculate_warehouse_orders(orders, nm_id, name)
+
+    def test_article_orders_exclude_canceled(self, api_data):
+        """Article counts only include non-canceled orders"""
+        _, orders, nm_ids = api_data
+        index = AggregationIndex(orders_data=orders)
+
+        for nm_id in nm_ids:
+            expected = sum(
+                1 for order in orders
+                if order["nmId"] == nm_id and not order["isCancel"]
+            )
+            assert index.article_orders(f"ART-{nm_id}", nm_id) == expected
+
+    def test_warehouse_totals(self, api_data):
+        """Cross-product warehouse totals add up to product totals"""
+        remains, orders, _ = api_data
+        index = AggregationIndex(remains, orders)
+
+        totals = index.warehouse_totals()
+
+        assert sum(t["total_stock"] for t in totals.values()) == \
+            sum(index.total_stock_by_product.values())
+        assert sum(t["total_orders"] for t in totals.values()) == \
+            sum(1 for order in orders if not order["isCancel"])
+
+    def test_product_warehouses(self):
+        """Warehouses with orders but no stock are included"""
+        index = AggregationIndex(
+            [{"nmId": 1, "warehouses": [{"warehouseName": "Казань", "quantity": 5}]}],
+            [{"nmId": 1, "warehouseName": "Коледино", "supplierArticle": "A"}]
+        )
+
+        assert index.product_warehouses(1) == {
+            "Казань": {"stock": 5, "orders": 0},
+            "Коледино": {"stock": 0, "orders": 1},
+        }
+        assert index.product_warehouses(2) == {}
+
+
+@pytest.mark.skipif(not is_columnar_available(), reason="numpy not installed")
+class TestColumnarBackend:
+    """Columnar mode must give the same results as the Python pass"""
+
+    def test_totals_for_matches_index(self, api_data):
+        """Batch lookups from typed arrays equal the dict-based index"""
+        remains, orders, nm_ids = api_data
+        index = AggregationIndex(remains, orders)
+        lookup = nm_ids + [999999]
+
+        total_orders, total_stock = ColumnarFeeds(remains, orders).totals_for(lookup)
+
+        assert total_orders.tolist() == [index.total_orders(nm_id) for nm_id in lookup]
+        assert total_stock.tolist() == [index.total_stock(nm_id) for nm_id in lookup]
+        assert ColumnarFeeds().totals_for([1, 2])[0].tolist() == [0, 0]
+
+    def test_product_totals(self, api_data):
+        """Vectorised per-product totals and turnover"""
+        remains, orders, nm_ids = api_data
+        index = AggregationIndex(remains, orders)
+
+        totals = ColumnarFeeds(remains, orders).product_totals()
+
+        for nm_id in nm_ids:
+            assert totals[nm_id]["total_stock"] == index.total_stock(nm_id)
+            assert totals[nm_id]["total_orders"] == index.total_orders(nm_id)
+            assert totals[nm_id]["turnover"] == pytest.approx(
+                TurnoverCalculator.calculate_turnover(index.total_orders(nm_id), index.total_stock(nm_id))
+            )
+
+    def test_turnover_batch(self):
+        """Columnar turnover batch matches the per-product loop"""
+        products = [
+            Product(wildberries_article=i + 1, total_orders=orders, total_stock=stock)
+            for i, (orders, stock) in enumerate([(10, 3), (0, 5), (7, 0), (1, 1)])
+        ]
+
+        expected = TurnoverCalculator.calculate_turnover_batch(products)
+        assert TurnoverCalculator.calculate_turnover_batch(products, columnar=True) == pytest.approx(expected)
+
+    def test_warehouse_totals_match_python(self, api_data):
+        """Sparse per-warehouse totals equal the dict-based ones"""
+        remains, orders, _ = api_data
+
+        columnar = ColumnarFeeds(remains, orders).warehouse_totals()
+        python = AggregationIndex(remains, orders).warehouse_totals()
+
+        assert {name: (t["total_stock"], t["total_orders"]) for name, t in columnar.items()} == {
+            name: (t["total_stock"], t["total_orders"]) for name, t in python.items()
+        }
+
+    def test_sparse_group_by(self):
+        """(nmId, warehouse) results hold only pairs present in the feeds"""
+        remains = [{"nmId": nm_id, "warehouses": [{"warehouseName": f"WH-{nm_id}", "quantity": 1}]}
+                   for nm_id in range(200)]
+        feeds = ColumnarFeeds(remains, [])
+
+        keys, stock = feeds.remains.warehouse_stock()
+
+        assert len(keys) == len(stock) == 200
+        assert feeds.warehouse_totals()["WH-5"] == {"total_stock": 1, "total_orders": 0, "product_count": 1}
+
+    @pytest.mark.parametrize("flag", ["true", "false"])
+    def test_batch_totals_follow_config_flag(self, api_data, monkeypatch, flag):
+        """Sync pipelines pick the backend from WB_COLUMNAR_PROCESSING"""
+        from stock_tracker.core import calculator
+        from stock_tracker.core.calculator import AutomaticAggregator
+
+        remains, orders, nm_ids = api_data
+        monkeypatch.setenv("WB_COLUMNAR_PROCESSING", flag)
+        built = []
+        original = calculator.ColumnarFeeds
+
+        def spy(*args, **kwargs):
+            built.append(True)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(calculator, "ColumnarFeeds", spy)
+        aggregator = AutomaticAggregator()
+
+        products = aggregator.calculate_products_totals_automatic(
+            [Product(wildberries_article=nm_id) for nm_id in nm_ids], orders, remains
+        )
+        expected = [
+            aggregator.calculate_product_totals_automatic(Product(wildberries_article=nm_id), orders, remains)
+            for nm_id in nm_ids
+        ]
+
+        assert built == ([True] if flag == "true" else [])
+        assert [(p.total_orders, p.total_stock, p.turnover) for p in products] == [
+            (p.total_orders, p.total_stock, pytest.approx(p.turnover)) for p in expected
+        ]
+
+    @pytest.mark.parametrize("group", [group_orders_by_product, group_warehouse_by_product])
+    def test_group_by_product_matches_python(self, api_data, group):
+        """Columnar (supplierArticle, nmId) grouping keeps group and record order"""
+        _, orders, _ = api_data
+        records = orders + [
+            {"supplierArticle": None, "nmId": 1000},
+            {"supplierArticle": "ART-X", "nmId": 0},
+            {"supplierArticle": "ART-1000", "nmId": 1000, "warehouseName": "Казань"},
+        ]
+
+        columnar = group(records, columnar=True)
+        python = group(records, columnar=False)
+
+        assert list(columnar) == list(python)
+        assert columnar == python
+        assert group([], columnar=True) == {}
@@ -0,0 +1,141 @@
+"""
+Unit tests for AnalyticsService database-side aggregates
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+from stock_tracker.database.models import Tenant
+from stock_tracker.services.analytics_service import AnalyticsService
+
+
+@pytest.fixture
+def service():
+    """AnalyticsService on an unbound session; queries are intercepted"""
+    tenant = MagicMock(spec=Tenant)
+    tenant.id = "3eb1c21d-3538-4cab-a98a-9894460e2c4d"
+    tenant.name = "Test Company"
+    return AnalyticsService(tenant=tenant, db_session=Session())
+
+
+def capture(rows):
+    """Replace Query execution, recording compiled PostgreSQL SQL"""
+    statements = []
+
+    def execute(query, *args):
+        statements.append(str(query.statement.compile(dialect=postgresql.dialect())))
+        return rows
+
+    return statements, execute
+
+
+class TestAnalyticsAggregates:
+    """Aggregates are computed by a single SQL statement each"""
+
+    def test_stock_distribution_single_group_by(self, service):
+        """Buckets come from one CASE ... GROUP BY, missing buckets are zero"""
+        statements, execute = capture([("critical", 3), ("excellent", 7)])
+
+        with patch.object(Query, "all", autospec=True, side_effect=execute):
+            distribution = service.get_stock_distribution()
+
+        assert len(statements) == 1
+        assert "CASE WHEN" in statements[0]
+        assert "GROUP BY bucket" in statements[0]
+        assert distribution == {
+            "out_of_stock": 0,
+            "critical": 3,
+            "low": 0,
+            "medium": 0,
+            "good": 0,
+            "excellent": 7,
+        }
+
+    def test_warehouse_breakdown_reads_rollup(self, service):
+        """Breakdown is served from tenant_warehouse_stats when populated"""
+        statements, execute = capture([
+            SimpleNamespace(warehouse_name="Коледино", total_stock=40, total_orders=12,
+                            product_count=2, turnover_days=23.3),
+        ])
+
+        with patch.object(Query, "all", autospec=True, side_effect=execute), \
+                patch.object(Session, "execute") as session_execute:
+            breakdown = service.get_warehouse_breakdown()
+
+        assert len(statements) == 1
+        assert "FROM tenant_warehouse_stats" in statements[0]
+        session_execute.assert_not_called()
+        assert breakdown == [
+            {"warehouse_name": "Коледино", "total_stock": 40, "total_orders": 12,
+             "product_count": 2, "turnover_days": 23.3},
+        ]
+
+    def test_warehouse_breakdown_falls_back_to_jsonb_array_elements(self, service):
+        """Without rollup rows warehouse entries are expanded and summed in the database"""
+        statements = []
+        result = MagicMock()
+        result.all.return_value = [
+            SimpleNamespace(warehouse_name="Коледино", total_stock=40, total_orders=12,
+                            product_count=2, turnover_days=23.3),
+            SimpleNamespace(warehouse_name="Казань", total_stock=None, total_orders=3,
+                            product_count=1, turnover_days=None),
+        ]
+
+        def execute(statement, *args, **kwargs):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return result
+
+        with patch.object(Query, "all", autospec=True, return_value=[]), \
+                patch.object(Session, "execute", side_effect=execute):
+            breakdown = service.get_warehouse_breakdown()
+
+        assert len(statements) == 1
+        assert "JOIN jsonb_array_elements(" in statements[0]
+        assert "count(DISTINCT products.id)" in statements[0]
+        assert breakdown == [
+            {"warehouse_name": "Коледино", "total_stock": 40, "total_orders": 12,
+             "product_count": 2, "turnover_days": 23.3},
+            {"warehouse_name": "Казань", "total_stock": 0, "total_orders": 3,
+             "product_count": 1, "turnover_days": 0.0},
+        ]
+
+    def test_refresh_warehouse_stats_is_incremental(self, service):
+        """Refresh upserts only changed rows and removes vanished warehouses"""
+        statements = []
+
+        def execute(statement, *args, **kwargs):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return SimpleNamespace(rowcount=2 if len(statements) == 1 else 1)
+
+        with patch.object(Session, "execute", side_effect=execute):
+            result = service.refresh_warehouse_stats()
+
+        assert len(statements) == 2
+        upsert, cleanup = statements
+        assert "INSERT INTO tenant_warehouse_stats" in upsert
+        assert "ON CONFLICT (tenant_id, warehouse_name) DO UPDATE" in upsert
+        assert "IS DISTINCT FROM" in upsert
+        assert cleanup.startswith("DELETE FROM tenant_warehouse_stats")
+        assert "NOT IN" in cleanup
+        assert result == {"upserted": 2, "deleted": 1}
+
+    def test_dashboard_summary_single_aggregate(self, service):
+        """Product metrics come from one query with FILTER clauses"""
+        statements, execute = capture(SimpleNamespace(
+            total_products=4, total_stock=30, total_orders=8,
+            low_stock_count=1, out_of_stock_count=1
+        ))
+
+        with patch.object(Query, "one", autospec=True, side_effect=execute), \
+                patch.object(Query, "first", autospec=True, return_value=None):
+            summary = service.get_dashboard_summary()
+
+        assert len(statements) == 1
+        assert statements[0].count("FILTER (WHERE") == 2
+        assert summary["total_products"] == 4
+        assert summary["average_stock_per_product"] == 7.5
+        assert summary["health_score"] == 50.0
+        assert summary["last_sync"] is None
@@ -0,0 +1,65 @@
+"""
+Unit tests for the async database session layer
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from stock_tracker.api.routes.products import list_products
+from stock_tracker.database.connection import get_async_database_url
+
+
+class TestAsyncDatabaseUrl:
+    """DATABASE_URL is converted to the asyncpg driver"""
+
+    @pytest.mark.parametrize("url,expected", [
+        ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+        ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+        ("postgresql+asyncpg://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+        ("sqlite:///test.db", "sqlite:///test.db"),
+    ])
+    def test_driver_conversion(self, url, expected):
+        assert get_async_database_url(url) == expected
+
+
+class TestAsyncProductRoutes:
+    """Product routes await the AsyncSession instead of blocking"""
+
+    def test_list_products_counts_and_pages(self):
+        """Total is counted on the filtered query, page is fetched with LIMIT/OFFSET"""
+        statements = []
+        product = SimpleNamespace(
+            id="p1", marketplace_article="123", seller_article="ART", product_name="Item",
+            total_stock=5, total_orders=2, in_way_to_client=0, in_way_from_client=0, updated_at=None
+        )
+
+        async def scalar(statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return 51
+
+        async def scalars(statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return MagicMock(all=MagicMock(return_value=[product]))
+
+        db = MagicMock()
+        db.scalar = AsyncMock(side_effect=scalar)
+        db.scalars = AsyncMock(side_effect=scalars)
+
+        response = asyncio.run(list_products(
+            page=2, page_size=25, search="ART", min_stock=None, max_stock=None,
+            low_stock_only=True, sort_by="total_stock", sort_order="desc",
+            tenant=SimpleNamespace(id="t1"), user=SimpleNamespace(id="u1"), db=db
+        ))
+
+        count_sql, page_sql = statements
+        assert count_sql.startswith("SELECT count(*)")
+        assert "ORDER BY" not in count_sql
+        assert "products.total_stock <" in count_sql
+        assert "ORDER BY products.total_stock DESC" in page_sql
+        assert "LIMIT" in page_sql and "OFFSET" in page_sql
+        assert response.total == 51
+        assert response.total_pages == 3
+        assert [item.id for item in response.items] == ["p1"]
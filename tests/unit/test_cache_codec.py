@@ -0,0 +1,83 @@
+"""
+Unit tests for cache value codecs
+"""
+import json
+
+import pytest
+
+from stock_tracker.cache import codec as codec_module
+from stock_tracker.cache.codec import CacheCodec, CodecError, FORMAT_VERSION
+
+
+PAYLOAD = {
+    "products": [{"nmId": i, "name": f"Товар {i}", "stock": i * 3} for i in range(200)],
+    "total": 600,
+}
+
+
+def available_codecs():
+    """All serializer/compression pairs installed here"""
+    serializers = ["json"]
+    if codec_module.ORJSON_AVAILABLE:
+        serializers.append("orjson")
+    if codec_module.MSGPACK_AVAILABLE:
+        serializers.append("msgpack")
+
+    compressions = ["none", "zlib"]
+    if codec_module.ZSTD_AVAILABLE:
+        compressions.append("zstd")
+    if codec_module.LZ4_AVAILABLE:
+        compressions.append("lz4")
+
+    return [(s, c) for s in serializers for c in compressions]
+
+
+class TestCacheCodec:
+    """Encoded entries are versioned and round-trip"""
+
+    @pytest.mark.parametrize("serializer,compression", available_codecs())
+    def test_round_trip(self, serializer, compression):
+        codec = CacheCodec(serializer, compression, compress_min_bytes=256)
+
+        data = codec.encode(PAYLOAD)
+
+        assert data[0] == FORMAT_VERSION
+        assert codec.decode(data) == PAYLOAD
+        if compression != "none":
+            assert len(data) < len(json.dumps(PAYLOAD).encode())
+
+    def test_small_values_not_compressed(self):
+        codec = CacheCodec("json", "zlib", compress_min_bytes=1024)
+
+        data = codec.encode({"a": 1})
+
+        assert data[2] == 0
+        assert codec.decode(data) == {"a": 1}
+
+    def test_legacy_json_entries_decode(self):
+        codec = CacheCodec("json", "zlib")
+
+        assert codec.decode(json.dumps(PAYLOAD)) == PAYLOAD
+        assert codec.decode(json.dumps([1, 2]).encode()) == [1, 2]
+
+    def test_decodes_entries_written_with_other_settings(self):
+        writer = CacheCodec("json", "zlib", compress_min_bytes=0)
+        reader = CacheCodec("json", "none")
+
+        assert reader.decode(writer.encode(PAYLOAD)) == PAYLOAD
+
+    def test_errors(self):
+        codec = CacheCodec("json")
+
+        with pytest.raises(CodecError):
+            codec.encode({"value": object()})
+        with pytest.raises(CodecError):
+            codec.decode(b"\x01\x00")
+        with pytest.raises(CodecError):
+            codec.decode(b"\x01\x09\x00{}")
+
+    def test_unknown_settings_rejected(self):
+        with pytest.raises(ValueError):
+            CacheCodec("pickle")
+        with pytest.raises(ValueError):
+            CacheCodec("json", "brotli")
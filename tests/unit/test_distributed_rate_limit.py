@@ -0,0 +1,119 @@
+"""
+Unit tests for the cluster-wide WB rate limiter
+"""
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from stock_tracker.utils import rate_limiting
+from stock_tracker.utils.distributed_rate_limit import DistributedRateLimiter, api_key_id
+from stock_tracker.utils.exceptions import RateLimitError
+from stock_tracker.utils.rate_limiting import (
+    RateLimiter,
+    configure_wildberries_rate_limits,
+    rate_limited,
+)
+
+
+@pytest.fixture
+def redis_client():
+    """Redis client mock: register_script returns one mock per script"""
+    client = MagicMock()
+    client.register_script.side_effect = lambda script: MagicMock(return_value=[1, 0])
+    return client
+
+
+@pytest.fixture
+def distributed(redis_client):
+    return DistributedRateLimiter(redis_client)
+
+
+@pytest.fixture
+def limiter(distributed, monkeypatch):
+    limiter = RateLimiter(configure_wildberries_rate_limits(), distributed=distributed)
+    monkeypatch.setattr(rate_limiting, "_rate_limiter", limiter)
+    return limiter
+
+
+class TestDistributedRateLimiter:
+    """GCRA slots are reserved atomically per key hash and group"""
+
+    def test_reserve_slot(self, distributed):
+        distributed._reserve.return_value = [1, 1500]
+
+        wait = distributed.reserve("secret-key", "analytics", requests_per_minute=3)
+
+        assert wait == 1.5
+        distributed._reserve.assert_called_once_with(
+            keys=[f"ratelimit:wb:{api_key_id('secret-key')}:analytics"],
+            args=[20000, 0, 300000]
+        )
+        assert "secret-key" not in distributed._reserve.call_args.kwargs["keys"][0]
+
+    def test_wait_beyond_timeout_is_rejected(self, distributed):
+        distributed._reserve.return_value = [0, 400000]
+
+        with pytest.raises(RateLimitError):
+            distributed.reserve("secret-key", "analytics", requests_per_minute=3, max_wait=300)
+
+
+class TestRateLimiterIntegration:
+    """Calls with an API key use the shared budget of their endpoint group"""
+
+    def test_keyed_calls_use_group_budget(self, limiter, distributed):
+        asyncio.run(limiter.acquire("/api/v1/supplier/orders", api_key="k1"))
+
+        args = distributed._reserve.call_args.kwargs
+        assert args["keys"][0].endswith(":statistics")
+        assert args["args"][0] == 60000  # 1 req/min
+        assert limiter.endpoint_buckets == {}
+        assert limiter.stats["distributed_requests"] == 1
+
+    def test_redis_failure_falls_back_to_local_buckets(self, limiter, distributed):
+        distributed._reserve.side_effect = ConnectionError("redis down")
+
+        asyncio.run(limiter.acquire("/api/v2/stocks-report/products/products", api_key="k1"))
+
+        assert "/api/v2/stocks-report/products/products" in limiter.endpoint_buckets
+        assert limiter.stats["distributed_requests"] == 0
+
+    def test_decorator_shares_429_with_cluster(self, limiter, distributed):
+        class Client:
+            api_key = "k1"
+
+            @rate_limited("/api/v2/stocks-report/products/products")
+            async def fetch(self):
+                raise RateLimitError("API rate limit exceeded", retry_after=42)
+
+        with pytest.raises(RateLimitError):
+            asyncio.run(Client().fetch())
+
+        distributed._penalize.assert_called_once_with(
+            keys=[f"ratelimit:wb:{api_key_id('k1')}:analytics"],
+            args=[42000]
+        )
+        assert distributed._reserve.call_args.kwargs["keys"][0].endswith(":analytics")
+
+    def test_remains_polling_has_own_group(self, limiter, distributed):
+        asyncio.run(limiter.acquire("/api/v1/warehouse_remains/tasks", api_key="k1"))
+        asyncio.run(limiter.acquire("/api/v2/stocks-report/products/products", api_key="k1"))
+
+        groups = [c.kwargs["keys"][0].rsplit(":", 1)[1] for c in distributed._reserve.call_args_list]
+        assert groups == ["warehouse_remains", "analytics"]
+
+    def test_reserve_runs_off_event_loop(self, limiter, distributed):
+        import threading
+
+        threads = []
+        distributed._reserve.side_effect = lambda **kwargs: threads.append(threading.get_ident()) or [1, 0]
+
+        async def acquire():
+            await limiter.acquire("/api/v1/supplier/orders", api_key="k1")
+            await distributed.acquire("k1", "statistics", requests_per_minute=1)
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(acquire())
+
+        assert len(threads) == 2
+        assert loop_thread not in threads
@@ -0,0 +1,151 @@
+"""
+Unit tests for streamed JSON array parsing
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from stock_tracker.api import client as client_module
+from stock_tracker.api.client import RemainsTaskTimings, WildberriesAPIClient
+from stock_tracker.utils import rate_limiting
+from stock_tracker.utils.exceptions import AuthenticationError, WildberriesAPIError
+from stock_tracker.utils.json_stream import JSONArrayStreamParser
+
+
+RECORDS = [
+    {"nmId": 1, "vendorCode": "A-[1]", "warehouses": [{"warehouseName": "Коледино", "quantity": 3}]},
+    {"nmId": 2, "vendorCode": "quote \" and \\ ,]}", "warehouses": []},
+    12345,
+    -0.5,
+    True,
+    None,
+    "строка",
+]
+
+
+def parse_in_chunks(body: bytes, size: int):
+    parser = JSONArrayStreamParser()
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(parser.feed(body[start:start + size]))
+    items.extend(parser.close())
+    return items
+
+
+class TestJSONArrayStreamParser:
+    """Elements are returned as soon as they are complete"""
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+    def test_any_chunk_boundary(self, size):
+        body = json.dumps(RECORDS, ensure_ascii=False, indent=1).encode("utf-8")
+
+        assert parse_in_chunks(body, size) == RECORDS
+
+    def test_elements_are_not_held_back(self):
+        parser = JSONArrayStreamParser()
+
+        assert parser.feed(b'[{"nmId": 1}, {"nmId"') == [{"nmId": 1}]
+        assert parser.feed(b': 2}, 12') == [{"nmId": 2}]
+        assert parser.feed(b"3]") == [123]
+        assert parser.close() == []
+
+    def test_empty_array(self):
+        assert parse_in_chunks(b" [ ] ", 1) == []
+
+    @pytest.mark.parametrize("body", [b'{"error": "bad"}', b'[{"nmId": 1}', b'[1 2]', b'[1] []'])
+    def test_malformed_body(self, body):
+        with pytest.raises(ValueError):
+            parse_in_chunks(body, 4)
+
+
+class TestClientStreaming:
+    """Client yields records of streamed responses"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock()
+        monkeypatch.setattr(rate_limiting, "_rate_limiter", limiter)
+        return WildberriesAPIClient(api_key="test-key")
+
+    def mock_transport(self, client, handler):
+        client._create_async_session = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def test_iter_supplier_orders(self, client):
+        def handler(request):
+            assert request.url.params["dateFrom"] == "2025-12-20T09:00:00"
+            return httpx.Response(200, content=json.dumps([{"srid": "a"}, {"srid": "b"}]).encode())
+
+        self.mock_transport(client, handler)
+
+        async def collect():
+            return [order async for order in client.iter_supplier_orders("2025-12-20T09:00:00")]
+
+        assert asyncio.run(collect()) == [{"srid": "a"}, {"srid": "b"}]
+        client.rate_limiter.acquire.assert_awaited_once()
+        client.rate_limiter.record_response.assert_called_once_with(200, {})
+
+    def test_session_closed_when_loop_ends_without_aclose(self, client):
+        self.mock_transport(client, lambda request: httpx.Response(200, content=b"[]"))
+
+        async def collect():
+            return [order async for order in client.iter_supplier_orders("2025-12-20T09:00:00")]
+
+        asyncio.run(collect())
+        first = client._async_session
+        asyncio.run(collect())
+
+        assert first.is_closed
+        assert client._async_session is not first
+
+        asyncio.run(client.aclose())
+        assert client._async_session is None
+
+    def test_error_status_and_invalid_body(self, client):
+        responses = [httpx.Response(401, json={"title": "unauthorized"}),
+                     httpx.Response(200, json={"data": []})]
+        self.mock_transport(client, lambda request: responses.pop(0))
+
+        async def collect():
+            return [item async for item in client.iter_warehouse_remains("task-1")]
+
+        with pytest.raises(AuthenticationError):
+            asyncio.run(collect())
+
+        with pytest.raises(WildberriesAPIError, match="expected JSON array"):
+            asyncio.run(collect())
+
+    def test_stream_remains_polls_again_after_404(self, client, monkeypatch):
+        sleep = AsyncMock()
+        monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+        monkeypatch.setattr(client_module, "remains_task_timings", RemainsTaskTimings())
+        downloads = [httpx.Response(404, json={"title": "task not ready"}),
+                     httpx.Response(200, content=json.dumps([{"nmId": 1}, {"nmId": 2}]).encode())]
+
+        def handler(request):
+            if request.url.path.endswith("/download"):
+                return downloads.pop(0)
+            return httpx.Response(200, json={"data": {"taskId": "task-1"}})
+
+        self.mock_transport(client, handler)
+        records = []
+
+        count = asyncio.run(client.stream_warehouse_remains_with_retry(records.append, max_wait_time=900))
+
+        assert count == 2
+        assert records == [{"nmId": 1}, {"nmId": 2}]
+        assert downloads == []
+        assert sleep.await_count == 2  # first poll delay + one "not ready" backoff
+
+    def test_stream_wraps_plain_api_error(self, client):
+        self.mock_transport(client, lambda request: httpx.Response(404, json={"title": "not found"}))
+
+        async def collect():
+            return [item async for item in client.iter_warehouse_remains("task-1")]
+
+        with pytest.raises(WildberriesAPIError) as excinfo:
+            asyncio.run(collect())
+        assert excinfo.value.status_code == 404
@@ -0,0 +1,109 @@
+"""
+Unit tests for the in-process L1 cache
+"""
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from stock_tracker.cache.codec import CacheCodec
+from stock_tracker.cache.local_cache import ENTRY_OVERHEAD_BYTES, LocalCache, TieredCache
+from stock_tracker.cache.redis_cache import RedisCache
+
+
+class TestLocalCache:
+    """LRU with TTL and memory accounting"""
+
+    def test_evicts_least_recently_used_by_size(self):
+        entry_size = 100 + len("k1") + ENTRY_OVERHEAD_BYTES
+        cache = LocalCache(max_bytes=entry_size * 2, max_entry_bytes=10_000)
+
+        cache.set("k1", b"a" * 100)
+        cache.set("k2", b"b" * 100)
+        cache.get("k1")  # k2 becomes LRU
+        cache.set("k3", b"c" * 100)
+
+        assert cache.get("k2") is None
+        assert cache.get("k1") == b"a" * 100
+        assert cache.get("k3") == b"c" * 100
+        assert cache.size_bytes == entry_size * 2
+        assert cache.stats()["evictions"] == 1
+
+    def test_expired_entries_dropped(self):
+        cache = LocalCache()
+
+        cache.set("k", b"v", ttl=-1)
+
+        assert cache.get("k") is None
+        assert cache.size_bytes == 0
+
+    def test_large_entries_not_stored(self):
+        cache = LocalCache(max_entry_bytes=1024)
+
+        assert not cache.set("k", b"x" * 2048)
+        assert cache.get("k") is None
+
+    def test_fill_after_invalidation_is_skipped(self):
+        cache = LocalCache()
+        generation = cache.generation
+
+        cache.delete_prefix("tenant:t1:")
+
+        assert not cache.set("tenant:t1:k", b"old", generation=generation)
+        assert cache.get("tenant:t1:k") is None
+
+    def test_delete_matching_uses_redis_glob(self):
+        cache = LocalCache()
+        for key in ("tenant:t1:products:1", "tenant:t1:products:2", "tenant:t1:stats"):
+            cache.set(key, b"v")
+
+        assert cache.delete_matching("tenant:t1:products:*") == 2
+        assert cache.get("tenant:t1:stats") == b"v"
+
+
+@pytest.fixture
+def tiered():
+    """TieredCache over a RedisCache with mocked client, no listener thread"""
+    remote = RedisCache(redis_url="redis://localhost:6379/15", codec=CacheCodec("json"))
+    remote.client = MagicMock()
+    remote.client.pipeline.return_value.execute.return_value = [True, 1, True]
+    return TieredCache(remote, LocalCache(), subscribe=False)
+
+
+class TestTieredCache:
+    """L1 serves hot reads, writes are broadcast to other workers"""
+
+    def test_second_read_served_from_l1(self, tiered):
+        tiered.remote.client.get.return_value = tiered.remote.codec.encode({"plan": "pro"})
+
+        assert tiered.get("t1", "subscription") == {"plan": "pro"}
+        assert tiered.get("t1", "subscription") == {"plan": "pro"}
+
+        tiered.remote.client.get.assert_called_once()
+
+    def test_set_writes_through_and_publishes(self, tiered):
+        assert tiered.set("t1", "tenant", {"id": "t1"}, ttl=60)
+
+        channel, message = tiered.remote.client.publish.call_args.args
+        assert json.loads(message) == {"origin": tiered.origin, "op": "key", "target": "tenant:t1:tenant"}
+        assert tiered.get("t1", "tenant") == {"id": "t1"}
+        tiered.remote.client.get.assert_not_called()
+
+    def test_messages_from_other_workers_invalidate(self, tiered):
+        tiered.set("t1", "tenant", {"id": "t1"})
+        tiered.set("t2", "tenant", {"id": "t2"})
+
+        # Own messages are ignored
+        tiered.handle_message(json.dumps({"origin": tiered.origin, "op": "prefix", "target": "tenant:t1:"}))
+        assert tiered.local.get("tenant:t1:tenant") is not None
+
+        tiered.handle_message(json.dumps({"origin": "other", "op": "prefix", "target": "tenant:t1:"}).encode())
+        assert tiered.local.get("tenant:t1:tenant") is None
+        assert tiered.local.get("tenant:t2:tenant") is not None
+
+    def test_get_many_fetches_only_l1_misses(self, tiered):
+        tiered.set("t1", "a", 1)
+        tiered.remote.client.mget.return_value = [tiered.remote.codec.encode(2)]
+
+        assert tiered.get_many("t1", ["a", "b"]) == {"a": 1, "b": 2}
+        tiered.remote.client.mget.assert_called_once_with(["tenant:t1:b"])
@@ -0,0 +1,115 @@
+"""
+Unit tests for the incremental supplier orders store
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from stock_tracker.services import orders_store
+from stock_tracker.services.orders_store import SupplierOrdersStore
+
+
+def make_order(srid, last_change, warehouse="Коледино"):
+    return {
+        "srid": srid, "nmId": 1, "supplierArticle": "ART-1", "warehouseName": warehouse,
+        "warehouseType": "Склад WB", "isCancel": False,
+        "date": "2025-12-20T10:00:00", "lastChangeDate": last_change,
+    }
+
+
+def streamed(*pages):
+    """iter_supplier_orders replacement yielding one page per call; records the calls"""
+    pages = list(pages)
+    calls = []
+
+    async def iter_supplier_orders(date_from, flag=0):
+        calls.append({"date_from": date_from, "flag": flag})
+        for order in pages.pop(0):
+            yield order
+
+    iter_supplier_orders.calls = calls
+    return iter_supplier_orders
+
+
+def compiled(db):
+    """SQL of statements passed to db.execute"""
+    return [str(call.args[0].compile(dialect=postgresql.dialect())) for call in db.execute.call_args_list]
+
+
+class TestUpsert:
+    """Only the latest version of each srid is written"""
+
+    def test_dedup_and_changed_rows_only(self):
+        db = MagicMock()
+        db.execute.return_value.rowcount = 2
+        store = SupplierOrdersStore(db, uuid.uuid4())
+
+        written = store.upsert([
+            make_order("a", "2025-12-20T10:00:00"),
+            make_order("a", "2025-12-21T10:00:00", warehouse="Казань"),
+            make_order("b", "2025-12-20T11:00:00"),
+            make_order(None, "2025-12-20T11:00:00"),
+        ])
+
+        assert written == 2
+        stmt = db.execute.call_args.args[0]
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        assert params["warehouse_name_m0"] == "Казань"
+        assert "srid_m2" not in params
+        assert "WHERE supplier_orders.last_change_date < excluded.last_change_date" in compiled(db)[0]
+
+
+class TestSync:
+    """Pages by lastChangeDate and stores the cursor"""
+
+    def test_pages_from_cursor(self, monkeypatch):
+        monkeypatch.setattr(orders_store, "WB_ORDERS_PAGE_LIMIT", 2)
+        db = MagicMock()
+        db.scalar.return_value = datetime(2025, 12, 20, 9, 0, 0)
+        db.execute.return_value.rowcount = 1
+        api = MagicMock()
+        api.iter_supplier_orders = streamed(
+            [make_order("a", "2025-12-20T10:00:00"), make_order("b", "2025-12-20T12:00:00")],
+            [make_order("b", "2025-12-20T12:00:00")],
+        )
+        store = SupplierOrdersStore(db, uuid.uuid4())
+
+        stats = asyncio.run(store.sync(api))
+
+        assert [call["date_from"] for call in api.iter_supplier_orders.calls] == [
+            "2025-12-20T09:00:00", "2025-12-20T12:00:00",
+        ]
+        assert stats["pages"] == 2 and stats["fetched"] == 3
+        assert stats["cursor"] == "2025-12-20T12:00:00"
+        assert any("INSERT INTO supplier_order_cursors" in sql for sql in compiled(db))
+
+    def test_large_page_is_upserted_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(orders_store, "UPSERT_CHUNK_SIZE", 2)
+        db = MagicMock()
+        db.scalar.return_value = datetime(2025, 12, 20, 9, 0, 0)
+        db.execute.return_value.rowcount = 1
+        api = MagicMock()
+        api.iter_supplier_orders = streamed(
+            [make_order(srid, "2025-12-20T10:00:00") for srid in "abcde"]
+        )
+        store = SupplierOrdersStore(db, uuid.uuid4())
+
+        stats = asyncio.run(store.sync(api))
+
+        order_inserts = [sql for sql in compiled(db) if sql.startswith("INSERT INTO supplier_orders ")]
+        assert len(order_inserts) == 3
+        assert stats["fetched"] == 5 and stats["written"] == 3
+
+    def test_first_sync_covers_retention_window(self):
+        db = MagicMock()
+        db.scalar.return_value = None
+        api = MagicMock()
+        api.iter_supplier_orders = streamed([])
+
+        asyncio.run(SupplierOrdersStore(db, uuid.uuid4(), retention_days=90).sync(api))
+
+        date_from = datetime.fromisoformat(api.iter_supplier_orders.calls[0]["date_from"])
+        assert abs(date_from - (datetime.now() - timedelta(days=90))) < timedelta(minutes=1)
@@ -0,0 +1,185 @@
+"""
+Unit tests for the per-token principal cache
+"""
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from stock_tracker.api.middleware.tenant_context import TenantContextMiddleware, get_current_user_async
+from stock_tracker.auth import principal_cache as principal_cache_module
+from stock_tracker.auth.principal_cache import Principal, PrincipalCache
+from stock_tracker.cache.codec import CacheCodec
+from stock_tracker.database.models import Subscription, Tenant, User
+from stock_tracker.database.models.user import UserRole
+
+
+def make_principal():
+    tenant = Tenant(id=uuid.uuid4(), name="Test Company", slug="test-company", is_active=True)
+    user = User(
+        id=uuid.uuid4(), tenant_id=tenant.id, email="owner@example.com", full_name="Owner",
+        role=UserRole.OWNER, is_active=True, is_verified=True, is_admin=False
+    )
+    return Principal.from_models(user, tenant, jti="token-1")
+
+
+class TestPrincipal:
+    """Snapshot survives the cache codec and rebuilds detached models"""
+
+    def test_codec_round_trip(self):
+        codec = CacheCodec("orjson")
+        principal = make_principal()
+
+        restored = Principal.from_dict(codec.decode(codec.encode(principal.to_dict())))
+
+        assert restored == principal
+
+    def test_to_user_is_detached_with_tenant(self):
+        principal = Principal.from_dict(make_principal().to_dict())
+
+        user = principal.to_user()
+
+        assert user.role is UserRole.OWNER
+        assert isinstance(user.id, uuid.UUID)
+        assert user.tenant.slug == "test-company"
+        assert inspect(user).detached
+        assert principal.to_user() is user
+
+
+class TestPrincipalCache:
+    """Entries are namespaced per tenant and never outlive the token"""
+
+    def test_ttl_capped_by_token_expiry(self):
+        cache = MagicMock()
+        principal = make_principal()
+
+        PrincipalCache(cache=cache, ttl=60).set(principal, expires_at=time.time() + 10)
+
+        args, kwargs = cache.set.call_args
+        assert args[:2] == (principal.tenant_id, f"principal:{principal.user_id}:token-1")
+        assert 0 < kwargs["ttl"] <= 10
+
+    def test_expired_token_not_cached(self):
+        cache = MagicMock()
+
+        assert PrincipalCache(cache=cache).set(make_principal(), expires_at=time.time() - 1) is False
+        cache.set.assert_not_called()
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    tables = [Tenant.__table__, User.__table__, Subscription.__table__]
+    Tenant.metadata.create_all(engine, tables=tables)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def cache():
+    cache = MagicMock()
+    with patch.object(principal_cache_module, "_principal_cache", PrincipalCache(cache=cache)):
+        yield cache
+
+
+class TestEventInvalidation:
+    """Authorization changes drop cached principals after commit"""
+
+    def seed(self, session_factory):
+        with session_factory() as db:
+            tenant = Tenant(name="Test Company", slug="test-company")
+            db.add(tenant)
+            db.flush()
+            user = User(email="owner@example.com", tenant_id=tenant.id, role=UserRole.OWNER)
+            db.add(user)
+            db.commit()
+            return str(tenant.id), str(user.id)
+
+    def test_user_deactivation_invalidates_after_commit(self, session_factory, cache):
+        tenant_id, user_id = self.seed(session_factory)
+        cache.reset_mock()
+
+        with session_factory() as db:
+            db.get(User, uuid.UUID(user_id)).is_active = False
+            db.flush()
+            cache.invalidate_tracked.assert_not_called()
+            db.commit()
+
+        cache.invalidate_tracked.assert_called_once_with(tenant_id, [f"principal:{user_id}:*"])
+        cache.invalidate_pattern.assert_not_called()
+
+    def test_tenant_deactivation_invalidates_tenant(self, session_factory, cache):
+        tenant_id, _ = self.seed(session_factory)
+        cache.reset_mock()
+
+        with session_factory() as db:
+            db.get(Tenant, uuid.UUID(tenant_id)).is_active = False
+            db.commit()
+
+        cache.invalidate_tracked.assert_called_once_with(tenant_id, ["principal:*"])
+
+    def test_unwatched_change_and_rollback_keep_cache(self, session_factory, cache):
+        _, user_id = self.seed(session_factory)
+        cache.reset_mock()
+
+        with session_factory() as db:
+            user = db.get(User, uuid.UUID(user_id))
+            user.phone = "+70000000000"
+            db.commit()
+
+            user.is_admin = True
+            db.flush()
+            db.rollback()
+
+        cache.invalidate_tracked.assert_not_called()
+        cache.invalidate_pattern.assert_not_called()
+
+
+class TestDependencyReuse:
+    """Async dependency uses the principal resolved by the middleware"""
+
+    def test_get_current_user_async_skips_database(self):
+        principal = make_principal()
+        request = SimpleNamespace(state=SimpleNamespace(principal=principal))
+        db = MagicMock()
+
+        user = asyncio.run(get_current_user_async(request=request, credentials=None, db=db))
+
+        assert str(user.id) == principal.user_id
+        assert user.tenant.name == "Test Company"
+        assert db.mock_calls == []
+
+
+class TestMiddlewareCacheAccess:
+    """Principal cache round trips do not run on the event loop thread"""
+
+    def test_cache_hit_resolved_off_loop(self):
+        import threading
+
+        principal = make_principal()
+        threads = []
+
+        def get(tenant_id, key):
+            threads.append(threading.get_ident())
+            return principal.to_dict()
+
+        cache = MagicMock()
+        cache.get.side_effect = get
+        payload = {"sub": principal.user_id, "tenant_id": principal.tenant_id, "jti": "token-1"}
+
+        async def resolve():
+            return threading.get_ident(), await TenantContextMiddleware(app=None)._resolve_principal(payload)
+
+        with patch.object(principal_cache_module, "_principal_cache", PrincipalCache(cache=cache)):
+            loop_thread, resolved = asyncio.run(resolve())
+
+        assert resolved == principal
+        assert threads and threads[0] != loop_thread
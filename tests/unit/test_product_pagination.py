@@ -0,0 +1,122 @@
+"""
+Unit tests for rate-limited, resumable Analytics v2 product pagination
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from stock_tracker.api import client as client_module
+from stock_tracker.api.client import PRODUCT_STOCK_PAGE_LIMIT, WildberriesAPIClient
+from stock_tracker.utils import rate_limiting
+from stock_tracker.utils.exceptions import WildberriesAPIError
+from stock_tracker.utils.rate_limiting import configure_wildberries_rate_limits
+
+
+class DictCache:
+    """In-memory stand-in for the tenant-scoped cache API"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, tenant_id, key):
+        return self.data.get((tenant_id, key))
+
+    def set(self, tenant_id, key, value, ttl=None):
+        self.data[(tenant_id, key)] = value
+        return True
+
+    def get_many(self, tenant_id, keys):
+        return {key: self.data[(tenant_id, key)] for key in keys if (tenant_id, key) in self.data}
+
+    def delete_many(self, tenant_id, keys):
+        deleted = [key for key in keys if self.data.pop((tenant_id, key), None) is not None]
+        return len(deleted)
+
+
+def page(offset, size):
+    return {"data": {"items": [{"nmID": offset + i} for i in range(size)]}}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = DictCache()
+    monkeypatch.setattr(client_module, "get_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def client(monkeypatch, cache):
+    limiter = MagicMock()
+    limiter.acquire = AsyncMock()
+    monkeypatch.setattr(rate_limiting, "_rate_limiter", limiter)
+    return WildberriesAPIClient(api_key="test-key")
+
+
+class TestGetAllProductStockData:
+    """Full catalog is fetched in maximum-size pages without fixed pauses"""
+
+    def test_max_page_size_without_sleep(self, client, cache, monkeypatch):
+        sleep = AsyncMock()
+        monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+        client.get_product_stock_data = AsyncMock(side_effect=[
+            page(0, PRODUCT_STOCK_PAGE_LIMIT), page(1000, PRODUCT_STOCK_PAGE_LIMIT), page(2000, 5),
+        ])
+
+        items = asyncio.run(client.get_all_product_stock_data(brand_name="B"))
+
+        assert len(items) == 2005
+        assert [(c.kwargs["offset"], c.kwargs["limit"]) for c in client.get_product_stock_data.call_args_list] == [
+            (0, 1000), (1000, 1000), (2000, 1000),
+        ]
+        assert all(c.kwargs["brand_name"] == "B" for c in client.get_product_stock_data.call_args_list)
+        sleep.assert_not_awaited()
+        assert cache.data == {}  # Checkpoint dropped after completion
+
+    def test_interrupted_fetch_resumes_at_checkpoint(self, client, cache):
+        client.get_product_stock_data = AsyncMock(side_effect=[
+            page(0, PRODUCT_STOCK_PAGE_LIMIT), WildberriesAPIError("Request timeout after 30s"),
+        ])
+        with pytest.raises(WildberriesAPIError):
+            asyncio.run(client.get_all_product_stock_data())
+        assert "test-key" not in str(cache.data)
+
+        client.get_product_stock_data = AsyncMock(side_effect=[page(1000, 10)])
+        items = asyncio.run(client.get_all_product_stock_data())
+
+        assert client.get_product_stock_data.call_args.kwargs["offset"] == 1000
+        assert [item["nmID"] for item in items] == list(range(1010))
+        assert cache.data == {}
+
+    def test_checkpoint_clear_deletes_known_keys(self, cache):
+        cache.invalidate_pattern = MagicMock()
+        checkpoint = client_module.PaginationCheckpoint(cache, "scope", "products")
+        checkpoint.save(0, 2, [{"nmID": 1}, {"nmID": 2}])
+        checkpoint.save(2, 2, [{"nmID": 3}, {"nmID": 4}])
+        cache.set("scope", "other:progress", {"offset": 2, "limit": 2})
+
+        checkpoint.clear()
+
+        cache.invalidate_pattern.assert_not_called()
+        assert cache.data == {("scope", "other:progress"): {"offset": 2, "limit": 2}}
+
+    def test_resume_disabled(self, client, cache):
+        client.get_product_stock_data = AsyncMock(side_effect=[
+            page(0, PRODUCT_STOCK_PAGE_LIMIT), WildberriesAPIError("Request timeout after 30s"),
+        ])
+        with pytest.raises(WildberriesAPIError):
+            asyncio.run(client.get_all_product_stock_data())
+
+        client.get_product_stock_data = AsyncMock(side_effect=[page(0, 3)])
+        items = asyncio.run(client.get_all_product_stock_data(resume=False))
+
+        assert client.get_product_stock_data.call_args.kwargs["offset"] == 0
+        assert len(items) == 3
+
+
+def test_local_fallback_paces_analytics_products():
+    """Without Redis the products endpoint still follows 3 req/min"""
+    limit = configure_wildberries_rate_limits().endpoint_configs["/api/v2/stocks-report/products/products"]
+
+    assert limit.requests_per_second == pytest.approx(3 / 60)
+    assert limit.burst_size == 1
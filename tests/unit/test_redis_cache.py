@@ -0,0 +1,273 @@
+"""
+Unit tests for RedisCache batching and non-blocking invalidation
+"""
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from stock_tracker.cache import redis_cache
+from stock_tracker.cache.codec import CacheCodec
+from stock_tracker.cache.redis_cache import RedisCache
+
+
+@pytest.fixture
+def cache():
+    """RedisCache with a mocked client (pool is never connected)"""
+    cache = RedisCache(redis_url="redis://localhost:6379/15", codec=CacheCodec("json"))
+    cache.client = MagicMock()
+    cache.pipe = cache.client.pipeline.return_value
+    return cache
+
+
+class TestRedisCacheBatching:
+    """Round trips are pipelined and tenant keys are tracked"""
+
+    def test_set_tracks_key_in_one_round_trip(self, cache):
+        cache.set("t1", "products:list", {"a": 1}, ttl=60)
+
+        cache.pipe.setex.assert_called_once_with(
+            "tenant:t1:products:list", 60, cache.codec.encode({"a": 1})
+        )
+        cache.pipe.sadd.assert_called_once_with("tenant_keys:t1", "tenant:t1:products:list")
+        cache.pipe.execute.assert_called_once()
+        cache.client.setex.assert_not_called()
+
+    def test_get_many_uses_mget(self, cache):
+        cache.client.mget.return_value = [json.dumps([1, 2]), None, "{broken"]
+
+        result = cache.get_many("t1", ["a", "b", "c"])
+
+        cache.client.mget.assert_called_once_with(["tenant:t1:a", "tenant:t1:b", "tenant:t1:c"])
+        assert result == {"a": [1, 2]}
+
+    def test_set_many_single_pipeline(self, cache):
+        assert cache.set_many("t1", {"a": 1, "b": 2}, ttl=30)
+
+        assert cache.pipe.setex.call_count == 2
+        cache.pipe.sadd.assert_called_once_with("tenant_keys:t1", "tenant:t1:a", "tenant:t1:b")
+        cache.pipe.execute.assert_called_once()
+
+
+class TestRedisCacheInvalidation:
+    """Invalidation never uses KEYS"""
+
+    def test_invalidate_pattern_scans_and_unlinks_in_batches(self, cache, monkeypatch):
+        monkeypatch.setattr(redis_cache, "INVALIDATE_BATCH_SIZE", 2)
+        cache.client.scan_iter.return_value = iter(["tenant:t1:p:1", "tenant:t1:p:2", "tenant:t1:p:3"])
+        cache.pipe.execute.side_effect = [[2, 2], [1, 1]]
+
+        deleted = cache.invalidate_pattern("t1", "p:*")
+
+        cache.client.keys.assert_not_called()
+        cache.client.scan_iter.assert_called_once_with(match="tenant:t1:p:*", count=2)
+        assert [c.args for c in cache.pipe.unlink.call_args_list] == [
+            ("tenant:t1:p:1", "tenant:t1:p:2"),
+            ("tenant:t1:p:3",),
+        ]
+        assert deleted == 3
+
+    def test_delete_many_single_round_trip(self, cache):
+        cache.pipe.execute.return_value = [2, 2]
+
+        assert cache.delete_many("t1", ["a", "b"]) == 2
+
+        cache.client.scan_iter.assert_not_called()
+        cache.pipe.unlink.assert_called_once_with("tenant:t1:a", "tenant:t1:b")
+        cache.pipe.srem.assert_called_once_with("tenant_keys:t1", "tenant:t1:a", "tenant:t1:b")
+        cache.pipe.execute.assert_called_once()
+
+    def test_flush_tenant_uses_key_set(self, cache):
+        cache.client.sscan_iter.return_value = iter(["tenant:t1:a", "tenant:t1:b"])
+        cache.client.unlink.side_effect = [2, 1]
+
+        deleted = cache.flush_tenant("t1")
+
+        cache.client.keys.assert_not_called()
+        cache.client.scan_iter.assert_not_called()
+        assert cache.client.unlink.call_args_list[0].args == ("tenant:t1:a", "tenant:t1:b")
+        assert cache.client.unlink.call_args_list[1].args == ("tenant_keys:t1",)
+        assert deleted == 2
+
+
+    def test_invalidate_tracked_keeps_other_tenant_state(self, cache):
+        cache.client.sscan_iter.return_value = iter([
+            b"tenant:t1:products:list", "tenant:t1:sheets:fingerprint:s:1", "tenant:t1:warehouse_mapping"
+        ])
+        cache.pipe.execute.return_value = [1, 1]
+
+        deleted = cache.invalidate_tracked("t1", ["products:*", "analytics:*"])
+
+        cache.client.scan_iter.assert_not_called()
+        cache.pipe.unlink.assert_called_once_with(b"tenant:t1:products:list")
+        assert deleted == 1
+
+
+class MemoryCache:
+    """In-memory stand-in with the RedisCache interface used by @cached"""
+
+    default_ttl = 300
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.locks = {}
+
+    def get(self, tenant_id, key):
+        return self.data.get((tenant_id, key))
+
+    def set(self, tenant_id, key, value, ttl=None):
+        self.data[(tenant_id, key)] = value
+        self.ttls[(tenant_id, key)] = ttl
+        return True
+
+    def acquire_lock(self, tenant_id, key, timeout):
+        if (tenant_id, key) in self.locks:
+            return None
+        self.locks[(tenant_id, key)] = "token"
+        return "token"
+
+    def release_lock(self, tenant_id, key, token):
+        return self.locks.pop((tenant_id, key), None) == token
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    cache = MemoryCache()
+    monkeypatch.setattr(redis_cache, "get_cache", lambda: cache)
+    return cache
+
+
+class TestCachedDecorator:
+    """@cached avoids stampedes and serves stale values while refreshing"""
+
+    def test_concurrent_misses_compute_once(self, memory_cache):
+        calls = []
+
+        @redis_cache.cached("analytics", ttl=60)
+        async def load(tenant_id):
+            calls.append(tenant_id)
+            await asyncio.sleep(0.01)
+            return {"total": 42}
+
+        async def run():
+            return await asyncio.gather(*[load("t1") for _ in range(20)])
+
+        results = asyncio.run(run())
+
+        assert calls == ["t1"]
+        assert results == [{"total": 42}] * 20
+        assert memory_cache.get("t1", "analytics")["value"] == {"total": 42}
+
+    def test_stale_value_served_while_refreshing(self, memory_cache):
+        memory_cache.set("t1", "analytics", redis_cache._wrap_entry({"total": 1}, ttl=-1, delta=0.1))
+        calls = []
+
+        @redis_cache.cached("analytics", ttl=60, stale_ttl=30)
+        async def load(tenant_id):
+            calls.append(tenant_id)
+            return {"total": 2}
+
+        async def run():
+            first = await asyncio.gather(*[load("t1") for _ in range(5)])
+            await asyncio.sleep(0.01)  # let the background refresh finish
+            return first, await load("t1")
+
+        stale, fresh = asyncio.run(run())
+
+        assert stale == [{"total": 1}] * 5
+        assert fresh == {"total": 2}
+        assert calls == ["t1"]
+
+    def test_refresh_skipped_when_other_worker_holds_lock(self, memory_cache):
+        memory_cache.set("t1", "report", redis_cache._wrap_entry("old", ttl=-1, delta=0.1))
+        memory_cache.locks[("t1", "report")] = "other-worker"
+        calls = []
+
+        @redis_cache.cached("report", ttl=60, stale_ttl=30)
+        def load(tenant_id):
+            calls.append(tenant_id)
+            return "new"
+
+        assert load("t1") == "old"
+        redis_cache._get_refresh_executor().submit(lambda: None).result()
+
+        assert calls == []
+        assert memory_cache.get("t1", "report")["value"] == "old"
+
+    def test_stale_serving_is_opt_in(self, memory_cache):
+        @redis_cache.cached("plain", ttl=60)
+        def load(tenant_id):
+            return 1
+
+        @redis_cache.cached("swr", ttl=60, stale_ttl=30)
+        def load_swr(tenant_id):
+            return 2
+
+        load("t1"), load_swr("t1")
+
+        assert memory_cache.ttls[("t1", "plain")] == 60
+        assert memory_cache.ttls[("t1", "swr")] == 90
+
+    def test_cache_calls_run_off_event_loop(self, memory_cache, monkeypatch):
+        import threading
+
+        threads = []
+        original_get = memory_cache.get
+
+        def get(tenant_id, key):
+            threads.append(threading.get_ident())
+            return original_get(tenant_id, key)
+
+        monkeypatch.setattr(memory_cache, "get", get)
+
+        @redis_cache.cached("analytics", ttl=60)
+        async def load(tenant_id):
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(load("t1"))
+
+        assert threads and loop_thread not in threads
+
+    def test_early_refresh_probability(self, monkeypatch):
+        entry = redis_cache._wrap_entry("v", ttl=10, delta=1.0)
+
+        monkeypatch.setattr(redis_cache.random, "random", lambda: 0.5)
+        assert redis_cache._entry_state(entry, beta=1.0) == ("v", "fresh")
+
+        # -log(1e-6) * delta ~ 13.8s > 10s remaining
+        monkeypatch.setattr(redis_cache.random, "random", lambda: 1e-6)
+        assert redis_cache._entry_state(entry, beta=1.0) == ("v", "refresh")
+        assert redis_cache._entry_state(entry, beta=0) == ("v", "fresh")
+
+    def test_legacy_entries_are_fresh(self):
+        assert redis_cache._entry_state({"total": 1}, beta=1.0) == ({"total": 1}, "fresh")
+        assert redis_cache._entry_state(None, beta=1.0) == (None, "miss")
+
+
+class TestAnalyticsRouteCaching:
+    """Analytics reports are cached per tenant and query params"""
+
+    def test_reports_computed_once_per_params(self, memory_cache, monkeypatch):
+        from stock_tracker.api.routes import analytics
+
+        calls = []
+
+        async def run_analytics(db, tenant, method):
+            calls.append(tenant)
+            return [{"id": "p1"}]
+
+        monkeypatch.setattr(analytics, "_run_analytics", run_analytics)
+
+        async def run():
+            return [
+                await analytics._top_products("t1", None, "tenant-1", limit=20),
+                await analytics._top_products("t1", None, "tenant-1", limit=20),
+                await analytics._top_products("t1", None, "tenant-1", limit=50),
+            ]
+
+        assert asyncio.run(run()) == [[{"id": "p1"}]] * 3
+        assert len(calls) == 2
+        assert ("t1", "analytics:top-products:limit=20") in memory_cache.data
+        assert memory_cache.ttls[("t1", "analytics:top-products:limit=20")] == analytics.ANALYTICS_CACHE_TTL
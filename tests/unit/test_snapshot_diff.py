@@ -0,0 +1,62 @@
+"""
+Unit tests for the snapshot diff engine
+"""
+import pytest
+
+from stock_tracker.core.columnar import is_columnar_available
+from stock_tracker.core.models import Product, Warehouse
+from stock_tracker.core.snapshot_diff import ProductSnapshot, diff_snapshots
+
+
+def make_product(nm_id, stock=10, orders=2, warehouses=("Коледино", "Казань")):
+    return Product(
+        wildberries_article=nm_id,
+        seller_article=f"ART-{nm_id}",
+        warehouses=[Warehouse(name=name, stock=stock, orders=orders) for name in warehouses],
+    )
+
+
+@pytest.fixture
+def snapshots():
+    old = [make_product(1), make_product(2), make_product(3), make_product(4)]
+    new = [
+        make_product(1),
+        make_product(2, stock=11),  # stock changed
+        make_product(3, warehouses=("Коледино",)),  # warehouse removed
+        make_product(5),  # new product
+    ]
+    return old, new
+
+
+@pytest.mark.parametrize("columnar", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not is_columnar_available(), reason="numpy not installed")),
+])
+class TestSnapshotDiff:
+    """Only products with changed fingerprints are reported"""
+
+    def test_added_removed_changed(self, snapshots, columnar):
+        old, new = snapshots
+
+        diff = diff_snapshots(ProductSnapshot(old, columnar=columnar), ProductSnapshot(new, columnar=columnar))
+
+        assert diff.added == ["ART-5_5"]
+        assert diff.removed == ["ART-4_4"]
+        assert sorted(diff.changed) == ["ART-2_2", "ART-3_3"]
+        assert diff.has_changes
+
+    def test_identical_catalog(self, snapshots, columnar):
+        old, _ = snapshots
+        copy = [make_product(p.wildberries_article) for p in old]
+
+        diff = diff_snapshots(ProductSnapshot(old, columnar=columnar), ProductSnapshot(copy, columnar=columnar))
+
+        assert not diff.has_changes
+
+    def test_duplicate_keys_keep_last(self, columnar):
+        old = [make_product(1, stock=5), make_product(1, stock=10)]
+        new = [make_product(1, stock=10)]
+
+        diff = diff_snapshots(ProductSnapshot(old, columnar=columnar), ProductSnapshot(new, columnar=columnar))
+
+        assert not diff.has_changes
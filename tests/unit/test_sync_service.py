@@ -287,3 +287,190 @@ class TestSyncServicePerformance:
         assert result["products_synced"] == 1000
         assert result["status"] == "success"
         assert result["duration_seconds"] > 0
+
+
+class TestSyncServiceBulkMode:
+    """Test bulk upsert staging and statement building"""
+    
+    @pytest.fixture
+    def bulk_service(self):
+        """Create SyncService in bulk mode with mocked marketplace client"""
+        tenant = MagicMock(spec=Tenant)
+        tenant.id = "3eb1c21d-3538-4cab-a98a-9894460e2c4d"
+        tenant.name = "Test Company"
+        
+        with patch("stock_tracker.services.sync_service.create_marketplace_client"):
+            return SyncService(tenant=tenant, db_session=MagicMock(spec=Session), bulk_mode=True)
+    
+    def test_stage_rows_collapses_duplicates(self, bulk_service):
+        """Duplicate articles are staged once, last one wins"""
+        from stock_tracker.core.models import Product as MarketplaceProduct
+        
+        rows = bulk_service._stage_product_rows(
+            [
+                MarketplaceProduct(wildberries_article=101, seller_article="A", total_stock=1),
+                MarketplaceProduct(wildberries_article=102, seller_article="", total_stock=5, total_orders=4),
+                MarketplaceProduct(wildberries_article=101, seller_article="A", total_stock=9),
+            ],
+            {102: {"warehouses": [{"name": "Подольск", "stock": 3}, {"name": "Казань", "stock": 1}]}}
+        )
+        
+        assert [row["marketplace_article"] for row in rows] == ["101", "102"]
+        assert rows[0]["total_stock"] == 9
+        assert rows[1]["seller_article"] == "WB-102"
+        assert rows[1]["_has_seller_article"] is False
+        assert [wh["orders"] for wh in rows[1]["warehouse_data"]["warehouses"]] == [3, 1]
+    
+    def test_upsert_statement_targets_unique_index(self, bulk_service):
+        """Statement uses ON CONFLICT on (tenant_id, marketplace_article)"""
+        from sqlalchemy.dialects import postgresql
+        from stock_tracker.core.models import Product as MarketplaceProduct
+        
+        rows = bulk_service._stage_product_rows(
+            [MarketplaceProduct(wildberries_article=101, total_stock=1)], {}
+        )
+        for row in rows:
+            row.pop("_has_seller_article")
+        
+        sql = str(bulk_service._upsert_statement(rows, update_seller_article=False)
+                  .compile(dialect=postgresql.dialect()))
+        
+        assert "ON CONFLICT (tenant_id, marketplace_article) DO UPDATE" in sql
+        assert "RETURNING (xmax = 0)" in sql
+        assert "seller_article = excluded.seller_article" not in sql
+
+    
+    def test_row_fallback_counts_created_and_updated(self, bulk_service):
+        """Rows retried after a failed chunk still update the counters"""
+        from stock_tracker.core.models import Product as MarketplaceProduct
+        
+        bulk_service.db.execute.side_effect = Exception("chunk failed")
+        lookup = bulk_service.db.query.return_value.filter.return_value.with_for_update.return_value
+        lookup.first.side_effect = [MagicMock(), None, Exception("row failed")]
+        stats = {"products_synced": 0, "products_created": 0, "products_updated": 0, "errors": []}
+        
+        bulk_service._bulk_upsert_products(
+            [MarketplaceProduct(wildberries_article=article, total_stock=1) for article in (101, 102, 103)],
+            {},
+            stats
+        )
+        
+        assert stats["products_synced"] == 2
+        assert stats["products_updated"] == 1
+        assert stats["products_created"] == 1
+        assert len(stats["errors"]) == 1
+
+
+class TestSyncServiceFetchPipeline:
+    """Test overlapped fetching of products and warehouse remains"""
+    
+    @pytest.fixture
+    def service(self):
+        """Create SyncService with mocked marketplace client"""
+        tenant = MagicMock(spec=Tenant)
+        tenant.id = "3eb1c21d-3538-4cab-a98a-9894460e2c4d"
+        tenant.name = "Test Company"
+        
+        with patch("stock_tracker.services.sync_service.create_marketplace_client"):
+            return SyncService(tenant=tenant, db_session=MagicMock(spec=Session))
+    
+    def test_products_fetched_while_remains_task_runs(self, service):
+        """Wall-clock time is the slower source, not the sum"""
+        import asyncio
+        import time
+        
+        async def slow_remains(consumer, max_wait_time):
+            await asyncio.sleep(0.2)
+            consumer({"nmId": 101, "warehouses": [{"warehouseName": "Казань", "quantity": 3}]})
+            consumer({"nmId": 101, "warehouses": [{"warehouseName": "Остальные", "quantity": 9}]})
+            return 2
+        
+        async def slow_products(limit):
+            await asyncio.sleep(0.2)
+            return ["product"]
+        
+        service.marketplace_client.api_client.stream_warehouse_remains_with_retry = slow_remains
+        service.marketplace_client.fetch_products = slow_products
+        
+        start = time.monotonic()
+        products, warehouse_data = asyncio.run(service._fetch_marketplace_data())
+        elapsed = time.monotonic() - start
+        
+        assert products == ["product"]
+        assert warehouse_data[101]["warehouses"] == [{"name": "Казань", "stock": 3, "orders": 0}]
+        assert elapsed < 0.35
+    
+    def test_stream_failure_falls_back_to_list_download(self, service):
+        """A failed stream is not used half-parsed; remains are downloaded as a list"""
+        import asyncio
+        
+        async def broken_remains(consumer, max_wait_time):
+            consumer({"nmId": 101, "warehouses": [{"warehouseName": "Казань", "quantity": 3}]})
+            raise RuntimeError("connection reset")
+        
+        api_client = service.marketplace_client.api_client
+        api_client.stream_warehouse_remains_with_retry = broken_remains
+        api_client.get_warehouse_remains_with_retry = AsyncMock(return_value=[
+            {"nmId": 101, "warehouses": [{"warehouseName": "Подольск", "quantity": 7}]},
+        ])
+        service.marketplace_client.fetch_products = AsyncMock(return_value=["product"])
+        
+        products, warehouse_data = asyncio.run(service._fetch_marketplace_data())
+        
+        assert products == ["product"]
+        assert warehouse_data == {101: {"warehouses": [{"name": "Подольск", "stock": 7, "orders": 0}]}}
+        api_client.get_warehouse_remains_with_retry.assert_awaited_once_with(max_wait_time=600)
+    
+    def test_remains_failure_fails_sync(self, service):
+        """Without remains the sync fails instead of wiping warehouse breakdowns"""
+        import asyncio
+        
+        api_client = service.marketplace_client.api_client
+        api_client.stream_warehouse_remains_with_retry = AsyncMock(side_effect=RuntimeError("stream failed"))
+        api_client.get_warehouse_remains_with_retry = AsyncMock(side_effect=RuntimeError("task timed out"))
+        service.marketplace_client.fetch_products = AsyncMock(return_value=["product"])
+        
+        with pytest.raises(RuntimeError, match="task timed out"):
+            asyncio.run(service._fetch_marketplace_data())
+    
+    def test_fetch_error_not_masked_by_client_without_api_client(self, service):
+        """Clients without api_client (Ozon) do not hide the original error on cleanup"""
+        service.marketplace_client = MagicMock(spec=["marketplace_name"])
+        
+        with patch.object(service, "_fetch_marketplace_data", AsyncMock(side_effect=RuntimeError("API down"))):
+            with pytest.raises(RuntimeError, match="API down"):
+                service.sync_products()
+    
+    def test_close_error_is_logged_not_raised(self, service):
+        """A failing aclose() does not replace the fetch result"""
+        service.marketplace_client.api_client.aclose = AsyncMock(side_effect=RuntimeError("close failed"))
+        
+        with patch.object(service, "_fetch_marketplace_data", AsyncMock(side_effect=ValueError("API down"))):
+            with pytest.raises(ValueError, match="API down"):
+                service.sync_products()
+
+
+class TestRemainsTaskTimings:
+    """Test adaptive polling schedule for warehouse remains tasks"""
+    
+    def test_cold_start_uses_default_schedule(self):
+        """Without history: 60s first wait, then 30/60/90s backoff"""
+        from stock_tracker.api.client import RemainsTaskTimings
+        
+        timings = RemainsTaskTimings()
+        
+        assert timings.first_poll_delay() == RemainsTaskTimings.DEFAULT_FIRST_POLL
+        assert [timings.next_poll_interval(0, attempt) for attempt in (1, 2, 3, 4)] == [30, 60, 90, 90]
+    
+    def test_learned_schedule(self):
+        """Polls are aimed at observed completion times"""
+        from stock_tracker.api.client import RemainsTaskTimings
+        
+        timings = RemainsTaskTimings()
+        for duration in (20, 22, 25, 30, 80):
+            timings.record(duration)
+        
+        assert timings.first_poll_delay() == pytest.approx(0.9 * 25)
+        # Aim at the slow tail, then fall back to backoff
+        assert timings.next_poll_interval(elapsed=23, attempt=1) == 57
+        assert timings.next_poll_interval(elapsed=85, attempt=1) == 15
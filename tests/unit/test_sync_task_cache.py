@@ -0,0 +1,155 @@
+"""
+Unit tests for cache handling in sync_tenant_products
+
+Runs the real task order (product sync -> cache invalidation -> Sheets
+sync) over a RedisCache backed by an in-memory client, so tenant key set
+bookkeeping is exercised end to end.
+"""
+import fnmatch
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from stock_tracker.cache.codec import CacheCodec
+from stock_tracker.cache.redis_cache import RedisCache
+from stock_tracker.services.google_sheets_service import GridFingerprint, GridFingerprintStore
+from stock_tracker.workers import tasks
+
+
+class InMemoryRedis:
+    """Subset of redis.Redis used by RedisCache (strings, sets, pipelines)"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+        return True
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def unlink(self, *keys):
+        deleted = 0
+        for key in keys:
+            deleted += int(self.values.pop(key, None) is not None or self.sets.pop(key, None) is not None)
+        return deleted
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+        return len(members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+        return len(members)
+
+    def sscan_iter(self, key, count=None):
+        return iter(list(self.sets.get(key, ())))
+
+    def scan_iter(self, match=None, count=None):
+        return iter([key for key in list(self.values) if fnmatch.fnmatchcase(key, match)])
+
+    def expire(self, key, ttl):
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+    def publish(self, channel, message):
+        return 0
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.client, name), args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [method(*args, **kwargs) for method, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+@pytest.fixture
+def cache():
+    cache = RedisCache(redis_url="redis://localhost:6379/15", codec=CacheCodec("json"))
+    cache.client = InMemoryRedis()
+    return cache
+
+
+@pytest.fixture
+def tenant():
+    tenant = MagicMock()
+    tenant.id = "t1"
+    tenant.name = "Test Tenant"
+    tenant.is_active = True
+    tenant.google_sheet_id = "sheet-1"
+    tenant.google_service_account_encrypted = b"creds"
+    return tenant
+
+
+def run_sync(tenant, cache, sheets_sync):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = tenant
+    db.query.return_value.filter.return_value.all.return_value = []
+
+    sync_service = MagicMock()
+    sync_service.sync_products.return_value = {"products_synced": 0}
+    sheets_service = MagicMock()
+    sheets_service.sync_products_to_sheet.side_effect = sheets_sync
+
+    with patch.object(tasks.sync_tenant_products, "_db", db), \
+            patch.object(tasks, "get_cache", return_value=cache), \
+            patch.object(tasks, "SyncService", return_value=sync_service), \
+            patch.object(tasks, "AnalyticsService"), \
+            patch.object(tasks, "enqueue_webhook"), \
+            patch.object(tasks, "GoogleSheetsService", return_value=sheets_service):
+        return tasks.sync_tenant_products(str(tenant.id))
+
+
+class TestSyncTaskCache:
+    """Sync drops stale product data but keeps long-lived tenant state"""
+
+    def test_fingerprint_survives_invalidation_before_sheets_sync(self, tenant, cache):
+        store = GridFingerprintStore(tenant.id, "sheet-1", 0, cache=cache)
+        store.save(GridFingerprint.from_grid([], [["h"] * 5, ["h"] * 5, ["b", "n", "a", 1, 5]]))
+        cache.set("t1", "sync_all_products", {"products": 1})
+        cache.set("t1", "warehouse_mapping", {"Коледино": "WB"})
+
+        seen = []
+        result = run_sync(
+            tenant, cache,
+            lambda products, db, incremental: seen.append(store.load()) or {"success": True}
+        )
+
+        assert result["status"] == "completed"
+        assert seen and seen[0] is not None
+        assert cache.get("t1", "sync_all_products") is None
+        assert cache.get("t1", "warehouse_mapping") == {"Коледино": "WB"}
+
+    def test_fingerprint_survives_tenant_flush(self, tenant, cache):
+        store = GridFingerprintStore(tenant.id, "sheet-1", 0, cache=cache)
+        store.save(GridFingerprint.from_grid([], [["h"] * 5, ["h"] * 5]))
+
+        cache.flush_tenant("t1")
+
+        assert store.load() is not None
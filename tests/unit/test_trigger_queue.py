@@ -0,0 +1,124 @@
+"""
+Unit tests for the pending recalculation trigger queue
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from stock_tracker.core.trigger_queue import PendingTriggerQueue, TriggerEvent, TriggerType
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def make_trigger(trigger_id, product_ids=("A_1",), trigger_type=TriggerType.WAREHOUSE_DATA_CHANGE,
+                 age_seconds=0):
+    return TriggerEvent(
+        trigger_id=trigger_id,
+        trigger_type=trigger_type,
+        product_ids=list(product_ids),
+        triggered_at=NOW - timedelta(seconds=age_seconds),
+        details={},
+    )
+
+
+@pytest.fixture
+def queue():
+    return PendingTriggerQueue(max_size=3)
+
+
+class TestDebounce:
+    """Same type + same products inside the window coalesce"""
+
+    def test_duplicate_in_batch_is_skipped(self, queue):
+        stats = queue.add_batch([make_trigger("t1"), make_trigger("t2")], debounce_seconds=10, now=NOW)
+
+        assert stats == {"added": 1, "duplicates": 1, "dropped": 0}
+        assert [t.trigger_id for t in queue] == ["t1"]
+
+    def test_product_order_does_not_matter(self, queue):
+        queue.append(make_trigger("t1", product_ids=("A_1", "B_2")))
+
+        similar = queue.find_similar(make_trigger("t2", product_ids=("B_2", "A_1")), NOW - timedelta(seconds=10))
+
+        assert similar.trigger_id == "t1"
+
+    def test_different_type_or_products_are_kept(self, queue):
+        stats = queue.add_batch([
+            make_trigger("t1"),
+            make_trigger("t2", trigger_type=TriggerType.ORDER_DATA_CHANGE),
+            make_trigger("t3", product_ids=("B_2",)),
+        ], debounce_seconds=10, now=NOW)
+
+        assert stats["added"] == 3
+        assert stats["duplicates"] == 0
+
+    def test_trigger_outside_window_is_not_a_duplicate(self, queue):
+        queue.append(make_trigger("old", age_seconds=30))
+
+        stats = queue.add_batch([make_trigger("new")], debounce_seconds=10, now=NOW)
+
+        assert stats["added"] == 1
+        assert queue.find_similar(make_trigger("probe"), NOW - timedelta(seconds=10)).trigger_id == "new"
+
+    def test_older_trigger_does_not_replace_latest(self, queue):
+        queue.append(make_trigger("new"))
+        queue.append(make_trigger("old", age_seconds=30))
+
+        assert queue.find_similar(make_trigger("probe"), NOW - timedelta(seconds=10)).trigger_id == "new"
+
+
+class TestOverflow:
+    """The oldest triggers are dropped above max_size"""
+
+    def test_oldest_are_trimmed(self, queue):
+        triggers = [make_trigger(f"t{i}", product_ids=(f"P_{i}",)) for i in range(5)]
+
+        stats = queue.add_batch(triggers, debounce_seconds=10, now=NOW)
+
+        assert stats == {"added": 5, "duplicates": 0, "dropped": 2}
+        assert [t.trigger_id for t in queue] == ["t2", "t3", "t4"]
+        assert queue.oldest().trigger_id == "t2"
+
+    def test_trimmed_trigger_no_longer_debounces(self, queue):
+        for i in range(4):
+            queue.append(make_trigger(f"t{i}", product_ids=(f"P_{i}",)))
+
+        assert queue.find_similar(make_trigger("probe", product_ids=("P_0",)), NOW - timedelta(seconds=10)) is None
+        assert queue.find_similar(make_trigger("probe", product_ids=("P_3",)), NOW - timedelta(seconds=10))
+
+    def test_max_size_change_applies_to_next_append(self, queue):
+        for i in range(3):
+            queue.append(make_trigger(f"t{i}", product_ids=(f"P_{i}",)))
+        queue.max_size = 1
+
+        assert queue.append(make_trigger("t3", product_ids=("P_3",))) == 3
+        assert [t.trigger_id for t in queue] == ["t3"]
+
+
+class TestCounters:
+    """Per-type counts follow appends, trimming and clear"""
+
+    def test_count_by_type(self, queue):
+        queue.add_batch([
+            make_trigger("w1", product_ids=("P_1",)),
+            make_trigger("o1", product_ids=("P_1",), trigger_type=TriggerType.ORDER_DATA_CHANGE),
+            make_trigger("w2", product_ids=("P_2",)),
+            make_trigger("o2", product_ids=("P_2",), trigger_type=TriggerType.ORDER_DATA_CHANGE),
+        ], debounce_seconds=10, now=NOW)
+
+        # w1 was trimmed
+        assert queue.count_by_type(TriggerType.WAREHOUSE_DATA_CHANGE) == 1
+        assert queue.count_by_type(TriggerType.ORDER_DATA_CHANGE) == 2
+        assert queue.count_by_type(TriggerType.MANUAL_TRIGGER) == 0
+
+    def test_clear_returns_triggers_in_order(self, queue):
+        queue.append(make_trigger("t1", product_ids=("P_1",)))
+        queue.append(make_trigger("t2", product_ids=("P_2",)))
+
+        cleared = queue.clear()
+
+        assert [t.trigger_id for t in cleared] == ["t1", "t2"]
+        assert len(queue) == 0
+        assert queue.oldest() is None
+        assert queue.count_by_type(TriggerType.WAREHOUSE_DATA_CHANGE) == 0
+        assert queue.add_batch([make_trigger("t3", product_ids=("P_1",))], debounce_seconds=10, now=NOW)["added"] == 1
@@ -0,0 +1,84 @@
+"""
+Unit tests for the SQLite-backed warehouse cache
+"""
+import json
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from stock_tracker.utils import warehouse_cache
+from stock_tracker.utils.warehouse_cache import WarehouseCache
+
+
+def _write_entries(args):
+    """Write entries from a separate process."""
+    path, source, count = args
+    cache = WarehouseCache(cache_file=path)
+    for i in range(count):
+        cache.set_warehouses([f"{source}-{i}"], source=source, key=source)
+    return count
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    """Application config is not needed by the cache itself"""
+    monkeypatch.setattr(warehouse_cache, "get_config", MagicMock())
+
+
+class TestWarehouseCache:
+    """Entries are upserted row by row in a WAL database"""
+
+    def test_set_and_get(self, tmp_path):
+        cache = WarehouseCache(cache_file=str(tmp_path / "warehouse_cache.db"))
+
+        cache.set_warehouses(["Коледино", "Казань"], source="warehouse_api", total_products=10)
+
+        entry = cache.get_warehouses(prefer_source="warehouse_api")
+        assert entry.warehouse_names == ["Коледино", "Казань"]
+        assert cache.get_entry("default_warehouses").source == "warehouse_api"
+        assert cache.get_cache_stats()["valid_entries"] == 1
+
+        with sqlite3.connect(cache.cache_file) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_expired_entries(self, tmp_path):
+        cache = WarehouseCache(cache_file=str(tmp_path / "warehouse_cache.db"), ttl_hours=1)
+        cache.set_warehouses(["Коледино"])
+
+        with sqlite3.connect(cache.cache_file) as conn:
+            conn.execute("UPDATE warehouse_cache SET timestamp = ?", (time.time() - 7200,))
+
+        assert cache.get_warehouses() is None
+        assert cache.clear_expired() == 1
+        assert cache.get_cache_stats()["total_entries"] == 0
+
+    def test_legacy_json_is_migrated(self, tmp_path):
+        legacy = tmp_path / "warehouse_cache.json"
+        legacy.write_text(json.dumps({
+            "default_warehouses": {
+                "warehouse_names": ["Тула"], "weights": [1.0], "timestamp": time.time(),
+                "source": "analytics_v2", "total_products": 3, "api_success_rate": 0.9,
+            }
+        }), encoding="utf-8")
+
+        cache = WarehouseCache(cache_file=str(legacy))
+
+        assert cache.cache_file == tmp_path / "warehouse_cache.db"
+        assert cache.get_warehouses().warehouse_names == ["Тула"]
+        assert not legacy.exists()
+        assert (tmp_path / "warehouse_cache.json.migrated").exists()
+
+    def test_concurrent_writers(self, tmp_path):
+        path = str(tmp_path / "warehouse_cache.db")
+        WarehouseCache(cache_file=path)
+
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(_write_entries, [(path, f"source{i}", 20) for i in range(4)]))
+
+        cache = WarehouseCache(cache_file=path)
+        assert cache.get_cache_stats()["total_entries"] == 1
+        # Last write of one of the workers, never a torn file
+        assert cache.get_warehouses().warehouse_names[0].endswith("-19")
@@ -0,0 +1,62 @@
+"""
+Unit tests for the compiled warehouse name matcher
+"""
+import pytest
+
+from stock_tracker.utils.warehouse_mapper import (
+    AhoCorasick,
+    WarehouseNameMapper,
+    is_marketplace_warehouse,
+)
+
+
+class TestAhoCorasick:
+    """All (overlapping) patterns are reported in one pass"""
+
+    def test_overlapping_patterns(self):
+        automaton = AhoCorasick({"he": 1, "she": 2, "hers": 3, "his": 4})
+
+        assert sorted(automaton.search("ushers")) == [1, 2, 3]
+        assert list(automaton.search("xyz")) == []
+        assert automaton.contains_any("this")
+
+
+class TestWarehouseNameMapper:
+    """Priorities of the partial match are kept"""
+
+    @pytest.mark.parametrize("name,expected", [
+        ("Самара (Новосемейкино)", "Новосемейкино"),  # direct mapping
+        ("СЦ Подольск 3", "Подольск 3"),  # variant as suffix
+        ("Склад Чехов 1", "Чехов 1"),
+        ("Коледино МП", "Маркетплейс"),
+        ("Fulllog FBS Москва", "Маркетплейс"),  # explicit marketplace indicator
+        ("Тула 2", "Тула"),  # variant prefix beats substring of later warehouses
+        ("Домодедово СЦ", "Домодедово"),
+        ("Коледино", "Коледино"),  # unknown names are kept
+    ])
+    def test_normalize(self, name, expected):
+        assert WarehouseNameMapper().normalize_warehouse_name(name) == expected
+
+    def test_earlier_mapping_wins(self):
+        mapper = WarehouseNameMapper({
+            "Первый": ["Первый", "Общий"],
+            "Второй": ["Второй", "Общий склад"],
+        })
+
+        assert mapper.normalize_warehouse_name("Общий склад 7") == "Первый"
+        assert mapper.normalize_warehouse_name("дальний второй") == "Второй"
+
+    def test_memo_is_bounded(self):
+        mapper = WarehouseNameMapper(cache_size=2)
+
+        for name in ["Склад 1", "Склад 2", "Склад 3", "Склад 3"]:
+            mapper.normalize_warehouse_name(name)
+
+        info = mapper.cache_info()
+        assert info.currsize == 2
+        assert info.hits == 1
+
+    def test_marketplace_indicators(self):
+        assert is_marketplace_warehouse("МП-1")
+        assert is_marketplace_warehouse("Склад продавца")
+        assert not is_marketplace_warehouse("Подольск 3")
@@ -0,0 +1,237 @@
+"""
+Unit tests for the webhook outbox and async sender
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import httpx
+from sqlalchemy.dialects import postgresql
+
+from stock_tracker.database.models import WebhookConfig, WebhookDelivery
+from stock_tracker.services import webhook_dispatcher
+from stock_tracker.services.webhook_dispatcher import (
+    DeliveryBatch,
+    DeliveryResult,
+    WebhookSender,
+    build_batches,
+    claim_due_deliveries,
+    enqueue_webhook,
+    record_results,
+    sign_payload,
+)
+
+
+def make_config(url="https://hooks.example.com/a", events=("low_stock_alert", "sync_completed")):
+    return WebhookConfig(
+        id=uuid.uuid4(), tenant_id=uuid.uuid4(), url=url, secret="s3cret",
+        events=list(events), is_active=True, failure_count=0
+    )
+
+
+def make_delivery(config, event_type, data):
+    delivery = WebhookDelivery(
+        id=uuid.uuid4(), tenant_id=config.tenant_id, webhook_config_id=config.id,
+        event_type=event_type, data=data, status="pending", attempts=0
+    )
+    delivery.config = config
+    return delivery
+
+
+class TestEnqueue:
+    """Sync code only writes outbox rows"""
+
+    def test_rows_for_subscribed_endpoints(self):
+        subscribed = make_config()
+        other = make_config(events=["sync_failed"])
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.return_value = [subscribed, other]
+
+        queued = enqueue_webhook(SimpleNamespace(id=subscribed.tenant_id), "low_stock_alert", {"sku": 1}, db)
+
+        assert queued == 1
+        row = db.add.call_args.args[0]
+        assert row.webhook_config_id == subscribed.id
+        assert row.next_attempt_at > datetime.utcnow()  # coalescing window
+        db.commit.assert_called_once()
+
+
+class TestBatching:
+    """low_stock_alert bursts become one request per endpoint"""
+
+    def test_coalesces_low_stock_alerts_per_endpoint(self):
+        a, b = make_config(), make_config(url="https://hooks.example.com/b")
+        deliveries = [
+            make_delivery(a, "low_stock_alert", {"sku": 1}),
+            make_delivery(a, "sync_completed", {"products_count": 5}),
+            make_delivery(a, "low_stock_alert", {"sku": 2}),
+            make_delivery(b, "low_stock_alert", {"sku": 3}),
+        ]
+
+        batches = build_batches(deliveries)
+
+        assert [(batch.url, len(batch.deliveries)) for batch in batches] == [
+            (a.url, 2), (a.url, 1), (b.url, 1),
+        ]
+        payload = batches[0].payload()
+        assert payload["batched"] is True
+        assert payload["data"] == {"count": 2, "alerts": [{"sku": 1}, {"sku": 2}]}
+        assert batches[2].payload()["data"] == {"sku": 3}
+
+    def test_claim_skips_locked_rows(self):
+        statements = []
+        db = MagicMock()
+        db.scalars.side_effect = lambda stmt: statements.append(
+            str(stmt.compile(dialect=postgresql.dialect()))
+        ) or []
+
+        assert claim_due_deliveries(db, limit=10) == []
+        assert "FOR UPDATE SKIP LOCKED" in statements[0]
+
+
+class TestSender:
+    """Pooled async sender with per-endpoint limits"""
+
+    def batch(self, url="https://hooks.example.com/a"):
+        config = make_config(url=url)
+        return DeliveryBatch(
+            webhook_id=config.id, url=url, secret=config.secret, event_type="sync_completed",
+            deliveries=[make_delivery(config, "sync_completed", {"products_count": 5})]
+        )
+
+    def send_all(self, handler, batches, concurrency=4):
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with WebhookSender(client=client, per_endpoint_concurrency=concurrency) as sender:
+                return await sender.send_all(batches)
+
+        return asyncio.run(run())
+
+    def test_signed_request(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(204)
+
+        [result] = self.send_all(handler, [self.batch()])
+
+        assert result.ok
+        body = requests[0].content
+        assert json.loads(body)["data"] == {"products_count": 5}
+        assert requests[0].headers["X-StockTracker-Signature"] == sign_payload("s3cret", body)
+
+    def test_status_classification(self):
+        statuses = {"/a": 503, "/b": 404, "/c": 429}
+
+        def handler(request):
+            return httpx.Response(statuses[request.url.path])
+
+        results = self.send_all(handler, [
+            self.batch(f"https://hooks.example.com{path}") for path in statuses
+        ])
+
+        assert [(r.ok, r.retryable) for r in results] == [(False, True), (False, False), (False, True)]
+
+    def test_per_endpoint_concurrency(self):
+        in_flight = {"now": 0, "max": 0}
+
+        async def handler(request):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return httpx.Response(200)
+
+        results = self.send_all(handler, [self.batch() for _ in range(6)], concurrency=2)
+
+        assert all(result.ok for result in results)
+        assert in_flight["max"] == 2
+
+    def test_run_deadline_releases_unfinished_requests(self):
+        async def handler(request):
+            if request.url.path == "/slow":
+                await asyncio.sleep(5)
+            return httpx.Response(200)
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with WebhookSender(client=client) as sender:
+                return await sender.send_all(
+                    [self.batch("https://hooks.example.com/fast"), self.batch("https://hooks.example.com/slow")],
+                    timeout=0.1,
+                )
+
+        fast, slow = asyncio.run(run())
+
+        assert fast.ok
+        assert slow is None
+
+    def test_unsigned_request_without_secret(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200)
+
+        batch = self.batch()
+        batch.secret = None
+        [result] = self.send_all(handler, [batch])
+
+        assert result.ok
+        assert "X-StockTracker-Signature" not in requests[0].headers
+
+    def test_lease_outlives_run(self):
+        assert webhook_dispatcher.CLAIM_LEASE_SECONDS > webhook_dispatcher.DELIVERY_RUN_TIMEOUT
+
+
+class TestRecordResults:
+    """Failures are rescheduled with backoff until attempts run out"""
+
+    def test_retry_then_fail(self, monkeypatch):
+        monkeypatch.setattr(webhook_dispatcher, "MAX_ATTEMPTS", 2)
+        config = make_config()
+        delivery = make_delivery(config, "sync_completed", {})
+        batch = DeliveryBatch(config.id, config.url, config.secret, "sync_completed", [delivery])
+        db = MagicMock()
+
+        stats = record_results(db, [batch], [DeliveryResult(ok=False, status_code=500, error="boom")])
+
+        assert stats == {"delivered": 0, "retried": 1, "failed": 0, "deferred": 0}
+        assert delivery.status == "pending"
+        assert delivery.next_attempt_at > datetime.utcnow() + timedelta(seconds=10)
+
+        stats = record_results(db, [batch], [DeliveryResult(ok=False, status_code=500, error="boom")])
+
+        assert stats["failed"] == 1
+        assert delivery.status == "failed"
+        assert config.failure_count == 2
+
+    def test_success_resets_circuit_breaker(self):
+        config = make_config()
+        config.failure_count = 3
+        delivery = make_delivery(config, "sync_completed", {})
+        batch = DeliveryBatch(config.id, config.url, config.secret, "sync_completed", [delivery])
+
+        record_results(MagicMock(), [batch], [DeliveryResult(ok=True, status_code=200)])
+
+        assert delivery.status == "delivered"
+        assert delivery.attempts == 1
+        assert config.failure_count == 0
+
+    def test_deferred_delivery_is_not_an_attempt(self):
+        config = make_config()
+        delivery = make_delivery(config, "sync_completed", {})
+        delivery.next_attempt_at = datetime.utcnow() + timedelta(hours=1)
+        batch = DeliveryBatch(config.id, config.url, config.secret, "sync_completed", [delivery])
+
+        stats = record_results(MagicMock(), [batch], [None])
+
+        assert stats["deferred"] == 1
+        assert delivery.attempts == 0
+        assert delivery.status == "pending"
+        assert delivery.next_attempt_at <= datetime.utcnow()
+        assert config.failure_count == 0